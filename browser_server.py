@@ -77,12 +77,19 @@ curl -X POST http://localhost:9222/browser -H "Content-Type: application/json" -
 - snapshot 使用 Playwright 的 accessibility snapshot API
 - 每个可交互元素分配唯一的 ref ID (e1, e2, e3...)
 - act 操作通过 ref ID 定位元素并执行相应操作
+- ★ 导航快照缓存：navigate + 首次 snapshot 的结果按规范化 URL 短期缓存。
+  再次导航到同一页面时立即返回缓存的元素列表，真实页面在后台加载，
+  页面稳定后刷新缓存条目；act / wait 会先等待后台导航完成。
+  缓存按条目数与字节数双重限制，统计信息见 GET /health 的 nav_cache 字段。
 """
 
 import asyncio
 import json
 import sys
-from typing import Any, Dict, List, Optional
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from aiohttp import web
 from loguru import logger
 
@@ -107,6 +114,126 @@ def safe_json_response(data, status=200):
     )
 
 
+# 导航快照缓存配置
+NAV_CACHE_TTL_SECONDS = 300
+NAV_CACHE_MAX_ENTRIES = 64
+NAV_CACHE_MAX_BYTES = 4 * 1024 * 1024
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    规范化 URL 作为缓存键
+
+    scheme / host 小写，去掉默认端口、fragment 与末尾斜杠，query 参数排序。
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+class NavSnapshotCache:
+    """
+    导航快照缓存 - 规范化 URL → 首次快照的元素列表与 ref 映射
+
+    LRU 淘汰，同时限制条目数与总字节数；条目超过 TTL 视为未命中。
+    """
+
+    def __init__(
+        self,
+        ttl: float = NAV_CACHE_TTL_SECONDS,
+        max_entries: int = NAV_CACHE_MAX_ENTRIES,
+        max_bytes: int = NAV_CACHE_MAX_BYTES,
+    ) -> None:
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, bool], Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "refreshes": 0, "evictions": 0}
+
+    def get(self, url: str, interactive: bool = False) -> Optional[Dict[str, Any]]:
+        """获取未过期的缓存条目"""
+        key = (normalize_url(url), interactive)
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry["stored_at"] > self._ttl:
+            if entry is not None:
+                self._remove(key)
+            self._stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return entry
+
+    def has(self, url: str) -> bool:
+        """是否存在该 URL 的任意缓存条目（不计入命中统计）"""
+        normalized = normalize_url(url)
+        return any(key[0] == normalized for key in self._entries)
+
+    def put(
+        self,
+        url: str,
+        title: str,
+        elements: List[Dict[str, Any]],
+        ref_map: Dict[str, Dict[str, Any]],
+        interactive: bool = False,
+        refresh: bool = False,
+    ) -> None:
+        """写入缓存条目，超出条目数或字节数上限时淘汰最久未使用的条目"""
+        key = (normalize_url(url), interactive)
+        size = len(json.dumps([elements, ref_map], ensure_ascii=False).encode("utf-8"))
+        if size > self._max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = {
+            "title": title,
+            "elements": elements,
+            "ref_map": ref_map,
+            "size": size,
+            "stored_at": time.monotonic(),
+        }
+        self._bytes += size
+        self._stats["refreshes" if refresh else "stores"] += 1
+        while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+
+    def invalidate(self, url: str) -> None:
+        """删除该 URL 的所有缓存条目"""
+        normalized = normalize_url(url)
+        for key in [k for k in self._entries if k[0] == normalized]:
+            self._remove(key)
+
+    def keys_for(self, url: str) -> List[bool]:
+        """该 URL 已缓存的 interactive 变体"""
+        normalized = normalize_url(url)
+        return [key[1] for key in self._entries if key[0] == normalized]
+
+    def _remove(self, key: Tuple[str, bool]) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry["size"]
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self._max_entries,
+            "max_bytes": self._max_bytes,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
 class BrowserControlServer:
     """浏览器控制服务器 - 管理 Playwright 浏览器实例和操作"""
 
@@ -118,6 +245,13 @@ class BrowserControlServer:
         self._lock = asyncio.Lock()
         # ref ID 映射表: ref -> locator 信息
         self._ref_map: Dict[str, Dict[str, Any]] = {}
+        # 导航快照缓存
+        self.nav_cache = NavSnapshotCache()
+        # 最近一次导航的 URL：首次快照写入缓存 / 命中时直接返回缓存
+        self._nav_url: Optional[str] = None
+        self._nav_from_cache = False
+        # 命中缓存时在后台执行的真实导航
+        self._pending_nav: Optional[asyncio.Task] = None
 
     async def _ensure_page(self) -> bool:
         """确保 page 对象可用，崩溃时自动恢复"""
@@ -235,10 +369,29 @@ class BrowserControlServer:
                 return {"success": False, "error": str(e)}
 
     async def navigate(self, url: str) -> Dict[str, Any]:
-        """导航到指定 URL"""
+        """
+        导航到指定 URL
+
+        命中导航快照缓存时立即返回，真实导航在后台进行，完成后刷新缓存。
+        """
         if not self._page:
             return {"success": False, "error": "Browser not started"}
 
+        await self._cancel_pending_navigation()
+        self._nav_url = url
+        self._nav_from_cache = False
+
+        cached = self.nav_cache.get(url)
+        if cached is not None:
+            logger.info(f"⚡ [Browser] 命中导航缓存，后台加载: {url}")
+            self._nav_from_cache = True
+            self._pending_nav = asyncio.create_task(self._navigate_and_refresh(url))
+            return {"success": True, "url": url, "title": cached["title"], "cached": True}
+
+        return await self._goto(url)
+
+    async def _goto(self, url: str) -> Dict[str, Any]:
+        """执行真实导航（带崩溃重试）"""
         if not await self._ensure_page():
             return {"success": False, "error": "Page is not available and recovery failed"}
 
@@ -261,6 +414,55 @@ class BrowserControlServer:
                 return {"success": False, "error": error_msg}
         return {"success": False, "error": "Navigation failed after all retries"}
 
+    async def _navigate_and_refresh(self, url: str) -> Dict[str, Any]:
+        """后台导航：页面稳定后重新采集元素并刷新缓存条目"""
+        result = await self._goto(url)
+        if not result["success"]:
+            self.nav_cache.invalidate(url)
+            return result
+        for interactive in self.nav_cache.keys_for(url) or [False]:
+            try:
+                elements, ref_map = await self._collect_elements(interactive=interactive)
+            except Exception as e:
+                logger.warning(f"⚠️ [Browser] 刷新导航缓存失败: {e}")
+                self.nav_cache.invalidate(url)
+                break
+            self.nav_cache.put(url, result.get("title", ""), elements, ref_map,
+                               interactive=interactive, refresh=True)
+        logger.info(f"🔄 [Browser] 导航缓存已刷新: {url}")
+        return result
+
+    async def _await_pending_navigation(self) -> Optional[Dict[str, Any]]:
+        """
+        等待后台导航完成
+
+        Returns:
+            导航失败时返回错误结果，否则返回 None
+        """
+        pending, self._pending_nav = self._pending_nav, None
+        self._nav_from_cache = False
+        if pending is None:
+            return None
+        try:
+            result = await pending
+        except asyncio.CancelledError:
+            return None
+        except Exception as e:
+            return {"success": False, "error": f"Background navigation failed: {e}"}
+        if not result["success"]:
+            return result
+        return None
+
+    async def _cancel_pending_navigation(self) -> None:
+        """取消尚未完成的后台导航"""
+        pending, self._pending_nav = self._pending_nav, None
+        if pending is not None and not pending.done():
+            pending.cancel()
+            try:
+                await pending
+            except (asyncio.CancelledError, Exception):
+                pass
+
     async def snapshot(
         self,
         # ★ 新增参数
@@ -277,130 +479,32 @@ class BrowserControlServer:
         if not self._page:
             return {"success": False, "error": "Browser not started"}
 
+        # 导航命中缓存后的首次快照：直接返回缓存的元素列表
+        nav_url, self._nav_url = self._nav_url, None
+        if nav_url and self._nav_from_cache and not frame:
+            cached = self.nav_cache.get(nav_url, interactive=interactive)
+            if cached is not None:
+                self._ref_map = {ref: dict(info) for ref, info in cached["ref_map"].items()}
+                elements = [dict(e) for e in cached["elements"]]
+                logger.info(f"⚡ [Browser] 返回缓存快照，共 {len(elements)} 个元素")
+                return {"success": True, "elements": elements, "count": len(elements), "cached": True}
+
+        failed = await self._await_pending_navigation()
+        if failed:
+            return failed
+
         if not await self._ensure_page():
             return {"success": False,
                     "error": "Page crashed, recovered but needs re-navigation. Please navigate first."}
 
         try:
             logger.info("📸 [Browser] 获取页面快照...")
+            elements, self._ref_map = await self._collect_elements(interactive=interactive, frame=frame)
 
-            # ★ 改动: 支持在 iframe 中取快照
-            target = await self._get_target_frame(frame)
-            # frame_locator 没有 evaluate，所以如果是 frame_locator 则回退到 page
-            eval_target = target if hasattr(target, 'evaluate') else self._page
-
-            # ★ 改动: interactive 模式的选择器更精简
-            if interactive:
-                selectors_js = """
-                'button', 'a[href]', 'input:not([type="hidden"])', 'textarea', 'select',
-                '[role="button"]', '[role="link"]', '[role="textbox"]',
-                '[role="combobox"]', '[role="tab"]', '[role="menuitem"]',
-                '[contenteditable="true"]'
-                """
-            else:
-                selectors_js = """
-                'button', 'a', 'input', 'textarea', 'select',
-                '[role="button"]', '[role="link"]', '[role="textbox"]',
-                '[onclick]', '[role="tab"]', '[role="menuitem"]',
-                '[contenteditable="true"]', '[role="combobox"]',
-                '[role="checkbox"]', '[role="radio"]', '[role="slider"]',
-                '[role="switch"]', '[role="option"]'
-                """
-
-            js_code = f"""
-            () => {{
-                const elements = [];
-                const selectors = [{selectors_js}];
-
-                const allElements = document.querySelectorAll(selectors.join(','));
-
-                allElements.forEach((el, index) => {{
-                    const style = window.getComputedStyle(el);
-                    if (style.display === 'none' || style.visibility === 'hidden') {{
-                        return;
-                    }}
-
-                    // ★ 新增: interactive 模式下过滤掉禁用元素
-                    if ({'true' if interactive else 'false'} && el.disabled) {{
-                        return;
-                    }}
-
-                    const tagName = el.tagName.toLowerCase();
-                    let role = el.getAttribute('role') || tagName;
-
-                    if (tagName === 'a') role = 'link';
-                    if (tagName === 'button') role = 'button';
-                    if (tagName === 'input') role = el.type === 'text' ? 'textbox' : el.type;
-                    if (tagName === 'textarea') role = 'textbox';
-                    if (tagName === 'select') role = 'combobox';
-
-                    const innerText = el.innerText ? el.innerText.trim().substring(0, 100) : '';
-                    const name = el.getAttribute('aria-label') ||
-                                el.getAttribute('title') ||
-                                el.getAttribute('placeholder') ||
-                                innerText ||
-                                el.value ||
-                                '';
-
-                    const value = el.value || '';
-
-                    const rect = el.getBoundingClientRect();
-
-                    // ★ 新增: 收集 CSS 选择器信息，便于 selector 定位
-                    let cssSelector = '';
-                    if (el.id) {{
-                        cssSelector = '#' + el.id;
-                    }} else if (el.className && typeof el.className === 'string') {{
-                        const cls = el.className.trim().split(/\\s+/).slice(0, 2).join('.');
-                        if (cls) cssSelector = tagName + '.' + cls;
-                    }}
-
-                    elements.push({{
-                        role: role,
-                        name: name,
-                        value: value,
-                        tagName: tagName,
-                        id: el.id || '',
-                        className: typeof el.className === 'string' ? el.className : '',
-                        cssSelector: cssSelector,
-                        x: Math.round(rect.x + rect.width / 2),
-                        y: Math.round(rect.y + rect.height / 2),
-                    }});
-                }});
-
-                return elements;
-            }}
-            """
-
-            raw_elements = await eval_target.evaluate(js_code)
-
-            elements = []
-            self._ref_map = {}
-
-            for index, elem in enumerate(raw_elements):
-                ref_id = f"e{index + 1}"
-
-                element = {
-                    "ref": ref_id,
-                    "role": elem["role"],
-                    "name": elem["name"],
-                }
-
-                if elem.get("value"):
-                    element["value"] = elem["value"]
-
-                elements.append(element)
-
-                self._ref_map[ref_id] = {
-                    "role": elem["role"],
-                    "name": elem["name"],
-                    "tagName": elem["tagName"],
-                    "id": elem.get("id", ""),
-                    "className": elem.get("className", ""),
-                    "cssSelector": elem.get("cssSelector", ""),
-                    "x": elem.get("x", 0),
-                    "y": elem.get("y", 0),
-                }
+            # 导航后的首次快照写入缓存
+            if nav_url and not frame:
+                self.nav_cache.put(nav_url, await self._page.title(), elements, self._ref_map,
+                                   interactive=interactive)
 
             logger.info(f"✅ [Browser] 快照完成，共 {len(elements)} 个元素"
                         f"{' (仅可交互)' if interactive else ''}")
@@ -416,6 +520,137 @@ class BrowserControlServer:
                 await self._ensure_page()
             return {"success": False, "error": error_msg}
 
+    async def _collect_elements(
+        self,
+        interactive: bool = False,
+        frame: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        """
+        采集页面可交互元素
+
+        Returns:
+            (返回给调用方的元素列表, ref → locator 信息映射)
+        """
+        # ★ 改动: 支持在 iframe 中取快照
+        target = await self._get_target_frame(frame)
+        # frame_locator 没有 evaluate，所以如果是 frame_locator 则回退到 page
+        eval_target = target if hasattr(target, 'evaluate') else self._page
+
+        # ★ 改动: interactive 模式的选择器更精简
+        if interactive:
+            selectors_js = """
+            'button', 'a[href]', 'input:not([type="hidden"])', 'textarea', 'select',
+            '[role="button"]', '[role="link"]', '[role="textbox"]',
+            '[role="combobox"]', '[role="tab"]', '[role="menuitem"]',
+            '[contenteditable="true"]'
+            """
+        else:
+            selectors_js = """
+            'button', 'a', 'input', 'textarea', 'select',
+            '[role="button"]', '[role="link"]', '[role="textbox"]',
+            '[onclick]', '[role="tab"]', '[role="menuitem"]',
+            '[contenteditable="true"]', '[role="combobox"]',
+            '[role="checkbox"]', '[role="radio"]', '[role="slider"]',
+            '[role="switch"]', '[role="option"]'
+            """
+
+        js_code = f"""
+        () => {{
+            const elements = [];
+            const selectors = [{selectors_js}];
+
+            const allElements = document.querySelectorAll(selectors.join(','));
+
+            allElements.forEach((el, index) => {{
+                const style = window.getComputedStyle(el);
+                if (style.display === 'none' || style.visibility === 'hidden') {{
+                    return;
+                }}
+
+                // ★ 新增: interactive 模式下过滤掉禁用元素
+                if ({'true' if interactive else 'false'} && el.disabled) {{
+                    return;
+                }}
+
+                const tagName = el.tagName.toLowerCase();
+                let role = el.getAttribute('role') || tagName;
+
+                if (tagName === 'a') role = 'link';
+                if (tagName === 'button') role = 'button';
+                if (tagName === 'input') role = el.type === 'text' ? 'textbox' : el.type;
+                if (tagName === 'textarea') role = 'textbox';
+                if (tagName === 'select') role = 'combobox';
+
+                const innerText = el.innerText ? el.innerText.trim().substring(0, 100) : '';
+                const name = el.getAttribute('aria-label') ||
+                            el.getAttribute('title') ||
+                            el.getAttribute('placeholder') ||
+                            innerText ||
+                            el.value ||
+                            '';
+
+                const value = el.value || '';
+
+                const rect = el.getBoundingClientRect();
+
+                // ★ 新增: 收集 CSS 选择器信息，便于 selector 定位
+                let cssSelector = '';
+                if (el.id) {{
+                    cssSelector = '#' + el.id;
+                }} else if (el.className && typeof el.className === 'string') {{
+                    const cls = el.className.trim().split(/\\s+/).slice(0, 2).join('.');
+                    if (cls) cssSelector = tagName + '.' + cls;
+                }}
+
+                elements.push({{
+                    role: role,
+                    name: name,
+                    value: value,
+                    tagName: tagName,
+                    id: el.id || '',
+                    className: typeof el.className === 'string' ? el.className : '',
+                    cssSelector: cssSelector,
+                    x: Math.round(rect.x + rect.width / 2),
+                    y: Math.round(rect.y + rect.height / 2),
+                }});
+            }});
+
+            return elements;
+        }}
+        """
+
+        raw_elements = await eval_target.evaluate(js_code)
+
+        elements = []
+        ref_map: Dict[str, Dict[str, Any]] = {}
+
+        for index, elem in enumerate(raw_elements):
+            ref_id = f"e{index + 1}"
+
+            element = {
+                "ref": ref_id,
+                "role": elem["role"],
+                "name": elem["name"],
+            }
+
+            if elem.get("value"):
+                element["value"] = elem["value"]
+
+            elements.append(element)
+
+            ref_map[ref_id] = {
+                "role": elem["role"],
+                "name": elem["name"],
+                "tagName": elem["tagName"],
+                "id": elem.get("id", ""),
+                "className": elem.get("className", ""),
+                "cssSelector": elem.get("cssSelector", ""),
+                "x": elem.get("x", 0),
+                "y": elem.get("y", 0),
+            }
+
+        return elements, ref_map
+
     # ================================================================
     # ★ 新增: wait 方法 — 等待页面状态变化
     # ================================================================
@@ -447,6 +682,10 @@ class BrowserControlServer:
         if not self._page:
             return {"success": False, "error": "Browser not started"}
 
+        failed = await self._await_pending_navigation()
+        if failed:
+            return failed
+
         if not await self._ensure_page():
             return {"success": False, "error": "Page is not available"}
 
@@ -554,6 +793,12 @@ class BrowserControlServer:
         if not kind:
             return {"success": False, "error": "Missing 'kind' parameter"}
 
+        # 操作前等待后台导航完成，操作后的页面不再写入导航缓存
+        self._nav_url = None
+        failed = await self._await_pending_navigation()
+        if failed:
+            return failed
+
         # 操作前检查页面是否存活
         if not await self._ensure_page():
             return {"success": False, "error": "Page crashed and recovery failed"}
@@ -825,6 +1070,8 @@ class BrowserControlServer:
 
     async def close_browser(self) -> Dict[str, Any]:
         """关闭浏览器"""
+        await self._cancel_pending_navigation()
+        self._nav_url = None
         async with self._lock:
             try:
                 if self._page:
@@ -890,6 +1137,7 @@ async def health_handler(request: web.Request) -> web.Response:
     return safe_json_response({
         "status": "ok",
         "browser_connected": browser_controller.is_connected(),
+        "nav_cache": browser_controller.nav_cache.stats(),
     })
 
 
@@ -19,7 +19,33 @@ class Settings(BaseSettings):
     file_log_level: str = "DEBUG"
     # Telegram Configuration
     telegram_bot_token: Optional[str] = None
-    telegram_webhook_url: Optional[str] = None
+    telegram_webhook_url: Optional[str] = None  # webhook 模式的公网基础 URL，如 https://bot.example.com
+    bot_mode: str = "polling"  # 多 Bot 运行模式：polling 或 webhook
+    webhook_listen_host: str = "0.0.0.0"  # webhook 服务器监听地址
+    webhook_listen_port: int = 8443  # webhook 服务器监听端口
+    webhook_path_prefix: str = "/telegram"  # webhook 路径前缀，每个 Bot 使用 <前缀>/<Token 哈希>
+    webhook_secret_token: Optional[str] = None  # 未配置时按 Bot Token 派生
+    webhook_max_connections: int = 40  # Telegram 向每个 Bot webhook 的最大并发连接数
+    bot_api_pool_size: int = 64  # webhook 模式下所有 Bot 共用的 Bot API 连接池大小
+    bot_startup_concurrency: int = 8  # 同时初始化的 Bot 数量
+
+    # 更新分发与 LLM 管线并发控制
+    dispatch_max_concurrent_updates: int = 256  # 每个 Bot 同时处理的更新数（同一聊天内始终串行）
+    dispatch_max_pipelines: int = 32  # 全局同时运行的 LLM 对话管线数
+    dispatch_max_pipelines_per_bot: int = 8  # 每个 Bot 同时运行的 LLM 对话管线数
+    dispatch_max_waiting: int = 64  # 排队等待管线的最大请求数，超出时直接回复忙碌提示
+    dispatch_queue_timeout: float = 30.0  # 排队等待管线的最长时间（秒）
+
+    # Agent 执行
+    agent_respond_timeout: float = 360.0  # 单个 Agent 的响应超时（秒），多个 Agent 并发执行
+    agent_sync_workers: int = 8  # 执行只实现同步 respond() 的 Agent 的线程数
+    agent_lazy_loading: bool = True  # 按 src/agents/plugins/manifest.yaml 懒加载插件，首次调度时才导入模块
+
+    # 提醒调度
+    reminder_load_window: int = 600  # 每次加载未来多少秒内到期的提醒到内存堆
+    reminder_load_limit: int = 1000  # 每次最多加载的提醒数（积压较多时分批加载）
+    reminder_send_rate_per_bot: float = 25.0  # 每个 Bot 每秒最多发送的提醒数（Telegram 限制约 30 条/秒）
+    reminder_max_concurrent_sends: int = 50  # 同时进行的提醒发送请求数
 
     # Proxy Configuration (代理配置)
     http_proxy: Optional[str] = "http://127.0.0.1:7890"
@@ -35,15 +61,31 @@ class Settings(BaseSettings):
     vllm_api_url: Optional[str] = None
     vllm_api_token: Optional[str] = None
     vllm_model: str = "default"
+    # 统一分析 System Prompt 布局：legacy（人设后紧跟记忆 / 历史）或
+    # static_first（静态人设与任务指令在前，记忆与本轮内容在后，便于 vLLM 前缀缓存复用）
+    prompt_layout: str = "legacy"
 
     executor_llm_url: Optional[str] = None
     executor_llm_model: Optional[str] = None
     executor_llm_token: Optional[str] = None
     max_iterations: Optional[int] = 5
 
+    planner_llm_url: Optional[str] = None  # 任务规划 LLM，未配置时复用 executor/vLLM 配置
+    planner_llm_model: Optional[str] = None
+    planner_llm_token: Optional[str] = None
+    planner_shell_enabled: bool = False  # 允许规划器生成 shell 步骤（命令由 LLM 根据用户消息生成，仅执行白名单内的固定命令）
+
     polisher_llm_url: Optional[str] = None
     polisher_llm_model: Optional[str] = None
     polisher_llm_token: Optional[str] = None
+    polisher_cache_size: int = 256  # 润色结果 LRU 缓存条数，0 表示禁用
+    polisher_fast_path_max_chars: int = 40  # 不超过该长度的纯文本报告跳过 LLM 润色
+
+    # TaskEngine 后台任务队列
+    task_queue_db_path: str = "data/task_queue.db"
+    task_queue_workers: int = 2  # 同时执行的任务数
+    task_queue_per_user_limit: int = 1  # 每个用户同时执行的任务数
+    task_queue_task_timeout: int = 600  # 单个任务超时时间（秒）
 
     # Browser Control Server (浏览器控制服务)
     browser_server_url: Optional[str] = None
@@ -51,11 +93,23 @@ class Settings(BaseSettings):
     vlm_api_url: Optional[str] = None
     vlm_model: Optional[str] = None
     vlm_api_token: Optional[str] = None
+    vlm_max_image_edge: int = 1280  # 发送给 VLM 前截图最长边（像素）
+    vlm_jpeg_quality: int = 85  # 降采样截图 JPEG 质量
 
     # Database Configuration
     database_url: str = "sqlite:///./soulmatebot.db"
+    memory_embedding_format: str = "float32"  # 记忆向量的二进制存储格式：float32 / float16 / int8
     redis_url: Optional[str] = None
 
+    # Feedback Ingestion (反馈异步写入队列)
+    feedback_queue_max_size: int = 10000  # 队列容量，满时丢弃新事件
+    feedback_batch_size: int = 200  # 单批最多写入的事件数
+    feedback_flush_interval: float = 1.0  # 等待新事件的最长时间（秒）
+
+    # Memory Access Tracking (记忆访问计数缓冲)
+    memory_access_flush_interval: float = 5.0  # 访问计数定时写入间隔（秒）
+    memory_access_max_pending: int = 500  # 缓冲的记忆数达到该值时立即写入
+
     # Application Configuration
     app_env: Environment = Environment.DEVELOPMENT
     debug: bool = True
@@ -102,12 +156,32 @@ class Settings(BaseSettings):
     embedding_provider: str = "dashscope"  # 嵌入服务提供商：dashscope 或 openai
     embedding_model: str = "text-embedding-v3"  # 嵌入模型名称
     memory_similarity_threshold: float = 0.5  # 记忆检索的最低相似度阈值
+    memory_retrieval_candidate_limit: int = 200  # 向量检索在 SQL 中按重要性与时间截取的候选记忆数
+    memory_retrieval_min_importance: str = "low"  # 检索的最低重要性级别：low / medium / high / critical
+    memory_retrieval_max_age_days: int = 0  # 只检索最近多少天的记忆（high / critical 不受限制），0 表示不限制
+    memory_lexical_index_max_users: int = 1000  # 进程内记忆倒排索引最多缓存的用户数（LRU）
+    memory_lexical_min_score: float = 0.2  # 倒排索引命中的最低 BM25 分数（按查询 IDF 之和归一化，即命中查询信息量的比例）
+    memory_rank_vector_weight: float = 0.6  # 融合排序：余弦相似度权重
+    memory_rank_lexical_weight: float = 0.25  # 融合排序：BM25 权重
+    memory_rank_importance_weight: float = 0.1  # 融合排序：重要性权重
+    memory_rank_recency_weight: float = 0.05  # 融合排序：新近度权重
+    memory_recency_half_life_days: float = 30.0  # 新近度半衰期（天）
+    embedding_backfill_checkpoint_path: str = "data/embedding_backfill.json"  # 向量补全任务的检查点文件
+    embedding_backfill_page_size: int = 500  # 向量补全任务每页读取的记忆数
+    embedding_backfill_concurrency: int = 4  # 向量补全任务同时进行的 embed_batch 请求数
 
     # Search Agent / SERP API Configuration (搜索代理配置)
     serp_api_keys: str = ""  # 多个 SERP API keys，逗号分隔
     serp_cache_ttl: int = 3600  # 搜索缓存过期时间（秒），默认1小时
+    serp_cache_stale_ttl: int = 3600  # 过期后仍可返回陈旧结果并后台刷新的时间（秒）
+    serp_memory_cache_size: int = 512  # 进程内搜索缓存条数
     serp_top_k: int = 5  # 返回搜索结果数量
     serp_api_provider: str = "serpapi"  # 搜索API提供商：serpapi, google, bing
+    serp_fetch_timeout: int = 10  # 单个网页抓取超时（秒）
+    serp_fetch_deadline: float = 15.0  # 并发抓取结果网页的整体截止时间（秒）
+    serp_fetch_max_bytes: int = 1_000_000  # 单个网页最多读取的字节数
+    serp_fetch_per_host_limit: int = 2  # 同一主机的并发连接数
+    serp_fetch_max_connections: int = 20  # 连接池总连接数
 
     class Config:
         env_file = ".env"
@@ -1,5 +1,6 @@
 import asyncio
 import signal
+import sys
 import yaml
 from pathlib import Path
 from typing import Dict, List, Optional
@@ -18,9 +19,17 @@ from src.models.database import Bot as BotModel
 from src.bot.config_loader import BotConfigLoader, BotConfig
 from src.conversation import get_session_manager
 from src.services.reminder_scheduler import get_reminder_scheduler, start_reminder_scheduler, stop_reminder_scheduler
+from src.services.task_queue import get_task_queue, start_task_queue, stop_task_queue
+from src.services.feedback_ingestion import start_feedback_ingestion, stop_feedback_ingestion
+from src.services.memory_access_tracker import start_memory_access_tracker, stop_memory_access_tracker
+from src.agents.base_agent import shutdown_agent_executor
+from src.services.webhook_ingress import SharedHTTPXRequest, WebhookServer, token_secret
+from src.services.update_dispatcher import create_update_processor, get_dispatch_stats, limit_pipeline
+from config import settings
 from src.handlers import (
     start_command, help_command, status_command, subscribe_command,
     image_command, pay_basic_command, pay_premium_command, check_payment_command,
+    tasks_command, cancel_task_command,
     handle_photo, handle_sticker, error_handler,
     list_bots_command, add_bot_command, remove_bot_command, my_bots_command, config_bot_command,
     feedback_stats_command, my_feedback_command
@@ -54,8 +63,9 @@ class MultiBotLauncher:
     """
     多 Bot 启动器
 
-    负责从数据库加载所有活跃的 Bot 配置和 Token，
-    然后并行启动它们各自的轮询循环。
+    负责从数据库加载所有活跃的 Bot 配置和 Token，然后并行启动它们：
+    - polling 模式：每个 Bot 各自轮询 getUpdates
+    - webhook 模式：单个 HTTP 服务器接收所有 Bot 的更新，出站请求共用连接池
     """
     """
     多 Bot 启动器
@@ -68,14 +78,18 @@ class MultiBotLauncher:
         "tuantuan_2025_bot": "tuantuan_bot",
     }
 
-    def __init__(self, bots_dir: str = "src/bot/configs"):
+    def __init__(self, bots_dir: str = "src/bot/configs", mode: Optional[str] = None):
         self.bots_dir = bots_dir
         self.config_loader = BotConfigLoader(bots_dir)
         self.running_bots: Dict[int, RunningBot] = {}
         self._shutdown_event = asyncio.Event()
         self._session_manager = None
         self.bot_voice_configs: Dict[str, BotVoiceConfig] = {}
-        logger.info("MultiBotLauncher initialized")
+        # 运行模式：polling 或 webhook
+        self.mode = mode or getattr(settings, "bot_mode", "polling")
+        self._webhook_server: Optional[WebhookServer] = None
+        self._shared_request: Optional[SharedHTTPXRequest] = None
+        logger.info(f"MultiBotLauncher initialized (mode={self.mode})")
 
     def load_voice_config(self, bot_username: str, config_dir: str) -> BotVoiceConfig:
         """
@@ -150,44 +164,73 @@ class MultiBotLauncher:
         logger.info(f"No YAML configs for @{bot_username}, using database configs")
         return None
 
+    def build_application(self, bot_db: BotModel) -> Application:
+        """
+        创建 Bot 的 Application 并注册处理器
+
+        webhook 模式下不创建 Updater，出站请求使用共享连接池。
+        """
+        bot_id = bot_db.id
+        bot_username = bot_db.bot_username
+
+        # 使用智能查找配置（不会产生多余警告）
+        bot_config = self.find_bot_config(bot_username)
+
+        # 获取语音配置
+        voice_config = self.bot_voice_configs.get(bot_username, BotVoiceConfig())
+
+        # 创建 Application（同一聊天内保序、不同聊天并发处理更新）
+        builder = Application.builder().token(bot_db.bot_token).concurrent_updates(
+            create_update_processor(bot_username)
+        )
+        if self._shared_request is not None:
+            builder = builder.request(self._shared_request).get_updates_request(self._shared_request)
+        if self.mode == "webhook":
+            builder = builder.updater(None)
+        app = builder.build()
+
+        # 存储语音配置到 bot_data，供 handler 使用
+        app.bot_data["voice_config"] = {
+            "enabled": voice_config.enabled,
+            "provider": voice_config.provider,
+            "voice_id": voice_config.voice_id,
+        }
+        app.bot_data["bot_username"] = bot_username
+        app.bot_data["bot_id"] = bot_id
+
+        # 存储 BotConfig 到 bot_data，供 handler 使用（包含 values 等配置）
+        app.bot_data["bot_config"] = bot_config
+
+        # 设置处理器
+        self.setup_handlers(app, bot_db, bot_config)
+
+        # 记录运行状态
+        self.running_bots[bot_id] = RunningBot(
+            bot_id=bot_id,
+            bot_username=bot_username,
+            application=app,
+            started_at=datetime.now(timezone.utc)
+        )
+        return app
+
+    def _register_services(self, bot_id: int, app: Application) -> None:
+        """注册到提醒调度器和后台任务队列"""
+        get_reminder_scheduler().register_bot(bot_id, app.bot)
+        get_task_queue().register_bot(bot_id, app.bot)
+
+    def _unregister_services(self, bot_id: int) -> None:
+        """从提醒调度器和后台任务队列注销"""
+        get_reminder_scheduler().unregister_bot(bot_id)
+        get_task_queue().unregister_bot(bot_id)
+
     async def run_single_bot(self, bot_db: BotModel) -> None:
         """运行单个 Bot 的轮询循环"""
         bot_id = bot_db.id
         bot_username = bot_db.bot_username
-        token = bot_db.bot_token
 
         logger.info(f"Starting bot: @{bot_username} (ID: {bot_id})")
         try:
-            # 使用智能查找配置（不会产生多余警告）
-            bot_config = self.find_bot_config(bot_username)
-
-            # 获取语音配置
-            voice_config = self.bot_voice_configs.get(bot_username, BotVoiceConfig())
-
-            # 创建 Application
-            app = Application.builder().token(token).build()
-
-            # 存储语音配置到 bot_data，供 handler 使用
-            app.bot_data["voice_config"] = {
-                "enabled": voice_config.enabled,
-                "provider": voice_config.provider,
-                "voice_id": voice_config.voice_id,
-            }
-            app.bot_data["bot_username"] = bot_username
-
-            # 存储 BotConfig 到 bot_data，供 handler 使用（包含 values 等配置）
-            app.bot_data["bot_config"] = bot_config
-
-            # 设置处理器
-            self.setup_handlers(app, bot_db, bot_config)
-
-            # 记录运行状态
-            self.running_bots[bot_id] = RunningBot(
-                bot_id=bot_id,
-                bot_username=bot_username,
-                application=app,
-                started_at=datetime.now(timezone.utc)
-            )
+            app = self.build_application(bot_db)
 
             # 初始化并启动
             await app.initialize()
@@ -197,15 +240,12 @@ class MultiBotLauncher:
                 drop_pending_updates=True
             )
 
-            # 注册到提醒调度器
-            reminder_scheduler = get_reminder_scheduler()
-            reminder_scheduler.register_bot(bot_id, app.bot)
+            self._register_services(bot_id, app)
 
             logger.info(f"✅ Bot @{bot_username} is now polling for updates")
 
             # 保持运行
-            while not self._shutdown_event.is_set():
-                await asyncio.sleep(1)
+            await self._shutdown_event.wait()
 
         except asyncio.CancelledError:
             logger.info(f"Bot @{bot_username} received cancel signal")
@@ -214,10 +254,80 @@ class MultiBotLauncher:
             if bot_id in self.running_bots:
                 self.running_bots[bot_id].error_count += 1
         finally:
-            # 从提醒调度器注销
-            reminder_scheduler = get_reminder_scheduler()
-            reminder_scheduler.unregister_bot(bot_id)
+            self._unregister_services(bot_id)
+            await self.stop_bot(bot_id)
+
+    async def start_webhook_bot(self, bot_db: BotModel, base_url: str) -> bool:
+        """
+        初始化单个 Bot 并设置 Webhook
+
+        Returns:
+            bool: 是否启动成功
+        """
+        bot_id = bot_db.id
+        bot_username = bot_db.bot_username
+        token = bot_db.bot_token
+
+        logger.info(f"Starting bot: @{bot_username} (ID: {bot_id}, webhook)")
+        try:
+            app = self.build_application(bot_db)
+            await app.initialize()
+            await app.start()
+
+            self._webhook_server.register(app, token, bot_username)
+            await app.bot.set_webhook(
+                url=self._webhook_server.webhook_url(base_url, token),
+                secret_token=token_secret(token),
+                allowed_updates=Update.ALL_TYPES,
+                drop_pending_updates=True,
+                max_connections=getattr(settings, "webhook_max_connections", 40)
+            )
+
+            self._register_services(bot_id, app)
+            logger.info(f"✅ Bot @{bot_username} is now receiving updates via webhook")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error starting bot @{bot_username}: {e}", exc_info=True)
+            if bot_id in self.running_bots:
+                self.running_bots[bot_id].error_count += 1
             await self.stop_bot(bot_id)
+            return False
+
+    async def run_webhook_mode(self, bots: List[BotModel]) -> None:
+        """
+        webhook 模式：并行初始化所有 Bot，共用一个 HTTP 服务器接收更新
+        """
+        base_url = settings.telegram_webhook_url
+        if not base_url:
+            logger.error("❌ webhook 模式需要配置 TELEGRAM_WEBHOOK_URL")
+            return
+
+        self._webhook_server = WebhookServer(
+            host=getattr(settings, "webhook_listen_host", "0.0.0.0"),
+            port=getattr(settings, "webhook_listen_port", 8443),
+            path_prefix=getattr(settings, "webhook_path_prefix", "/telegram"),
+        )
+        await self._webhook_server.start()
+
+        # 限制同时初始化的 Bot 数量，避免瞬时请求过多
+        semaphore = asyncio.Semaphore(getattr(settings, "bot_startup_concurrency", 8))
+
+        async def start_one(bot_db: BotModel) -> bool:
+            async with semaphore:
+                return await self.start_webhook_bot(bot_db, base_url)
+
+        results = await asyncio.gather(*(start_one(bot_db) for bot_db in bots))
+        logger.info(f"🚀 {sum(results)}/{len(bots)} bot(s) started in webhook mode")
+
+        try:
+            await self._shutdown_event.wait()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            for bot_id in list(self.running_bots.keys()):
+                self._unregister_services(bot_id)
+                await self.stop_bot(bot_id)
+            await self._webhook_server.stop()
 
     async def load_bots_from_db(self) -> List[BotModel]:
         """从数据库加载所有活跃的 Bot"""
@@ -253,6 +363,10 @@ class MultiBotLauncher:
         app.add_handler(CommandHandler("pay_premium", pay_premium_command))
         app.add_handler(CommandHandler("check_payment", check_payment_command))
 
+        # ===== 后台任务命令 =====
+        app.add_handler(CommandHandler("tasks", tasks_command))
+        app.add_handler(CommandHandler("cancel_task", cancel_task_command))
+
         # ===== 语音命令 =====
         # 始终注册语音命令处理器，让用户可以通过 /voice_on 和 /voice_off 控制语音回复
         for handler in get_voice_handlers():
@@ -270,9 +384,10 @@ class MultiBotLauncher:
         app.add_handler(get_chat_member_handler())
 
         # ===== 消息处理器 =====
+        # LLM 管线受全局 / 每 Bot 并发上限约束，饱和时回复忙碌提示
         app.add_handler(MessageHandler(
             filters.TEXT & ~filters.COMMAND,
-            handle_message_with_agents
+            limit_pipeline(handle_message_with_agents)
         ))
         app.add_handler(MessageHandler(filters.PHOTO, handle_photo))
         app.add_handler(MessageHandler(filters.Sticker.ALL, handle_sticker))
@@ -291,15 +406,19 @@ class MultiBotLauncher:
         logger.info(f"Stopping bot: @{running_bot.bot_username}")
 
         try:
+            if self._webhook_server is not None:
+                self._webhook_server.unregister(running_bot.application.bot.token)
             if running_bot.application:
-                if running_bot.application.updater.running:
-                    await running_bot.application.updater.stop()
-                await running_bot.application.stop()
+                updater = running_bot.application.updater
+                if updater is not None and updater.running:
+                    await updater.stop()
+                if running_bot.application.running:
+                    await running_bot.application.stop()
                 await running_bot.application.shutdown()
         except Exception as e:
             logger.error(f"Error stopping bot @{running_bot.bot_username}: {e}")
         finally:
-            del self.running_bots[bot_id]
+            self.running_bots.pop(bot_id, None)
             logger.info(f"Bot @{running_bot.bot_username} stopped")
 
     async def start_all(self, specific_bot: Optional[str] = None) -> None:
@@ -337,18 +456,6 @@ class MultiBotLauncher:
 
         logger.info(f"🚀 Starting {len(bots)} bot(s)...")
 
-        # 启动提醒调度器
-        await start_reminder_scheduler()
-        logger.info("🔔 Reminder scheduler started")
-
-        # 创建所有 Bot 的任务
-        tasks = []
-        for bot_db in bots:
-            task = asyncio.create_task(self.run_single_bot(bot_db))
-            tasks.append(task)
-            # 稍微延迟，避免同时发起太多请求
-            await asyncio.sleep(0.5)
-
         # 设置信号处理
         def signal_handler():
             logger.info("Received shutdown signal...")
@@ -362,28 +469,81 @@ class MultiBotLauncher:
                 # Windows 不支持 add_signal_handler
                 pass
 
+        try:
+            # 启动提醒调度器
+            await start_reminder_scheduler()
+            logger.info("🔔 Reminder scheduler started")
+
+            # 启动后台任务队列（TaskEngine 长任务）
+            await start_task_queue()
+
+            # 启动反馈异步写入队列
+            await start_feedback_ingestion()
+
+            # 启动记忆访问计数缓冲
+            await start_memory_access_tracker()
+
+            if self.mode == "webhook":
+                # 所有 Bot 的出站 Bot API 请求共用一个连接池
+                self._shared_request = SharedHTTPXRequest(
+                    connection_pool_size=getattr(settings, "bot_api_pool_size", 64)
+                )
+                await self.run_webhook_mode(bots)
+            else:
+                await self.run_polling_mode(bots)
+            logger.info("All bots stopped")
+        finally:
+            # 信号触发的正常退出也要停止共享服务：写入剩余的反馈事件与访问计数、关闭连接池
+            await self.stop_all()
+
+    async def run_polling_mode(self, bots: List[BotModel]) -> None:
+        """轮询模式：每个 Bot 各自运行 getUpdates 长轮询，直到收到停止信号"""
+        # 创建所有 Bot 的任务
+        tasks = []
+        for bot_db in bots:
+            task = asyncio.create_task(self.run_single_bot(bot_db))
+            tasks.append(task)
+            # 稍微延迟，避免同时发起太多请求
+            await asyncio.sleep(0.5)
+
         # 等待所有任务完成或收到停止信号
         try:
             await asyncio.gather(*tasks, return_exceptions=True)
         except asyncio.CancelledError:
             pass
 
-        logger.info("All bots stopped")
-
     async def stop_all(self) -> None:
-        """停止所有 Bot"""
+        """
+        停止所有 Bot 与共享服务
+
+        start_all() 退出时（信号、异常或正常返回）都会调用；各服务的 stop 均可重复调用。
+        """
         self._shutdown_event.set()
 
         # 停止提醒调度器
         await stop_reminder_scheduler()
+        await stop_task_queue()
 
         for bot_id in list(self.running_bots.keys()):
             await self.stop_bot(bot_id)
 
+        # Bot 停止后再写入剩余的反馈事件
+        await stop_feedback_ingestion()
+        await stop_memory_access_tracker()
+        shutdown_agent_executor()
+
+        # 搜索服务由插件按需导入；未导入时不存在需要关闭的连接池
+        serp_module = sys.modules.get("src.services.serp_api_service")
+        if serp_module is not None:
+            await serp_module.serp_api_service.close()
+
     def get_stats(self) -> Dict:
         """获取运行统计"""
         return {
+            "mode": self.mode,
             "running_bots": len(self.running_bots),
+            "webhook": self._webhook_server.get_stats() if self._webhook_server else None,
+            "dispatch": get_dispatch_stats(),
             "bots": [
                 {
                     "id": rb.bot_id,
@@ -430,6 +590,7 @@ async def main():
     parser.add_argument("--list", action="store_true", help="列出所有可用的 Bot")
     parser.add_argument("--bot", type=str, help="只启动指定用户名的 Bot")
     parser.add_argument("--stats", action="store_true", help="显示运行统计")
+    parser.add_argument("--webhook", action="store_true", help="使用 webhook 模式（单个 HTTP 服务器接收所有 Bot 的更新）")
 
     args = parser.parse_args()
     if args.list:
@@ -437,13 +598,13 @@ async def main():
         return
 
     # 启动 Bot
-    launcher = MultiBotLauncher()
+    launcher = MultiBotLauncher(mode="webhook" if args.webhook else None)
 
     try:
         await launcher.start_all(specific_bot=args.bot)
     except KeyboardInterrupt:
+        # start_all() 退出时已停止所有服务
         logger.info("Received keyboard interrupt")
-        await launcher.stop_all()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Agent 插件导入耗时报告
+=====================
+
+在全新的解释器进程中分别以 eager / lazy 两种模式执行 AgentLoader.load_agents()，
+输出：
+- 启动耗时：load_agents() 总耗时，以及 lazy 模式下首次调度（导入 + 实例化）的耗时
+- 每个插件模块的导入耗时（AgentLoader.get_import_report()）
+- 可选：python -X importtime 统计的累计耗时最高的依赖模块，定位重量级依赖
+
+使用方法:
+  python scripts/agent_import_report.py
+  python scripts/agent_import_report.py --importtime 15
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from loguru import logger
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def child(mode: str) -> None:
+    """子进程：加载 Agent 并以 JSON 输出耗时"""
+    logger.remove()
+    from src.agents.loader import AgentLoader, LazyAgent
+
+    loader = AgentLoader(agents_dir=str(ROOT / "src/agents/plugins"), lazy=(mode == "lazy"))
+    started = time.perf_counter()
+    agents = loader.load_agents()
+    startup_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    for agent in agents:
+        if isinstance(agent, LazyAgent):
+            agent.load()
+    first_dispatch_ms = (time.perf_counter() - started) * 1000
+
+    print(json.dumps({
+        "agents": [agent.name for agent in agents],
+        "startup_ms": startup_ms,
+        "first_dispatch_ms": first_dispatch_ms,
+        "imports": loader.get_import_report(),
+    }))
+
+
+def run_child(mode: str, importtime: bool = False) -> Tuple[Dict, str]:
+    """在新进程中运行 child()，返回 (结果, stderr)"""
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += [__file__, "--child", mode]
+    proc = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def heaviest_imports(stderr: str, top: int) -> List[Tuple[str, float]]:
+    """解析 -X importtime 输出，返回累计耗时最高的模块（毫秒）"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((name, int(cumulative) / 1000))
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return rows[:top]
+
+
+def main(args: argparse.Namespace) -> None:
+    for mode in ("eager", "lazy"):
+        result, _ = run_child(mode)
+        print(f"\n[{mode}] agents={result['agents']}")
+        print(f"  load_agents(): {result['startup_ms']:.1f}ms")
+        if mode == "lazy":
+            print(f"  首次调度（导入 + 实例化）: {result['first_dispatch_ms']:.1f}ms")
+        for module_path, ms in result["imports"]:
+            print(f"  {ms:>10.1f}ms  {module_path}")
+
+    if args.importtime:
+        _, stderr = run_child("eager", importtime=True)
+        print(f"\n累计导入耗时最高的 {args.importtime} 个模块（eager，-X importtime）:")
+        for name, ms in heaviest_imports(stderr, args.importtime):
+            print(f"  {ms:>10.1f}ms  {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agent 插件导入耗时报告")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N",
+                        help="额外输出 -X importtime 统计的前 N 个重量级模块")
+    parser.add_argument("--child", choices=["eager", "lazy"], help=argparse.SUPPRESS)
+    parsed = parser.parse_args()
+    if parsed.child:
+        child(parsed.child)
+    else:
+        main(parsed)
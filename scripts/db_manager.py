@@ -60,6 +60,8 @@ SoulmateBot 数据库管理工具
   init                初始化测试数据(交互式)
   all                 重建数据库并初始化测试数据
 
+  feedback-backfill [days]     从反应/交互记录重建反馈小时统计桶(默认全部)
+
 示例:
   python scripts/db_manager.py status
   python scripts/db_manager.py user list
@@ -10,7 +10,7 @@ import sys
 import time
 from typing import List, Optional, Dict, Any
 
-from sqlalchemy import inspect, text
+from sqlalchemy import LargeBinary, inspect, text
 from loguru import logger
 
 # 添加项目根目录到路径
@@ -250,7 +250,7 @@ class DatabaseManager:
         """
         修复数据库结构
         
-        检查并添加缺失的列。
+        检查并添加缺失的列和索引。
         
         Returns:
             bool: 修复是否成功
@@ -266,8 +266,21 @@ class DatabaseManager:
             'bots': [('uuid', 'VARCHAR(36)'), ('version', 'INTEGER DEFAULT 1')],
             'channels': [('version', 'INTEGER DEFAULT 1')],
             'channel_bot_mappings': [('version', 'INTEGER DEFAULT 1')],
+            'user_memories': [
+                ('embedding_vector', LargeBinary().compile(dialect=self.engine.dialect)),
+                ('embedding_format', 'VARCHAR(10)'),
+                ('embedding_dim', 'INTEGER'),
+                ('embedding_norm', 'FLOAT'),
+            ],
         }
 
+        # 小时反馈桶的唯一索引（bot_id / channel_id 为 NULL 时 uq_feedback_summary_period 不生效）
+        index_fixes = [
+            ('feedback_summaries', 'uq_feedback_summary_bucket',
+             "CREATE UNIQUE INDEX IF NOT EXISTS uq_feedback_summary_bucket ON feedback_summaries "
+             "(coalesce(bot_id, 0), coalesce(channel_id, 0), period_type, period_start)"),
+        ]
+
         try:
             with self.engine.connect() as conn:
                 for table_name, columns in schema_fixes.items():
@@ -281,6 +294,14 @@ class DatabaseManager:
                             conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {col_name} {col_type}"))
                             print(f"   ✅ {table_name}.{col_name} 已添加")
 
+                # 表达式索引无法通过 inspector 可靠检测，使用 IF NOT EXISTS
+                for table_name, index_name, index_sql in index_fixes:
+                    if table_name not in inspector.get_table_names():
+                        continue
+
+                    conn.execute(text(index_sql))
+                    print(f"   ✅ {table_name}.{index_name} 已确认")
+
                 conn.commit()
 
             print("\n✅ 数据库结构修复完成!")
@@ -41,6 +41,12 @@
   
   init                初始化测试数据(交互式)
   all                 重建数据库并初始化测试数据
+  
+  feedback-backfill [days]     从反应/交互记录重建反馈小时统计桶(默认全部)
+  memory-embeddings-migrate [batch_size] [float32|float16|int8]
+                               把记忆向量从 JSON 批量转换为二进制(需先执行 fix)
+  memory-embeddings-backfill [--reset]
+                               为缺少向量或向量模型过期的记忆批量生成向量(可中断续跑)
 """
 
 import sys
@@ -287,6 +293,105 @@ def init_test_data() -> bool:
         return False
 
 
+def backfill_feedback_rollups(days: int = None) -> bool:
+    """
+    从 message_reactions / message_interactions 重建反馈小时统计桶
+
+    Args:
+        days: 只重建最近 N 天，None 表示全部历史数据
+    """
+    from datetime import datetime, timedelta
+    from src.database import get_db_session
+    from src.services.feedback_rollup import backfill_rollups
+
+    start = datetime.utcnow() - timedelta(days=days) if days else None
+    scope = f"最近 {days} 天" if days else "全部数据"
+    print(f"\n📊 重建反馈小时统计桶（{scope}）...")
+
+    db = get_db_session()
+    try:
+        count = backfill_rollups(db, start=start)
+        print(f"✅ 已重建 {count} 个小时桶")
+        return True
+    except Exception as e:
+        db.rollback()
+        print(f"❌ 重建失败: {e}")
+        return False
+    finally:
+        db.close()
+
+
+def migrate_memory_embeddings(batch_size: int = 500, fmt: str = None) -> bool:
+    """
+    把 user_memories.embedding（JSON）批量转换为二进制向量列
+
+    Args:
+        batch_size: 每批转换的记录数
+        fmt: float32 / float16 / int8，None 表示使用 memory_embedding_format 配置
+    """
+    from src.database import get_db_session
+    from src.services.embedding_codec import migrate_json_embeddings
+
+    print(f"\n🔄 转换记忆向量（batch_size={batch_size}, format={fmt or '配置默认'}）...")
+
+    db = get_db_session()
+    try:
+        stats = migrate_json_embeddings(db, batch_size=batch_size, fmt=fmt)
+        print(f"✅ 已转换 {stats['converted']} 条，清理空向量 {stats['cleared']} 条")
+        if stats["converted"]:
+            ratio = stats["binary_bytes"] / stats["json_bytes"]
+            print(f"   存储: JSON {stats['json_bytes']:,} 字节 → 二进制 {stats['binary_bytes']:,} 字节（{ratio:.1%}）")
+            print(f"   解码: JSON {stats['json_decode_ms']:.1f}ms → 二进制 {stats['binary_decode_ms']:.1f}ms")
+        return True
+    except Exception as e:
+        db.rollback()
+        print(f"❌ 转换失败: {e}")
+        return False
+    finally:
+        db.close()
+
+
+def backfill_memory_embeddings(reset: bool = False) -> bool:
+    """
+    为缺少向量、或向量由其他模型生成的记忆批量生成嵌入
+
+    进度写入 embedding_backfill_checkpoint_path，中断后再次执行从上次位置继续。
+
+    Args:
+        reset: 忽略检查点，从头开始
+    """
+    import asyncio
+    from config import settings
+    from src.services.embedding_backfill import EmbeddingBackfillJob
+    from src.services.embedding_service import get_embedding_service
+
+    embedding_service = get_embedding_service()
+    if not embedding_service.provider:
+        print("❌ 未配置向量嵌入服务")
+        return False
+
+    job = EmbeddingBackfillJob(
+        embedding_service,
+        checkpoint_path=getattr(settings, "embedding_backfill_checkpoint_path", "data/embedding_backfill.json"),
+        page_size=getattr(settings, "embedding_backfill_page_size", 500),
+        concurrency=getattr(settings, "embedding_backfill_concurrency", 4),
+    )
+    print(f"\n🔄 补全记忆向量（model={job.model}, chunk_size={job.chunk_size}, reset={reset}）...")
+
+    try:
+        report = asyncio.run(job.run(reset=reset))
+    except KeyboardInterrupt:
+        print(f"\n⏸️ 已中断，进度保存在 {job.checkpoint_path}，再次执行即可继续")
+        return False
+    except Exception as e:
+        print(f"❌ 补全失败: {e}")
+        return False
+
+    print(f"✅ 已生成 {report['processed']} 条，失败 {report['failed']} 条，剩余 {report['pending']} 条")
+    print(f"   耗时 {report['elapsed_seconds']:.1f}s，{report['rows_per_second']:.1f} 条/秒")
+    return True
+
+
 def print_help():
     """打印帮助信息"""
     print(__doc__)
@@ -476,6 +581,24 @@ def main():
     elif command == 'token-validate':
         TokenManager.validate_token()
 
+    # 反馈统计
+    elif command == 'feedback-backfill':
+        days = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        if not backfill_feedback_rollups(days):
+            sys.exit(1)
+
+    # 记忆向量
+    elif command == 'memory-embeddings-migrate':
+        batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+        fmt = sys.argv[3] if len(sys.argv) > 3 else None
+        if not migrate_memory_embeddings(batch_size, fmt):
+            sys.exit(1)
+
+    elif command == 'memory-embeddings-backfill':
+        reset = '--reset' in sys.argv[2:]
+        if not backfill_memory_embeddings(reset):
+            sys.exit(1)
+
     # 帮助
     elif command in ['help', '-h', '--help']:
         print_help()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+统一分析 Prompt 布局基准测试
+===========================
+
+比较 legacy 与 static_first 两种 System Prompt 布局下，
+vLLM 自动前缀缓存（Automatic Prefix Caching）的命中率与首 token 延迟（TTFT）。
+
+默认启动一个本地 OpenAI 兼容的模拟服务：
+- 按 block_size 个 token（此处以字符近似 token）为一块，按前缀链式哈希缓存，
+  与 vLLM 的块级前缀缓存行为一致
+- 预填充耗时 = base_ms + 未命中 token 数 × prefill_ms
+- 流式返回，并在 usage.prompt_tokens_details.cached_tokens 中返回命中的 token 数
+
+也可以用 --url 指向真实的 vLLM 服务（需启用 --enable-prefix-caching）。
+
+使用方法:
+  python scripts/prompt_prefix_benchmark.py
+  python scripts/prompt_prefix_benchmark.py --users 50 --turns 8
+  python scripts/prompt_prefix_benchmark.py --url http://127.0.0.1:8000/v1 --model qwen
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import statistics
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.agents.models import ChatContext  # noqa: E402
+from src.agents.orchestrator import (  # noqa: E402
+    AgentOrchestrator,
+    PROMPT_LAYOUT_LEGACY,
+    PROMPT_LAYOUT_STATIC_FIRST,
+)
+from src.conversation.context_builder import ContextConfig, UnifiedContextBuilder  # noqa: E402
+
+# 模拟的 Bot 人设（静态部分）
+PERSONA = "\n".join([
+    "【你现在是用户的好朋友。】",
+    "你的名字是小暖。",
+    "\n【基础人设】\n一个在杭州做插画师的女生，性格温柔但有主见，喜欢听别人讲故事。",
+    "\n【性格特点】\n温柔、细心、幽默、偶尔毒舌",
+    "\n【喜欢的事物】\n猫、雨天、手冲咖啡、宫崎骏的电影、逛菜市场",
+    "\n【讨厌的事物】\n敷衍、早起、香菜",
+    "\n【语言风格】\n- 语气：轻松自然\n- 适当使用emoji\n- 回复类型：短句居多，节奏快",
+])
+
+USER_MESSAGES = ["今天好累啊", "我们老板又让加班", "周末想去看展", "你推荐什么电影", "最近睡不好", "猫咪生病了"]
+
+
+class PrefixCacheStub:
+    """
+    模拟 vLLM 自动前缀缓存的 OpenAI 兼容服务
+    """
+
+    def __init__(self, block_size: int = 16, capacity_blocks: int = 200_000,
+                 base_ms: float = 5.0, prefill_ms: float = 0.02):
+        self.block_size = block_size
+        self.capacity_blocks = capacity_blocks
+        self.base_ms = base_ms
+        self.prefill_ms = prefill_ms
+        self._blocks: "OrderedDict[str, None]" = OrderedDict()
+        self.app = web.Application()
+        self.app.router.add_post("/v1/chat/completions", self._handle)
+        self._runner: Optional[web.AppRunner] = None
+
+    def reset(self) -> None:
+        self._blocks.clear()
+
+    def _lookup_and_insert(self, prompt: str) -> int:
+        """返回命中的前缀 token 数，并把全部完整块写入缓存"""
+        cached = 0
+        matching = True
+        digest = b""
+        for start in range(0, len(prompt) - self.block_size + 1, self.block_size):
+            digest = hashlib.sha1(digest + prompt[start:start + self.block_size].encode()).digest()
+            key = digest.hex()
+            if matching and key in self._blocks:
+                cached += self.block_size
+                self._blocks.move_to_end(key)
+            else:
+                matching = False
+                self._blocks[key] = None
+        while len(self._blocks) > self.capacity_blocks:
+            self._blocks.popitem(last=False)
+        return cached
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        prompt = "".join(f"<|{m['role']}|>{m['content']}" for m in body["messages"])
+        cached = self._lookup_and_insert(prompt)
+        await asyncio.sleep((self.base_ms + (len(prompt) - cached) * self.prefill_ms) / 1000)
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        chunk = {"choices": [{"index": 0, "delta": {"content": "{\"intent\": \"direct_response\"}"}}]}
+        await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        usage = {
+            "choices": [],
+            "usage": {
+                "prompt_tokens": len(prompt),
+                "completion_tokens": 8,
+                "prompt_tokens_details": {"cached_tokens": cached},
+            },
+        }
+        await response.write(f"data: {json.dumps(usage)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    async def start(self) -> str:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        return f"http://{host}:{port}/v1"
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+
+
+async def build_workload(layout: str, users: int, turns: int) -> List[List[List[Dict[str, str]]]]:
+    """
+    构建请求：workload[turn][user] 为该用户该轮发送的 messages
+
+    每个用户有固定的长期记忆，对话历史逐轮增长。
+    """
+    orchestrator = AgentOrchestrator([], prompt_layout=layout)
+    builder = UnifiedContextBuilder(config=ContextConfig(enable_history_filter=False, max_memories=8))
+    histories: List[List[Dict[str, str]]] = [[] for _ in range(users)]
+    workload = []
+    for turn in range(turns):
+        requests = []
+        for user in range(users):
+            text = USER_MESSAGES[(user + turn) % len(USER_MESSAGES)]
+            memories = [
+                {"event_summary": f"用户{user}喜欢{item}", "event_date": "2024-05-0%d" % (i + 1)}
+                for i, item in enumerate(["爬山", "拿铁", "科幻小说"])
+            ]
+            result = await builder.build_context(
+                bot_system_prompt=PERSONA,
+                conversation_history=histories[user],
+                current_message=text,
+                user_memories=memories,
+                dialogue_strategy=f"【本轮策略】用户情绪偏低，先共情再追问（第{turn + 1}轮）",
+            )
+            context = ChatContext(
+                chat_id=str(user),
+                system_prompt=result.messages[0]["content"],
+                prompt_sections=result.metadata["prompt_sections"],
+            )
+            requests.append([
+                {"role": "system", "content": orchestrator.assemble_system_prompt(context)},
+                {"role": "user", "content": text},
+            ])
+            histories[user] += [
+                {"role": "user", "content": text},
+                {"role": "assistant", "content": f"收到～第{turn + 1}轮的回复"},
+            ]
+        workload.append(requests)
+    return workload
+
+
+async def send(session: aiohttp.ClientSession, url: str, model: str,
+               messages: List[Dict[str, str]]) -> Tuple[float, int, int]:
+    """发送一次流式请求，返回 (TTFT 秒, prompt_tokens, cached_tokens)"""
+    payload = {
+        "model": model,
+        "messages": messages,
+        "max_tokens": 8,
+        "stream": True,
+        "stream_options": {"include_usage": True},
+    }
+    started = time.perf_counter()
+    ttft = None
+    prompt_tokens = cached_tokens = 0
+    async with session.post(f"{url}/chat/completions", json=payload) as resp:
+        resp.raise_for_status()
+        async for raw in resp.content:
+            line = raw.decode().strip()
+            if not line.startswith("data:") or line == "data: [DONE]":
+                continue
+            data = json.loads(line[5:])
+            if ttft is None and data.get("choices"):
+                ttft = time.perf_counter() - started
+            usage = data.get("usage") or {}
+            if usage:
+                prompt_tokens = usage.get("prompt_tokens", 0)
+                cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+    return ttft or (time.perf_counter() - started), prompt_tokens, cached_tokens
+
+
+async def run_layout(layout: str, url: str, model: str, users: int, turns: int) -> Dict[str, float]:
+    workload = await build_workload(layout, users, turns)
+    ttfts: List[float] = []
+    prompt_total = cached_total = 0
+    async with aiohttp.ClientSession() as session:
+        for requests in workload:
+            results = await asyncio.gather(*(send(session, url, model, m) for m in requests))
+            for ttft, prompt_tokens, cached_tokens in results:
+                ttfts.append(ttft)
+                prompt_total += prompt_tokens
+                cached_total += cached_tokens
+    ttfts.sort()
+    return {
+        "requests": len(ttfts),
+        "prefix_hit_rate": cached_total / prompt_total if prompt_total else 0.0,
+        "ttft_p50_ms": statistics.median(ttfts) * 1000,
+        "ttft_p95_ms": ttfts[min(len(ttfts) - 1, int(len(ttfts) * 0.95))] * 1000,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    stub = None
+    url = args.url
+    if url is None:
+        stub = PrefixCacheStub(block_size=args.block_size, base_ms=args.base_ms, prefill_ms=args.prefill_ms)
+        url = await stub.start()
+        print(f"本地模拟服务: {url}（block_size={args.block_size}, prefill={args.prefill_ms}ms/token）")
+
+    print(f"\n{'布局':<14}{'请求数':>8}{'前缀命中率':>12}{'TTFT p50':>12}{'TTFT p95':>12}")
+    try:
+        for layout in (PROMPT_LAYOUT_LEGACY, PROMPT_LAYOUT_STATIC_FIRST):
+            if stub:
+                stub.reset()
+            report = await run_layout(layout, url, args.model, args.users, args.turns)
+            print(f"{layout:<14}{report['requests']:>8}{report['prefix_hit_rate']:>12.1%}"
+                  f"{report['ttft_p50_ms']:>10.1f}ms{report['ttft_p95_ms']:>10.1f}ms")
+    finally:
+        if stub:
+            await stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="统一分析 Prompt 布局的前缀缓存基准测试")
+    parser.add_argument("--users", type=int, default=20, help="并发用户数")
+    parser.add_argument("--turns", type=int, default=5, help="每个用户的对话轮数")
+    parser.add_argument("--url", default=None, help="OpenAI 兼容服务地址（如 http://127.0.0.1:8000/v1），不填则使用本地模拟服务")
+    parser.add_argument("--model", default="default", help="模型名称")
+    parser.add_argument("--block-size", type=int, default=16, help="模拟服务的缓存块大小（token）")
+    parser.add_argument("--base-ms", type=float, default=5.0, help="模拟服务的固定延迟（毫秒）")
+    parser.add_argument("--prefill-ms", type=float, default=0.02, help="模拟服务每个未命中 token 的预填充耗时（毫秒）")
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    asyncio.run(main(parser.parse_args()))
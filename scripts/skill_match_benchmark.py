@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+技能匹配基准测试
+================
+
+SkillRegistry.match_skills 在每条可能展示技能按钮的消息上执行。
+本脚本在 10 / 100 / 1000 个技能的注册表上比较：
+- 逐个关键词（旧实现）：对每个激活技能的每个关键词执行 `keyword in text`
+- 关键词索引（当前实现）：Aho-Corasick 自动机一次扫描找出全部命中的关键词
+
+并校验两种实现的匹配结果（技能与分数）一致。
+
+使用方法:
+  python scripts/skill_match_benchmark.py
+  python scripts/skill_match_benchmark.py --skills 10 100 1000 5000 --keywords 8
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.agents.skills import Skill, SkillRegistry  # noqa: E402
+
+# 关键词素材：常见中文词与英文词
+CJK_WORDS = [
+    "心情", "难过", "开心", "代码", "报错", "翻译", "天气", "提醒", "日程", "搜索", "新闻", "股票",
+    "电影", "音乐", "旅行", "机票", "酒店", "菜谱", "健身", "减肥", "学习", "考试", "作文", "诗歌",
+    "画画", "图片", "语音", "总结", "分析", "数据", "表格", "邮件", "合同", "法律", "医生", "感冒",
+]
+ASCII_WORDS = [
+    "python", "java", "bug", "error", "sql", "docker", "weather", "translate", "remind", "search",
+    "news", "stock", "movie", "music", "travel", "hotel", "recipe", "fitness", "study", "exam",
+]
+
+MESSAGES = [
+    "我今天心情不太好，有点难过", "帮我看看这个Python代码为什么报错", "明天天气怎么样",
+    "提醒我下午三点开会", "translate this sentence into English", "最近有什么好看的电影推荐吗",
+    "哈哈哈哈", "好的", "晚安～", "帮我总结一下这篇新闻", "docker container keeps crashing with an error",
+    "想去旅行，帮我查下机票和酒店", "我想减肥，有什么健身计划", "嗯嗯", "你在干嘛",
+]
+
+
+def build_registry(skill_count: int, keywords_per_skill: int, seed: int = 42) -> SkillRegistry:
+    """构造含 skill_count 个技能的注册表，关键词由素材词组合而成"""
+    rnd = random.Random(seed)
+    registry = SkillRegistry()
+    for i in range(skill_count):
+        keywords = []
+        for _ in range(keywords_per_skill):
+            if rnd.random() < 0.6:
+                word = rnd.choice(CJK_WORDS)
+                # 一部分关键词加后缀，模拟更具体的多字关键词
+                keywords.append(word + rnd.choice(CJK_WORDS) if rnd.random() < 0.5 else word)
+            else:
+                keywords.append(rnd.choice(ASCII_WORDS).capitalize())
+        registry.register(Skill(
+            id=f"skill_{i}",
+            name=f"Skill {i}",
+            description="",
+            keywords=keywords,
+            priority=rnd.randint(0, 5),
+            is_active=rnd.random() > 0.1,
+        ))
+    return registry
+
+
+def legacy_match(registry: SkillRegistry, text: str, top_n: int = 3):
+    """旧实现：逐个技能、逐个关键词 `in` 判断"""
+    text_lower = text.lower()
+    matches = []
+    for skill in registry._skills.values():
+        if not skill.is_active:
+            continue
+        score = 0
+        for keyword in skill.keywords:
+            if keyword.lower() in text_lower:
+                score += 1
+        if score > 0:
+            matches.append((skill, score))
+    matches.sort(key=lambda x: (-x[1], -x[0].priority))
+    return matches[:top_n]
+
+
+def bench(fn: Callable[[str], object], corpus: List[str], repeat: int) -> float:
+    """返回每条消息的平均耗时（微秒），取多轮中的最小值"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for message in corpus:
+            fn(message)
+        best = min(best, time.perf_counter() - started)
+    return best / len(corpus) * 1e6
+
+
+def main(args: argparse.Namespace) -> None:
+    rnd = random.Random(7)
+    corpus = [rnd.choice(MESSAGES) for _ in range(args.messages)]
+
+    print(f"语料: {len(corpus)} 条消息，每个技能 {args.keywords} 个关键词")
+    print(f"\n{'技能数':<8}{'逐个关键词':>14}{'关键词索引':>14}{'加速':>8}{'建索引':>12}{'不一致':>8}")
+    for skill_count in args.skills:
+        registry = build_registry(skill_count, args.keywords)
+
+        started = time.perf_counter()
+        registry.match_skills_scored("")  # 触发索引构建
+        build_ms = (time.perf_counter() - started) * 1000
+
+        mismatches = sum(
+            1 for message in set(corpus)
+            if legacy_match(registry, message, top_n=10) != registry.match_skills_scored(message, top_n=10)
+        )
+        legacy_us = bench(lambda m: legacy_match(registry, m), corpus, args.repeat)
+        indexed_us = bench(registry.match_skills_scored, corpus, args.repeat)
+        print(
+            f"{skill_count:<8}{legacy_us:>12.2f}µs{indexed_us:>12.2f}µs"
+            f"{legacy_us / indexed_us:>7.1f}x{build_ms:>10.1f}ms{mismatches:>8}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="技能匹配基准测试")
+    parser.add_argument("--skills", type=int, nargs="+", default=[10, 100, 1000], help="注册表中的技能数")
+    parser.add_argument("--keywords", type=int, default=6, help="每个技能的关键词数")
+    parser.add_argument("--messages", type=int, default=2000, help="语料消息数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复轮数（取最快一轮）")
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    main(parser.parse_args())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+时间表达解析基准测试
+====================
+
+ReminderParser.parse 与 DateParser.parse_from_message 在每条消息进入 LLM 之前都会执行。
+本脚本在模拟的真实聊天语料上比较：
+- 逐族扫描（旧实现）：按优先级对每个正则族分别 re.search / re.findall
+- 单次扫描（当前实现）：预过滤 + 导入时预编译的组合交替，一次扫描提取全部表达
+
+并校验两种实现的解析结果一致。
+
+使用方法:
+  python scripts/time_parser_benchmark.py
+  python scripts/time_parser_benchmark.py --messages 50000 --time-ratio 0.3
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.conversation_memory_service import (  # noqa: E402
+    DateParser,
+    _DATE_EXPRESSION_PATTERNS,
+)
+from src.services.reminder_service import ReminderParser  # noqa: E402
+
+# 日常闲聊（不含时间表达，占真实流量的大多数）
+SMALL_TALK = [
+    "哈哈哈哈", "好的", "嗯嗯", "你在干嘛", "我好无聊啊", "晚安～", "笑死我了",
+    "你觉得我应该换工作吗", "我们老板真的太离谱了", "猫咪又把杯子打翻了", "推荐一部电影吧",
+    "你喜欢吃辣吗", "好想去旅游", "这个好可爱", "为什么会这样", "我不太开心",
+    "刚下班", "在地铁上", "外卖到了", "你说得对", "emmm", "ok", "lol that's funny",
+    "what are you doing", "我想吃火锅", "唉", "谢谢你陪我聊天", "你真好",
+]
+
+# 含日期/时长表达的消息
+TIME_MESSAGES = [
+    "我下个月15号生日", "明天要去面试好紧张", "昨天晚上没睡好", "上周五和朋友去爬山了",
+    "2024年3月5日是我们的纪念日", "这周末想去看展", "月底要交报告", "去年12月25日我们分手了",
+    "前几天感冒了", "今天下午开会开了三个小时", "周三有考试", "最近压力好大",
+    "30分钟后提醒我吃药", "提醒我2小时后给妈妈打电话", "半小时后记得提醒我做饭",
+    "remind me in 10 minutes to check email", "过十五分钟提醒我关火", "明年3月要搬家",
+]
+
+
+def build_corpus(count: int, time_ratio: float, seed: int = 42) -> List[str]:
+    """按比例混合闲聊与含时间表达的消息"""
+    rnd = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        if rnd.random() < time_ratio:
+            corpus.append(rnd.choice(TIME_MESSAGES))
+        else:
+            corpus.append(rnd.choice(SMALL_TALK))
+    return corpus
+
+
+def legacy_reminder_parse(parser: ReminderParser, message: str):
+    """旧实现：逐个模式 re.search"""
+    message = message.strip()
+    for pattern in parser.REMINDER_PATTERNS:
+        match = re.search(pattern, message, re.IGNORECASE)
+        if match:
+            result = parser._build_result(match.group(1), match.group(2), match.group(3))
+            if result:
+                return result
+    return None
+
+
+def legacy_date_parse(parser: DateParser, message: str):
+    """旧实现：逐族 re.findall，再解析整条消息"""
+    if not message:
+        return None
+    for pattern in _DATE_EXPRESSION_PATTERNS:
+        for match in re.findall(pattern, message):
+            result = parser.parse(match)
+            if result:
+                return result
+    return parser.parse(message)
+
+
+def bench(fn: Callable[[str], Optional[object]], corpus: List[str], repeat: int) -> float:
+    """返回每条消息的平均耗时（微秒），取多轮中的最小值"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for message in corpus:
+            fn(message)
+        best = min(best, time.perf_counter() - started)
+    return best / len(corpus) * 1e6
+
+
+def main(args: argparse.Namespace) -> None:
+    corpus = build_corpus(args.messages, args.time_ratio)
+    reminder_parser = ReminderParser()
+    date_parser = DateParser()
+
+    mismatches = 0
+    for message in set(corpus):
+        if legacy_reminder_parse(reminder_parser, message) != reminder_parser.parse(message):
+            mismatches += 1
+            print(f"⚠️ ReminderParser 结果不一致: {message}")
+        if legacy_date_parse(date_parser, message) != date_parser.parse_from_message(message):
+            mismatches += 1
+            print(f"⚠️ DateParser 结果不一致: {message}")
+
+    cases = [
+        ("ReminderParser", lambda m: legacy_reminder_parse(reminder_parser, m), reminder_parser.parse),
+        ("DateParser", lambda m: legacy_date_parse(date_parser, m), date_parser.parse_from_message),
+    ]
+    print(f"语料: {len(corpus)} 条消息，含时间表达比例 {args.time_ratio:.0%}，结果不一致 {mismatches} 处")
+    print(f"\n{'解析器':<16}{'逐族扫描':>12}{'单次扫描':>12}{'加速':>8}")
+    for name, legacy, current in cases:
+        legacy_us = bench(legacy, corpus, args.repeat)
+        current_us = bench(current, corpus, args.repeat)
+        print(f"{name:<16}{legacy_us:>10.2f}µs{current_us:>10.2f}µs{legacy_us / current_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="时间表达解析基准测试")
+    parser.add_argument("--messages", type=int, default=20000, help="语料消息数")
+    parser.add_argument("--time-ratio", type=float, default=0.15, help="含时间表达的消息比例")
+    parser.add_argument("--repeat", type=int, default=3, help="重复轮数（取最快一轮）")
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    main(parser.parse_args())
@@ -38,7 +38,7 @@ from .models import Message, ChatContext, AgentResponse, MessageType
 from .base_agent import BaseAgent
 from .router import Router, RouterConfig
 from .loader import AgentLoader
-from .memory import MemoryStore, FileMemoryStore, SQLiteMemoryStore, InMemoryStore
+from .memory import MemoryStore, FileMemoryStore, SQLiteMemoryStore, AsyncSQLiteMemoryStore, InMemoryStore
 from .orchestrator import AgentOrchestrator, OrchestratorResult, IntentType, IntentSource, AgentCapability
 from .skills import (
     Skill, SkillCategory, SkillRegistry, SkillButtonGenerator,
@@ -62,6 +62,7 @@ __all__ = [
     "MemoryStore",
     "FileMemoryStore",
     "SQLiteMemoryStore",
+    "AsyncSQLiteMemoryStore",
     "InMemoryStore",
     
     # Orchestrator
@@ -8,11 +8,76 @@ Agent的设计理念：
 - Agent是技能的载体，专注于提供特定领域的能力
 - Bot是人格的外壳，拥有独特的性格、外貌、口头禅等特征
 - Bot通过配置选择启用哪些Agent的技能
+
+执行模型：
+- 编排器与Router在事件循环中 await respond_async()
+- 原生异步的Agent（如需要等待网络/子进程）重写 respond_async()
+- 只实现同步 respond() 的Agent由默认 respond_async() 卸载到有界线程池执行，
+  不会阻塞事件循环
 """
+import asyncio
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
+
+from loguru import logger
+
 from .models import Message, ChatContext, AgentResponse
 
+# 同步 respond() 的默认线程数
+DEFAULT_AGENT_SYNC_WORKERS = 8
+
+# 执行同步 respond() 的有界线程池（懒加载）
+_agent_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_agent_executor() -> ThreadPoolExecutor:
+    """获取执行同步 respond() 的全局线程池，线程数由 agent_sync_workers 配置"""
+    global _agent_executor
+    if _agent_executor is None:
+        from config import settings
+        max_workers = getattr(settings, "agent_sync_workers", DEFAULT_AGENT_SYNC_WORKERS)
+        _agent_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent-respond")
+        logger.info(f"🧵 Agent同步执行线程池已创建: max_workers={max_workers}")
+    return _agent_executor
+
+
+def shutdown_agent_executor() -> None:
+    """关闭线程池（不等待仍在运行的同步 respond()）"""
+    global _agent_executor
+    if _agent_executor is not None:
+        _agent_executor.shutdown(wait=False, cancel_futures=True)
+        _agent_executor = None
+
+
+async def respond_with_timeout(
+    agent: "BaseAgent",
+    message: Message,
+    context: ChatContext,
+    timeout: Optional[float] = None
+) -> Optional[AgentResponse]:
+    """
+    调用 agent.respond_async()，超时或出错时记录日志并返回 None
+
+    参数:
+        agent: 要执行的Agent
+        message: 要响应的消息
+        context: 聊天上下文
+        timeout: 单个Agent的超时时间（秒），None 表示不限制
+
+    注意:
+        超时只取消等待；已卸载到线程池的同步 respond() 无法被中断，会在后台运行结束
+    """
+    try:
+        if timeout is None:
+            return await agent.respond_async(message, context)
+        return await asyncio.wait_for(agent.respond_async(message, context), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"⏱️ Agent {agent.name} 响应超时（{timeout}s）")
+    except Exception as e:
+        logger.error(f"Error getting response from agent {agent.name}: {e}")
+    return None
+
 
 class BaseAgent(ABC):
     """
@@ -23,6 +88,7 @@ class BaseAgent(ABC):
     - description: str property - Agent的功能描述
     - can_handle(message, context) -> float - 判断能否处理消息（返回0-1的置信度）
     - respond(message, context) -> AgentResponse - 生成响应
+    - respond_async(message, context) -> AgentResponse - 异步生成响应（可选重写）
     - memory_read(user_id) -> dict - 读取用户记忆
     - memory_write(user_id, data) -> None - 保存用户记忆
     
@@ -37,8 +103,14 @@ class BaseAgent(ABC):
             
             def respond(self, message, context):
                 return AgentResponse(content="响应内容", ...)
+    
+    can_handle_is_pure:
+        can_handle() 的返回值只取决于消息文本与 @提及（不读取上下文、时间或自身状态）时设为 True，
+        Router 会按 (Agent, 文本, 提及) 缓存置信度，相同消息不再重复计算
     """
     
+    can_handle_is_pure: bool = False
+    
     @property
     @abstractmethod
     def name(self) -> str:
@@ -125,6 +197,24 @@ class BaseAgent(ABC):
         """
         pass
     
+    async def respond_async(self, message: Message, context: ChatContext) -> AgentResponse:
+        """
+        异步生成对消息的响应
+        
+        编排器和Router.route_async()通过此方法调用Agent。
+        默认实现把同步 respond() 放到有界线程池中执行；
+        需要等待I/O的Agent应重写此方法，直接 await 异步调用。
+        
+        参数:
+            message: 要响应的消息
+            context: 聊天上下文，包含历史对话
+            
+        返回值:
+            AgentResponse: 包含响应内容和元数据的响应对象
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_agent_executor(), self.respond, message, context)
+    
     @abstractmethod
     def memory_read(self, user_id: str) -> Dict[str, Any]:
         """
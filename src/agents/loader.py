@@ -2,14 +2,191 @@
 Agent plugin loader for dynamic agent discovery.
 
 Automatically discovers and loads agents from the agents/ directory.
+
+Plugins listed in the directory's manifest.yaml can be loaded lazily: the loader
+builds a LazyAgent proxy from the manifest entry (name, description, skills), so
+the orchestrator can describe the agent without importing its module. The module
+is imported on first dispatch. Every plugin import is timed and can be reported
+with get_import_report() / log_import_report().
 """
+import asyncio
 import importlib
 import inspect
+import threading
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Type, Optional, Set
+from typing import Any, Callable, Dict, List, Tuple, Type, Optional, Set
+
+import yaml
 from loguru import logger
 
-from .base_agent import BaseAgent
+from .base_agent import BaseAgent, get_agent_executor
+from .models import Message, ChatContext, AgentResponse
+
+MANIFEST_FILENAME = "manifest.yaml"
+
+
+@dataclass
+class AgentManifestEntry:
+    """
+    Lightweight declaration of a plugin agent.
+    
+    Attributes:
+        module: Module name inside the plugins directory (without .py)
+        class_name: Agent class defined in that module
+        name: Agent name, must equal the instance's name
+        description: Agent description, must equal the instance's description
+        skills: Skill IDs provided by the agent
+        skill_keywords: Skill ID -> keyword list
+    """
+    module: str
+    class_name: str
+    name: str
+    description: str
+    skills: List[str] = field(default_factory=list)
+    skill_keywords: Dict[str, List[str]] = field(default_factory=dict)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AgentManifestEntry":
+        """Build an entry from a manifest item (raises KeyError/TypeError if malformed)."""
+        return cls(
+            module=str(data["module"]),
+            class_name=str(data["class"]),
+            name=str(data["name"]),
+            description=str(data["description"]),
+            skills=list(data.get("skills") or []),
+            skill_keywords=dict(data.get("skill_keywords") or {}),
+        )
+
+
+def load_manifest(path: Path) -> List[AgentManifestEntry]:
+    """
+    Read the plugin manifest.
+    
+    Malformed entries are skipped with an error log; their modules are then
+    discovered eagerly like unlisted plugins.
+    
+    Args:
+        path: Path to manifest.yaml
+        
+    Returns:
+        List of manifest entries (empty if the file does not exist)
+    """
+    if not path.exists():
+        return []
+    
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+    except Exception as e:
+        logger.error(f"Error reading agent manifest '{path}': {e}")
+        return []
+    
+    entries: List[AgentManifestEntry] = []
+    for item in data.get("agents") or []:
+        try:
+            entries.append(AgentManifestEntry.from_dict(item))
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Invalid agent manifest entry {item!r}: {e}")
+    return entries
+
+
+class LazyAgent(BaseAgent):
+    """
+    Proxy for a manifest-declared agent whose module is imported on first dispatch.
+    
+    name, description, skills and skill_keywords come from the manifest. Until the
+    real agent is loaded, can_handle() only answers @mentions (1.0 or 0.0), so the
+    manifest must only list agents whose can_handle() depends on nothing else;
+    such agents are selected by the orchestrator's LLM from their description.
+    respond/respond_async/memory_read/memory_write load the real agent and delegate.
+    """
+    
+    def __init__(
+        self,
+        entry: AgentManifestEntry,
+        factory: Callable[[AgentManifestEntry], BaseAgent],
+    ):
+        """
+        Args:
+            entry: Manifest entry describing the agent
+            factory: Imports the module and instantiates the real agent
+        """
+        self._entry = entry
+        self._factory = factory
+        self._agent: Optional[BaseAgent] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def name(self) -> str:
+        return self._entry.name
+    
+    @property
+    def description(self) -> str:
+        return self._entry.description
+    
+    @property
+    def skills(self) -> List[str]:
+        return list(self._entry.skills)
+    
+    @property
+    def skill_keywords(self) -> Dict[str, List[str]]:
+        return dict(self._entry.skill_keywords)
+    
+    @property
+    def can_handle_is_pure(self) -> bool:
+        """Mention-only answers before loading are pure; afterwards the real agent decides."""
+        return self._agent.can_handle_is_pure if self._agent is not None else True
+    
+    @property
+    def entry(self) -> AgentManifestEntry:
+        """The manifest entry this proxy was built from."""
+        return self._entry
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the real agent has been imported and instantiated."""
+        return self._agent is not None
+    
+    def load(self) -> BaseAgent:
+        """Import and instantiate the real agent (once, thread-safe)."""
+        if self._agent is None:
+            with self._lock:
+                if self._agent is None:
+                    agent = self._factory(self._entry)
+                    if agent.name != self._entry.name:
+                        logger.warning(
+                            f"Agent manifest name '{self._entry.name}' does not match "
+                            f"loaded agent name '{agent.name}'"
+                        )
+                    self._agent = agent
+        return self._agent
+    
+    def can_handle(self, message: Message, context: ChatContext) -> float:
+        if self._agent is not None:
+            return self._agent.can_handle(message, context)
+        return 1.0 if message.has_mention(self.name) else 0.0
+    
+    def respond(self, message: Message, context: ChatContext) -> AgentResponse:
+        return self.load().respond(message, context)
+    
+    async def respond_async(self, message: Message, context: ChatContext) -> AgentResponse:
+        if self._agent is None:
+            # The first import can take seconds; keep it off the event loop
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(get_agent_executor(), self.load)
+        return await self._agent.respond_async(message, context)
+    
+    def memory_read(self, user_id: str) -> Dict[str, Any]:
+        return self.load().memory_read(user_id)
+    
+    def memory_write(self, user_id: str, data: Dict[str, Any]) -> None:
+        self.load().memory_write(user_id, data)
+    
+    def __repr__(self) -> str:
+        state = "loaded" if self._agent is not None else "lazy"
+        return f"<LazyAgent(name='{self.name}', module='{self._entry.module}', {state})>"
 
 
 class AgentLoader:
@@ -20,28 +197,71 @@ class AgentLoader:
     Each agent should be in its own module/package under the agents directory.
     """
     
-    def __init__(self, agents_dir: str = "src/agents/plugins"):
+    def __init__(
+        self,
+        agents_dir: str = "src/agents/plugins",
+        lazy: bool = False,
+        manifest_path: Optional[str] = None
+    ):
         """
         Initialize the agent loader.
         
         Args:
             agents_dir: Directory to search for agent plugins
+            lazy: Load manifest-declared plugins lazily in load_agents()
+            manifest_path: Manifest file (defaults to manifest.yaml in agents_dir)
         """
         self.agents_dir = Path(agents_dir)
+        self.lazy = lazy
+        self.manifest_path = Path(manifest_path) if manifest_path else self.agents_dir / MANIFEST_FILENAME
         self._loaded_agents: Set[str] = set()
+        # Module path -> import time in milliseconds
+        self.import_times: Dict[str, float] = {}
         
         if not self.agents_dir.exists():
             logger.warning(f"Agents directory does not exist: {self.agents_dir}")
             self.agents_dir.mkdir(parents=True, exist_ok=True)
             logger.info(f"Created agents directory: {self.agents_dir}")
     
-    def discover_agents(self) -> List[Type[BaseAgent]]:
+    def _import_module(self, module_path: str):
+        """Import a module and record how long it took."""
+        started = time.perf_counter()
+        module = importlib.import_module(module_path)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.import_times[module_path] = elapsed_ms
+        logger.debug(f"Imported '{module_path}' in {elapsed_ms:.1f}ms")
+        return module
+    
+    def get_import_report(self) -> List[Tuple[str, float]]:
+        """
+        Per-module import times recorded by this loader.
+        
+        Modules already in sys.modules before the loader imported them show
+        near-zero times.
+        
+        Returns:
+            List of (module path, milliseconds), slowest first
+        """
+        return sorted(self.import_times.items(), key=lambda item: item[1], reverse=True)
+    
+    def log_import_report(self) -> None:
+        """Log the import-time report."""
+        report = self.get_import_report()
+        total = sum(ms for _, ms in report)
+        logger.info(f"Agent plugin imports: {len(report)} modules, {total:.1f}ms total")
+        for module_path, ms in report:
+            logger.info(f"  {ms:>8.1f}ms  {module_path}")
+    
+    def discover_agents(self, exclude: Optional[Set[str]] = None) -> List[Type[BaseAgent]]:
         """
         Discover all agent classes in the agents directory.
         
         Searches for Python modules/packages in the agents directory and
         looks for classes that inherit from BaseAgent.
         
+        Args:
+            exclude: Module/package names to skip (e.g. lazily loaded plugins)
+        
         Returns:
             List of agent classes (not instances)
         """
@@ -56,6 +276,8 @@ class AgentLoader:
             # Skip __pycache__ and hidden files
             if path.name.startswith('_') or path.name.startswith('.'):
                 continue
+            if exclude and path.stem in exclude:
+                continue
             
             # Handle both .py files and directories (packages)
             if path.is_file() and path.suffix == '.py':
@@ -87,7 +309,7 @@ class AgentLoader:
         try:
             # Import the module
             module_path = f"src.agents.plugins.{module_name}"
-            module = importlib.import_module(module_path)
+            module = self._import_module(module_path)
             
             # Look for BaseAgent subclasses
             agent_class = self._find_agent_class_in_module(module)
@@ -117,7 +339,7 @@ class AgentLoader:
         try:
             # Import the package
             package_path = f"agents.{package_name}"
-            package = importlib.import_module(package_path)
+            package = self._import_module(package_path)
             
             # Look for BaseAgent subclasses
             agent_class = self._find_agent_class_in_module(package)
@@ -161,10 +383,31 @@ class AgentLoader:
         
         return None
     
+    def _create_lazy_agents(self, **agent_kwargs) -> List[LazyAgent]:
+        """Build LazyAgent proxies for the manifest entries whose module exists."""
+        lazy_agents: List[LazyAgent] = []
+        
+        def factory(entry: AgentManifestEntry) -> BaseAgent:
+            module = self._import_module(f"src.agents.plugins.{entry.module}")
+            agent = getattr(module, entry.class_name)(**agent_kwargs)
+            self._loaded_agents.add(entry.module)
+            logger.info(f"Lazily loaded agent '{entry.name}' from module '{entry.module}'")
+            return agent
+        
+        for entry in load_manifest(self.manifest_path):
+            if not ((self.agents_dir / f"{entry.module}.py").exists() or (self.agents_dir / entry.module).is_dir()):
+                logger.warning(f"Agent manifest module not found: {entry.module}")
+                continue
+            lazy_agents.append(LazyAgent(entry, factory))
+        return lazy_agents
+    
     def load_agents(self, instantiate: bool = True, **agent_kwargs) -> List[BaseAgent]:
         """
         Load all discovered agents.
         
+        With lazy=True, manifest-declared plugins are returned as LazyAgent
+        proxies and their modules are not imported here.
+        
         Args:
             instantiate: If True, return agent instances; if False, return classes
             **agent_kwargs: Keyword arguments to pass to agent constructors
@@ -172,13 +415,20 @@ class AgentLoader:
         Returns:
             List of agent instances or classes
         """
-        agent_classes = self.discover_agents()
-        
         if not instantiate:
-            return agent_classes
+            return self.discover_agents()
         
         agents: List[BaseAgent] = []
         
+        if self.lazy:
+            lazy_agents = self._create_lazy_agents(**agent_kwargs)
+            agents.extend(lazy_agents)
+            for agent in lazy_agents:
+                logger.info(f"Registered lazy agent: {agent.name}")
+            agent_classes = self.discover_agents(exclude={a.entry.module for a in lazy_agents})
+        else:
+            agent_classes = self.discover_agents()
+        
         for agent_class in agent_classes:
             try:
                 # Try to instantiate the agent
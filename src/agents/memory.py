@@ -4,11 +4,19 @@ Memory storage system for agents.
 Provides an abstract interface for storing and retrieving agent memory.
 Currently supports file-based and SQLite storage, with future support
 for Redis and vector databases.
+
+Async agents should use the *_async methods; AsyncSQLiteMemoryStore serves
+them from a read-through LRU and a dedicated writer thread.
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
 import json
+import queue
 import sqlite3
+import threading
 from pathlib import Path
 from loguru import logger
 
@@ -53,6 +61,27 @@ class MemoryStore(ABC):
         """
         pass
 
+    async def read_async(self, agent_name: str, user_id: str) -> Dict[str, Any]:
+        """
+        Async read. Defaults to running read() in the agent thread pool.
+        异步读取，默认在 Agent 线程池中执行 read()，避免阻塞事件循环。
+        """
+        from .base_agent import get_agent_executor
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_agent_executor(), self.read, agent_name, user_id)
+
+    async def write_async(self, agent_name: str, user_id: str, data: Dict[str, Any]) -> None:
+        """Async write. Defaults to running write() in the agent thread pool."""
+        from .base_agent import get_agent_executor
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(get_agent_executor(), self.write, agent_name, user_id, data)
+
+    async def delete_async(self, agent_name: str, user_id: str) -> None:
+        """Async delete. Defaults to running delete() in the agent thread pool."""
+        from .base_agent import get_agent_executor
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(get_agent_executor(), self.delete, agent_name, user_id)
+
 
 class FileMemoryStore(MemoryStore):
     """
@@ -203,6 +232,275 @@ class SQLiteMemoryStore(MemoryStore):
             logger.error(f"Error deleting memory from database: {e}")
 
 
+class AsyncSQLiteMemoryStore(MemoryStore):
+    """
+    SQLite memory storage with persistent connections and an async API.
+    持久连接 + 异步接口的 SQLite 记忆存储。
+
+    - WAL 模式：读连接不会被写事务阻塞
+    - 读写各一个长期连接，SQL 语句固定，由 sqlite3 的语句缓存复用预编译语句
+    - 专用写线程：写入 / 删除进入队列，按短事务批量提交，同一批内同一 key 只写最后一次
+    - 读穿透 LRU：命中时不访问数据库；写入立即更新缓存，读到的总是最新值
+
+    同步接口（read / write / delete）与 SQLiteMemoryStore 行为一致，write 会等待提交完成；
+    异步接口（read_async / write_async / delete_async）只在缓存未命中时才进入线程。
+    使用完毕调用 close() 以写入剩余数据并关闭连接。
+    """
+
+    _SELECT_SQL = "SELECT data FROM agent_memory WHERE agent_name = ? AND user_id = ?"
+    _UPSERT_SQL = """
+        INSERT INTO agent_memory (agent_name, user_id, data)
+        VALUES (?, ?, ?)
+        ON CONFLICT(agent_name, user_id)
+        DO UPDATE SET data = excluded.data, updated_at = CURRENT_TIMESTAMP
+    """
+    _DELETE_SQL = "DELETE FROM agent_memory WHERE agent_name = ? AND user_id = ?"
+
+    # 写队列结束标记
+    _STOP = object()
+
+    def __init__(
+        self,
+        db_path: str = "data/agent_memory.db",
+        cache_size: int = 1024,
+        max_batch: int = 256,
+        batch_window: float = 0.002,
+    ):
+        """
+        Initialize the store and start the writer thread.
+        初始化存储并启动写线程。
+
+        Args:
+            db_path: Path to SQLite database file / SQLite 数据库文件路径
+            cache_size: LRU 缓存的记忆条数（0 表示不缓存）
+            max_batch: 单个事务最多包含的写操作数
+            batch_window: 收到第一个写操作后等待更多写操作的时间（秒）
+        """
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        # (agent_name, user_id) → JSON 文本；None 表示已知不存在
+        self._cache: "OrderedDict[Tuple[str, str], Optional[str]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._metrics: Dict[str, int] = {
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "writes": 0,
+            "batches": 0,
+            "failed_batches": 0,
+        }
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._ready = threading.Event()
+        self._closed = False
+        self._writer = threading.Thread(target=self._writer_loop, name="agent-memory-writer", daemon=True)
+        self._writer.start()
+        self._ready.wait()
+
+        self._read_conn = self._connect()
+        self._read_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _init_db(self, conn: sqlite3.Connection) -> None:
+        """Initialize database schema (same table as SQLiteMemoryStore)."""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS agent_memory (
+                agent_name TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                data TEXT NOT NULL,
+                session_id TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (agent_name, user_id)
+            )
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_agent_user_session
+            ON agent_memory(agent_name, user_id, session_id)
+        """)
+
+    # ==================== 缓存 ====================
+
+    def _cache_get(self, key: Tuple[str, str]) -> Tuple[bool, Optional[str]]:
+        with self._cache_lock:
+            if key not in self._cache:
+                self._metrics["cache_misses"] += 1
+                return False, None
+            self._cache.move_to_end(key)
+            self._metrics["cache_hits"] += 1
+            return True, self._cache[key]
+
+    def _cache_put(self, key: Tuple[str, str], value: Optional[str], overwrite: bool = True) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            if not overwrite and key in self._cache:
+                # 读取期间有新的写入，保留较新的值
+                return
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _decode(value: Optional[str]) -> Dict[str, Any]:
+        return json.loads(value) if value else {}
+
+    # ==================== 读 ====================
+
+    def _read_db(self, key: Tuple[str, str]) -> Optional[str]:
+        with self._read_lock:
+            row = self._read_conn.execute(self._SELECT_SQL, key).fetchone()
+        return row[0] if row else None
+
+    def read(self, agent_name: str, user_id: str) -> Dict[str, Any]:
+        """Read memory (LRU first, then database)."""
+        key = (agent_name, user_id)
+        hit, value = self._cache_get(key)
+        try:
+            if not hit:
+                value = self._read_db(key)
+                self._cache_put(key, value, overwrite=False)
+            return self._decode(value)
+        except Exception as e:
+            logger.error(f"Error reading memory from database: {e}")
+            return {}
+
+    async def read_async(self, agent_name: str, user_id: str) -> Dict[str, Any]:
+        """Read memory without blocking the event loop on a cache miss."""
+        key = (agent_name, user_id)
+        hit, value = self._cache_get(key)
+        try:
+            if not hit:
+                value = await asyncio.to_thread(self._read_db, key)
+                self._cache_put(key, value, overwrite=False)
+            return self._decode(value)
+        except Exception as e:
+            logger.error(f"Error reading memory from database: {e}")
+            return {}
+
+    # ==================== 写 ====================
+
+    def _submit(self, key: Tuple[str, str], value: Optional[str]) -> Future:
+        """更新缓存并把写操作放入写线程队列（value 为 None 表示删除）"""
+        future: Future = Future()
+        if self._closed:
+            future.set_result(False)
+            return future
+        self._cache_put(key, value)
+        self._queue.put((key, value, future))
+        return future
+
+    def write(self, agent_name: str, user_id: str, data: Dict[str, Any]) -> None:
+        """Write memory and wait until it is committed."""
+        try:
+            self._submit((agent_name, user_id), json.dumps(data, ensure_ascii=False)).result()
+        except Exception as e:
+            logger.error(f"Error writing memory to database: {e}")
+
+    async def write_async(self, agent_name: str, user_id: str, data: Dict[str, Any]) -> None:
+        """Write memory; awaits the batched commit without blocking the loop."""
+        try:
+            await asyncio.wrap_future(self._submit((agent_name, user_id), json.dumps(data, ensure_ascii=False)))
+        except Exception as e:
+            logger.error(f"Error writing memory to database: {e}")
+
+    def delete(self, agent_name: str, user_id: str) -> None:
+        """Delete memory and wait until it is committed."""
+        try:
+            self._submit((agent_name, user_id), None).result()
+        except Exception as e:
+            logger.error(f"Error deleting memory from database: {e}")
+
+    async def delete_async(self, agent_name: str, user_id: str) -> None:
+        """Delete memory; awaits the batched commit without blocking the loop."""
+        try:
+            await asyncio.wrap_future(self._submit((agent_name, user_id), None))
+        except Exception as e:
+            logger.error(f"Error deleting memory from database: {e}")
+
+    def _writer_loop(self) -> None:
+        """写线程：按短事务批量执行队列中的写操作"""
+        conn = self._connect()
+        try:
+            self._init_db(conn)
+        finally:
+            self._ready.set()
+
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is self._STOP:
+                break
+            batch = [first]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=self.batch_window)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write_batch(conn, batch)
+        conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[Tuple[Tuple[str, str], Optional[str], Future]]) -> None:
+        # 同一 key 只保留最后一次写入
+        latest: Dict[Tuple[str, str], Optional[str]] = {}
+        for key, value, _ in batch:
+            latest[key] = value
+        upserts = [(*key, value) for key, value in latest.items() if value is not None]
+        deletes = [key for key, value in latest.items() if value is None]
+        try:
+            conn.execute("BEGIN")
+            if upserts:
+                conn.executemany(self._UPSERT_SQL, upserts)
+            if deletes:
+                conn.executemany(self._DELETE_SQL, deletes)
+            conn.execute("COMMIT")
+        except Exception as e:
+            conn.rollback()
+            self._metrics["failed_batches"] += 1
+            logger.error(f"Error writing memory batch to database ({len(batch)} ops): {e}")
+            # 缓存可能已与数据库不一致，清除本批涉及的 key
+            with self._cache_lock:
+                for key in latest:
+                    self._cache.pop(key, None)
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        self._metrics["writes"] += len(batch)
+        self._metrics["batches"] += 1
+        for _, _, future in batch:
+            future.set_result(True)
+
+    # ==================== 生命周期 ====================
+
+    def get_stats(self) -> Dict[str, int]:
+        """Cache and writer metrics / 缓存与写入指标"""
+        return {**self._metrics, "cached": len(self._cache), "queued": self._queue.qsize()}
+
+    def close(self) -> None:
+        """Flush pending writes and close connections / 写入剩余数据并关闭连接"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(self._STOP)
+        self._writer.join()
+        with self._read_lock:
+            self._read_conn.close()
+
+
 class InMemoryStore(MemoryStore):
     """
     In-memory storage for short-term session context.
@@ -13,10 +13,11 @@ from datetime import datetime
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
+import asyncio
 import json
 from loguru import logger
 
-from .base_agent import BaseAgent
+from .base_agent import BaseAgent, respond_with_timeout
 from .models import Message, ChatContext, AgentResponse
 from .router import Router, RouterConfig
 
@@ -55,6 +56,11 @@ class MemoryAnalysis:
     raw_date_expression: Optional[str] = None
 
 
+# System Prompt 布局
+PROMPT_LAYOUT_LEGACY = "legacy"
+PROMPT_LAYOUT_STATIC_FIRST = "static_first"
+
+
 @dataclass
 class OrchestratorResult:
     """编排器处理结果"""
@@ -172,13 +178,38 @@ class AgentOrchestrator:
 {current_time}
 【再次强调】
 无论历史对话是什么格式，你都必须输出为JSON格式
+"""
+
+    # 统一分析 System Prompt 中位于人设前后的固定片段
+    _PERSONA_HEADER = """
+=========================
+基础人设定义
+=========================
+"""
+    _TASK_HEADER = """
+=========================
+📋 任务指令
+=========================
+【最高优先级】你必须且只能输出 JSON 格式。
+上方的对话记录仅用于理解上下文，绝对不要模仿其格式。
+你的输出必须是可被 json.loads() 直接解析的 JSON 对象。
+
+"""
+
+    # 静态优先布局中，用户记忆与本轮上下文的标题
+    _USER_CONTEXT_HEADER = """
+=========================
+用户上下文
+=========================
 """
 
     def __init__(
             self,
             agents: List[BaseAgent],
             llm_provider=None,
-            enable_unified_mode: bool = True
+            enable_unified_mode: bool = True,
+            prompt_layout: str = PROMPT_LAYOUT_LEGACY,
+            agent_timeout: Optional[float] = None
     ):
         """
         初始化编排器
@@ -187,19 +218,30 @@ class AgentOrchestrator:
             agents: 可用的Agent列表
             llm_provider: LLM提供者实例（用于意图识别和最终决策）
             enable_unified_mode: 是否启用统一分析模式
+            prompt_layout: System Prompt 布局，legacy 或 static_first
+            agent_timeout: 单个Agent的响应超时（秒），None 表示不限制
         """
         self.agents = {agent.name: agent for agent in agents}
         self.llm_provider = llm_provider
         self.enable_unified_mode = enable_unified_mode
+        self.prompt_layout = prompt_layout
+        self.agent_timeout = agent_timeout
 
         # 构建Agent能力描述
         self._capabilities = self._build_capabilities()
+        # 预编译任务指令（Agent 能力在编排器生命周期内不变）
+        self._task_prompt_head, self._task_prompt_tail = self._compile_task_prompt()
+        # 静态优先布局：【当前时间】及之后的内容移到用户上下文之后
+        time_index = self._task_prompt_head.rfind("【当前时间】")
+        self._static_task_prompt = self._task_prompt_head[:time_index]
+        self._time_prompt_head = self._task_prompt_head[time_index:]
 
         # 创建内部Router用于基于置信度的Agent选择
         self._router = Router(agents, RouterConfig(
             min_confidence=0.3,
             max_agents=5,
-            enable_parallel=True
+            enable_parallel=True,
+            agent_timeout=agent_timeout
         ))
 
         logger.info(f"AgentOrchestrator初始化完成，加载了{len(self.agents)}个Agent")
@@ -220,30 +262,7 @@ class AgentOrchestrator:
 
             # 1. 构建增强的 System Prompt
             # 包含：Bot人设 + 用户记忆 + 对话策略 + UNIFIED_PROMPT_TEMPLATE任务要求 + 返回格式
-            base_system_prompt = context.system_prompt if context and context.system_prompt else ""
-
-            # 将 UNIFIED_PROMPT_TEMPLATE 整合到 System Prompt 中
-            unified_task_prompt = self.UNIFIED_PROMPT_TEMPLATE.format(
-                agent_capabilities=self._get_capabilities_prompt(),
-                system_prompt="（参见上方的人设设定）",
-                current_time=datetime.now().strftime("%Y年%m月%d日 %H:%M"),
-            )
-            # 组合完整的 System Prompt
-            # base_system_prompt 已包含：人设 + 记忆 + 策略 + 对话历史提示
-            # unified_task_prompt 包含：任务要求 + 返回格式
-            enhanced_system_prompt = f"""
-=========================
-基础人设定义
-=========================
-{base_system_prompt}
-=========================
-📋 任务指令
-=========================
-【最高优先级】你必须且只能输出 JSON 格式。
-上方的对话记录仅用于理解上下文，绝对不要模仿其格式。
-你的输出必须是可被 json.loads() 直接解析的 JSON 对象。
-
-{unified_task_prompt}"""
+            enhanced_system_prompt = self.assemble_system_prompt(context)
             messages.append({
                 "role": "system",
                 "content": enhanced_system_prompt
@@ -396,6 +415,60 @@ class AgentOrchestrator:
             capabilities.append(cap)
         return capabilities
 
+    def assemble_system_prompt(self, context: Optional[ChatContext]) -> str:
+        """
+        拼接统一分析的 System Prompt
+
+        - legacy：人设（含记忆、历史、策略）→ 任务指令 → 当前时间
+        - static_first：人设 / 任务指令 / 输出格式 → 用户记忆 → 本轮上下文 → 当前时间，
+          同一 Bot 的所有请求共享最长的相同前缀，便于 vLLM 自动前缀缓存复用
+
+        上下文未提供分段内容时按 legacy 布局拼接。
+        """
+        current_time = datetime.now().strftime("%Y年%m月%d日 %H:%M")
+        sections = context.prompt_sections if context else None
+        if self.prompt_layout == PROMPT_LAYOUT_STATIC_FIRST and sections:
+            return "".join((
+                self._PERSONA_HEADER,
+                sections.get("static", ""),
+                self._static_task_prompt,
+                self._USER_CONTEXT_HEADER,
+                sections.get("semi_static", ""),
+                "\n\n",
+                sections.get("dynamic", ""),
+                "\n\n",
+                self._time_prompt_head,
+                current_time,
+                self._task_prompt_tail,
+            ))
+
+        # base_system_prompt 已包含：人设 + 记忆 + 策略 + 对话历史提示
+        base_system_prompt = context.system_prompt if context and context.system_prompt else ""
+        return "".join((
+            self._PERSONA_HEADER,
+            base_system_prompt,
+            self._task_prompt_head,
+            current_time,
+            self._task_prompt_tail,
+        ))
+
+    def _compile_task_prompt(self) -> Tuple[str, str]:
+        """
+        预渲染 UNIFIED_PROMPT_TEMPLATE
+
+        Agent 能力描述只渲染一次，模板按 {current_time} 拆成前后两段，
+        每次请求只需拼接当前时间。
+
+        Returns:
+            (人设之后、当前时间之前的片段, 当前时间之后的片段)
+        """
+        rendered = self.UNIFIED_PROMPT_TEMPLATE.format(
+            agent_capabilities=self._get_capabilities_prompt(),
+            current_time="{current_time}",
+        )
+        head, tail = rendered.split("{current_time}", 1)
+        return self._TASK_HEADER + head, tail
+
     def _get_capabilities_prompt(self) -> str:
         """生成Agent能力描述的提示词，仅使用 description 供 LLM 语义匹配"""
         cap_list = []
@@ -412,24 +485,28 @@ class AgentOrchestrator:
         """
         执行指定的Agent并收集响应
         
+        各Agent相互独立，并发执行；单个Agent超时或出错时跳过，不影响其他Agent。
+        
         Args:
             message: 用户消息
             context: 对话上下文
             agent_names: 要执行的Agent名称列表
             
         Returns:
-            List[AgentResponse]: Agent响应列表
+            List[AgentResponse]: Agent响应列表（与 agent_names 顺序一致）
         """
-        responses = []
-
+        agents = []
         for agent_name in agent_names:
             if agent_name not in self.agents:
                 logger.warning(f"Agent未找到: {agent_name}")
                 continue
-            agent = self.agents[agent_name]
-            response = agent.respond(message, context)
-            responses.append(response)
-        return responses
+            agents.append(self.agents[agent_name])
+
+        results = await asyncio.gather(*(
+            respond_with_timeout(agent, message, context, self.agent_timeout)
+            for agent in agents
+        ))
+        return [response for response in results if response is not None]
 
     async def process(
             self,
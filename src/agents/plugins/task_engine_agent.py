@@ -1,12 +1,13 @@
 """
 TaskEngine Agent - 任务引擎与 Agent 系统的桥接
 
-将 TaskEngine 异步执行能力桥接到 BaseAgent 同步接口。
+将 TaskEngine 异步执行能力接入 BaseAgent 接口。
 Agent 的选择完全由 LLM 根据 self._description 语义匹配决定，
 不使用关键词列表或硬编码判断逻辑。
 
-同步 Agent 接口中桥接异步 TaskEngine.run()
-返回最终自然语言结果
+后台任务队列已启动时，任务提交到队列后立即返回任务 ID，
+进度与结果由队列推送到聊天；否则在 respond_async() 中直接 await TaskEngine.run()，
+返回最终自然语言结果。同步 respond() 仅供事件循环之外的调用方使用
 """
 import asyncio
 from typing import Any, Dict, List, Optional
@@ -16,6 +17,7 @@ from loguru import logger
 from src.agents.base_agent import BaseAgent
 from src.agents.models import AgentResponse, ChatContext, Message
 
+from src.services.task_queue import get_running_task_queue
 from task_engine import TaskEngine
 
 
@@ -27,6 +29,9 @@ class TaskEngineAgent(BaseAgent):
     Agent 选择完全由 LLM 基于 self._description 自主决定。
     """
 
+    # can_handle() 只检查 @提及，Router 可缓存置信度
+    can_handle_is_pure = True
+
     def __init__(self, memory_store=None, **kwargs) -> None:
         self._name = "TaskEngineAgent"
         self._description = (
@@ -46,17 +51,32 @@ class TaskEngineAgent(BaseAgent):
         return self._description
 
 
-    def respond(self, message: Message, context: ChatContext) -> AgentResponse:
+    async def respond_async(self, message: Message, context: ChatContext) -> AgentResponse:
         """
         执行桌面操控任务并返回结果
 
-        通过 asyncio 桥接异步 TaskEngine.run()
+        在事件循环中直接 await TaskEngine.run()，不占用线程也不阻塞其他聊天
         """
-        user_input = message.get_clean_content()
+        user_input = self._begin(message)
 
-        logger.debug(f"🚀 [TaskEngineAgent] ===== 开始处理 =====")
-        logger.debug(f"🚀 [TaskEngineAgent] 输入: {user_input}")
-        logger.debug(f"🚀 [TaskEngineAgent] 决策: 由 LLM 编排器分配到 TaskEngineAgent")
+        task_queue = get_running_task_queue()
+        if task_queue is not None:
+            return self._submit_to_queue(task_queue, message, user_input)
+
+        result_text = await self._engine.run(user_input)
+        return self._build_response(user_input, result_text)
+
+    def respond(self, message: Message, context: ChatContext) -> AgentResponse:
+        """
+        执行桌面操控任务并返回结果（同步接口）
+
+        通过 asyncio 桥接异步 TaskEngine.run()；事件循环中应使用 respond_async()
+        """
+        user_input = self._begin(message)
+
+        task_queue = get_running_task_queue()
+        if task_queue is not None:
+            return self._submit_to_queue(task_queue, message, user_input)
 
         # 桥接异步 TaskEngine
         try:
@@ -73,6 +93,19 @@ class TaskEngineAgent(BaseAgent):
         else:
             result_text = asyncio.run(self._engine.run(user_input))
 
+        return self._build_response(user_input, result_text)
+
+    def _begin(self, message: Message) -> str:
+        """记录开始日志并返回任务输入"""
+        user_input = message.get_clean_content()
+
+        logger.debug(f"🚀 [TaskEngineAgent] ===== 开始处理 =====")
+        logger.debug(f"🚀 [TaskEngineAgent] 输入: {user_input}")
+        logger.debug(f"🚀 [TaskEngineAgent] 决策: 由 LLM 编排器分配到 TaskEngineAgent")
+        return user_input
+
+    def _build_response(self, user_input: str, result_text: str) -> AgentResponse:
+        """包装 TaskEngine 的执行结果"""
         logger.debug(f"📤 [TaskEngineAgent] 输出: {result_text}")
         logger.debug(f"🏁 [TaskEngineAgent] ===== 处理结束 =====")
 
@@ -84,6 +117,26 @@ class TaskEngineAgent(BaseAgent):
             should_continue=False,
         )
 
+    def _submit_to_queue(self, task_queue, message: Message, user_input: str) -> AgentResponse:
+        """提交到后台任务队列，立即返回任务 ID"""
+        task_id = task_queue.submit(
+            user_id=message.user_id,
+            chat_id=message.chat_id,
+            user_input=user_input,
+            bot_id=message.metadata.get("bot_id"),
+        )
+        logger.debug(f"📤 [TaskEngineAgent] 已提交后台任务: {task_id}")
+        return AgentResponse(
+            content=(
+                f"好的，任务已在后台开始执行（任务ID：{task_id}），完成后会把结果发给你。"
+                f"如需取消，发送 /cancel_task {task_id}"
+            ),
+            agent_name=self.name,
+            confidence=0.9,
+            metadata={"task_type": "desktop", "user_input": user_input, "task_id": task_id},
+            should_continue=False,
+        )
+
     def can_handle(self, message: Message, context: ChatContext) -> float:
         """
         返回基础置信度，实际选择由编排器中的 LLM 根据 description 决定。
@@ -7,15 +7,20 @@ Router负责智能地将用户消息路由到最合适的Agent：
 - 根据配置策略选择Agent
 - 管理并行执行
 - 合并并返回响应
+
+路由开销不随用户数增长：
+- 声明 can_handle_is_pure 的Agent，置信度按 (Agent, 文本, @提及) 缓存在有界 LRU 中
+- 冷却记录存放在时间轮中，过期的记录在推进时间轮时成槽清除
 """
-from typing import List, Optional, Dict, Any, Callable, Tuple
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Callable, Set, Tuple
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta, timezone
 import asyncio
+import time
 from loguru import logger
 
 from .models import Message, ChatContext, AgentResponse
-from .base_agent import BaseAgent
+from .base_agent import BaseAgent, respond_with_timeout
 
 
 @dataclass
@@ -30,6 +35,8 @@ class RouterConfig:
         enable_parallel: 是否启用并行执行（允许多个Agent同时处理）
         cooldown_seconds: 同一Agent对同一用户的最小响应间隔（秒）
         fallback_agent_name: 当没有Agent满足阈值时的备用Agent名称
+        agent_timeout: route_async() 中单个Agent的响应超时（秒），None 表示不限制
+        confidence_cache_size: 置信度缓存的最大条目数，0 表示不缓存
         
     使用示例:
         configs = RouterConfig(
@@ -44,6 +51,8 @@ class RouterConfig:
     enable_parallel: bool = False
     cooldown_seconds: float = 0.0
     fallback_agent_name: Optional[str] = None
+    agent_timeout: Optional[float] = None
+    confidence_cache_size: int = 1024
     
     def __post_init__(self):
         """验证配置参数的有效性"""
@@ -51,6 +60,128 @@ class RouterConfig:
             raise ValueError(f"min_confidence必须在0.0-1.0之间，当前值: {self.min_confidence}")
         if self.max_agents < 1:
             raise ValueError(f"max_agents必须至少为1，当前值: {self.max_agents}")
+        if self.confidence_cache_size < 0:
+            raise ValueError(f"confidence_cache_size不能为负数，当前值: {self.confidence_cache_size}")
+
+
+ConfidenceKey = Tuple[str, str, Tuple[str, ...]]
+
+
+class ConfidenceCache:
+    """
+    can_handle() 置信度的 LRU 缓存
+    
+    只缓存声明了 can_handle_is_pure 的Agent：它们的置信度只取决于消息文本与 @提及，
+    同一条消息（如群聊中的重复问候、固定指令）无需再次计算。
+    """
+    
+    def __init__(self, max_size: int = 1024):
+        """
+        参数:
+            max_size: 最大条目数，超出后淘汰最久未使用的条目
+        """
+        self.max_size = max_size
+        self._entries: "OrderedDict[ConfidenceKey, float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    @staticmethod
+    def key(agent_name: str, message: Message) -> ConfidenceKey:
+        """缓存键：Agent名称 + 消息文本 + 元数据中的 @提及"""
+        mentions = message.metadata.get("mentions") or ()
+        return agent_name, message.content, tuple(mentions)
+    
+    def get(self, key: ConfidenceKey) -> Optional[float]:
+        """读取缓存的置信度，未命中返回 None"""
+        confidence = self._entries.get(key)
+        if confidence is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return confidence
+    
+    def put(self, key: ConfidenceKey, confidence: float) -> None:
+        """写入置信度"""
+        self._entries[key] = confidence
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self, agent_name: Optional[str] = None) -> None:
+        """清除某个Agent（None 表示全部）的缓存条目"""
+        if agent_name is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] == agent_name]:
+            del self._entries[key]
+
+
+class CooldownStore:
+    """
+    基于时间轮的冷却记录
+    
+    每条 (agent_name, user_id) 记录按到期时间放入时间轮的一个槽，每个槽覆盖 ttl/(slots-2) 秒。
+    每次读写时推进时间轮，整体过期的槽被直接清空，因此内存只与冷却窗口内
+    有过响应的用户数成正比，不会随总用户数增长。
+    """
+    
+    def __init__(self, ttl: float, slots: int = 64, clock: Callable[[], float] = time.monotonic):
+        """
+        参数:
+            ttl: 冷却时间（秒），必须大于 0
+            slots: 时间轮槽数（至少 3）
+            clock: 单调时钟（测试时可替换）
+        """
+        if ttl <= 0:
+            raise ValueError(f"ttl必须大于0，当前值: {ttl}")
+        slots = max(slots, 3)
+        self.ttl = ttl
+        self._clock = clock
+        # 到期时间最多比当前时间晚 slots-2 个槽，不会落回当前槽
+        self._tick = ttl / (slots - 2)
+        self._slots: List[Set[Tuple[str, str]]] = [set() for _ in range(slots)]
+        self._expires: Dict[Tuple[str, str], float] = {}
+        self._last_tick = int(clock() // self._tick)
+    
+    def __len__(self) -> int:
+        return len(self._expires)
+    
+    def _slot(self, expires_at: float) -> Set[Tuple[str, str]]:
+        return self._slots[int(expires_at // self._tick) % len(self._slots)]
+    
+    def _advance(self, now: float) -> None:
+        """清空 [上次推进, 当前) 之间已经整体过期的槽"""
+        current = int(now // self._tick)
+        steps = min(current - self._last_tick, len(self._slots))
+        for tick in range(self._last_tick, self._last_tick + steps):
+            slot = self._slots[tick % len(self._slots)]
+            for key in slot:
+                del self._expires[key]
+            slot.clear()
+        self._last_tick = max(self._last_tick, current)
+    
+    def is_cooling(self, agent_name: str, user_id: str) -> bool:
+        """该Agent对该用户是否仍在冷却中"""
+        now = self._clock()
+        self._advance(now)
+        expires_at = self._expires.get((agent_name, user_id))
+        return expires_at is not None and expires_at > now
+    
+    def touch(self, agent_name: str, user_id: str) -> None:
+        """记录一次响应，冷却从现在开始计算"""
+        now = self._clock()
+        self._advance(now)
+        key = (agent_name, user_id)
+        previous = self._expires.get(key)
+        if previous is not None:
+            self._slot(previous).discard(key)
+        expires_at = now + self.ttl
+        self._expires[key] = expires_at
+        self._slot(expires_at).add(key)
 
 
 class Router:
@@ -91,8 +222,14 @@ class Router:
         # 使用Agent名称作为key构建字典，便于快速查找
         self.agents = {agent.name: agent for agent in agents}
         self.config = config or RouterConfig()
-        # 记录每个Agent对每个用户的最后响应时间（用于冷却）
-        self._last_response_times: Dict[str, Dict[str, datetime]] = {}
+        # 每个Agent对每个用户的冷却记录（冷却时间为 0 时不记录）
+        self._cooldowns: Optional[CooldownStore] = (
+            CooldownStore(self.config.cooldown_seconds) if self.config.cooldown_seconds > 0 else None
+        )
+        # 纯函数 can_handle() 的置信度缓存
+        self._confidence_cache: Optional[ConfidenceCache] = (
+            ConfidenceCache(self.config.confidence_cache_size) if self.config.confidence_cache_size > 0 else None
+        )
         
         logger.info(f"Router初始化完成，加载了 {len(self.agents)} 个Agent")
         logger.info(f"Router配置: {self.config}")
@@ -111,6 +248,8 @@ class Router:
             logger.warning(f"Agent '{agent.name}' already exists, replacing")
         
         self.agents[agent.name] = agent
+        if self._confidence_cache is not None:
+            self._confidence_cache.invalidate(agent.name)
         logger.info(f"Added agent: {agent.name}")
     
     def remove_agent(self, agent_name: str) -> bool:
@@ -125,6 +264,8 @@ class Router:
         """
         if agent_name in self.agents:
             del self.agents[agent_name]
+            if self._confidence_cache is not None:
+                self._confidence_cache.invalidate(agent_name)
             logger.info(f"移除Agent: {agent_name}")
             return True
         return False
@@ -169,26 +310,51 @@ class Router:
         Returns:
             True if cooldown has passed, False if still in cooldown
         """
-        if self.config.cooldown_seconds <= 0:
-            return True
-        
-        if agent_name not in self._last_response_times:
-            return True
-        
-        if user_id not in self._last_response_times[agent_name]:
+        if self._cooldowns is None:
             return True
-        
-        last_time = self._last_response_times[agent_name][user_id]
-        elapsed = (datetime.now(timezone.utc) - last_time).total_seconds()
-        
-        return elapsed >= self.config.cooldown_seconds
+        return not self._cooldowns.is_cooling(agent_name, user_id)
     
     def _update_cooldown(self, agent_name: str, user_id: str) -> None:
         """Update the last response time for cooldown tracking."""
-        if agent_name not in self._last_response_times:
-            self._last_response_times[agent_name] = {}
+        if self._cooldowns is not None:
+            self._cooldowns.touch(agent_name, user_id)
+    
+    def _get_confidence(self, agent: BaseAgent, message: Message, context: ChatContext) -> float:
+        """
+        获取Agent的置信度（已校正到 [0.0, 1.0]）
         
-        self._last_response_times[agent_name][user_id] = datetime.now(timezone.utc)
+        can_handle_is_pure 的Agent先查缓存；can_handle() 抛出的异常不缓存，由调用方处理。
+        """
+        cache = self._confidence_cache if agent.can_handle_is_pure else None
+        if cache is not None:
+            key = ConfidenceCache.key(agent.name, message)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        
+        confidence = agent.can_handle(message, context)
+        
+        # Validate confidence score
+        if not 0.0 <= confidence <= 1.0:
+            logger.warning(
+                f"Agent {agent.name} returned invalid confidence {confidence}, "
+                f"clamping to [0.0, 1.0]"
+            )
+            confidence = max(0.0, min(1.0, confidence))
+        
+        if cache is not None:
+            cache.put(key, confidence)
+        return confidence
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """路由缓存与冷却记录的统计信息"""
+        cache = self._confidence_cache
+        return {
+            "confidence_cache_size": len(cache) if cache is not None else 0,
+            "confidence_cache_hits": cache.hits if cache is not None else 0,
+            "confidence_cache_misses": cache.misses if cache is not None else 0,
+            "cooldown_entries": len(self._cooldowns) if self._cooldowns is not None else 0,
+        }
     
     def select_agents(
         self,
@@ -230,15 +396,7 @@ class Router:
                 continue
             
             try:
-                confidence = agent.can_handle(message, context)
-                
-                # Validate confidence score
-                if not 0.0 <= confidence <= 1.0:
-                    logger.warning(
-                        f"Agent {agent_name} returned invalid confidence {confidence}, "
-                        f"clamping to [0.0, 1.0]"
-                    )
-                    confidence = max(0.0, min(1.0, confidence))
+                confidence = self._get_confidence(agent, message, context)
                 
                 logger.debug(f"Agent {agent_name} confidence: {confidence:.2f}")
                 
@@ -296,37 +454,32 @@ class Router:
             # Execute agents in parallel
             logger.info(f"Executing {len(selected_agents)} agents in parallel")
             
-            async def get_response(agent: BaseAgent) -> Optional[AgentResponse]:
-                try:
-                    # Run synchronous respond() in thread pool
-                    loop = asyncio.get_event_loop()
-                    return await loop.run_in_executor(None, agent.respond, message, context)
-                except Exception as e:
-                    logger.error(f"Error getting response from agent {agent.name}: {e}")
-                    return None
-            
-            tasks = [get_response(agent) for agent, _ in selected_agents]
+            tasks = [
+                respond_with_timeout(agent, message, context, self.config.agent_timeout)
+                for agent, _ in selected_agents
+            ]
             results = await asyncio.gather(*tasks)
             
             responses = [r for r in results if r is not None]
+            for (agent, _), result in zip(selected_agents, results):
+                if result is not None:
+                    self._update_cooldown(agent.name, message.user_id)
         else:
             # Execute agents sequentially
             for agent, confidence in selected_agents:
-                try:
-                    logger.info(f"Getting response from agent: {agent.name}")
-                    response = agent.respond(message, context)
-                    responses.append(response)
-                    
-                    # Update cooldown
-                    self._update_cooldown(agent.name, message.user_id)
-                    
-                    # Check if we should stop (agent says no other agents should respond)
-                    if not response.should_continue:
-                        logger.info(f"Agent {agent.name} requested exclusive response")
-                        break
-                        
-                except Exception as e:
-                    logger.error(f"Error getting response from agent {agent.name}: {e}")
+                logger.info(f"Getting response from agent: {agent.name}")
+                response = await respond_with_timeout(agent, message, context, self.config.agent_timeout)
+                if response is None:
+                    continue
+                responses.append(response)
+                
+                # Update cooldown
+                self._update_cooldown(agent.name, message.user_id)
+                
+                # Check if we should stop (agent says no other agents should respond)
+                if not response.should_continue:
+                    logger.info(f"Agent {agent.name} requested exclusive response")
+                    break
         
         # Sort responses by confidence (highest first) for deterministic ordering
         responses.sort(key=lambda r: r.confidence, reverse=True)
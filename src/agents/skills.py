@@ -10,7 +10,8 @@ Skills System for Token-Efficient Selection
 3. 处理用户选择回调
 4. 与Agent系统集成
 """
-from typing import List, Dict, Any, Optional, Callable
+from collections import deque
+from typing import List, Dict, Any, Optional, Callable, Set, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 from loguru import logger
@@ -59,6 +60,107 @@ class Skill:
         }
 
 
+class KeywordIndex:
+    """
+    技能关键词索引（Aho-Corasick 自动机）
+    
+    把所有技能的小写关键词编译为一个自动机，对输入文本只扫描一遍即可找出全部命中的关键词，
+    耗时与技能数量基本无关。评分与逐个 `keyword in text` 的结果一致：
+    技能的每个关键词（含重复项）出现在文本中即计 1 分。
+    """
+    
+    def __init__(self, skills: List[Skill]):
+        """
+        编译关键词索引
+        
+        Args:
+            skills: 按注册顺序排列的技能（包括未激活的技能，激活状态在匹配时检查）
+        """
+        # 自动机：状态转移、失败指针、每个状态命中的关键词编号
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+        # 关键词编号 → [(技能在注册顺序中的位置, 该关键词在技能中出现的次数)]
+        self._keyword_skills: List[List[Tuple[int, int]]] = []
+        # 空关键词总是命中（与 "" in text 一致）
+        self._always: Dict[int, int] = {}
+        self._skills = skills
+        
+        keyword_ids: Dict[str, int] = {}
+        for position, skill in enumerate(skills):
+            counts: Dict[str, int] = {}
+            for keyword in skill.keywords:
+                keyword = keyword.lower()
+                counts[keyword] = counts.get(keyword, 0) + 1
+            for keyword, count in counts.items():
+                if not keyword:
+                    self._always[position] = count
+                    continue
+                if keyword not in keyword_ids:
+                    keyword_ids[keyword] = len(self._keyword_skills)
+                    self._keyword_skills.append([])
+                    self._add_keyword(keyword, keyword_ids[keyword])
+                self._keyword_skills[keyword_ids[keyword]].append((position, count))
+        self._build_fail_links()
+    
+    def _add_keyword(self, keyword: str, keyword_id: int) -> None:
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] = self._output[state] + (keyword_id,)
+    
+    def _build_fail_links(self) -> None:
+        """广度优先计算失败指针，并把后缀状态的命中合并到当前状态"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail_next = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail_next if fail_next != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+    
+    def find_keywords(self, text: str) -> Set[int]:
+        """扫描一遍小写文本，返回命中的关键词编号"""
+        goto, fail, output = self._goto, self._fail, self._output
+        found: Set[int] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+    
+    def match(self, text: str) -> List[Tuple[Skill, int]]:
+        """
+        返回激活技能的 (技能, 分数)，按注册顺序排列
+        
+        Args:
+            text: 用户输入文本（内部转为小写）
+        """
+        scores: Dict[int, int] = dict(self._always)
+        for keyword_id in self.find_keywords(text.lower()):
+            for position, count in self._keyword_skills[keyword_id]:
+                scores[position] = scores.get(position, 0) + count
+        return [
+            (self._skills[position], scores[position])
+            for position in sorted(scores)
+            if self._skills[position].is_active
+        ]
+
+
 class SkillRegistry:
     """
     技能注册表
@@ -70,6 +172,8 @@ class SkillRegistry:
         """初始化技能注册表"""
         self._skills: Dict[str, Skill] = {}
         self._category_skills: Dict[SkillCategory, List[str]] = {}
+        # 关键词索引，注册 / 注销后失效，下次匹配时重建
+        self._keyword_index: Optional[KeywordIndex] = None
 
     def register(self, skill: Skill) -> None:
         """
@@ -85,6 +189,7 @@ class SkillRegistry:
             self._category_skills[skill.category] = []
         if skill.id not in self._category_skills[skill.category]:
             self._category_skills[skill.category].append(skill.id)
+        self._keyword_index = None
         
         logger.info(f"注册技能: {skill.id} ({skill.name})")
     
@@ -106,6 +211,7 @@ class SkillRegistry:
             if skill.category in self._category_skills:
                 if skill_id in self._category_skills[skill.category]:
                     self._category_skills[skill.category].remove(skill_id)
+            self._keyword_index = None
             
             logger.info(f"注销技能: {skill_id}")
             return True
@@ -148,25 +254,29 @@ class SkillRegistry:
         Returns:
             List[Skill]: 匹配的技能列表
         """
-        text_lower = text.lower()
-        matches = []
+        return [skill for skill, _ in self.match_skills_scored(text, top_n)]
+    
+    def match_skills_scored(self, text: str, top_n: int = 3) -> List[Tuple[Skill, int]]:
+        """
+        根据文本内容匹配技能并返回分数
         
-        for skill in self._skills.values():
-            if not skill.is_active:
-                continue
-            
-            score = 0
-            for keyword in skill.keywords:
-                if keyword.lower() in text_lower:
-                    score += 1
+        关键词索引在注册 / 注销后重建；直接修改已注册技能的 keywords 后需要重新 register。
+        
+        Args:
+            text: 用户输入文本
+            top_n: 返回前N个匹配的技能
             
-            if score > 0:
-                matches.append((skill, score))
+        Returns:
+            List[Tuple[Skill, int]]: (技能, 命中的关键词数)，按分数与优先级排序
+        """
+        if self._keyword_index is None:
+            self._keyword_index = KeywordIndex(list(self._skills.values()))
+        matches = self._keyword_index.match(text)
         
         # 按匹配分数排序
         matches.sort(key=lambda x: (-x[1], -x[0].priority))
         
-        return [m[0] for m in matches[:top_n]]
+        return matches[:top_n]
 
 
 class SkillButtonGenerator:
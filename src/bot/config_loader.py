@@ -215,6 +215,28 @@ class BotConfig:
     version: str = "1.0.0"
     config_path: Optional[Path] = None
 
+    # 提示词相关配置的版本指纹（首次使用时计算）
+    _prompt_version: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def prompt_version(self) -> str:
+        """
+        提示词配置版本
+
+        由元数据版本与 prompt / personality / values 的内容指纹组成，
+        用作预编译提示词缓存的键。原地修改这些配置后需调用 invalidate_prompt()。
+        """
+        if self._prompt_version is None:
+            from src.conversation.prompt_cache import config_fingerprint
+
+            fingerprint = config_fingerprint(self.prompt, self.personality, self.values)
+            self._prompt_version = f"{self.version}:{fingerprint}"
+        return self._prompt_version
+
+    def invalidate_prompt(self) -> None:
+        """原地修改提示词相关配置后调用，下次获取时重新计算版本并重新渲染"""
+        self._prompt_version = None
+
     def _build_personality_prompt(self) -> str:
         """
         从personality配置构建人设提示词
@@ -370,6 +392,19 @@ class BotConfig:
         """
         获取最终的系统提示词
 
+        渲染结果按 prompt_version 缓存，配置不变时直接返回预编译的提示词。
+
+        Returns:
+            完整的系统提示词字符串
+        """
+        from src.conversation.prompt_cache import get_prompt_cache
+
+        return get_prompt_cache().get(("system_prompt", self.prompt_version), self._render_system_prompt)
+
+    def _render_system_prompt(self) -> str:
+        """
+        渲染系统提示词
+
         优先级：
         1. 自定义提示词 (prompt.custom) - 如果存在则直接使用
         2. 模板 + 变量 (prompt.template + prompt.variables) - 使用模板渲染
@@ -4,11 +4,13 @@ Conversation Module - 多轮对话管理
 提供：
 - 会话管理
 - Prompt模板管理
+- 预编译提示词缓存
 - 上下文窗口管理
 """
 
 from .session_manager import SessionManager, Session, Message, get_session_manager
 from .prompt_template import PromptTemplate, PromptTemplateManager, get_template_manager
+from .prompt_cache import PromptCache, get_prompt_cache
 from .context_manager import ContextManager, ContextWindow, get_context_manager
 
 __all__ = [
@@ -19,6 +21,8 @@ __all__ = [
     'PromptTemplate',
     'PromptTemplateManager',
     'get_template_manager',
+    'PromptCache',
+    'get_prompt_cache',
     'ContextManager',
     'ContextWindow',
     'get_context_manager',
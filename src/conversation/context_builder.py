@@ -65,6 +65,87 @@ class BuilderResult:
     metadata: Dict[str, Any] = field(default_factory=dict)  # 元数据
 
 
+# 记忆块标题
+_MEMORY_BLOCK_HEADER = """
+=========================
+对话相关记忆
+=========================
+"""
+
+# 对话策略块标题与固定的安全对话策略
+_STRATEGY_BLOCK_HEADER = """
+=========================
+对话策略管理
+=========================
+** 注意对话记录的时间和任务，回复是需要保持事件的一致性和时间的连贯性 **
+
+'【安全对话策略】\n'
+'**需要主动回避的话题**：'
+'-政治话题'
+'-歧视内容'
+'-暴力内容'
+'-未成年性内容'
+'-人身攻击'
+
+'**高度警惕要求主动关闭话题的关键词**：'
+'-自杀'
+'-抑郁'
+'-谋杀'
+
+'**特殊的响应策略**：'
+'-遇到严肃问题收起幽默'
+'-表达真诚的关心'
+'-不用幽默掩盖严重问题\n'
+"""
+
+
+@dataclass
+class PromptSections:
+    """
+    System Prompt 的组成片段
+
+    按变化频率分为三类：
+    - 静态（同一 Bot 的所有请求相同）：persona、persona_emotion、json_format
+    - 按用户半静态：memories
+    - 每轮变化：summary、history、strategy
+    """
+    persona: str = ""  # Bot 人设
+    persona_emotion: str = ""  # 人设中的情绪回复习惯
+    json_format: str = ""  # 强制输出格式
+    memories: str = ""  # 长期记忆
+    summary: str = ""  # 中期摘要
+    history: str = ""  # 近期对话记录
+    strategy: str = ""  # 本轮对话策略
+
+    def legacy(self) -> str:
+        """
+        原有布局：人设 → 记忆 / 摘要 / 历史 → 策略 → 输出格式
+        """
+        components = [self.persona]
+        memory_sections = [s for s in (self.memories, self.summary, self.history) if s]
+        if memory_sections:
+            components.append(_MEMORY_BLOCK_HEADER + "\n\n".join(memory_sections))
+        strategy_sections = [s for s in (self.strategy, self.persona_emotion) if s]
+        if strategy_sections:
+            components.append(_STRATEGY_BLOCK_HEADER + "\n\n".join(strategy_sections))
+        components.append(self.json_format)
+        return "\n\n".join(components)
+
+    def layered(self) -> Dict[str, str]:
+        """
+        静态优先布局使用的三段内容
+
+        Returns:
+            {"static": ..., "semi_static": ..., "dynamic": ...}
+        """
+        static = [self.persona, _STRATEGY_BLOCK_HEADER + self.persona_emotion, self.json_format]
+        return {
+            "static": "\n\n".join(s for s in static if s),
+            "semi_static": _MEMORY_BLOCK_HEADER + self.memories if self.memories else "",
+            "dynamic": "\n\n".join(s for s in (self.summary, self.history, self.strategy) if s),
+        }
+
+
 class UnifiedContextBuilder:
     """
     统一上下文构建器
@@ -163,7 +244,7 @@ class UnifiedContextBuilder:
         # 3. 格式化长期记忆
         memory_context = self._format_memories(user_memories)
         # 5. 构建增强的 System Prompt（包含对话历史）
-        enhanced_system_prompt = self._build_enhanced_system_prompt(
+        prompt_sections = self._build_prompt_sections(
             bot_system_prompt=bot_system_prompt,
             memory_context=memory_context,
             mid_term_summary=mid_term_summary,
@@ -172,6 +253,7 @@ class UnifiedContextBuilder:
             short_term_history=short_term,
             persona=persona
         )
+        enhanced_system_prompt = prompt_sections.legacy()
         # 6. 构建最终消息列表（仅 system + user 两条消息）
         messages = self._build_messages(
             enhanced_system_prompt,
@@ -199,7 +281,9 @@ class UnifiedContextBuilder:
                 "has_mid_term_summary": mid_term_summary is not None,
                 "memory_count": len(user_memories) if user_memories else 0,
                 "filtered_history_count": filtered_count,
-                "history_filter_enabled": self.config.enable_history_filter
+                "history_filter_enabled": self.config.enable_history_filter,
+                # 静态优先布局使用的分段内容（见 AgentOrchestrator 的 prompt_layout）
+                "prompt_sections": prompt_sections.layered()
             }
         )
 
@@ -287,30 +371,30 @@ class UnifiedContextBuilder:
 
 
 
-    #
-    def _build_enhanced_system_prompt(
+    def _build_prompt_sections(
             self,
             bot_system_prompt: str,
             memory_context: str,
             mid_term_summary: Optional[ConversationSummary],
-            llm_generated_summary: Optional[Dict] = None,  # 新增：LLM 生成的摘要
+            llm_generated_summary: Optional[Dict] = None,
             dialogue_strategy: Optional[str] = None,
             short_term_history: Optional[List[Dict[str, str]]] = None,
             persona: Optional[Any] = None
-    ) -> str:
+    ) -> PromptSections:
         """
-        构建增强的 System Prompt
+        构建 System Prompt 的各个片段（按变化频率分类，尚未拼接）
         """
-        components = [bot_system_prompt]
-        # ====================  整合所有记忆到一个块 ====================
-        memory_sections = []
+        sections = PromptSections(
+            persona=bot_system_prompt,
+            json_format=self._get_json_format_instruction(),
+        )
         # 1. 长期历史重要记忆
         if memory_context:
             memory_lines = memory_context.split('\n')
             if memory_lines and memory_lines[0].startswith('【'):
                 memory_lines = memory_lines[1:]  # 去掉第一行标题
             if memory_lines:
-                memory_sections.append("【历史重要记忆】\n" + '\n'.join(memory_lines))
+                sections.memories = "【历史重要记忆】\n" + '\n'.join(memory_lines)
         # 2. 中期摘要记忆
         summary_text = ""
         if llm_generated_summary and isinstance(llm_generated_summary, dict):
@@ -330,26 +414,15 @@ class UnifiedContextBuilder:
 讨论话题：{', '.join(mid_term_summary.key_topics[:3])}"""
             if mid_term_summary.emotion_trajectory:
                 summary_text += f"\n情绪变化：{mid_term_summary.emotion_trajectory}"
-        if summary_text:
-            memory_sections.append(summary_text.strip())
+        sections.summary = summary_text.strip()
 
         # 3. 近期对话记录
         if short_term_history:
-            history_text = self._format_history_for_system_prompt(short_term_history)
-            if history_text:
-                memory_sections.append(history_text)
-        # 整合所有记忆到一个块
-        if memory_sections:
-            unified_memory_block = """
-=========================
-对话相关记忆
-=========================
-""" + "\n\n".join(memory_sections)
-            components.append(unified_memory_block)
-        # ==================== 对话策略管理（整合块） ====================
-        strategy_sections = []
+            sections.history = self._format_history_for_system_prompt(short_term_history)
+
+        # 4. 对话策略与人设中的情绪回复习惯
         if dialogue_strategy:
-            strategy_sections.append(dialogue_strategy.strip())
+            sections.strategy = dialogue_strategy.strip()
         if persona and hasattr(persona, 'emotional_response') and persona.emotional_response:
             p = persona
             emotion_sections = []
@@ -364,39 +437,32 @@ class UnifiedContextBuilder:
                 lines = '\n - '.join(p.emotional_response['user_happy'])
                 emotion_sections.append(f"当用户开心时：\n - {lines}")
             if len(emotion_sections) > 1:
-                strategy_sections.append('\n'.join(emotion_sections))
-
-        if strategy_sections:
-            unified_strategy_block = """
-=========================
-对话策略管理
-=========================
-** 注意对话记录的时间和任务，回复是需要保持事件的一致性和时间的连贯性 **
-
-'【安全对话策略】\n'
-'**需要主动回避的话题**：'
-'-政治话题'
-'-歧视内容'
-'-暴力内容'
-'-未成年性内容'
-'-人身攻击'
-
-'**高度警惕要求主动关闭话题的关键词**：'
-'-自杀'
-'-抑郁'
-'-谋杀'
+                sections.persona_emotion = '\n'.join(emotion_sections)
+        return sections
 
-'**特殊的响应策略**：'
-'-遇到严肃问题收起幽默'
-'-表达真诚的关心'
-'-不用幽默掩盖严重问题\n'
-"""
-            unified_strategy_block += "\n\n".join(strategy_sections)
-            components.append(unified_strategy_block)
-        json_format_instruction = self._get_json_format_instruction()
-        components.append(json_format_instruction)
-        enhanced_prompt = "\n\n".join(components)
-        return enhanced_prompt
+    #
+    def _build_enhanced_system_prompt(
+            self,
+            bot_system_prompt: str,
+            memory_context: str,
+            mid_term_summary: Optional[ConversationSummary],
+            llm_generated_summary: Optional[Dict] = None,  # 新增：LLM 生成的摘要
+            dialogue_strategy: Optional[str] = None,
+            short_term_history: Optional[List[Dict[str, str]]] = None,
+            persona: Optional[Any] = None
+    ) -> str:
+        """
+        构建增强的 System Prompt
+        """
+        return self._build_prompt_sections(
+            bot_system_prompt=bot_system_prompt,
+            memory_context=memory_context,
+            mid_term_summary=mid_term_summary,
+            llm_generated_summary=llm_generated_summary,
+            dialogue_strategy=dialogue_strategy,
+            short_term_history=short_term_history,
+            persona=persona
+        ).legacy()
 
     def _format_history_for_system_prompt(
             self,
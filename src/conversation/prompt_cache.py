@@ -0,0 +1,102 @@
+"""
+Prompt Cache - 预编译提示词缓存
+
+人设提示词、模板渲染结果、编排器任务说明等静态片段只依赖配置，
+不依赖单次请求。这里按「配置版本」（配置内容指纹）缓存渲染结果：
+- 配置不变时，每条消息只需拼接已缓存的片段与少量动态字段（时间、记忆、历史）
+- 配置重新加载或内容变化后指纹随之变化，自动使用新的渲染结果
+- 旧版本条目按 LRU 淘汰
+
+使用方法：
+    cache = get_prompt_cache()
+    prompt = cache.get(("system_prompt", config_fingerprint(config)), build_fn)
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from loguru import logger
+
+
+def config_fingerprint(*parts: Any) -> str:
+    """
+    配置内容指纹
+
+    基于 repr 计算，dataclass 配置的 repr 包含全部字段，内容变化即指纹变化。
+    """
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class PromptCache:
+    """
+    预编译提示词的 LRU 缓存
+
+    key 由调用方构造，应包含配置版本；值为渲染好的提示词或片段。
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Args:
+            max_entries: 最多缓存的片段数量
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """
+        获取缓存片段，未命中时调用 build() 渲染并缓存
+
+        值通常是字符串，也可以是拆分好的片段元组。
+
+        Args:
+            key: 缓存键（含配置版本）
+            build: 渲染函数
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return value
+            self._misses += 1
+
+        # 渲染在锁外进行；并发未命中时重复渲染的结果相同，后写入者覆盖即可
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        """清空缓存（如模板被重新注册时）"""
+        with self._lock:
+            self._entries.clear()
+        logger.debug("[PromptCache] 缓存已清空")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """缓存条目数与命中率"""
+        total = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_ratio": round(self._hits / total, 4) if total else 0.0,
+        }
+
+
+# 全局提示词缓存实例
+_prompt_cache: Optional[PromptCache] = None
+
+
+def get_prompt_cache() -> PromptCache:
+    """获取全局提示词缓存"""
+    global _prompt_cache
+    if _prompt_cache is None:
+        _prompt_cache = PromptCache()
+    return _prompt_cache
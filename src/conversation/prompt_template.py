@@ -12,6 +12,8 @@ from datetime import datetime, timezone
 import re
 from loguru import logger
 
+from .prompt_cache import get_prompt_cache
+
 
 @dataclass
 class PromptTemplate:
@@ -338,6 +340,8 @@ class PromptTemplateManager:
             template: 模板对象
         """
         self._templates[template.name] = template
+        # 已缓存的系统提示词可能基于旧模板渲染
+        get_prompt_cache().clear()
         logger.info(f"Registered template: {template.name}")
     
     def get_template(self, name: str) -> Optional[PromptTemplate]:
@@ -399,6 +403,7 @@ class PromptTemplateManager:
         """删除模板"""
         if name in self._templates:
             del self._templates[name]
+            get_prompt_cache().clear()
             logger.info(f"Deleted template: {name}")
             return True
         return False
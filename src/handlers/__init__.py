@@ -9,7 +9,9 @@ from .commands import (
     image_command,
     pay_basic_command,
     pay_premium_command,
-    check_payment_command
+    check_payment_command,
+    tasks_command,
+    cancel_task_command
 )
 from .messages import (
     handle_photo,
@@ -46,6 +48,8 @@ __all__ = [
     "pay_basic_command",
     "pay_premium_command",
     "check_payment_command",
+    "tasks_command",
+    "cancel_task_command",
     # 消息处理
     "handle_photo",
     "handle_sticker",
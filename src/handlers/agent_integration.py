@@ -18,6 +18,7 @@ from telegram.ext import ContextTypes, CallbackQueryHandler
 from sqlalchemy import select
 from loguru import logger
 
+from config import settings
 from src.database import get_async_db_context
 from src.subscription.async_service import AsyncSubscriptionService
 from src.services.async_channel_manager import AsyncChannelManagerService
@@ -36,6 +37,8 @@ from src.agents import (
 from datetime import datetime
 from src.models.database import UserMemory
 from src.services.conversation_memory_service import DateParser
+from src.services.embedding_codec import embedding_columns
+from src.services.memory_lexical_index import get_memory_lexical_index
 from src.conversation.dialogue_strategy import enhance_prompt_with_strategy
 from src.conversation.context_builder import UnifiedContextBuilder, ContextConfig
 
@@ -53,14 +56,20 @@ def get_orchestrator() -> AgentOrchestrator:
 
     if _orchestrator is None:
         # 加载所有Agent
-        loader = AgentLoader(agents_dir="src/agents/plugins")
+        loader = AgentLoader(
+            agents_dir="src/agents/plugins",
+            lazy=getattr(settings, "agent_lazy_loading", True)
+        )
         agents = loader.load_agents()
+        loader.log_import_report()
 
         # 创建编排器
         _orchestrator = AgentOrchestrator(
             agents=agents,
             llm_provider=conversation_service.provider,
-            enable_unified_mode=True
+            enable_unified_mode=True,
+            prompt_layout=getattr(settings, "prompt_layout", "legacy"),
+            agent_timeout=getattr(settings, "agent_respond_timeout", 360.0)
         )
 
         logger.info(f"AgentOrchestrator初始化完成，加载了{len(agents)}个Agent")
@@ -305,15 +314,7 @@ async def handle_message_with_agents(update: Update, context: ContextTypes.DEFAU
                     )
                     if memories:
                         # 转换为字典格式供 UnifiedContextBuilder 使用,统一使用 "YYYY-MM-DD" 格式
-                        user_memories = [
-                            {
-                                "event_summary": m.event_summary,
-                                "event_date": m.event_date.strftime("%Y-%m-%d") if m.event_date else None,
-                                "event_type": m.event_type,
-                                "keywords": m.keywords
-                            }
-                            for m in memories
-                        ]
+                        user_memories = [m.to_context_dict() for m in memories]
                         logger.info(f"🧠 Retrieved {len(user_memories)} memories for context injection")
                 except Exception as e:
                     logger.warning(f"Error retrieving memories: {e}", exc_info=True)
@@ -340,6 +341,7 @@ async def handle_message_with_agents(update: Update, context: ContextTypes.DEFAU
                 except Exception as e:
                     logger.warning(f"Error generating dialogue strategy: {e}", exc_info=True)
 
+            prompt_sections = None
             # 🔧 使用 UnifiedContextBuilder 构建上下文
             context_builder = UnifiedContextBuilder(
                 config=ContextConfig(
@@ -368,6 +370,7 @@ async def handle_message_with_agents(update: Update, context: ContextTypes.DEFAU
                 enhanced_messages = builder_result.messages
                 # 提取 system prompt（第一条消息）
                 enhanced_system_prompt = enhanced_messages[0]["content"] if enhanced_messages else system_prompt
+                prompt_sections = builder_result.metadata.get("prompt_sections")
                 # 记录 token 使用情况
                 budget_info = context_builder.get_token_budget_info(builder_result)
                 logger.info(
@@ -384,12 +387,16 @@ async def handle_message_with_agents(update: Update, context: ContextTypes.DEFAU
                 content=message_text,
                 user_id=user_id,
                 chat_id=str(chat_id),
-                metadata={"telegram_message_id": message.message_id}
+                metadata={
+                    "telegram_message_id": message.message_id,
+                    "bot_id": selected_bot.id if selected_bot else None,
+                }
             )
             chat_context = ChatContext(
                 chat_id=str(chat_id),
                 conversation_history=history_messages,
-                system_prompt=enhanced_system_prompt
+                system_prompt=enhanced_system_prompt,
+                prompt_sections=prompt_sections
             )
             # 使用编排器处理消息
             orchestrator = get_orchestrator()
@@ -524,10 +531,13 @@ async def handle_message_with_agents(update: Update, context: ContextTypes.DEFAU
                                     event_type=result.memory_analysis.event_type,
                                     keywords=result.memory_analysis.keywords or [],
                                     event_date=event_date,
-                                    embedding=embedding,
-                                    embedding_model=embedding_model
+                                    **embedding_columns(embedding, model=embedding_model)
                                 )
                                 db.add(memory)
+                                await db.flush()
+                                get_memory_lexical_index().add_memory(
+                                    memory.user_id, memory.id, memory.event_summary, memory.keywords
+                                )
                                 logger.info(f"🧠 Saved memory from unified analysis (0 extra LLM calls)")
                         except Exception as e:
                             logger.warning(f"Error saving memory: {e}")
@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from src.database import get_db_session
 from src.subscription.service import SubscriptionService
 from src.models.database import SubscriptionTier
+from src.services.task_queue import get_running_task_queue
 
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -170,6 +171,8 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 /pay_premium - 订阅高级版（¥19.99/月）
 /check_payment - 查询支付状态
 /image - 获取温馨图片
+/tasks - 查看后台任务
+/cancel_task - 取消后台任务
 
 📊 订阅计划：
 
@@ -545,3 +548,52 @@ async def image_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
     finally:
         db.close()
+
+
+_TASK_STATUS_NAMES = {
+    "queued": "⏳ 排队中",
+    "running": "⚙️ 执行中",
+    "succeeded": "✅ 已完成",
+    "failed": "❌ 失败",
+    "cancelled": "🛑 已取消",
+}
+
+
+async def tasks_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /tasks command - list the user's background tasks"""
+    task_queue = get_running_task_queue()
+    if task_queue is None:
+        await update.message.reply_text("后台任务队列未启用。")
+        return
+
+    tasks = task_queue.list_user_tasks(str(update.effective_user.id), active_only=False, limit=5)
+    if not tasks:
+        await update.message.reply_text("你还没有后台任务。")
+        return
+
+    lines = ["📋 最近的后台任务：", ""]
+    for task in tasks:
+        status = _TASK_STATUS_NAMES.get(task.status.value, task.status.value)
+        lines.append(f"{task.task_id}  {status}  {task.user_input[:30]}")
+        if task.result:
+            # 结果可能因 Bot 不可用而未能推送，在这里也能看到
+            lines.append(f"    ↳ {task.result[:100]}")
+    await update.message.reply_text("\n".join(lines))
+
+
+async def cancel_task_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /cancel_task <task_id> command - cancel a queued or running task"""
+    task_queue = get_running_task_queue()
+    if task_queue is None:
+        await update.message.reply_text("后台任务队列未启用。")
+        return
+
+    if not context.args:
+        await update.message.reply_text("用法：/cancel_task <任务ID>")
+        return
+
+    task_id = context.args[0]
+    if task_queue.cancel(task_id, user_id=str(update.effective_user.id)):
+        await update.message.reply_text(f"🛑 任务 {task_id} 已取消。")
+    else:
+        await update.message.reply_text(f"找不到可取消的任务 {task_id}（可能已结束）。")
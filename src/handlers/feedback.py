@@ -7,21 +7,43 @@ Feedback Handlers - 用户反馈处理器
 3. 消息编辑和删除事件
 
 设计原则：
-- 异步处理：不阻塞主消息处理流程
+- 异步处理：不阻塞主消息处理流程，事件交给 feedback_ingestion 批量写入
 - 容错设计：反馈记录失败不影响用户体验
 - 完整记录：捕获尽可能多的用户交互信息
 """
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
 from telegram import Update, MessageReactionUpdated
 from telegram.ext import ContextTypes
 from loguru import logger
 
 from src.database import get_db_session
 from src.services.feedback_service import FeedbackService
+from src.services.feedback_ingestion import (
+    FeedbackEvent,
+    INTERACTION,
+    REACTION_ADD,
+    REACTION_REMOVE,
+    submit_feedback_events,
+)
 from src.services.channel_manager import ChannelManagerService
 from src.subscription.service import SubscriptionService
 from src.models.database import InteractionType
 
 
+def _chat_fields(chat, context: ContextTypes.DEFAULT_TYPE) -> Dict[str, Any]:
+    """构建反馈事件的频道与机器人字段"""
+    bot_data = getattr(context, "bot_data", None) or {}
+    return {
+        "chat_id": chat.id,
+        "chat_type": chat.type,
+        "chat_title": getattr(chat, "title", None),
+        "chat_username": getattr(chat, "username", None),
+        "bot_id": bot_data.get("bot_id"),
+    }
+
+
 async def handle_message_reaction(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     处理Telegram消息反应事件
@@ -39,7 +61,6 @@ async def handle_message_reaction(update: Update, context: ContextTypes.DEFAULT_
         return
     
     # 获取基本信息
-    chat_id = reaction_update.chat.id
     message_id = reaction_update.message_id
     user = reaction_update.user
     
@@ -54,27 +75,10 @@ async def handle_message_reaction(update: Update, context: ContextTypes.DEFAULT_
     new_reactions = reaction_update.new_reaction or []
     
     logger.info(f"Reaction update from user {user_id} on message {message_id}")
-    logger.info(f"Old reactions: {[r.emoji for r in old_reactions if hasattr(r, 'emoji')]}")
-    logger.info(f"New reactions: {[r.emoji for r in new_reactions if hasattr(r, 'emoji')]}")
+    logger.debug(f"Old reactions: {[r.emoji for r in old_reactions if hasattr(r, 'emoji')]}")
+    logger.debug(f"New reactions: {[r.emoji for r in new_reactions if hasattr(r, 'emoji')]}")
     
-    db = get_db_session()
     try:
-        feedback_service = FeedbackService(db)
-        subscription_service = SubscriptionService(db)
-        channel_service = ChannelManagerService(db)
-        
-        # 获取或创建用户
-        db_user = subscription_service.get_user_by_telegram_id(user_id)
-        
-        # 获取或创建频道
-        channel = channel_service.get_or_create_channel(
-            telegram_chat_id=chat_id,
-            chat_type=reaction_update.chat.type,
-            title=reaction_update.chat.title if hasattr(reaction_update.chat, 'title') else None,
-            username=reaction_update.chat.username if hasattr(reaction_update.chat, 'username') else None,
-            owner_id=user_id
-        )
-        
         # 解析被移除的反应
         old_emojis = set()
         for reaction in old_reactions:
@@ -91,49 +95,39 @@ async def handle_message_reaction(update: Update, context: ContextTypes.DEFAULT_
         added_emojis = new_emojis - old_emojis
         removed_emojis = old_emojis - new_emojis
         
-        # 处理移除的反应
-        for emoji in removed_emojis:
-            try:
-                feedback_service.remove_reaction(
-                    user_id=db_user.id,
-                    message_id=message_id,
-                    chat_id=chat_id,
-                    reaction_emoji=emoji
-                )
-                logger.info(f"Removed reaction '{emoji}' by user {user_id}")
-            except Exception as e:
-                logger.error(f"Error removing reaction: {e}")
-        
-        # 处理添加的反应
+        base = dict(
+            telegram_user_id=user_id,
+            message_id=message_id,
+            **_chat_fields(reaction_update.chat, context),
+        )
+        events = [
+            FeedbackEvent(kind=REACTION_REMOVE, emoji=emoji, **base)
+            for emoji in removed_emojis
+        ]
+        
         for emoji in added_emojis:
-            try:
-                # 检查是否是自定义emoji
-                custom_emoji_id = None
-                is_big = False
-                
-                for reaction in new_reactions:
-                    if hasattr(reaction, 'emoji') and reaction.emoji == emoji:
-                        is_big = getattr(reaction, 'is_big', False)
-                    elif hasattr(reaction, 'custom_emoji_id'):
-                        custom_emoji_id = reaction.custom_emoji_id
-                
-                feedback_service.add_reaction(
-                    user_id=db_user.id,
-                    message_id=message_id,
-                    chat_id=chat_id,
-                    reaction_emoji=emoji,
-                    channel_id=channel.id,
-                    custom_emoji_id=custom_emoji_id,
-                    is_big=is_big
-                )
-                logger.info(f"Added reaction '{emoji}' by user {user_id}")
-            except Exception as e:
-                logger.error(f"Error adding reaction: {e}")
+            # 检查是否是自定义emoji
+            custom_emoji_id = None
+            is_big = False
+            
+            for reaction in new_reactions:
+                if hasattr(reaction, 'emoji') and reaction.emoji == emoji:
+                    is_big = getattr(reaction, 'is_big', False)
+                elif hasattr(reaction, 'custom_emoji_id'):
+                    custom_emoji_id = reaction.custom_emoji_id
+            
+            events.append(FeedbackEvent(
+                kind=REACTION_ADD,
+                emoji=emoji,
+                custom_emoji_id=custom_emoji_id,
+                is_big=is_big,
+                **base
+            ))
+        
+        await submit_feedback_events(events)
         
     except Exception as e:
         logger.error(f"Error handling message reaction: {e}", exc_info=True)
-    finally:
-        db.close()
 
 
 async def handle_message_reaction_count(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -190,39 +184,21 @@ async def handle_reply_interaction(update: Update, context: ContextTypes.DEFAULT
     if not user:
         return
     
-    db = get_db_session()
     try:
-        feedback_service = FeedbackService(db)
-        subscription_service = SubscriptionService(db)
-        channel_service = ChannelManagerService(db)
-        
-        # 获取或创建用户
-        db_user = subscription_service.get_user_by_telegram_id(user.id)
-        
-        # 获取或创建频道
-        channel = channel_service.get_or_create_channel(
-            telegram_chat_id=message.chat.id,
-            chat_type=message.chat.type,
-            title=message.chat.title if hasattr(message.chat, 'title') else None,
-            username=message.chat.username if hasattr(message.chat, 'username') else None,
-            owner_id=user.id
-        )
-        
         # 记录回复交互
-        feedback_service.record_reply(
-            user_id=db_user.id,
+        await submit_feedback_events([FeedbackEvent(
+            kind=INTERACTION,
+            interaction_type=InteractionType.REPLY.value,
+            telegram_user_id=user.id,
             message_id=reply_to.message_id,
-            chat_id=message.chat.id,
-            reply_message_id=message.message_id,
-            channel_id=channel.id
-        )
+            metadata={'reply_message_id': message.message_id},
+            **_chat_fields(message.chat, context),
+        )])
         
         logger.info(f"Recorded reply interaction by user {user.id} to message {reply_to.message_id}")
         
     except Exception as e:
         logger.error(f"Error recording reply interaction: {e}", exc_info=True)
-    finally:
-        db.close()
 
 
 async def handle_pinned_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -244,38 +220,20 @@ async def handle_pinned_message(update: Update, context: ContextTypes.DEFAULT_TY
     if not user:
         return
     
-    db = get_db_session()
     try:
-        feedback_service = FeedbackService(db)
-        subscription_service = SubscriptionService(db)
-        channel_service = ChannelManagerService(db)
-        
-        # 获取或创建用户
-        db_user = subscription_service.get_user_by_telegram_id(user.id)
-        
-        # 获取或创建频道
-        channel = channel_service.get_or_create_channel(
-            telegram_chat_id=message.chat.id,
-            chat_type=message.chat.type,
-            title=message.chat.title if hasattr(message.chat, 'title') else None,
-            username=message.chat.username if hasattr(message.chat, 'username') else None,
-            owner_id=user.id
-        )
-        
         # 记录置顶交互
-        feedback_service.record_pin(
-            user_id=db_user.id,
+        await submit_feedback_events([FeedbackEvent(
+            kind=INTERACTION,
+            interaction_type=InteractionType.PIN.value,
+            telegram_user_id=user.id,
             message_id=pinned.message_id,
-            chat_id=message.chat.id,
-            channel_id=channel.id
-        )
+            **_chat_fields(message.chat, context),
+        )])
         
         logger.info(f"Recorded pin interaction by user {user.id} on message {pinned.message_id}")
         
     except Exception as e:
         logger.error(f"Error recording pin interaction: {e}", exc_info=True)
-    finally:
-        db.close()
 
 
 async def handle_forward(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -303,34 +261,26 @@ async def handle_forward(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not user:
         return
     
-    db = get_db_session()
     try:
-        feedback_service = FeedbackService(db)
-        subscription_service = SubscriptionService(db)
-        
-        # 获取或创建用户
-        db_user = subscription_service.get_user_by_telegram_id(user.id)
-        
         # 记录转发交互
         metadata = {
             'forward_origin_type': str(type(forward_origin).__name__),
             'forward_date': forward_origin.date.isoformat() if hasattr(forward_origin, 'date') else None
         }
         
-        feedback_service.record_interaction(
-            user_id=db_user.id,
-            message_id=message.message_id,
-            chat_id=message.chat.id,
+        await submit_feedback_events([FeedbackEvent(
+            kind=INTERACTION,
             interaction_type=InteractionType.FORWARD.value,
-            metadata=metadata
-        )
+            telegram_user_id=user.id,
+            message_id=message.message_id,
+            metadata=metadata,
+            **_chat_fields(message.chat, context),
+        )])
         
         logger.info(f"Recorded forward interaction by user {user.id}")
         
     except Exception as e:
         logger.error(f"Error recording forward interaction: {e}", exc_info=True)
-    finally:
-        db.close()
 
 
 # 命令处理器：获取反馈统计
@@ -368,6 +318,12 @@ async def feedback_stats_command(update: Update, context: ContextTypes.DEFAULT_T
         # 获取热门反应
         trending = feedback_service.get_trending_reactions(hours=24, limit=5)
         
+        # 当前频道近 30 天汇总（合并小时桶）
+        now = datetime.utcnow()
+        channel_summary = feedback_service.get_rollup_summary(
+            now - timedelta(days=30), now, channel_id=channel.id
+        )
+        
         # 构建统计消息
         stats_message = "📊 **反馈统计**\n\n"
         
@@ -378,6 +334,13 @@ async def feedback_stats_command(update: Update, context: ContextTypes.DEFAULT_T
         else:
             stats_message += "暂无反应数据\n"
         
+        if channel_summary['total_reactions'] or channel_summary['total_interactions']:
+            stats_message += "\n📅 **本聊天近30天**\n"
+            stats_message += f"  反应: {channel_summary['total_reactions']}次\n"
+            stats_message += f"  互动: {channel_summary['total_interactions']}次\n"
+            if channel_summary['satisfaction_score'] is not None:
+                stats_message += f"  满意度: {channel_summary['satisfaction_score']}%\n"
+        
         stats_message += "\n💡 提示：对机器人的回复发送表情反应，帮助我们改进服务！"
         
         await message.reply_text(stats_message, parse_mode='Markdown')
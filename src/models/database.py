@@ -7,7 +7,7 @@ Database models for SoulmateBot
 2. 支持高并发场景（乐观锁、会话隔离）
 3. 使用UUID/MD5字符串作为外部引用标识，内部仍使用Integer主键
 """
-from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, ForeignKey, Text, Enum as SQLEnum, JSON, Index, UniqueConstraint
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, ForeignKey, Text, Enum as SQLEnum, JSON, Index, UniqueConstraint, Float, LargeBinary, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -603,6 +603,10 @@ class FeedbackSummary(Base):
     __table_args__ = (
         # 唯一约束：确保同一维度同一周期不重复
         UniqueConstraint('bot_id', 'channel_id', 'period_type', 'period_start', name='uq_feedback_summary_period'),
+        # 唯一索引：bot_id / channel_id 可为 NULL，上面的约束对 NULL 不生效；
+        # 小时桶的原子增量（ON CONFLICT DO UPDATE）以此索引为冲突目标
+        Index('uq_feedback_summary_bucket', func.coalesce(bot_id, 0), func.coalesce(channel_id, 0),
+              period_type, period_start, unique=True),
         # 复合索引：优化按周期查询
         Index('idx_summary_period', 'period_type', 'period_start'),
         # 复合索引：优化按机器人查询
@@ -659,7 +663,11 @@ class UserMemory(Base):
     keywords = Column(JSON, default=[], comment="关键词列表，用于检索匹配")
     
     # 向量嵌入（用于RAG检索）
-    embedding = Column(JSON, nullable=True, comment="事件摘要的向量嵌入，用于语义相似度检索")
+    embedding = Column(JSON, nullable=True, comment="事件摘要的向量嵌入（旧格式，迁移后为空）")
+    embedding_vector = Column(LargeBinary, nullable=True, comment="事件摘要向量嵌入的小端序二进制，用于语义相似度检索")
+    embedding_format = Column(String(10), nullable=True, comment="二进制嵌入格式：float32/float16/int8")
+    embedding_dim = Column(Integer, nullable=True, comment="嵌入向量维度")
+    embedding_norm = Column(Float, nullable=True, comment="嵌入向量的L2范数，检索时直接使用")
     embedding_model = Column(String(50), nullable=True, comment="生成嵌入向量使用的模型名称")
     
     # 时间信息
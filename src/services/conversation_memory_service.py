@@ -37,7 +37,7 @@ import json
 import time
 import uuid
 import re
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional
 from datetime import datetime, timezone, timedelta
 from dateutil.relativedelta import relativedelta
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -46,6 +46,79 @@ from loguru import logger
 import numpy as np
 
 from src.models.database import UserMemory, MemoryImportance
+from src.services.embedding_codec import (
+    embedding_columns,
+    has_embedding_clause,
+    memory_embedding,
+    missing_embedding_clause,
+)
+from src.services.memory_access_tracker import record_memory_access
+from src.services.memory_lexical_index import (
+    MemoryLexicalIndex,
+    get_memory_lexical_index,
+    hybrid_score,
+)
+from src.services.memory_projection import (
+    EMBEDDING_COLUMNS,
+    MEMORY_RECORD_COLUMNS,
+    MemoryRecord,
+    importance_rank,
+    memory_filters,
+)
+
+
+# ==================== 日期表达识别（导入时预编译） ====================
+
+# 日期表达族，按解析优先级排列
+_DATE_EXPRESSION_PATTERNS = [
+    # ==================== 模糊时间表达 ====================
+    r'刚刚|刚才|方才',
+    r'最近|这几天|前几天|这段时间|近期|近来|这两天',
+    r'今天?早上|今天?上午|今天?中午|今天?下午|今天?晚上|今天?凌晨',
+    r'今早|今晚|今日',
+    r'昨天?晚上|昨天?下午|昨天?上午|昨天?早上|昨晚|昨早|昨日',
+    r'前天晚上|前晚',
+    r'这会儿|现在|此刻',
+    # ==================== 完整日期表达 ====================
+    r'\d{4}[-/年]\d{1,2}[-/月]\d{1,2}[日号]?',
+    r'\d{1,2}[-/月]\d{1,2}[日号]?',
+    r'\d{1,2}[日号]',
+    # 相对日期
+    r'大?前天|昨天|今天|明天|大?后天',
+    # 相对周
+    r'上{1,2}周|这周|本周|下{1,2}周',
+    # 相对月
+    r'上{1,2}个?月|这个?月|本月|下{1,2}个?月',
+    # 相对年
+    r'前年|去年|今年|明年|后年',
+    # 星期
+    r'(?:上{1,2}周|这周|本周|下{1,2}周)?(?:周|星期)[一二三四五六日天1-7]',
+    # 特殊表达
+    r'月[初底末]|年[初底末]',
+    # 组合表达 (如 "下个月15号")
+    r'(?:上{1,2}个?月|下{1,2}个?月)\d{1,2}[日号]',
+    r'(?:去年|明年|后年)\d{1,2}月(?:\d{1,2}[日号])?',
+]
+
+# 单次扫描的词法器：所有表达族合并为一个带命名分组的交替，同一位置按优先级取第一个命中的族
+_DATE_TOKEN_RE = re.compile(
+    "|".join(f"(?P<f{rank}>{pattern})" for rank, pattern in enumerate(_DATE_EXPRESSION_PATTERNS))
+)
+
+# 预过滤：任何可解析的日期表达都至少包含其中之一，不含这些字的消息直接跳过
+_DATE_HINT_RE = re.compile(r'[刚方今昨午晚晨现刻最近段周星月年日号天]|这会儿|\d[-/]\d')
+
+# 指向今天 / 昨天 / 最近的模糊表达（同一组内结果相同，合并为一次搜索）
+_TODAY_EXPRESSION_RE = re.compile(
+    '刚刚|刚才|方才'
+    '|今天早上|今天上午|今天中午|今天下午|今天晚上|今天凌晨'
+    '|今早|今晚'
+    '|上午|下午|晚上|凌晨|中午'  # 不带"今天"默认指今天
+    '|这会儿|现在|此刻'
+    '|今日'
+)
+_YESTERDAY_EXPRESSION_RE = re.compile('昨晚|昨天晚上|昨天下午|昨天上午|昨天早上|昨日')
+_RECENT_EXPRESSION_RE = re.compile('最近|这几天|前几天|这段时间|近期|近来')
 
 
 class DateParser:
@@ -107,6 +180,9 @@ class DateParser:
 
         text = text.strip()
 
+        if not _DATE_HINT_RE.search(text):
+            return None
+
         # 尝试各种解析策略
         result = None
 
@@ -169,37 +245,16 @@ class DateParser:
 
         # ==================== 模糊时间表达 ====================
         # 这些表达都指向"今天"
-        today_expressions = [
-            r'刚刚', r'刚才', r'方才',
-            r'今天早上', r'今天上午', r'今天中午', r'今天下午', r'今天晚上', r'今天凌晨',
-            r'今早', r'今晚',
-            r'上午', r'下午', r'晚上', r'凌晨', r'中午',  # 不带"今天"默认指今天
-            r'这会儿', r'现在', r'此刻',
-            r'今日',
-        ]
-
-        for pattern in today_expressions:
-            if re.search(pattern, text):
-                return self.today
+        if _TODAY_EXPRESSION_RE.search(text):
+            return self.today
 
         # 这些表达指向"昨天"
-        yesterday_expressions = [
-            r'昨晚', r'昨天晚上', r'昨天下午', r'昨天上午', r'昨天早上',
-            r'昨日',
-        ]
-
-        for pattern in yesterday_expressions:
-            if re.search(pattern, text):
-                return self.today + timedelta(days=-1)
+        if _YESTERDAY_EXPRESSION_RE.search(text):
+            return self.today + timedelta(days=-1)
 
         # 模糊的"最近"表达 - 默认指向今天
-        recent_expressions = [
-            r'最近', r'这几天', r'前几天', r'这段时间', r'近期', r'近来',
-        ]
-
-        for pattern in recent_expressions:
-            if re.search(pattern, text):
-                return self.today
+        if _RECENT_EXPRESSION_RE.search(text):
+            return self.today
 
         # ==================== 精确的相对天数 ====================
         day_patterns = {
@@ -404,6 +459,25 @@ class DateParser:
 
         return None
 
+    @staticmethod
+    def extract_expressions(message: str) -> List[str]:
+        """
+        单次扫描提取消息中的全部日期表达
+
+        Args:
+            message: 用户消息
+
+        Returns:
+            日期表达列表，按表达族优先级、出现位置排序
+        """
+        if not message or not _DATE_HINT_RE.search(message):
+            return []
+        tokens = sorted(
+            (int(match.lastgroup[1:]), match.start(), match.group())
+            for match in _DATE_TOKEN_RE.finditer(message)
+        )
+        return [token for _, _, token in tokens]
+
     def parse_from_message(self, message: str) -> Optional[datetime]:
         """
         从用户消息中智能提取日期
@@ -419,44 +493,15 @@ class DateParser:
         if not message:
             return None
 
-        # 常见的日期相关关键词模式
-        date_patterns = [
-            # ==================== 新增：模糊时间表达 ====================
-            r'刚刚|刚才|方才',
-            r'最近|这几天|前几天|这段时间|近期|近来|这两天',
-            r'今天?早上|今天?上午|今天?中午|今天?下午|今天?晚上|今天?凌晨',
-            r'今早|今晚|今日',
-            r'昨天?晚上|昨天?下午|昨天?上午|昨天?早上|昨晚|昨早|昨日',
-            r'前天晚上|前晚',
-            r'这会儿|现在|此刻',
-            # ==================== 完整日期表达 ====================
-            r'\d{4}[-/年]\d{1,2}[-/月]\d{1,2}[日号]?',
-            r'\d{1,2}[-/月]\d{1,2}[日号]?',
-            r'\d{1,2}[日号]',
-            # 相对日期
-            r'大?前天|昨天|今天|明天|大?后天',
-            # 相对周
-            r'上{1,2}周|这周|本周|下{1,2}周',
-            # 相对月
-            r'上{1,2}个?月|这个?月|本月|下{1,2}个?月',
-            # 相对年
-            r'前年|去年|今年|明年|后年',
-            # 星期
-            r'(?:上{1,2}周|这周|本周|下{1,2}周)?(?:周|星期)[一二三四五六日天1-7]',
-            # 特殊表达
-            r'月[初底末]|年[初底末]',
-            # 组合表达 (如 "下个月15号")
-            r'(?:上{1,2}个?月|下{1,2}个?月)\d{1,2}[日号]',
-            r'(?:去年|明年|后年)\d{1,2}月(?:\d{1,2}[日号])?',
-        ]
+        # 预过滤：没有任何时间相关字词的消息不做解析
+        if not _DATE_HINT_RE.search(message):
+            return None
 
-        # 找到所有可能的日期表达
-        for pattern in date_patterns:
-            matches = re.findall(pattern, message)
-            for match in matches:
-                result = self.parse(match)
-                if result:
-                    return result
+        # 一次扫描提取全部日期表达，再按表达族优先级、出现位置依次解析
+        for expression in self.extract_expressions(message):
+            result = self.parse(expression)
+            if result:
+                return result
 
         # 尝试直接解析整个消息
         return self.parse(message)
@@ -526,7 +571,11 @@ class ConversationMemoryService:
             embedding_service=None,
             max_memories_per_query: int = 5,
             importance_threshold: str = "medium",
-            similarity_threshold: float = 0.5
+            similarity_threshold: float = 0.5,
+            candidate_limit: Optional[int] = None,
+            retrieval_min_importance: Optional[str] = None,
+            retrieval_max_age_days: Optional[int] = None,
+            lexical_index: Optional[MemoryLexicalIndex] = None
     ):
         """
         初始化对话记忆服务
@@ -538,13 +587,36 @@ class ConversationMemoryService:
             max_memories_per_query: 每次检索返回的最大记忆数量
             importance_threshold: 保存记忆的最低重要性阈值
             similarity_threshold: 向量相似度检索的最低阈值
+            candidate_limit: 向量检索在 SQL 中截取的候选记忆数（默认读取配置）
+            retrieval_min_importance: 检索的最低重要性级别（默认读取配置）
+            retrieval_max_age_days: 只检索最近多少天的记忆，0 表示不限制（默认读取配置）
+            lexical_index: 记忆倒排索引（默认使用全局实例）
         """
+        from config import settings
+
         self.db = db
         self.llm_provider = llm_provider
         self.embedding_service = embedding_service
         self.max_memories_per_query = max_memories_per_query
         self.importance_threshold = importance_threshold
         self.similarity_threshold = similarity_threshold
+        self.candidate_limit = candidate_limit or getattr(settings, "memory_retrieval_candidate_limit", 200)
+        self.retrieval_min_importance = (
+            retrieval_min_importance or getattr(settings, "memory_retrieval_min_importance", "low")
+        )
+        self.retrieval_max_age_days = (
+            retrieval_max_age_days if retrieval_max_age_days is not None
+            else getattr(settings, "memory_retrieval_max_age_days", 0)
+        )
+        self.lexical_index = lexical_index or get_memory_lexical_index()
+        self.lexical_min_score = getattr(settings, "memory_lexical_min_score", 0.2)
+        self.rank_weights = {
+            "vector": getattr(settings, "memory_rank_vector_weight", 0.6),
+            "lexical": getattr(settings, "memory_rank_lexical_weight", 0.25),
+            "importance": getattr(settings, "memory_rank_importance_weight", 0.1),
+            "recency": getattr(settings, "memory_rank_recency_weight", 0.05),
+        }
+        self.recency_half_life_days = getattr(settings, "memory_recency_half_life_days", 30.0)
 
         # 重要性级别排序
         self._importance_order = {
@@ -994,8 +1066,7 @@ AI回复: {bot_response}
             event_type=analysis.get("event_type"),
             keywords=analysis.get("keywords", []),
             event_date=event_date,
-            embedding=embedding,
-            embedding_model=embedding_model
+            **embedding_columns(embedding, model=embedding_model)
         )
 
         logger.debug(
@@ -1015,6 +1086,7 @@ AI回复: {bot_response}
             self.db.add(memory)
             await self.db.commit()
             await self.db.refresh(memory)
+            self.lexical_index.add_memory(memory.user_id, memory.id, memory.event_summary, memory.keywords)
 
             db_latency = (time.perf_counter() - db_start) * 1000
             logger.debug(
@@ -1054,7 +1126,7 @@ AI回复: {bot_response}
             limit: Optional[int] = None,
             use_vector_search: bool = True,
             skip_llm_analysis: bool = False
-    ) -> List[UserMemory]:
+    ) -> List[MemoryRecord]:
         """
         检索用户的相关记忆
 
@@ -1071,7 +1143,7 @@ AI回复: {bot_response}
             skip_llm_analysis: 是否跳过LLM分析（避免额外的LLM调用）
 
         Returns:
-            相关记忆列表（按相似度/重要性排序）
+            相关记忆列表（按相似度/重要性排序），只包含注入上下文所需字段的 MemoryRecord
         """
         trace_id = self._generate_trace_id()
         start_time = time.perf_counter()
@@ -1136,6 +1208,30 @@ AI回复: {bot_response}
                 f"🔎 [Memory-Retrieve][{trace_id}] Skipping vector search | reasons={reasons}"
             )
 
+        # 嵌入服务不可用或向量检索无结果时，先尝试倒排索引（不需要嵌入调用）
+        if current_message:
+            try:
+                memories = await self._retrieve_by_lexical(
+                    user_id=user_id,
+                    bot_id=bot_id,
+                    current_message=current_message,
+                    event_types=event_types,
+                    limit=limit,
+                    trace_id=trace_id
+                )
+                if memories:
+                    latency_ms = (time.perf_counter() - start_time) * 1000
+                    logger.info(
+                        f"✅ [Memory-Retrieve][{trace_id}] END lexical search | "
+                        f"latency={latency_ms:.1f}ms | retrieved={len(memories)} memories"
+                    )
+                    return memories
+            except Exception as e:
+                logger.warning(
+                    f"⚠️ [Memory-Retrieve][{trace_id}] Lexical search failed, falling back to metadata retrieval | "
+                    f"error_type={type(e).__name__} | error={e}"
+                )
+
         logger.debug(f"🔎 [Memory-Retrieve][{trace_id}] Using metadata-based retrieval...")
         # 回退到传统检索
         memories = await self._retrieve_by_metadata(
@@ -1164,13 +1260,14 @@ AI回复: {bot_response}
             event_types: Optional[List[str]],
             limit: int,
             trace_id: str = ""
-    ) -> List[UserMemory]:
+    ) -> List[MemoryRecord]:
         """
-        使用向量相似度检索记忆
+        使用向量相似度 + 倒排索引混合检索记忆
         1. 生成查询消息的向量嵌入
-        2. 从数据库获取用户的所有有embedding的记忆
-        3. 计算相似度并排序
-        4. 返回最相关的记忆
+        2. 在 SQL 中预过滤（重要性、时间范围、向量维度），按重要性与时间截取候选集，只选择需要的列
+        3. 用倒排索引（BM25）检索精确匹配的记忆，补充到候选集
+        4. 融合余弦相似度、BM25、重要性与新近度排序
+        5. 返回最相关的记忆
         """
         # 生成查询向量
         logger.debug(f"🔢 [Memory-VectorSearch][{trace_id}] Generating query embedding...")
@@ -1186,95 +1283,200 @@ AI回复: {bot_response}
             f"model={query_result.model}"
         )
 
-        # 构建基础查询 - 获取所有有embedding的记忆
-        query = select(UserMemory).where(
-            and_(
-                UserMemory.user_id == user_id,
-                UserMemory.is_active == True,
-                UserMemory.embedding.isnot(None)
-            )
+        # 构建候选查询 - 只选择检索结果与相似度计算需要的列
+        conditions = memory_filters(
+            user_id,
+            bot_id=bot_id,
+            event_types=event_types,
+            min_importance=self.retrieval_min_importance,
+            max_age_days=self.retrieval_max_age_days,
         )
+        if event_types:
+            logger.debug(f"🔢 [Memory-VectorSearch][{trace_id}] Filtering by event_types: {event_types}")
 
-        # 如果指定了Bot ID，添加过滤
-        if bot_id is not None:
-            query = query.where(
+        query = (
+            select(*MEMORY_RECORD_COLUMNS, *EMBEDDING_COLUMNS)
+            .where(and_(
+                *conditions,
+                has_embedding_clause(),
+                # 维度不同的向量无法比较（尚未迁移的 JSON 向量没有维度信息，在计算时再检查）
                 or_(
-                    UserMemory.bot_id == bot_id,
-                    UserMemory.bot_id.is_(None)
+                    UserMemory.embedding_dim == query_embedding.shape[0],
+                    UserMemory.embedding_dim.is_(None)
                 )
-            )
-
-        # 如果指定了事件类型，添加过滤
-        if event_types:
-            query = query.where(UserMemory.event_type.in_(event_types))
-            logger.debug(f"🔢 [Memory-VectorSearch][{trace_id}] Filtering by event_types: {event_types}")
+            ))
+            .order_by(importance_rank().desc(), UserMemory.created_at.desc())
+            .limit(self.candidate_limit)
+        )
 
         db_start = time.perf_counter()
         result = await self.db.execute(query)
-        memories = list(result.scalars().all())
+        rows = result.all()
         db_latency = (time.perf_counter() - db_start) * 1000
 
+        # 倒排索引命中但不在候选集中的记忆（如没有向量、超出候选上限）
+        lexical_scores = await self._lexical_scores(user_id, current_message)
+        extra_ids = lexical_scores.keys() - {row.id for row in rows}
+        if extra_ids:
+            result = await self.db.execute(
+                select(*MEMORY_RECORD_COLUMNS, *EMBEDDING_COLUMNS)
+                .where(and_(*conditions, UserMemory.id.in_(extra_ids)))
+            )
+            rows.extend(result.all())
+
         logger.debug(
-            f"🔢 [Memory-VectorSearch][{trace_id}] Fetched {len(memories)} memories with embeddings | "
+            f"🔢 [Memory-VectorSearch][{trace_id}] Fetched {len(rows)} candidate memories | "
+            f"candidate_limit={self.candidate_limit} | lexical_hits={len(lexical_scores)} | "
             f"db_latency={db_latency:.1f}ms"
         )
 
-        if not memories:
+        if not rows:
             return []
 
         # 计算余弦相似度
         logger.debug(f"🔢 [Memory-VectorSearch][{trace_id}] Computing cosine similarities...")
         similarity_start = time.perf_counter()
 
-        scored_memories: List[Tuple[UserMemory, float]] = []
-        for num, memory in enumerate(memories):
-            if memory.embedding:
-                memory_embedding = np.array(memory.embedding, dtype=np.float32)
-                similarity = self._cosine_similarity(query_embedding, memory_embedding)
+        # 二进制向量零拷贝解码，使用写入时保存的范数，一次矩阵乘法算出全部相似度
+        query_norm = float(np.linalg.norm(query_embedding))
+        candidates = []
+        vectors: List[np.ndarray] = []
+        norms: List[float] = []
+        for row in rows:
+            decoded = memory_embedding(row)
+            if decoded is None:
+                continue
+            vector, norm = decoded
+            if vector.shape[0] != query_embedding.shape[0]:
                 logger.debug(
-                    f"🔢 [Memory-VectorSearch][{trace_id}] Memory {memory.id}: "
-                    f"similarity={similarity:.4f} | threshold={self.similarity_threshold} | "
-                    f"preview={memory.event_summary[:30]}..."
+                    f"🔢 [Memory-VectorSearch][{trace_id}] Memory {row.id}: "
+                    f"dim mismatch ({vector.shape[0]} != {query_embedding.shape[0]}), skipped"
                 )
-
-                if similarity >= self.similarity_threshold:
-                    scored_memories.append((memory, similarity))
+                continue
+            candidates.append(row)
+            vectors.append(vector)
+            norms.append(norm)
+
+        similarities: Dict[int, float] = {}
+        if candidates and query_norm > 0:
+            denominators = np.asarray(norms, dtype=np.float32) * query_norm
+            denominators[denominators == 0] = np.inf
+            scores = (np.stack(vectors) @ query_embedding) / denominators
+            similarities = {row.id: similarity for row, similarity in zip(candidates, scores.tolist())}
+
+        # 相似度达到阈值或倒排索引强命中的记忆参与融合排序
+        now = datetime.utcnow()
+        ranked = []
+        for row in rows:
+            similarity = similarities.get(row.id)
+            lexical = lexical_scores.get(row.id, 0.0)
+            logger.debug(
+                f"🔢 [Memory-VectorSearch][{trace_id}] Memory {row.id}: "
+                f"similarity={similarity if similarity is not None else float('nan'):.4f} | "
+                f"lexical={lexical:.4f} | threshold={self.similarity_threshold} | "
+                f"preview={row.event_summary[:30]}..."
+            )
+            if (similarity is not None and similarity >= self.similarity_threshold) or lexical >= self.lexical_min_score:
+                ranked.append((row, self._hybrid_score(row, similarity, lexical, now)))
 
         similarity_latency = (time.perf_counter() - similarity_start) * 1000
         logger.debug(
             f"🔢 [Memory-VectorSearch][{trace_id}] Similarity computation done | "
             f"latency={similarity_latency:.1f}ms | "
-            f"above_threshold={len(scored_memories)}/{len(memories)}"
+            f"above_threshold={len(ranked)}/{len(rows)}"
         )
 
-        # 按相似度排序并取top_k
-        scored_memories.sort(key=lambda x: x[1], reverse=True)
-        top_memories = [m for m, _ in scored_memories[:limit]]
+        # 按融合分数排序并取top_k，只为入选的记忆创建记录
+        ranked.sort(key=lambda x: x[1], reverse=True)
+        top_memories = [MemoryRecord.from_row(row, score) for row, score in ranked[:limit]]
 
         if top_memories:
             logger.debug(f"🔢 [Memory-VectorSearch][{trace_id}] Top {len(top_memories)} memories selected:")
-            for i, (memory, score) in enumerate(scored_memories[:limit]):
+            for i, memory in enumerate(top_memories):
                 logger.debug(
-                    f"  [{i + 1}] id={memory.id} | similarity={score:.4f} | "
+                    f"  [{i + 1}] id={memory.id} | score={memory.score:.4f} | "
+                    f"similarity={similarities.get(memory.id, float('nan')):.4f} | "
                     f"type={memory.event_type} | summary={memory.event_summary[:60]}..."
                 )
 
-        # 更新访问计数和时间
+        # 记录访问计数和时间（由访问计数缓冲合并后批量写入）
         if top_memories:
             memory_ids = [m.id for m in top_memories]
-            await self.db.execute(
-                update(UserMemory)
-                .where(UserMemory.id.in_(memory_ids))
-                .values(
-                    access_count=UserMemory.access_count + 1,
-                    last_accessed_at=datetime.utcnow()
-                )
-            )
-            await self.db.commit()
-            logger.debug(f"🔢 [Memory-VectorSearch][{trace_id}] Updated access count for {len(memory_ids)} memories")
+            await record_memory_access(memory_ids, self.db)
+            logger.debug(f"🔢 [Memory-VectorSearch][{trace_id}] Recorded access for {len(memory_ids)} memories")
 
         return top_memories
 
+    async def _retrieve_by_lexical(
+            self,
+            user_id: int,
+            bot_id: Optional[int],
+            current_message: str,
+            event_types: Optional[List[str]],
+            limit: int,
+            trace_id: str = ""
+    ) -> List[MemoryRecord]:
+        """
+        只使用倒排索引（BM25）检索记忆
+
+        嵌入服务不可用时的快速路径，按 BM25、重要性与新近度融合排序。
+        """
+        lexical_start = time.perf_counter()
+        lexical_scores = {
+            memory_id: score
+            for memory_id, score in (await self._lexical_scores(user_id, current_message)).items()
+            if score >= self.lexical_min_score
+        }
+        if not lexical_scores:
+            logger.debug(f"🔤 [Memory-LexicalSearch][{trace_id}] No lexical hits")
+            return []
+
+        conditions = memory_filters(
+            user_id,
+            bot_id=bot_id,
+            event_types=event_types,
+            min_importance=self.retrieval_min_importance,
+            max_age_days=self.retrieval_max_age_days,
+        )
+        result = await self.db.execute(
+            select(*MEMORY_RECORD_COLUMNS).where(and_(*conditions, UserMemory.id.in_(lexical_scores.keys())))
+        )
+        now = datetime.utcnow()
+        ranked = [
+            (row, self._hybrid_score(row, None, lexical_scores[row.id], now))
+            for row in result.all()
+        ]
+        ranked.sort(key=lambda x: x[1], reverse=True)
+        memories = [MemoryRecord.from_row(row, score) for row, score in ranked[:limit]]
+
+        lexical_latency = (time.perf_counter() - lexical_start) * 1000
+        logger.debug(
+            f"🔤 [Memory-LexicalSearch][{trace_id}] Query executed | latency={lexical_latency:.1f}ms | "
+            f"hits={len(lexical_scores)} | retrieved={len(memories)} memories"
+        )
+
+        # 记录访问计数和时间（由访问计数缓冲合并后批量写入）
+        if memories:
+            await record_memory_access([m.id for m in memories], self.db)
+
+        return memories
+
+    async def _lexical_scores(self, user_id: int, current_message: str) -> Dict[int, float]:
+        """在用户倒排索引中检索当前消息，返回 {memory_id: 归一化 BM25}"""
+        await self.lexical_index.ensure_user(self.db, user_id)
+        return self.lexical_index.search(user_id, current_message, limit=self.candidate_limit)
+
+    def _hybrid_score(self, row, similarity: Optional[float], lexical: float, now: datetime) -> float:
+        return hybrid_score(
+            similarity,
+            lexical,
+            row.importance,
+            row.created_at,
+            now,
+            self.rank_weights,
+            self.recency_half_life_days,
+        )
+
     async def _retrieve_by_metadata(
             self,
             user_id: int,
@@ -1284,7 +1486,7 @@ AI回复: {bot_response}
             limit: int,
             skip_llm_analysis: bool = False,
             trace_id: str = ""
-    ) -> List[UserMemory]:
+    ) -> List[MemoryRecord]:
         """
         使用元数据（关键词、事件类型等）检索记忆
 
@@ -1292,26 +1494,15 @@ AI回复: {bot_response}
         """
         logger.debug(f"📋 [Memory-MetadataSearch][{trace_id}] Building metadata query...")
 
-        # 构建基础查询
-        query = select(UserMemory).where(
-            and_(
-                UserMemory.user_id == user_id,
-                UserMemory.is_active == True
-            )
-        )
-
-        # 如果指定了Bot ID，添加过滤
-        if bot_id is not None:
-            query = query.where(
-                or_(
-                    UserMemory.bot_id == bot_id,
-                    UserMemory.bot_id.is_(None)  # 也包括通用记忆
-                )
-            )
-
-        # 如果指定了事件类型，添加过滤
+        # 构建基础查询 - 只选择检索结果需要的列（包括通用记忆）
+        query = select(*MEMORY_RECORD_COLUMNS).where(and_(*memory_filters(
+            user_id,
+            bot_id=bot_id,
+            event_types=event_types,
+            min_importance=self.retrieval_min_importance,
+            max_age_days=self.retrieval_max_age_days,
+        )))
         if event_types:
-            query = query.where(UserMemory.event_type.in_(event_types))
             logger.debug(f"📋 [Memory-MetadataSearch][{trace_id}] Filtering by event_types: {event_types}")
 
         # LLM 会分析这句话“该搜什么类型的信息”，并动态添加 event_type 过滤条件。
@@ -1339,14 +1530,14 @@ AI回复: {bot_response}
 
         # 按重要性和访问时间排序
         query = query.order_by(
-            UserMemory.importance.desc(),
+            importance_rank().desc(),
             UserMemory.last_accessed_at.desc().nullsfirst(),
             UserMemory.created_at.desc()
         ).limit(limit)
 
         db_start = time.perf_counter()
         result = await self.db.execute(query)
-        memories = list(result.scalars().all())
+        memories = [MemoryRecord.from_row(row) for row in result.all()]
         db_latency = (time.perf_counter() - db_start) * 1000
 
         logger.debug(
@@ -1361,19 +1552,11 @@ AI回复: {bot_response}
                     f"type={memory.event_type} | summary={memory.event_summary[:60]}..."
                 )
 
-        # 更新访问计数和时间
+        # 记录访问计数和时间（由访问计数缓冲合并后批量写入）
         if memories:
             memory_ids = [m.id for m in memories]
-            await self.db.execute(
-                update(UserMemory)
-                .where(UserMemory.id.in_(memory_ids))
-                .values(
-                    access_count=UserMemory.access_count + 1,
-                    last_accessed_at=datetime.utcnow()
-                )
-            )
-            await self.db.commit()
-            logger.debug(f"📋 [Memory-MetadataSearch][{trace_id}] Updated access count for {len(memory_ids)} memories")
+            await record_memory_access(memory_ids, self.db)
+            logger.debug(f"📋 [Memory-MetadataSearch][{trace_id}] Recorded access for {len(memory_ids)} memories")
 
         return memories
 
@@ -1449,7 +1632,7 @@ AI回复: {bot_response}
 
     async def format_memories_for_context(
             self,
-            memories: List[UserMemory],
+            memories: List[MemoryRecord],
             max_chars: int = 1000
     ) -> str:
         """
@@ -1505,6 +1688,8 @@ AI回复: {bot_response}
         await self.db.commit()
 
         success = result.rowcount > 0
+        if success:
+            self.lexical_index.remove_memory(memory_id)
         logger.debug(
             f"🗑️ [Memory-Delete][{trace_id}] Delete {'succeeded' if success else 'failed'} | "
             f"memory_id={memory_id} | rows_affected={result.rowcount}"
@@ -1537,7 +1722,7 @@ AI回复: {bot_response}
             and_(
                 UserMemory.user_id == user_id,
                 UserMemory.is_active == True,
-                UserMemory.embedding.isnot(None)
+                has_embedding_clause()
             )
         )
         embedded_result = await self.db.execute(embedded_query)
@@ -1594,62 +1779,18 @@ AI回复: {bot_response}
             )
             return {"processed": 0, "failed": 0, "skipped": 0}
 
-        # 构建查询 - 获取没有embedding的记忆
-        query = select(UserMemory).where(
-            and_(
-                UserMemory.is_active == True,
-                UserMemory.embedding.is_(None)
-            )
+        # 单页补全：按主键游标读取、按 Provider 批量上限分片嵌入、批量写回
+        from src.services.embedding_backfill import EmbeddingBackfillJob, session_scope
+        job = EmbeddingBackfillJob(
+            self.embedding_service,
+            session_factory=session_scope(self.db),
+            page_size=batch_size,
+            user_id=user_id,
+            reembed_stale=False,
         )
-
-        if user_id is not None:
-            query = query.where(UserMemory.user_id == user_id)
-
-        query = query.limit(batch_size)
-
-        result = await self.db.execute(query)
-        memories = list(result.scalars().all())
-
-        logger.debug(f"🔄 [Memory-Backfill][{trace_id}] Found {len(memories)} memories without embeddings")
-
-        processed = 0
-        failed = 0
-
-        for memory in memories:
-            try:
-                logger.debug(
-                    f"🔄 [Memory-Backfill][{trace_id}] Processing memory_id={memory.id} | "
-                    f"summary={memory.event_summary[:50]}..."
-                )
-
-                # 生成embedding
-                embed_result = await self.embedding_service.embed_text(memory.event_summary)
-
-                # 更新记忆
-                await self.db.execute(
-                    update(UserMemory)
-                    .where(UserMemory.id == memory.id)
-                    .values(
-                        embedding=embed_result.embedding,
-                        embedding_model=embed_result.model,
-                        updated_at=datetime.utcnow()
-                    )
-                )
-                processed += 1
-
-                logger.debug(
-                    f"🔄 [Memory-Backfill][{trace_id}] memory_id={memory.id} embedding generated | "
-                    f"dim={len(embed_result.embedding)}"
-                )
-
-            except Exception as e:
-                logger.warning(
-                    f"⚠️ [Memory-Backfill][{trace_id}] Failed to generate embedding for memory_id={memory.id} | "
-                    f"error={e}"
-                )
-                failed += 1
-
-        await self.db.commit()
+        report = await job.run(max_pages=1)
+        processed = report.get("processed", 0)
+        failed = report.get("failed", 0)
 
         remaining = await self._count_memories_without_embedding(user_id)
 
@@ -1671,7 +1812,7 @@ AI回复: {bot_response}
         query = select(func.count(UserMemory.id)).where(
             and_(
                 UserMemory.is_active == True,
-                UserMemory.embedding.is_(None)
+                missing_embedding_clause()
             )
         )
 
@@ -0,0 +1,297 @@
+"""
+Embedding Backfill - 可断点续跑的记忆向量补全任务
+
+为缺少向量、或向量由旧模型生成的记忆批量生成嵌入：
+- 按主键游标分页读取（只查询 id 与摘要），不依赖 OFFSET
+- 每页按 Provider 的 max_batch_size 切分，以有限并发调用 embed_batch；
+  分片失败时逐条重试，单条坏摘要不会拖累同分片的其它记忆
+- 每页结果用一次 executemany 批量写回并提交
+- 每页提交后把游标写入检查点文件，中断后再次运行从游标处继续
+- 切换嵌入模型后，embedding_model 与当前模型不同的记忆会被重新生成
+
+使用方法：
+    job = EmbeddingBackfillJob(get_embedding_service())
+    report = await job.run()
+
+    # 或命令行
+    python -m scripts.db_manager memory-embeddings-backfill
+"""
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncContextManager, Callable, Dict, List, Optional, Sequence
+
+from loguru import logger
+from sqlalchemy import and_, func, null, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import get_async_db_context
+from src.models.database import UserMemory
+from src.services.embedding_codec import embedding_columns, missing_embedding_clause
+
+
+class EmbeddingBackfillJob:
+    """
+    记忆向量批量补全任务
+
+    检查点按「目标模型 + 用户范围」区分；模型或范围变化时从头开始。
+    分片嵌入失败时逐条重试，只有单条仍然失败的记忆记入 failed，游标仍然前进；
+    需要重试失败的记录时使用 reset=True 重新运行。
+    """
+
+    def __init__(
+        self,
+        embedding_service,
+        session_factory: Callable[[], AsyncContextManager[AsyncSession]] = get_async_db_context,
+        checkpoint_path: Optional[str] = None,
+        page_size: int = 500,
+        concurrency: int = 4,
+        chunk_size: Optional[int] = None,
+        user_id: Optional[int] = None,
+        reembed_stale: bool = True,
+        embedding_format: Optional[str] = None,
+    ):
+        """
+        Args:
+            embedding_service: EmbeddingService 实例
+            session_factory: 异步数据库会话工厂
+            checkpoint_path: 检查点文件路径，None 表示不保存检查点
+            page_size: 每页读取的记忆数
+            concurrency: 同时进行的 embed_batch 请求数
+            chunk_size: 每次 embed_batch 的文本数，默认使用 Provider 的 max_batch_size
+            user_id: 只处理指定用户（None 表示全部）
+            reembed_stale: 是否重新生成由其他模型生成的向量
+            embedding_format: 二进制向量格式，默认使用配置
+        """
+        self.embedding_service = embedding_service
+        self.session_factory = session_factory
+        self.checkpoint_path = checkpoint_path
+        self.page_size = page_size
+        self.concurrency = concurrency
+        provider = embedding_service.provider
+        self.chunk_size = chunk_size or getattr(provider, "max_batch_size", 25)
+        self.model: Optional[str] = getattr(provider, "model", None)
+        self.user_id = user_id
+        self.reembed_stale = reembed_stale and self.model is not None
+        self.embedding_format = embedding_format
+
+        self._cursor = 0
+        self._progress: Dict[str, Any] = {}
+        self._started_at: Optional[float] = None
+
+    # ==================== 检查点 ====================
+
+    def _scope(self) -> Dict[str, Any]:
+        return {"model": self.model, "user_id": self.user_id}
+
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ [Embedding-Backfill] 检查点读取失败，从头开始: {e}")
+            return {}
+        if checkpoint.get("scope") != self._scope():
+            logger.info(f"🔄 [Embedding-Backfill] 检查点范围不同（{checkpoint.get('scope')}），从头开始")
+            return {}
+        return checkpoint
+
+    def _save_checkpoint(self) -> None:
+        if not self.checkpoint_path:
+            return
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        checkpoint = {
+            "scope": self._scope(),
+            "cursor": self._cursor,
+            "processed": self._progress["processed"],
+            "failed": self._progress["failed"],
+            "updated_at": datetime.utcnow().isoformat(),
+        }
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def clear_checkpoint(self) -> None:
+        """删除检查点，下次运行从头开始"""
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    # ==================== 查询 ====================
+
+    def _pending_clause(self):
+        """需要生成向量的记忆：没有向量，或向量由其他模型生成"""
+        needs_embedding = missing_embedding_clause()
+        if self.reembed_stale:
+            needs_embedding = or_(
+                needs_embedding,
+                UserMemory.embedding_model.is_(None),
+                UserMemory.embedding_model != self.model,
+            )
+        conditions = [UserMemory.is_active == True, needs_embedding]
+        if self.user_id is not None:
+            conditions.append(UserMemory.user_id == self.user_id)
+        return and_(*conditions)
+
+    async def _count_pending(self) -> int:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(func.count(UserMemory.id)).where(and_(UserMemory.id > self._cursor, self._pending_clause()))
+            )
+            return result.scalar() or 0
+
+    async def _fetch_page(self) -> List[Any]:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(UserMemory.id, UserMemory.event_summary)
+                .where(and_(UserMemory.id > self._cursor, self._pending_clause()))
+                .order_by(UserMemory.id)
+                .limit(self.page_size)
+            )
+            return result.all()
+
+    # ==================== 嵌入与写回 ====================
+
+    async def _embed_chunk(self, semaphore: asyncio.Semaphore, rows: Sequence[Any]) -> List[Dict[str, Any]]:
+        """嵌入一个分片，返回待写回的列；分片失败时逐条重试，跳过仍然失败的记忆"""
+        async with semaphore:
+            try:
+                embedded = list(zip(rows, await self._embed_rows(rows)))
+            except Exception as e:
+                logger.warning(
+                    f"⚠️ [Embedding-Backfill] 分片嵌入失败，逐条重试 | ids={rows[0].id}..{rows[-1].id} | error={e}"
+                )
+                embedded = await self._embed_one_by_one(rows) if len(rows) > 1 else []
+        now = datetime.utcnow()
+        return [
+            {
+                "id": row.id,
+                "embedding": null(),
+                "updated_at": now,
+                **embedding_columns(result.embedding, model=result.model, fmt=self.embedding_format),
+            }
+            for row, result in embedded
+        ]
+
+    async def _embed_rows(self, rows: Sequence[Any]) -> List[Any]:
+        return await self.embedding_service.embed_batch(
+            [row.event_summary for row in rows], use_cache=False
+        )
+
+    async def _embed_one_by_one(self, rows: Sequence[Any]) -> List[Any]:
+        """逐条嵌入，返回成功的 (row, result)"""
+        embedded = []
+        for row in rows:
+            try:
+                embedded.append((row, (await self._embed_rows([row]))[0]))
+            except Exception as e:
+                logger.warning(f"⚠️ [Embedding-Backfill] 记忆嵌入失败，已跳过 | id={row.id} | error={e}")
+        return embedded
+
+    async def _process_page(self, rows: Sequence[Any]) -> int:
+        """处理一页记忆，返回成功写回的数量"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        chunks = [rows[i:i + self.chunk_size] for i in range(0, len(rows), self.chunk_size)]
+        chunk_results = await asyncio.gather(*(self._embed_chunk(semaphore, chunk) for chunk in chunks))
+        changes = [change for chunk in chunk_results for change in chunk]
+        if changes:
+            async with self.session_factory() as db:
+                await db.execute(update(UserMemory), changes)
+                await db.commit()
+        return len(changes)
+
+    # ==================== 运行 ====================
+
+    async def run(self, reset: bool = False, max_pages: Optional[int] = None) -> Dict[str, Any]:
+        """
+        运行补全任务直到没有待处理的记忆（或达到 max_pages）
+
+        Args:
+            reset: 忽略检查点，从头开始
+            max_pages: 最多处理的页数（None 表示不限制）
+
+        Returns:
+            进度报告，见 get_progress()
+        """
+        if not self.embedding_service or not self.embedding_service.provider:
+            logger.warning("⚠️ [Embedding-Backfill] No embedding service configured, cannot backfill")
+            return {}
+
+        if reset:
+            self.clear_checkpoint()
+        checkpoint = self._load_checkpoint()
+        self._cursor = checkpoint.get("cursor", 0)
+        self._progress = {
+            "processed": checkpoint.get("processed", 0),
+            "failed": checkpoint.get("failed", 0),
+            "pages": 0,
+            "run_processed": 0,
+            "pending": await self._count_pending(),
+        }
+        self._started_at = time.monotonic()
+        logger.info(
+            f"🔄 [Embedding-Backfill] START | model={self.model} | user_id={self.user_id} | "
+            f"cursor={self._cursor} | pending={self._progress['pending']} | "
+            f"chunk_size={self.chunk_size} | concurrency={self.concurrency}"
+        )
+
+        while max_pages is None or self._progress["pages"] < max_pages:
+            rows = await self._fetch_page()
+            if not rows:
+                break
+
+            written = await self._process_page(rows)
+            self._cursor = rows[-1].id
+            self._progress["pages"] += 1
+            self._progress["processed"] += written
+            self._progress["run_processed"] += written
+            self._progress["failed"] += len(rows) - written
+            self._progress["pending"] = max(0, self._progress["pending"] - len(rows))
+            self._save_checkpoint()
+
+            report = self.get_progress()
+            logger.info(
+                f"🔄 [Embedding-Backfill] page={report['pages']} | cursor={report['cursor']} | "
+                f"processed={report['processed']} | failed={report['failed']} | pending={report['pending']} | "
+                f"{report['rows_per_second']:.1f} rows/s | eta={report['eta_seconds']:.0f}s"
+            )
+
+        report = self.get_progress()
+        logger.info(
+            f"✅ [Embedding-Backfill] END | processed={report['processed']} | failed={report['failed']} | "
+            f"pending={report['pending']} | elapsed={report['elapsed_seconds']:.1f}s"
+        )
+        return report
+
+    def get_progress(self) -> Dict[str, Any]:
+        """进度与吞吐：累计处理数、失败数、剩余数、本次运行的速率与预计剩余时间"""
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        run_processed = self._progress.get("run_processed", 0)
+        rate = run_processed / elapsed if elapsed > 0 else 0.0
+        pending = self._progress.get("pending", 0)
+        return {
+            "model": self.model,
+            "cursor": self._cursor,
+            "pages": self._progress.get("pages", 0),
+            "processed": self._progress.get("processed", 0),
+            "failed": self._progress.get("failed", 0),
+            "pending": pending,
+            "elapsed_seconds": round(elapsed, 2),
+            "rows_per_second": round(rate, 2),
+            "eta_seconds": round(pending / rate, 1) if rate > 0 else 0.0,
+        }
+
+
+def session_scope(db: AsyncSession) -> Callable[[], AsyncContextManager[AsyncSession]]:
+    """把已有会话包装为会话工厂（由调用方负责会话的生命周期）"""
+    @asynccontextmanager
+    async def factory():
+        yield db
+    return factory
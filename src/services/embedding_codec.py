@@ -0,0 +1,229 @@
+"""
+Embedding Codec - 记忆向量的紧凑二进制存储
+
+UserMemory.embedding（JSON）每次检索都要在驱动中把上千个浮点数从文本解析成 list，
+再转换为 np.array。这里改为把向量以小端序二进制存入 UserMemory.embedding_vector，
+并在写入时一并保存维度与 L2 范数：
+- float32：4 字节/维，读取时 np.frombuffer 零拷贝
+- float16：2 字节/维，精度足够余弦相似度排序
+- int8：1 字节/维，对称量化，前 4 字节为 float32 缩放系数
+
+范数按解码后的向量计算，检索时直接使用，无需重复计算。
+
+使用方法：
+    memory = UserMemory(..., **embedding_columns(result.embedding, model=result.model))
+
+    decoded = memory_embedding(memory)  # (vector, norm) 或 None
+"""
+import json
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import String, and_, cast, null, or_, select, update
+from sqlalchemy.orm import Session
+
+from src.models.database import UserMemory
+
+# 支持的二进制格式
+EMBEDDING_FORMAT_FLOAT32 = "float32"
+EMBEDDING_FORMAT_FLOAT16 = "float16"
+EMBEDDING_FORMAT_INT8 = "int8"
+EMBEDDING_FORMATS = (EMBEDDING_FORMAT_FLOAT32, EMBEDDING_FORMAT_FLOAT16, EMBEDDING_FORMAT_INT8)
+
+# 小端序 dtype
+_DTYPES = {
+    EMBEDDING_FORMAT_FLOAT32: np.dtype("<f4"),
+    EMBEDDING_FORMAT_FLOAT16: np.dtype("<f2"),
+    EMBEDDING_FORMAT_INT8: np.dtype("i1"),
+}
+
+# int8 格式中缩放系数占用的字节数
+_INT8_SCALE_BYTES = 4
+
+
+def get_default_format() -> str:
+    """新写入记忆使用的二进制格式，由 memory_embedding_format 配置"""
+    from config import settings
+    fmt = getattr(settings, "memory_embedding_format", EMBEDDING_FORMAT_FLOAT32)
+    if fmt not in EMBEDDING_FORMATS:
+        logger.warning(f"⚠️ 未知的 memory_embedding_format={fmt}，使用 float32")
+        return EMBEDDING_FORMAT_FLOAT32
+    return fmt
+
+
+def encode_embedding(vector: Sequence[float], fmt: str = EMBEDDING_FORMAT_FLOAT32) -> bytes:
+    """
+    把向量编码为小端序二进制
+
+    Args:
+        vector: 向量
+        fmt: float32 / float16 / int8
+    """
+    array = np.asarray(vector, dtype=np.float32)
+    if fmt == EMBEDDING_FORMAT_INT8:
+        max_abs = float(np.max(np.abs(array))) if array.size else 0.0
+        scale = max_abs / 127 if max_abs > 0 else 1.0
+        quantized = np.clip(np.rint(array / scale), -127, 127).astype(_DTYPES[fmt])
+        return np.array([scale], dtype="<f4").tobytes() + quantized.tobytes()
+    if fmt not in _DTYPES:
+        raise ValueError(f"不支持的向量格式: {fmt}")
+    return array.astype(_DTYPES[fmt], copy=False).tobytes()
+
+
+def decode_embedding(blob: bytes, fmt: str = EMBEDDING_FORMAT_FLOAT32) -> np.ndarray:
+    """
+    解码二进制向量
+
+    float32 直接引用原始字节（只读视图，零拷贝）；float16 / int8 需要转换为 float32。
+    """
+    if fmt == EMBEDDING_FORMAT_FLOAT32:
+        return np.frombuffer(blob, dtype=_DTYPES[fmt])
+    if fmt == EMBEDDING_FORMAT_FLOAT16:
+        return np.frombuffer(blob, dtype=_DTYPES[fmt]).astype(np.float32)
+    if fmt == EMBEDDING_FORMAT_INT8:
+        scale = np.frombuffer(blob, dtype="<f4", count=1)[0]
+        return np.frombuffer(blob, dtype=_DTYPES[fmt], offset=_INT8_SCALE_BYTES).astype(np.float32) * scale
+    raise ValueError(f"不支持的向量格式: {fmt}")
+
+
+def embedding_columns(
+    vector: Optional[Sequence[float]],
+    model: Optional[str] = None,
+    fmt: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    生成 UserMemory 的嵌入列
+
+    Args:
+        vector: 向量（None 时返回空字典）
+        model: 生成向量的模型名称
+        fmt: 二进制格式，默认使用配置
+
+    Returns:
+        可直接传给 UserMemory(...) 或 update().values() 的列字典
+    """
+    if vector is None or len(vector) == 0:
+        return {}
+    fmt = fmt or get_default_format()
+    blob = encode_embedding(vector, fmt)
+    columns = {
+        "embedding_vector": blob,
+        "embedding_format": fmt,
+        "embedding_dim": len(vector),
+        "embedding_norm": float(np.linalg.norm(decode_embedding(blob, fmt))),
+    }
+    if model is not None:
+        columns["embedding_model"] = model
+    return columns
+
+
+def memory_embedding(memory: UserMemory) -> Optional[Tuple[np.ndarray, float]]:
+    """
+    读取记忆的向量与范数
+
+    优先使用二进制列；尚未迁移的记录回退到 JSON 列。
+    """
+    if memory.embedding_vector is not None:
+        vector = decode_embedding(memory.embedding_vector, memory.embedding_format or EMBEDDING_FORMAT_FLOAT32)
+        norm = memory.embedding_norm
+        if norm is None:
+            norm = float(np.linalg.norm(vector))
+        return vector, norm
+    if memory.embedding:
+        vector = np.asarray(memory.embedding, dtype=np.float32)
+        return vector, float(np.linalg.norm(vector))
+    return None
+
+
+def has_embedding_clause():
+    """SQL 条件：记忆有向量（二进制或尚未迁移的 JSON）"""
+    return or_(UserMemory.embedding_vector.isnot(None), UserMemory.embedding.isnot(None))
+
+
+def missing_embedding_clause():
+    """SQL 条件：记忆没有向量（显式写入 None 的 JSON 列存为 JSON null，也视为没有）"""
+    return and_(
+        UserMemory.embedding_vector.is_(None),
+        or_(UserMemory.embedding.is_(None), cast(UserMemory.embedding, String) == "null"),
+    )
+
+
+def migrate_json_embeddings(
+    db: Session,
+    batch_size: int = 500,
+    fmt: Optional[str] = None,
+    keep_json: bool = False,
+) -> Dict[str, Any]:
+    """
+    把 JSON 列中的向量批量转换为二进制列
+
+    按主键分批读取、批量写回并逐批提交，可中断后重复执行（已转换的记录会被跳过）。
+
+    Args:
+        db: 同步数据库会话
+        batch_size: 每批转换的记录数
+        fmt: 二进制格式，默认使用配置
+        keep_json: 是否保留 JSON 列（默认清空以回收空间）
+
+    Returns:
+        转换统计：记录数、存储字节数与解码耗时对比
+    """
+    fmt = fmt or get_default_format()
+    stats = {
+        "converted": 0,
+        "cleared": 0,
+        "json_bytes": 0,
+        "binary_bytes": 0,
+        "json_decode_ms": 0.0,
+        "binary_decode_ms": 0.0,
+    }
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(UserMemory.id, UserMemory.embedding)
+            .where(and_(
+                UserMemory.id > last_id,
+                UserMemory.embedding.isnot(None),
+                UserMemory.embedding_vector.is_(None),
+            ))
+            .order_by(UserMemory.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        changes = []
+        for row in rows:
+            if not row.embedding:
+                # JSON null / 空列表：规范化为 SQL NULL，便于补全任务识别
+                changes.append({"id": row.id, "embedding": null()})
+                stats["cleared"] += 1
+                continue
+
+            text = json.dumps(row.embedding)
+            started = time.perf_counter()
+            np.asarray(json.loads(text), dtype=np.float32)
+            stats["json_decode_ms"] += (time.perf_counter() - started) * 1000
+
+            columns = embedding_columns(row.embedding, fmt=fmt)
+            started = time.perf_counter()
+            decode_embedding(columns["embedding_vector"], fmt)
+            stats["binary_decode_ms"] += (time.perf_counter() - started) * 1000
+
+            stats["json_bytes"] += len(text.encode("utf-8"))
+            stats["binary_bytes"] += len(columns["embedding_vector"])
+            if not keep_json:
+                columns["embedding"] = null()
+            changes.append({"id": row.id, **columns})
+            stats["converted"] += 1
+
+        db.execute(update(UserMemory), changes)
+        db.commit()
+        logger.info(f"🔄 [Embedding-Migrate] 已转换 {stats['converted']} 条（最后 id={last_id}）")
+
+    stats["json_decode_ms"] = round(stats["json_decode_ms"], 2)
+    stats["binary_decode_ms"] = round(stats["binary_decode_ms"], 2)
+    return stats
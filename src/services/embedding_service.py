@@ -59,6 +59,9 @@ class EmbeddingResult:
 class EmbeddingProvider(ABC):
     """向量嵌入Provider抽象基类"""
     
+    # 单次 embed_batch 请求的最大文本数（批量补全任务按此切分）
+    max_batch_size: int = 25
+    
     @property
     @abstractmethod
     def name(self) -> str:
@@ -101,6 +104,8 @@ class EmbeddingProvider(ABC):
 class OpenAIEmbeddingProvider(EmbeddingProvider):
     """OpenAI Embedding Provider"""
     
+    max_batch_size = 256
+    
     # 模型维度映射
     MODEL_DIMENSIONS = {
         "text-embedding-3-small": 1536,
@@ -190,6 +195,8 @@ class DashScopeEmbeddingProvider(EmbeddingProvider):
     通义千问文本向量化服务
     """
     
+    max_batch_size = 25
+    
     # 模型维度映射
     MODEL_DIMENSIONS = {
         "text-embedding-v1": 1536,
@@ -259,7 +266,7 @@ class DashScopeEmbeddingProvider(EmbeddingProvider):
         
         try:
             # DashScope批量处理，每批最多25个
-            batch_size = 25
+            batch_size = self.max_batch_size
             all_results = []
             
             for i in range(0, len(texts), batch_size):
@@ -0,0 +1,506 @@
+"""
+Feedback Ingestion - 异步反馈写入管道
+
+反馈处理器（reaction / 回复 / 置顶 / 转发）不再在事件循环线程上执行同步 ORM 写入，
+而是把轻量的 FeedbackEvent 放入有界内存队列后立即返回；
+后台写入协程按批取出事件，通过异步引擎一次性完成：
+1. 批量解析 / 创建用户与频道（每批各一次 IN 查询；插入使用 ON CONFLICT DO NOTHING，
+   与同步路径并发创建同一用户 / 频道时不会使整批失败）
+2. 反应的添加、更新与取消（按到达顺序在内存中合并后，多行 INSERT + 按主键批量 UPDATE）
+3. 交互记录的多行 INSERT
+4. 在同一事务中更新小时统计桶（见 feedback_rollup）
+
+整批事务失败时逐条重试，单条坏事件只丢弃它自己，不会连带同批其余事件。
+
+语义与 FeedbackService.add_reaction / remove_reaction 保持一致：
+同一用户对同一消息只保留一个活跃反应，重复添加相同反应不产生新记录。
+
+使用方法：
+1. 在 Bot 启动时调用 start_feedback_ingestion()
+2. 处理器调用 submit_feedback_events() 提交事件（队列未运行时直接异步写入）
+3. 在 Bot 关闭时调用 stop_feedback_ingestion()，剩余事件会在退出前写入
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncContextManager, Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from src.database import get_async_db_context
+from src.models.database import (
+    Channel,
+    MessageInteraction,
+    MessageReaction,
+    SubscriptionTier,
+    User,
+)
+from src.services.feedback_rollup import RollupDelta, apply_rollup_deltas_async
+from src.services.feedback_service import (
+    NEGATIVE_REACTIONS,
+    NEUTRAL_REACTIONS,
+    POSITIVE_REACTIONS,
+)
+
+# 事件类型
+REACTION_ADD = "reaction_add"
+REACTION_REMOVE = "reaction_remove"
+INTERACTION = "interaction"
+
+
+@dataclass
+class FeedbackEvent:
+    """
+    一条待写入的反馈事件
+
+    只包含 Telegram 侧的原始标识，用户 / 频道的数据库 ID 由写入协程批量解析。
+    """
+    kind: str
+    telegram_user_id: int
+    chat_id: int
+    message_id: int
+    chat_type: str = "private"
+    chat_title: Optional[str] = None
+    chat_username: Optional[str] = None
+    bot_id: Optional[int] = None
+    emoji: Optional[str] = None
+    custom_emoji_id: Optional[str] = None
+    is_big: bool = False
+    interaction_type: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+
+def classify_reaction(emoji: str) -> str:
+    """分类反应为正面/负面/中性/自定义（与 FeedbackService._classify_reaction 一致）"""
+    if emoji in POSITIVE_REACTIONS:
+        return "positive"
+    if emoji in NEGATIVE_REACTIONS:
+        return "negative"
+    if emoji in NEUTRAL_REACTIONS:
+        return "neutral"
+    return "custom"
+
+
+def _insert_ignoring_conflicts(db: AsyncSession, model: Any, unique_column: Any) -> Any:
+    """
+    构造忽略唯一键冲突的 INSERT（ON CONFLICT DO NOTHING）
+
+    同步写入路径可能并发创建同一用户 / 频道；冲突行直接跳过，随后的 SELECT 会取到已有行。
+    不支持 ON CONFLICT 的方言回退为普通 INSERT。
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model).on_conflict_do_nothing(index_elements=[unique_column])
+    if dialect == "sqlite":
+        return sqlite.insert(model).on_conflict_do_nothing(index_elements=[unique_column])
+    return insert(model)
+
+
+class FeedbackIngestionQueue:
+    """
+    反馈写入队列 - 有界内存队列 + 后台批量写入协程
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        session_factory: Callable[[], AsyncContextManager[AsyncSession]] = get_async_db_context,
+    ):
+        """
+        初始化写入队列
+
+        Args:
+            max_size: 队列容量，队列满时新事件被丢弃并计入 dropped
+            batch_size: 单批最多写入的事件数
+            flush_interval: 等待新事件的最长时间（秒）
+            session_factory: 异步数据库会话上下文工厂
+        """
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._session_factory = session_factory
+        self._queue: Optional[asyncio.Queue] = None
+        self._running = False
+        self._task: Optional[asyncio.Task] = None
+        self._metrics: Dict[str, Any] = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "failed": 0,
+            "batches": 0,
+            "high_watermark": 0,
+            "last_batch_size": 0,
+            "last_flush_ms": 0.0,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def enqueue(self, event: FeedbackEvent) -> bool:
+        """
+        非阻塞地提交一条事件
+
+        Returns:
+            bool: 是否成功入队；队列未运行或已满时返回 False
+        """
+        if not self._running or self._queue is None:
+            return False
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self._metrics["dropped"] += 1
+            if self._metrics["dropped"] % 100 == 1:
+                logger.warning(
+                    f"⚠️ [FeedbackIngestion] 队列已满（{self.max_size}），"
+                    f"已丢弃 {self._metrics['dropped']} 条反馈事件"
+                )
+            return False
+        self._metrics["enqueued"] += 1
+        size = self._queue.qsize()
+        if size > self._metrics["high_watermark"]:
+            self._metrics["high_watermark"] = size
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取队列与写入指标（用于监控背压）"""
+        return {
+            **self._metrics,
+            "queue_size": self._queue.qsize() if self._queue else 0,
+            "max_size": self.max_size,
+            "running": self._running,
+        }
+
+    async def start(self) -> None:
+        """启动后台写入协程"""
+        if self._running:
+            logger.warning("Feedback ingestion already running")
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._running = True
+        self._task = asyncio.create_task(self._run_loop())
+        logger.info(
+            f"✅ [FeedbackIngestion] 已启动: max_size={self.max_size}, "
+            f"batch_size={self.batch_size}"
+        )
+
+    async def stop(self) -> None:
+        """停止写入协程，退出前写入队列中剩余的事件"""
+        if not self._running:
+            return
+        self._running = False
+        if self._task:
+            await self._task
+            self._task = None
+        logger.info(f"🛑 [FeedbackIngestion] 已停止: {self.get_stats()}")
+
+    async def _run_loop(self) -> None:
+        """写入主循环：停止后继续运行直到队列排空"""
+        while self._running or not self._queue.empty():
+            batch = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+
+    async def _next_batch(self) -> List[FeedbackEvent]:
+        """等待第一条事件，再非阻塞地取出同批其余事件"""
+        try:
+            first = await asyncio.wait_for(self._queue.get(), timeout=self.flush_interval)
+        except asyncio.TimeoutError:
+            return []
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _flush(self, batch: List[FeedbackEvent]) -> None:
+        """写入一批事件；整批失败时逐条重试，只丢弃写不进去的事件"""
+        started = time.monotonic()
+        try:
+            await self.write(batch)
+        except Exception as e:
+            logger.warning(f"⚠️ [FeedbackIngestion] 批量写入失败（{len(batch)} 条），逐条重试: {e}")
+            written = await self._write_one_by_one(batch)
+        else:
+            written = len(batch)
+        self._metrics["written"] += written
+        self._metrics["batches"] += 1
+        self._metrics["last_batch_size"] = len(batch)
+        self._metrics["last_flush_ms"] = round((time.monotonic() - started) * 1000, 2)
+
+    async def _write_one_by_one(self, batch: List[FeedbackEvent]) -> int:
+        """逐条写入，返回成功条数；失败的事件记录日志与指标后丢弃"""
+        written = 0
+        for event in batch:
+            try:
+                await self.write([event])
+            except Exception as e:
+                self._metrics["failed"] += 1
+                logger.error(
+                    f"❌ [FeedbackIngestion] 事件写入失败，已丢弃: kind={event.kind}, "
+                    f"user={event.telegram_user_id}, message={event.message_id}: {e}",
+                    exc_info=True,
+                )
+            else:
+                written += 1
+        return written
+
+    async def write(self, events: List[FeedbackEvent]) -> None:
+        """
+        在单个异步会话中写入一批事件
+
+        Args:
+            events: 按到达顺序排列的事件
+        """
+        if not events:
+            return
+        async with self._session_factory() as db:
+            await self._apply(db, events)
+            await db.commit()
+        logger.debug(f"📝 [FeedbackIngestion] 写入 {len(events)} 条反馈事件")
+
+    async def _apply(self, db: AsyncSession, events: List[FeedbackEvent]) -> None:
+        users = await self._resolve_users(db, {e.telegram_user_id for e in events})
+        channels = await self._resolve_channels(db, events, users)
+
+        # (user_id, message_id, chat_id) → {emoji: ("db", 已有行) | ("new", 待插入行)}
+        active = await self._load_active_reactions(db, events, users)
+        new_reactions: List[Dict[str, Any]] = []
+        # 反应ID → (取消时间, 已有行)
+        deactivated: Dict[int, Tuple[datetime, Dict[str, Any]]] = {}
+        interactions: List[Dict[str, Any]] = []
+
+        for event in events:
+            user_id = users[event.telegram_user_id]
+            channel_id = channels.get(event.chat_id)
+
+            if event.kind == INTERACTION:
+                interactions.append({
+                    "user_id": user_id,
+                    "message_id": event.message_id,
+                    "chat_id": event.chat_id,
+                    "interaction_type": event.interaction_type,
+                    "bot_id": event.bot_id,
+                    "channel_id": channel_id,
+                    "extra_data": event.metadata or {},
+                    "source_platform": "telegram",
+                    "client_info": {},
+                    "is_successful": True,
+                    "created_at": event.created_at,
+                })
+                continue
+
+            state = active.setdefault((user_id, event.message_id, event.chat_id), {})
+            if event.kind == REACTION_REMOVE:
+                entry = state.pop(event.emoji, None)
+                if entry is not None:
+                    self._deactivate(entry, event.created_at, deactivated)
+                continue
+
+            # REACTION_ADD：相同反应不重复记录，其它活跃反应被替换
+            if event.emoji in state:
+                continue
+            for entry in state.values():
+                self._deactivate(entry, event.created_at, deactivated)
+            row = {
+                "user_id": user_id,
+                "message_id": event.message_id,
+                "chat_id": event.chat_id,
+                "reaction_emoji": event.emoji,
+                "reaction_type": classify_reaction(event.emoji),
+                "bot_id": event.bot_id,
+                "channel_id": channel_id,
+                "custom_emoji_id": event.custom_emoji_id,
+                "is_big": event.is_big,
+                "is_active": True,
+                "removed_at": None,
+                "created_at": event.created_at,
+            }
+            new_reactions.append(row)
+            state.clear()
+            state[event.emoji] = ("new", row)
+
+        if deactivated:
+            await db.execute(
+                update(MessageReaction),
+                [{"id": rid, "is_active": False, "removed_at": at} for rid, (at, _) in deactivated.items()],
+            )
+        if new_reactions:
+            await db.execute(insert(MessageReaction), new_reactions)
+        if interactions:
+            await db.execute(insert(MessageInteraction), interactions)
+        await apply_rollup_deltas_async(db, self._rollup_delta(new_reactions, deactivated, interactions))
+
+    @staticmethod
+    def _rollup_delta(
+        new_reactions: List[Dict[str, Any]],
+        deactivated: Dict[int, Tuple[datetime, Dict[str, Any]]],
+        interactions: List[Dict[str, Any]],
+    ) -> RollupDelta:
+        """本批写入对小时桶的净增量：批末仍有效的新反应 +1，被取消的已有反应 -1，交互 +1"""
+        delta = RollupDelta()
+        for row in new_reactions:
+            if row["is_active"]:
+                delta.add_reaction(row["bot_id"], row["channel_id"], row["created_at"], row["reaction_emoji"])
+        for _, row in deactivated.values():
+            delta.add_reaction(row["bot_id"], row["channel_id"], row["created_at"], row["reaction_emoji"], sign=-1)
+        for row in interactions:
+            delta.add_interaction(row["bot_id"], row["channel_id"], row["created_at"], row["interaction_type"])
+        return delta
+
+    @staticmethod
+    def _deactivate(
+        entry: Tuple[str, Dict[str, Any]],
+        at: datetime,
+        deactivated: Dict[int, Tuple[datetime, Dict[str, Any]]],
+    ) -> None:
+        source, target = entry
+        if source == "db":
+            deactivated[target["id"]] = (at, target)
+        else:
+            target["is_active"] = False
+            target["removed_at"] = at
+
+    async def _resolve_users(self, db: AsyncSession, telegram_ids: Iterable[int]) -> Dict[int, int]:
+        """telegram_id → users.id，缺失的用户批量创建"""
+        telegram_ids = set(telegram_ids)
+        result = await db.execute(
+            select(User.telegram_id, User.id).where(User.telegram_id.in_(telegram_ids))
+        )
+        users = {row.telegram_id: row.id for row in result}
+        missing = telegram_ids - users.keys()
+        if missing:
+            await db.execute(_insert_ignoring_conflicts(db, User, User.telegram_id), [
+                {"telegram_id": tid, "subscription_tier": SubscriptionTier.FREE.value, "is_active": True}
+                for tid in missing
+            ])
+            result = await db.execute(
+                select(User.telegram_id, User.id).where(User.telegram_id.in_(missing))
+            )
+            users.update({row.telegram_id: row.id for row in result})
+            logger.info(f"Resolved {len(missing)} new user(s) from feedback events")
+        return users
+
+    async def _resolve_channels(
+        self,
+        db: AsyncSession,
+        events: List[FeedbackEvent],
+        users: Dict[int, int],
+    ) -> Dict[int, int]:
+        """telegram_chat_id → channels.id，缺失的频道批量创建"""
+        first_event: Dict[int, FeedbackEvent] = {}
+        for event in events:
+            first_event.setdefault(event.chat_id, event)
+        result = await db.execute(
+            select(Channel.telegram_chat_id, Channel.id).where(Channel.telegram_chat_id.in_(first_event))
+        )
+        channels = {row.telegram_chat_id: row.id for row in result}
+        missing = first_event.keys() - channels.keys()
+        if missing:
+            await db.execute(_insert_ignoring_conflicts(db, Channel, Channel.telegram_chat_id), [
+                {
+                    "telegram_chat_id": chat_id,
+                    "chat_type": first_event[chat_id].chat_type,
+                    "title": first_event[chat_id].chat_title,
+                    "username": first_event[chat_id].chat_username,
+                    "owner_id": users.get(first_event[chat_id].telegram_user_id),
+                    "subscription_tier": SubscriptionTier.FREE.value,
+                    "is_active": True,
+                    "settings": {},
+                }
+                for chat_id in missing
+            ])
+            result = await db.execute(
+                select(Channel.telegram_chat_id, Channel.id).where(Channel.telegram_chat_id.in_(missing))
+            )
+            channels.update({row.telegram_chat_id: row.id for row in result})
+        return channels
+
+    async def _load_active_reactions(
+        self,
+        db: AsyncSession,
+        events: List[FeedbackEvent],
+        users: Dict[int, int],
+    ) -> Dict[Tuple[int, int, int], Dict[str, Tuple[str, Any]]]:
+        """一次查询本批涉及消息上的现有活跃反应"""
+        keys = {
+            (users[e.telegram_user_id], e.message_id, e.chat_id)
+            for e in events if e.kind != INTERACTION
+        }
+        active: Dict[Tuple[int, int, int], Dict[str, Tuple[str, Any]]] = {}
+        if not keys:
+            return active
+        result = await db.execute(
+            select(
+                MessageReaction.id,
+                MessageReaction.user_id,
+                MessageReaction.message_id,
+                MessageReaction.chat_id,
+                MessageReaction.reaction_emoji,
+                MessageReaction.bot_id,
+                MessageReaction.channel_id,
+                MessageReaction.created_at,
+            ).where(
+                MessageReaction.is_active == True,
+                MessageReaction.user_id.in_({k[0] for k in keys}),
+                MessageReaction.message_id.in_({k[1] for k in keys}),
+            )
+        )
+        for row in result:
+            key = (row.user_id, row.message_id, row.chat_id)
+            if key in keys:
+                active.setdefault(key, {})[row.reaction_emoji] = ("db", dict(row._mapping))
+        return active
+
+
+# 全局写入队列实例
+_ingestion: Optional[FeedbackIngestionQueue] = None
+
+
+def get_feedback_ingestion() -> FeedbackIngestionQueue:
+    """获取全局反馈写入队列实例"""
+    global _ingestion
+    if _ingestion is None:
+        _ingestion = FeedbackIngestionQueue(
+            max_size=getattr(settings, "feedback_queue_max_size", 10000),
+            batch_size=getattr(settings, "feedback_batch_size", 200),
+            flush_interval=getattr(settings, "feedback_flush_interval", 1.0),
+        )
+    return _ingestion
+
+
+async def submit_feedback_events(events: List[FeedbackEvent]) -> None:
+    """
+    提交反馈事件
+
+    写入队列运行时非阻塞入队；未启动（如单 Bot 模式）时直接通过异步引擎写入。
+    """
+    if not events:
+        return
+    ingestion = get_feedback_ingestion()
+    if ingestion.is_running:
+        for event in events:
+            ingestion.enqueue(event)
+        return
+    await ingestion.write(events)
+
+
+async def start_feedback_ingestion() -> None:
+    """启动全局反馈写入队列"""
+    await get_feedback_ingestion().start()
+
+
+async def stop_feedback_ingestion() -> None:
+    """停止全局反馈写入队列并写入剩余事件"""
+    if _ingestion is not None:
+        await _ingestion.stop()
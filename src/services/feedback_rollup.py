@@ -0,0 +1,421 @@
+"""
+Feedback Rollup - 反馈统计的增量小时桶
+
+每个 (bot_id, channel_id, 小时) 对应一行 period_type='hourly' 的 FeedbackSummary，
+在反馈写入时随同一事务增量更新：
+- 反应生效：在其创建时间所在小时的桶中 +1
+- 反应取消 / 被替换：在其创建时间所在小时的桶中 -1
+- 交互记录：在其创建时间所在小时的桶中 +1
+
+因此每个桶始终等于「该小时内创建、当前仍有效的反应数」与「该小时内的交互数」，
+与 FeedbackService.generate_feedback_summary 的全量扫描口径一致。
+日 / 周 / 月统计通过合并桶得到，查询开销与桶数量成正比，而不是与事件数量成正比。
+计数列通过 INSERT ... ON CONFLICT DO UPDATE 原子累加（唯一索引 uq_feedback_summary_bucket），
+并发写入同一个桶不会丢失增量。
+
+已有数据通过 backfill_rollups() 一次性重建。
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import and_, case, delete, func, insert, literal_column, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.models.database import (
+    FeedbackSummary,
+    InteractionType,
+    MessageInteraction,
+    MessageReaction,
+)
+from src.services.feedback_service import NEGATIVE_REACTIONS, POSITIVE_REACTIONS
+
+# 小时桶使用的周期类型
+BUCKET_PERIOD = "hourly"
+
+# 交互类型 → FeedbackSummary 计数字段
+_INTERACTION_COUNTERS = {
+    InteractionType.COPY.value: "copy_count",
+    InteractionType.REPLY.value: "reply_count",
+    InteractionType.FORWARD.value: "forward_count",
+    InteractionType.PIN.value: "pin_count",
+    InteractionType.REPORT.value: "report_count",
+}
+
+_COUNTER_FIELDS = (
+    "total_reactions", "positive_reactions", "negative_reactions", "neutral_reactions",
+    "total_interactions", "copy_count", "reply_count", "forward_count", "pin_count", "report_count",
+)
+
+BucketKey = Tuple[Optional[int], Optional[int], datetime]
+
+
+def bucket_start(ts: datetime) -> datetime:
+    """时间所在小时桶的起始时间"""
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def _reaction_polarity(emoji: str) -> str:
+    """正面 / 负面 / 其余（中性与自定义），与 generate_feedback_summary 的口径一致"""
+    if emoji in POSITIVE_REACTIONS:
+        return "positive_reactions"
+    if emoji in NEGATIVE_REACTIONS:
+        return "negative_reactions"
+    return "neutral_reactions"
+
+
+class RollupDelta:
+    """
+    一批反馈事件对小时桶的计数增量
+    """
+
+    def __init__(self):
+        self._buckets: Dict[BucketKey, Dict[str, Any]] = {}
+
+    def _bucket(self, bot_id: Optional[int], channel_id: Optional[int], created_at: datetime) -> Dict[str, Any]:
+        key = (bot_id, channel_id, bucket_start(created_at))
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = {name: 0 for name in _COUNTER_FIELDS}
+            bucket["reaction_breakdown"] = {}
+            bucket["interaction_breakdown"] = {}
+            self._buckets[key] = bucket
+        return bucket
+
+    def add_reaction(
+        self,
+        bot_id: Optional[int],
+        channel_id: Optional[int],
+        created_at: datetime,
+        emoji: str,
+        sign: int = 1,
+    ) -> None:
+        """记录一个反应生效（sign=1）或失效（sign=-1）"""
+        bucket = self._bucket(bot_id, channel_id, created_at)
+        bucket["total_reactions"] += sign
+        bucket[_reaction_polarity(emoji)] += sign
+        breakdown = bucket["reaction_breakdown"]
+        breakdown[emoji] = breakdown.get(emoji, 0) + sign
+
+    def add_interaction(
+        self,
+        bot_id: Optional[int],
+        channel_id: Optional[int],
+        created_at: datetime,
+        interaction_type: str,
+        sign: int = 1,
+    ) -> None:
+        """记录一条交互"""
+        bucket = self._bucket(bot_id, channel_id, created_at)
+        bucket["total_interactions"] += sign
+        counter = _INTERACTION_COUNTERS.get(interaction_type)
+        if counter:
+            bucket[counter] += sign
+        breakdown = bucket["interaction_breakdown"]
+        breakdown[interaction_type] = breakdown.get(interaction_type, 0) + sign
+
+    def __bool__(self) -> bool:
+        return bool(self._buckets)
+
+    def items(self) -> Iterable[Tuple[BucketKey, Dict[str, Any]]]:
+        return self._buckets.items()
+
+
+def _merge_breakdown(current: Optional[Dict[str, int]], delta: Dict[str, int]) -> Dict[str, int]:
+    """合并计数字典，去掉归零的键（返回新字典，确保 JSON 列变更被检测到）"""
+    merged = dict(current or {})
+    for key, value in delta.items():
+        merged[key] = merged.get(key, 0) + value
+        if merged[key] <= 0:
+            merged.pop(key)
+    return merged
+
+
+def _score(summary: Any) -> None:
+    """根据计数重新计算满意度与参与度"""
+    rated = (summary.positive_reactions or 0) + (summary.negative_reactions or 0)
+    summary.satisfaction_score = int((summary.positive_reactions / rated) * 100) if rated > 0 else None
+    summary.engagement_score = min(100, summary.total_interactions or 0)
+
+
+def _apply_breakdowns(summary: FeedbackSummary, delta: Dict[str, Any]) -> None:
+    summary.reaction_breakdown = _merge_breakdown(summary.reaction_breakdown, delta["reaction_breakdown"])
+    summary.interaction_breakdown = _merge_breakdown(summary.interaction_breakdown, delta["interaction_breakdown"])
+    _score(summary)
+
+
+def _apply_to_summary(summary: FeedbackSummary, delta: Dict[str, Any]) -> None:
+    for name in _COUNTER_FIELDS:
+        setattr(summary, name, max(0, (getattr(summary, name) or 0) + delta[name]))
+    _apply_breakdowns(summary, delta)
+
+
+def new_bucket(key: BucketKey) -> FeedbackSummary:
+    """创建 (bot_id, channel_id, 小时起点) 对应的零计数小时桶"""
+    bot_id, channel_id, start = key
+    summary = FeedbackSummary(
+        bot_id=bot_id,
+        channel_id=channel_id,
+        period_type=BUCKET_PERIOD,
+        period_start=start,
+        period_end=start + timedelta(hours=1),
+        reaction_breakdown={},
+        interaction_breakdown={},
+    )
+    for name in _COUNTER_FIELDS:
+        setattr(summary, name, 0)
+    return summary
+
+
+# 与唯一索引 uq_feedback_summary_bucket 一致的冲突目标（NULL 维度按 0 处理）；
+# 0 必须以字面量出现，绑定参数无法与索引表达式匹配
+_BUCKET_CONFLICT_TARGET = [
+    func.coalesce(FeedbackSummary.bot_id, literal_column("0")),
+    func.coalesce(FeedbackSummary.channel_id, literal_column("0")),
+    FeedbackSummary.period_type,
+    FeedbackSummary.period_start,
+]
+
+
+def _bucket_filter(key: BucketKey):
+    bot_id, channel_id, start = key
+    return and_(
+        func.coalesce(FeedbackSummary.bot_id, 0) == (bot_id or 0),
+        func.coalesce(FeedbackSummary.channel_id, 0) == (channel_id or 0),
+        FeedbackSummary.period_type == BUCKET_PERIOD,
+        FeedbackSummary.period_start == start,
+    )
+
+
+def _sorted_buckets(delta: RollupDelta) -> List[Tuple[BucketKey, Dict[str, Any]]]:
+    """按固定顺序加锁，避免并发批次互相等待对方持有的桶"""
+    return sorted(delta.items(), key=lambda item: (item[0][0] or 0, item[0][1] or 0, item[0][2]))
+
+
+def _counter_increments(delta: Dict[str, Any]) -> Dict[str, Any]:
+    """计数列的原子增量表达式（col = col + delta，不低于 0）"""
+    values: Dict[str, Any] = {}
+    for name in _COUNTER_FIELDS:
+        if delta[name]:
+            column = getattr(FeedbackSummary, name)
+            incremented = func.coalesce(column, 0) + delta[name]
+            values[name] = case((incremented < 0, 0), else_=incremented)
+    values["updated_at"] = datetime.utcnow()
+    return values
+
+
+def _insert_values(key: BucketKey, delta: Dict[str, Any]) -> Dict[str, Any]:
+    bot_id, channel_id, start = key
+    now = datetime.utcnow()
+    values: Dict[str, Any] = {name: max(0, delta[name]) for name in _COUNTER_FIELDS}
+    values.update(
+        bot_id=bot_id,
+        channel_id=channel_id,
+        period_type=BUCKET_PERIOD,
+        period_start=start,
+        period_end=start + timedelta(hours=1),
+        reaction_breakdown={},
+        interaction_breakdown={},
+        version=1,
+        created_at=now,
+        updated_at=now,
+    )
+    return values
+
+
+def _upsert_counters(dialect: str, key: BucketKey, delta: Dict[str, Any]) -> Any:
+    """
+    构造计数列的原子 upsert（INSERT ... ON CONFLICT DO UPDATE SET col = col + delta）
+
+    不支持 ON CONFLICT 的方言返回 None，由调用方使用原子 UPDATE + INSERT 回退。
+    """
+    if dialect == "postgresql":
+        stmt = postgresql.insert(FeedbackSummary)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(FeedbackSummary)
+    else:
+        return None
+    return stmt.values(**_insert_values(key, delta)).on_conflict_do_update(
+        index_elements=_BUCKET_CONFLICT_TARGET,
+        set_=_counter_increments(delta),
+    )
+
+
+def _locked_bucket_query(key: BucketKey):
+    # populate_existing：会话中已加载的桶也以数据库中刚更新的计数为准
+    return (
+        select(FeedbackSummary)
+        .where(_bucket_filter(key))
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+
+
+def apply_rollup_deltas(db: Session, delta: RollupDelta) -> None:
+    """
+    在同步会话中应用增量（不提交，由调用方与事件写入一起提交）
+
+    计数列通过原子 upsert 累加，并发写入不会互相覆盖；
+    upsert 持有该桶的行锁，随后在锁内合并 JSON 明细并重算分数。
+    """
+    if not delta:
+        return
+    dialect = db.get_bind().dialect.name
+    for key, bucket_delta in _sorted_buckets(delta):
+        upsert = _upsert_counters(dialect, key, bucket_delta)
+        if upsert is not None:
+            db.execute(upsert)
+        elif db.execute(
+            update(FeedbackSummary).where(_bucket_filter(key)).values(**_counter_increments(bucket_delta))
+        ).rowcount == 0:
+            db.execute(insert(FeedbackSummary).values(**_insert_values(key, bucket_delta)))
+        summary = db.execute(_locked_bucket_query(key)).scalar_one()
+        _apply_breakdowns(summary, bucket_delta)
+    db.flush()
+
+
+async def apply_rollup_deltas_async(db: AsyncSession, delta: RollupDelta) -> None:
+    """
+    在异步会话中应用增量（不提交，由调用方与事件写入一起提交）
+    """
+    if not delta:
+        return
+    dialect = db.get_bind().dialect.name
+    for key, bucket_delta in _sorted_buckets(delta):
+        upsert = _upsert_counters(dialect, key, bucket_delta)
+        if upsert is not None:
+            await db.execute(upsert)
+        elif (await db.execute(
+            update(FeedbackSummary).where(_bucket_filter(key)).values(**_counter_increments(bucket_delta))
+        )).rowcount == 0:
+            await db.execute(insert(FeedbackSummary).values(**_insert_values(key, bucket_delta)))
+        summary = (await db.execute(_locked_bucket_query(key))).scalar_one()
+        _apply_breakdowns(summary, bucket_delta)
+    await db.flush()
+
+
+def load_buckets(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    bot_id: Optional[int] = None,
+    channel_id: Optional[int] = None,
+) -> List[FeedbackSummary]:
+    """
+    获取 [start, end) 内的小时桶
+
+    Args:
+        bot_id / channel_id: 过滤条件，None 表示不过滤
+    """
+    filters = [
+        FeedbackSummary.period_type == BUCKET_PERIOD,
+        FeedbackSummary.period_start >= bucket_start(start),
+        FeedbackSummary.period_start < end,
+    ]
+    if bot_id is not None:
+        filters.append(FeedbackSummary.bot_id == bot_id)
+    if channel_id is not None:
+        filters.append(FeedbackSummary.channel_id == channel_id)
+    return db.execute(select(FeedbackSummary).where(and_(*filters))).scalars().all()
+
+
+def merge_buckets(buckets: Iterable[FeedbackSummary]) -> Dict[str, Any]:
+    """
+    合并多个小时桶为一份汇总
+
+    Returns:
+        dict: 与 FeedbackSummary 计数字段同名的汇总值，以及 satisfaction_score / engagement_score
+    """
+    merged: Dict[str, Any] = {name: 0 for name in _COUNTER_FIELDS}
+    reaction_breakdown: Dict[str, int] = {}
+    interaction_breakdown: Dict[str, int] = {}
+    buckets = list(buckets)
+    for bucket in buckets:
+        for name in _COUNTER_FIELDS:
+            merged[name] += getattr(bucket, name) or 0
+        for emoji, count in (bucket.reaction_breakdown or {}).items():
+            reaction_breakdown[emoji] = reaction_breakdown.get(emoji, 0) + count
+        for kind, count in (bucket.interaction_breakdown or {}).items():
+            interaction_breakdown[kind] = interaction_breakdown.get(kind, 0) + count
+    rated = merged["positive_reactions"] + merged["negative_reactions"]
+    merged.update(
+        reaction_breakdown=reaction_breakdown,
+        interaction_breakdown=interaction_breakdown,
+        satisfaction_score=int((merged["positive_reactions"] / rated) * 100) if rated > 0 else None,
+        engagement_score=min(100, merged["total_interactions"]),
+        bucket_count=len(buckets),
+    )
+    return merged
+
+
+def backfill_rollups(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    chunk_size: int = 1000,
+) -> int:
+    """
+    从 message_reactions / message_interactions 重建小时桶
+
+    删除 [start, end) 内已有的小时桶后按原始记录重新累计，可重复执行。
+    start / end 不在整点时按所在的整桶处理。
+
+    Args:
+        db: 同步数据库会话
+        start: 开始时间（None 表示最早）
+        end: 结束时间（None 表示当前）
+        chunk_size: 流式读取的批大小
+
+    Returns:
+        int: 重建的桶数量
+    """
+    # end 向上对齐到桶边界：删除的是整桶，重建也必须覆盖整桶内的全部记录
+    end = end or datetime.utcnow()
+    if bucket_start(end) != end:
+        end = bucket_start(end) + timedelta(hours=1)
+    start = bucket_start(start) if start else None
+
+    bucket_filters = [FeedbackSummary.period_type == BUCKET_PERIOD, FeedbackSummary.period_start < end]
+    reaction_filters = [MessageReaction.is_active == True, MessageReaction.created_at < end]
+    interaction_filters = [MessageInteraction.created_at < end]
+    if start:
+        bucket_filters.append(FeedbackSummary.period_start >= start)
+        reaction_filters.append(MessageReaction.created_at >= start)
+        interaction_filters.append(MessageInteraction.created_at >= start)
+
+    db.execute(delete(FeedbackSummary).where(and_(*bucket_filters)))
+
+    delta = RollupDelta()
+    reactions = db.execute(
+        select(
+            MessageReaction.bot_id,
+            MessageReaction.channel_id,
+            MessageReaction.created_at,
+            MessageReaction.reaction_emoji,
+        ).where(and_(*reaction_filters)).execution_options(yield_per=chunk_size)
+    )
+    for row in reactions:
+        delta.add_reaction(row.bot_id, row.channel_id, row.created_at, row.reaction_emoji)
+
+    interactions = db.execute(
+        select(
+            MessageInteraction.bot_id,
+            MessageInteraction.channel_id,
+            MessageInteraction.created_at,
+            MessageInteraction.interaction_type,
+        ).where(and_(*interaction_filters)).execution_options(yield_per=chunk_size)
+    )
+    for row in interactions:
+        delta.add_interaction(row.bot_id, row.channel_id, row.created_at, row.interaction_type)
+
+    count = 0
+    for key, bucket_delta in delta.items():
+        summary = new_bucket(key)
+        _apply_to_summary(summary, bucket_delta)
+        db.add(summary)
+        count += 1
+    db.commit()
+    logger.info(f"✅ [FeedbackRollup] 重建小时桶 {count} 个")
+    return count
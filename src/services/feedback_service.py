@@ -9,7 +9,7 @@ Feedback Service - 用户反馈管理服务
 
 设计原则：
 - 高并发安全：使用事务和乐观锁
-- 性能优化：使用批量操作和缓存
+- 性能优化：使用批量操作和缓存；统计基于增量维护的小时桶（见 feedback_rollup）
 - 商业分析：提供丰富的统计接口
 """
 from datetime import datetime, timedelta
@@ -124,6 +124,9 @@ class FeedbackService:
                 )
             ).first()
             
+            from src.services.feedback_rollup import RollupDelta, apply_rollup_deltas
+            delta = RollupDelta()
+            
             if existing_reaction:
                 # 如果是相同的反应，不做任何操作
                 if existing_reaction.reaction_emoji == reaction_emoji:
@@ -133,6 +136,7 @@ class FeedbackService:
                 # 取消旧反应
                 existing_reaction.is_active = False
                 existing_reaction.removed_at = datetime.utcnow()
+                self._rollup_reaction(delta, existing_reaction, sign=-1)
                 logger.info(f"Deactivated old reaction '{existing_reaction.reaction_emoji}' for user {user_id}")
             
             # 确定反应类型
@@ -150,10 +154,13 @@ class FeedbackService:
                 channel_id=channel_id,
                 custom_emoji_id=custom_emoji_id,
                 is_big=is_big,
-                is_active=True
+                is_active=True,
+                created_at=datetime.utcnow()
             )
+            self._rollup_reaction(delta, new_reaction, sign=1)
             
             self.db.add(new_reaction)
+            apply_rollup_deltas(self.db, delta)
             self.db.commit()
             
             logger.info(f"Added reaction '{reaction_emoji}' by user {user_id} on message {message_id}")
@@ -202,10 +209,14 @@ class FeedbackService:
                 logger.debug(f"No active reaction found for user {user_id} on message {message_id}")
                 return False
             
+            from src.services.feedback_rollup import RollupDelta, apply_rollup_deltas
+            delta = RollupDelta()
             for reaction in reactions:
                 reaction.is_active = False
                 reaction.removed_at = datetime.utcnow()
+                self._rollup_reaction(delta, reaction, sign=-1)
             
+            apply_rollup_deltas(self.db, delta)
             self.db.commit()
             logger.info(f"Removed {len(reactions)} reaction(s) by user {user_id} on message {message_id}")
             return True
@@ -291,6 +302,17 @@ class FeedbackService:
         else:
             return "custom"
     
+    @staticmethod
+    def _rollup_reaction(delta, reaction: MessageReaction, sign: int) -> None:
+        """将反应的生效 / 失效计入小时桶增量"""
+        delta.add_reaction(
+            reaction.bot_id,
+            reaction.channel_id,
+            reaction.created_at or datetime.utcnow(),
+            reaction.reaction_emoji,
+            sign=sign
+        )
+    
     # ==================== Interaction 管理 ====================
     
     def record_interaction(
@@ -336,10 +358,16 @@ class FeedbackService:
                 extra_data=metadata or {},
                 source_platform=source_platform,
                 client_info=client_info or {},
-                is_successful=True
+                is_successful=True,
+                created_at=datetime.utcnow()
             )
             
+            from src.services.feedback_rollup import RollupDelta, apply_rollup_deltas
+            delta = RollupDelta()
+            delta.add_interaction(bot_id, channel_id, interaction.created_at, interaction_type)
+            
             self.db.add(interaction)
+            apply_rollup_deltas(self.db, delta)
             self.db.commit()
             
             logger.info(f"Recorded interaction '{interaction_type}' by user {user_id} on message {message_id}")
@@ -527,6 +555,8 @@ class FeedbackService:
         """
         获取机器人的反馈统计
         
+        基于小时桶合并计算，开销与桶数量成正比。
+        
         Args:
             bot_id: 机器人ID
             start_date: 开始日期（可选）
@@ -541,34 +571,17 @@ class FeedbackService:
         if not end_date:
             end_date = datetime.utcnow()
         
-        # 反应统计
-        reaction_query = self.db.query(
-            MessageReaction.reaction_type,
-            func.count(MessageReaction.id).label('count')
-        ).filter(
-            and_(
-                MessageReaction.bot_id == bot_id,
-                MessageReaction.is_active == True,
-                MessageReaction.created_at >= start_date,
-                MessageReaction.created_at <= end_date
-            )
-        ).group_by(MessageReaction.reaction_type)
+        # 从小时桶合并统计（按小时对齐）
+        rollup = self.get_rollup_summary(start_date, end_date, bot_id=bot_id)
         
-        reaction_stats = {row.reaction_type: row.count for row in reaction_query.all()}
+        # 反应统计：按表情分类汇总为 positive/negative/neutral/custom
+        reaction_stats: Dict[str, int] = {}
+        for emoji, count in rollup['reaction_breakdown'].items():
+            reaction_type = self._classify_reaction(emoji)
+            reaction_stats[reaction_type] = reaction_stats.get(reaction_type, 0) + count
         
         # 交互统计
-        interaction_query = self.db.query(
-            MessageInteraction.interaction_type,
-            func.count(MessageInteraction.id).label('count')
-        ).filter(
-            and_(
-                MessageInteraction.bot_id == bot_id,
-                MessageInteraction.created_at >= start_date,
-                MessageInteraction.created_at <= end_date
-            )
-        ).group_by(MessageInteraction.interaction_type)
-        
-        interaction_stats = {row.interaction_type: row.count for row in interaction_query.all()}
+        interaction_stats = rollup['interaction_breakdown']
         
         # 计算满意度分数
         positive_count = reaction_stats.get('positive', 0)
@@ -661,6 +674,8 @@ class FeedbackService:
         """
         生成反馈汇总报告
         
+        日/周/月汇总由周期内的小时桶合并得到；小时汇总直接返回对应的小时桶。
+        
         Args:
             period_type: 周期类型（hourly/daily/weekly/monthly）
             period_start: 周期开始时间
@@ -674,6 +689,25 @@ class FeedbackService:
         if not period_start:
             period_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
         
+        # 小时汇总即增量维护的小时桶本身
+        if period_type == 'hourly':
+            from src.services.feedback_rollup import bucket_start, new_bucket
+            period_start = bucket_start(period_start)
+            bucket = self.db.query(FeedbackSummary).filter(
+                and_(
+                    FeedbackSummary.bot_id == bot_id,
+                    FeedbackSummary.channel_id == channel_id,
+                    FeedbackSummary.period_type == period_type,
+                    FeedbackSummary.period_start == period_start
+                )
+            ).first()
+            if bucket is None:
+                bucket = new_bucket((bot_id, channel_id, period_start))
+                self.db.add(bucket)
+                self.db.commit()
+                self.db.refresh(bucket)
+            return bucket
+        
         period_end = self._calculate_period_end(period_start, period_type)
         
         # 检查是否已存在
@@ -699,77 +733,22 @@ class FeedbackService:
                 period_end=period_end
             )
         
-        # 构建查询过滤条件
-        reaction_filters = [
-            MessageReaction.created_at >= period_start,
-            MessageReaction.created_at < period_end,
-            MessageReaction.is_active == True
-        ]
-        
-        interaction_filters = [
-            MessageInteraction.created_at >= period_start,
-            MessageInteraction.created_at < period_end
-        ]
-        
-        if bot_id:
-            reaction_filters.append(MessageReaction.bot_id == bot_id)
-            interaction_filters.append(MessageInteraction.bot_id == bot_id)
+        # 合并周期内的小时桶
+        rollup = self.get_rollup_summary(period_start, period_end, bot_id=bot_id, channel_id=channel_id)
         
-        if channel_id:
-            reaction_filters.append(MessageReaction.channel_id == channel_id)
-            interaction_filters.append(MessageInteraction.channel_id == channel_id)
+        reaction_breakdown = rollup['reaction_breakdown']
+        total_reactions = rollup['total_reactions']
+        positive_reactions = rollup['positive_reactions']
+        negative_reactions = rollup['negative_reactions']
+        neutral_reactions = rollup['neutral_reactions']
         
-        # 统计反应
-        reaction_query = self.db.query(
-            MessageReaction.reaction_emoji,
-            func.count(MessageReaction.id).label('count')
-        ).filter(and_(*reaction_filters)).group_by(MessageReaction.reaction_emoji)
-        
-        reaction_breakdown = {}
-        total_reactions = 0
-        positive_reactions = 0
-        negative_reactions = 0
-        neutral_reactions = 0
-        
-        for row in reaction_query.all():
-            reaction_breakdown[row.reaction_emoji] = row.count
-            total_reactions += row.count
-            
-            if row.reaction_emoji in POSITIVE_REACTIONS:
-                positive_reactions += row.count
-            elif row.reaction_emoji in NEGATIVE_REACTIONS:
-                negative_reactions += row.count
-            else:
-                neutral_reactions += row.count
-        
-        # 统计交互
-        interaction_query = self.db.query(
-            MessageInteraction.interaction_type,
-            func.count(MessageInteraction.id).label('count')
-        ).filter(and_(*interaction_filters)).group_by(MessageInteraction.interaction_type)
-        
-        interaction_breakdown = {}
-        total_interactions = 0
-        copy_count = 0
-        reply_count = 0
-        forward_count = 0
-        pin_count = 0
-        report_count = 0
-        
-        for row in interaction_query.all():
-            interaction_breakdown[row.interaction_type] = row.count
-            total_interactions += row.count
-            
-            if row.interaction_type == InteractionType.COPY.value:
-                copy_count = row.count
-            elif row.interaction_type == InteractionType.REPLY.value:
-                reply_count = row.count
-            elif row.interaction_type == InteractionType.FORWARD.value:
-                forward_count = row.count
-            elif row.interaction_type == InteractionType.PIN.value:
-                pin_count = row.count
-            elif row.interaction_type == InteractionType.REPORT.value:
-                report_count = row.count
+        interaction_breakdown = rollup['interaction_breakdown']
+        total_interactions = rollup['total_interactions']
+        copy_count = rollup['copy_count']
+        reply_count = rollup['reply_count']
+        forward_count = rollup['forward_count']
+        pin_count = rollup['pin_count']
+        report_count = rollup['report_count']
         
         # 计算满意度分数
         satisfaction_score = None
@@ -841,23 +820,49 @@ class FeedbackService:
         Returns:
             热门反应列表
         """
-        start_time = datetime.utcnow() - timedelta(hours=hours)
-        
-        results = self.db.query(
-            MessageReaction.reaction_emoji,
-            func.count(MessageReaction.id).label('count')
-        ).filter(
-            and_(
-                MessageReaction.created_at >= start_time,
-                MessageReaction.is_active == True
-            )
-        ).group_by(
-            MessageReaction.reaction_emoji
-        ).order_by(
-            func.count(MessageReaction.id).desc()
-        ).limit(limit).all()
+        end_time = datetime.utcnow()
+        rollup = self.get_rollup_summary(end_time - timedelta(hours=hours), end_time)
         
+        ranked = sorted(rollup['reaction_breakdown'].items(), key=lambda item: item[1], reverse=True)
         return [
-            {'emoji': row.reaction_emoji, 'count': row.count}
-            for row in results
+            {'emoji': emoji, 'count': count}
+            for emoji, count in ranked[:limit]
         ]
+    
+    # ==================== 小时桶汇总 ====================
+    
+    def get_rollup_summary(
+        self,
+        start: datetime,
+        end: datetime,
+        bot_id: Optional[int] = None,
+        channel_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        合并 [start, end) 内的小时桶（start 向下对齐到整点）
+        
+        Args:
+            start: 开始时间
+            end: 结束时间
+            bot_id: 机器人ID过滤（可选）
+            channel_id: 频道ID过滤（可选）
+            
+        Returns:
+            汇总计数、分类明细与满意度/参与度分数
+        """
+        from src.services.feedback_rollup import load_buckets, merge_buckets
+        return merge_buckets(load_buckets(self.db, start, end, bot_id=bot_id, channel_id=channel_id))
+    
+    def rebuild_rollups(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> int:
+        """
+        从原始反应与交互记录重建小时桶（用于已有数据的回填）
+        
+        Returns:
+            重建的桶数量
+        """
+        from src.services.feedback_rollup import backfill_rollups
+        return backfill_rollups(self.db, start=start, end=end)
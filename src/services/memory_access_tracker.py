@@ -0,0 +1,216 @@
+"""
+Memory Access Tracker - 延迟合并的记忆访问计数
+
+记忆检索命中后不再在读路径上执行 UPDATE + commit，
+而是把 (memory_id → 访问次数, 最后访问时间) 累积在内存缓冲中：
+- 同一记忆的多次访问合并为一行
+- 后台协程每 flush_interval 秒、或缓冲达到 max_pending 条时，
+  用一条 executemany UPDATE 批量写入
+- stop() 时写入剩余缓冲：main.py 在 start_all() 的 finally 中调用，
+  SIGINT / SIGTERM 正常关闭时计数不会丢失；进程被强制终止（如 SIGKILL）时，
+  最多丢失最近一个 flush_interval 内的计数
+
+使用方法：
+1. 在 Bot 启动时调用 start_memory_access_tracker()
+2. 检索代码调用 record_memory_access(memory_ids, db)（未启动时直接用 db 写入）
+3. 在 Bot 关闭时调用 stop_memory_access_tracker()（MultiBotLauncher.stop_all 中）
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, AsyncContextManager, Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import bindparam, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from src.database import get_async_db_context
+from src.models.database import UserMemory
+
+_user_memories = UserMemory.__table__
+
+# 按主键累加访问次数并更新最后访问时间（executemany）
+_ACCESS_UPDATE = (
+    update(_user_memories)
+    .where(_user_memories.c.id == bindparam("memory_id"))
+    .values(
+        access_count=_user_memories.c.access_count + bindparam("increment"),
+        last_accessed_at=bindparam("accessed_at"),
+    )
+)
+
+
+def _access_params(pending: Dict[int, Tuple[int, datetime]]) -> List[Dict[str, Any]]:
+    return [
+        {"memory_id": memory_id, "increment": count, "accessed_at": accessed_at}
+        for memory_id, (count, accessed_at) in pending.items()
+    ]
+
+
+async def write_memory_access(db: AsyncSession, memory_ids: Iterable[int], accessed_at: Optional[datetime] = None) -> None:
+    """立即写入一次访问（访问计数缓冲未运行时使用）"""
+    accessed_at = accessed_at or datetime.utcnow()
+    pending = {memory_id: (1, accessed_at) for memory_id in memory_ids}
+    if not pending:
+        return
+    await db.execute(_ACCESS_UPDATE, _access_params(pending))
+    await db.commit()
+
+
+class MemoryAccessTracker:
+    """
+    记忆访问计数缓冲 - 内存合并 + 后台定时批量写入
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 5.0,
+        max_pending: int = 500,
+        session_factory: Callable[[], AsyncContextManager[AsyncSession]] = get_async_db_context,
+    ):
+        """
+        Args:
+            flush_interval: 定时写入间隔（秒）
+            max_pending: 缓冲中的记忆数达到该值时立即写入
+            session_factory: 异步数据库会话上下文工厂
+        """
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._session_factory = session_factory
+        # memory_id → (累计访问次数, 最后访问时间)
+        self._pending: Dict[int, Tuple[int, datetime]] = {}
+        self._running = False
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._metrics: Dict[str, Any] = {
+            "recorded": 0,
+            "written_rows": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "last_flush_rows": 0,
+            "last_flush_ms": 0.0,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def record(self, memory_ids: Iterable[int], accessed_at: Optional[datetime] = None) -> None:
+        """记录一次检索命中的记忆（非阻塞）"""
+        accessed_at = accessed_at or datetime.utcnow()
+        for memory_id in memory_ids:
+            count, _ = self._pending.get(memory_id, (0, accessed_at))
+            self._pending[memory_id] = (count + 1, accessed_at)
+            self._metrics["recorded"] += 1
+        if len(self._pending) >= self.max_pending and self._wakeup is not None:
+            self._wakeup.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓冲与写入指标"""
+        return {**self._metrics, "pending": len(self._pending), "running": self._running}
+
+    async def start(self) -> None:
+        """启动后台写入协程"""
+        if self._running:
+            logger.warning("Memory access tracker already running")
+            return
+        self._wakeup = asyncio.Event()
+        self._running = True
+        self._task = asyncio.create_task(self._run_loop())
+        logger.info(
+            f"✅ [MemoryAccess] 已启动: flush_interval={self.flush_interval}s, "
+            f"max_pending={self.max_pending}"
+        )
+
+    async def stop(self) -> None:
+        """停止写入协程，并写入剩余的访问计数"""
+        if not self._running:
+            return
+        self._running = False
+        self._wakeup.set()
+        if self._task:
+            await self._task
+            self._task = None
+        await self.flush()
+        logger.info(f"🛑 [MemoryAccess] 已停止: {self.get_stats()}")
+
+    async def _run_loop(self) -> None:
+        while self._running:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._running:
+                await self.flush()
+
+    async def flush(self) -> int:
+        """
+        把缓冲中的访问计数写入数据库
+
+        Returns:
+            写入的记忆数；失败时计数合并回缓冲，下次重试
+        """
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        started = time.monotonic()
+        try:
+            async with self._session_factory() as db:
+                await db.execute(_ACCESS_UPDATE, _access_params(pending))
+                await db.commit()
+        except Exception as e:
+            self._metrics["failed_flushes"] += 1
+            for memory_id, (count, accessed_at) in pending.items():
+                newer_count, newer_at = self._pending.get(memory_id, (0, accessed_at))
+                self._pending[memory_id] = (count + newer_count, max(accessed_at, newer_at))
+            logger.error(f"❌ [MemoryAccess] 批量写入失败（{len(pending)} 条），稍后重试: {e}")
+            return 0
+        self._metrics["written_rows"] += len(pending)
+        self._metrics["flushes"] += 1
+        self._metrics["last_flush_rows"] = len(pending)
+        self._metrics["last_flush_ms"] = round((time.monotonic() - started) * 1000, 2)
+        logger.debug(f"📝 [MemoryAccess] 写入 {len(pending)} 条记忆访问计数")
+        return len(pending)
+
+
+# 全局访问计数缓冲实例
+_tracker: Optional[MemoryAccessTracker] = None
+
+
+def get_memory_access_tracker() -> MemoryAccessTracker:
+    """获取全局记忆访问计数缓冲实例"""
+    global _tracker
+    if _tracker is None:
+        _tracker = MemoryAccessTracker(
+            flush_interval=getattr(settings, "memory_access_flush_interval", 5.0),
+            max_pending=getattr(settings, "memory_access_max_pending", 500),
+        )
+    return _tracker
+
+
+async def record_memory_access(memory_ids: List[int], db: AsyncSession) -> None:
+    """
+    记录检索命中的记忆
+
+    缓冲运行时非阻塞地合并计数；未启动（如脚本、测试）时直接用 db 写入。
+    """
+    if not memory_ids:
+        return
+    tracker = get_memory_access_tracker()
+    if tracker.is_running:
+        tracker.record(memory_ids)
+        return
+    await write_memory_access(db, memory_ids)
+
+
+async def start_memory_access_tracker() -> None:
+    """启动全局记忆访问计数缓冲"""
+    await get_memory_access_tracker().start()
+
+
+async def stop_memory_access_tracker() -> None:
+    """停止全局记忆访问计数缓冲并写入剩余计数"""
+    if _tracker is not None:
+        await _tracker.stop()
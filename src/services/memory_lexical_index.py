@@ -0,0 +1,244 @@
+"""
+Memory Lexical Index - 记忆的进程内倒排索引与混合排序
+
+纯向量相似度容易漏掉人名、日期等需要精确匹配的回忆；嵌入服务不可用时，
+元数据回退又只能按重要性排序。这里为每个用户维护一个基于 event_summary 与
+keywords 的倒排索引：
+- 中文按字符二元组（bigram）切分，单字片段保留单字；英文与数字按词切分并转小写
+- BM25 打分（k1=1.2, b=0.75），不需要任何嵌入调用
+- 首次检索时从数据库加载该用户的记忆，之后随记忆写入 / 删除增量更新
+- 按用户 LRU 淘汰，限制内存占用
+
+hybrid_score() 把余弦相似度、BM25、重要性与新近度融合为一个排序分数。
+
+使用方法：
+    index = get_memory_lexical_index()
+    await index.ensure_user(db, user_id)
+    scores = index.search(user_id, "小明的生日")  # {memory_id: 按查询 IDF 之和归一化的 BM25（0~1）}
+
+    index.add_memory(user_id, memory.id, memory.event_summary, memory.keywords)
+"""
+import math
+import re
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from loguru import logger
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.database import UserMemory
+from src.services.memory_projection import IMPORTANCE_ORDER
+
+# 中文（含日文假名）片段与英文 / 数字片段
+_TOKEN_RUN_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff]+|[a-z0-9]+")
+_ASCII_RUN_RE = re.compile(r"[a-z0-9]+")
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """把文本切分为索引词：中文字符二元组，英文 / 数字按词"""
+    tokens: List[str] = []
+    for run in _TOKEN_RUN_RE.findall(text.lower()):
+        if _ASCII_RUN_RE.fullmatch(run):
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def memory_document(event_summary: Optional[str], keywords: Optional[Iterable[str]]) -> str:
+    """记忆的索引文本：摘要 + 关键词"""
+    parts = [event_summary or ""]
+    if keywords:
+        parts.extend(str(keyword) for keyword in keywords)
+    return " ".join(parts)
+
+
+def hybrid_score(
+    similarity: Optional[float],
+    lexical: float,
+    importance: Optional[str],
+    created_at: Optional[datetime],
+    now: datetime,
+    weights: Dict[str, float],
+    half_life_days: float,
+) -> float:
+    """
+    融合排序分数
+
+    Args:
+        similarity: 余弦相似度（没有向量时为 None，按 0 计算）
+        lexical: 归一化的 BM25 分数（0~1）
+        importance: 重要性级别（按 low=0 ~ critical=1 线性映射）
+        created_at: 记忆创建时间（新近度按半衰期指数衰减）
+        now: 当前时间
+        weights: vector / lexical / importance / recency 四项权重
+        half_life_days: 新近度半衰期（天）
+    """
+    importance_score = IMPORTANCE_ORDER.get(importance or "medium", 1) / 3
+    recency = 0.0
+    if created_at is not None and half_life_days > 0:
+        age_days = max((now - created_at).total_seconds() / 86400, 0.0)
+        recency = 0.5 ** (age_days / half_life_days)
+    return (
+        weights.get("vector", 0.0) * (similarity or 0.0)
+        + weights.get("lexical", 0.0) * lexical
+        + weights.get("importance", 0.0) * importance_score
+        + weights.get("recency", 0.0) * recency
+    )
+
+
+class UserLexicalIndex:
+    """单个用户记忆的 BM25 倒排索引"""
+
+    __slots__ = ("postings", "doc_lengths", "total_length")
+
+    def __init__(self):
+        # 索引词 → {memory_id: 词频}
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, memory_id: int, text: str) -> None:
+        """添加（或替换）一条记忆"""
+        if memory_id in self.doc_lengths:
+            self.remove(memory_id)
+        counts = Counter(tokenize(text))
+        for token, tf in counts.items():
+            self.postings.setdefault(token, {})[memory_id] = tf
+        length = sum(counts.values())
+        self.doc_lengths[memory_id] = length
+        self.total_length += length
+
+    def remove(self, memory_id: int) -> None:
+        """移除一条记忆"""
+        length = self.doc_lengths.pop(memory_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for token in [t for t, docs in self.postings.items() if memory_id in docs]:
+            docs = self.postings[token]
+            del docs[memory_id]
+            if not docs:
+                del self.postings[token]
+
+    def search(self, query: str, limit: Optional[int] = None) -> Dict[int, float]:
+        """
+        BM25 检索
+
+        分数按查询自身可达到的上限归一化：上限为查询中全部索引词的 IDF 之和
+        （索引中不存在的词按文档频率 0 计算 IDF）。一条记忆在平均长度下各包含一次
+        查询的全部索引词时约为 1.0；只共享一个常见二元组时分数很低，不会被当作强命中。
+
+        Returns:
+            {memory_id: 归一化分数（0~1）}，按分数降序；没有命中时返回空字典
+        """
+        if not self.doc_lengths:
+            return {}
+        doc_count = len(self.doc_lengths)
+        avg_length = self.total_length / doc_count or 1.0
+        scores: Dict[int, float] = {}
+        max_score = 0.0
+        for token in set(tokenize(query)):
+            docs = self.postings.get(token) or {}
+            idf = math.log(1 + (doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+            max_score += idf
+            for memory_id, tf in docs.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[memory_id] / avg_length)
+                scores[memory_id] = scores.get(memory_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        if not scores:
+            return {}
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if limit is not None:
+            ranked = ranked[:limit]
+        return {memory_id: min(score / max_score, 1.0) for memory_id, score in ranked}
+
+
+class MemoryLexicalIndex:
+    """
+    按用户划分的记忆倒排索引集合
+
+    只缓存最近检索过的 max_users 个用户；未加载的用户在首次检索时从数据库构建。
+    """
+
+    def __init__(self, max_users: int = 1000):
+        """
+        Args:
+            max_users: 最多缓存的用户索引数（LRU 淘汰）
+        """
+        self.max_users = max_users
+        self._indexes: "OrderedDict[int, UserLexicalIndex]" = OrderedDict()
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._indexes
+
+    async def ensure_user(self, db: AsyncSession, user_id: int) -> UserLexicalIndex:
+        """返回用户索引，未加载时从数据库构建（只读取 id、摘要与关键词）"""
+        index = self._indexes.get(user_id)
+        if index is not None:
+            self._indexes.move_to_end(user_id)
+            return index
+
+        result = await db.execute(
+            select(UserMemory.id, UserMemory.event_summary, UserMemory.keywords)
+            .where(and_(UserMemory.user_id == user_id, UserMemory.is_active == True))
+        )
+        index = UserLexicalIndex()
+        for row in result.all():
+            index.add(row.id, memory_document(row.event_summary, row.keywords))
+        self._indexes[user_id] = index
+        while len(self._indexes) > self.max_users:
+            self._indexes.popitem(last=False)
+        logger.debug(f"🔤 [Memory-Lexical] Built index for user_id={user_id} | memories={len(index)}")
+        return index
+
+    def search(self, user_id: int, query: str, limit: Optional[int] = None) -> Dict[int, float]:
+        """在已加载的用户索引中检索（未加载时返回空字典）"""
+        index = self._indexes.get(user_id)
+        if index is None or not query:
+            return {}
+        return index.search(query, limit)
+
+    def add_memory(
+        self,
+        user_id: int,
+        memory_id: int,
+        event_summary: Optional[str],
+        keywords: Optional[Iterable[str]] = None,
+    ) -> None:
+        """记忆写入后更新索引（用户索引未加载时下次检索会从数据库构建，无需处理）"""
+        index = self._indexes.get(user_id)
+        if index is not None:
+            index.add(memory_id, memory_document(event_summary, keywords))
+
+    def remove_memory(self, memory_id: int, user_id: Optional[int] = None) -> None:
+        """记忆删除后更新索引"""
+        indexes = [self._indexes[user_id]] if user_id in self._indexes else self._indexes.values()
+        for index in indexes:
+            index.remove(memory_id)
+
+    def clear(self) -> None:
+        self._indexes.clear()
+
+
+# 全局索引实例
+_lexical_index: Optional[MemoryLexicalIndex] = None
+
+
+def get_memory_lexical_index() -> MemoryLexicalIndex:
+    """获取全局记忆倒排索引实例"""
+    global _lexical_index
+    if _lexical_index is None:
+        from config import settings
+        _lexical_index = MemoryLexicalIndex(max_users=getattr(settings, "memory_lexical_index_max_users", 1000))
+    return _lexical_index
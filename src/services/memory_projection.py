@@ -0,0 +1,150 @@
+"""
+Memory Projection - 记忆检索的列投影与 SQL 预过滤
+
+记忆检索只需要摘要、日期、类型、关键词和向量，不需要 user_message / bot_response
+等大字段，也不需要 ORM 对象的身份映射与变更追踪。这里提供：
+- MemoryRecord：__slots__ 轻量记录，检索结果直接返回它
+- MEMORY_RECORD_COLUMNS / EMBEDDING_COLUMNS：检索查询只选择这些列
+- memory_filters()：用户 / Bot / 事件类型 / 最低重要性 / 时间范围的 SQL 过滤条件
+- importance_rank()：按 low < medium < high < critical 排序的 SQL 表达式
+
+向量检索先在 SQL 中按重要性与时间排序并截取候选集（candidate_limit），再计算相似度。
+
+使用方法：
+    query = (
+        select(*MEMORY_RECORD_COLUMNS, *EMBEDDING_COLUMNS)
+        .where(and_(*memory_filters(user_id, bot_id, min_importance="medium")))
+        .order_by(importance_rank().desc(), UserMemory.created_at.desc())
+        .limit(200)
+    )
+    records = [MemoryRecord.from_row(row) for row in (await db.execute(query)).all()]
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func, or_
+
+from src.models.database import MemoryImportance, UserMemory
+
+# 重要性级别排序
+IMPORTANCE_ORDER = {
+    MemoryImportance.LOW.value: 0,
+    MemoryImportance.MEDIUM.value: 1,
+    MemoryImportance.HIGH.value: 2,
+    MemoryImportance.CRITICAL.value: 3,
+}
+
+# 不受时间范围限制的重要性级别
+_TIMELESS_IMPORTANCE = (MemoryImportance.HIGH.value, MemoryImportance.CRITICAL.value)
+
+# 检索结果需要的列
+MEMORY_RECORD_COLUMNS = (
+    UserMemory.id,
+    UserMemory.event_summary,
+    UserMemory.event_type,
+    UserMemory.event_date,
+    UserMemory.keywords,
+    UserMemory.importance,
+    UserMemory.created_at,
+)
+
+# 相似度计算需要的列（memory_embedding 可直接读取查询结果行）
+EMBEDDING_COLUMNS = (
+    UserMemory.embedding_vector,
+    UserMemory.embedding_format,
+    UserMemory.embedding_norm,
+    UserMemory.embedding,
+)
+
+
+class MemoryRecord:
+    """检索返回的记忆记录（只包含注入上下文所需的字段）"""
+
+    __slots__ = ("id", "event_summary", "event_type", "event_date", "keywords", "importance", "created_at", "score")
+
+    def __init__(
+        self,
+        id: int,
+        event_summary: str,
+        event_type: Optional[str] = None,
+        event_date: Optional[datetime] = None,
+        keywords: Optional[List[str]] = None,
+        importance: Optional[str] = None,
+        created_at: Optional[datetime] = None,
+        score: Optional[float] = None,
+    ):
+        self.id = id
+        self.event_summary = event_summary
+        self.event_type = event_type
+        self.event_date = event_date
+        self.keywords = keywords
+        self.importance = importance
+        self.created_at = created_at
+        self.score = score
+
+    @classmethod
+    def from_row(cls, row: Any, score: Optional[float] = None) -> "MemoryRecord":
+        """从包含 MEMORY_RECORD_COLUMNS 的查询结果行创建记录"""
+        return cls(
+            row.id,
+            row.event_summary,
+            row.event_type,
+            row.event_date,
+            row.keywords,
+            row.importance,
+            row.created_at,
+            score,
+        )
+
+    def to_context_dict(self) -> Dict[str, Any]:
+        """转换为 UnifiedContextBuilder 使用的字典，日期统一为 YYYY-MM-DD"""
+        return {
+            "event_summary": self.event_summary,
+            "event_date": self.event_date.strftime("%Y-%m-%d") if self.event_date else None,
+            "event_type": self.event_type,
+            "keywords": self.keywords,
+        }
+
+    def __repr__(self):
+        return f"<MemoryRecord(id={self.id}, importance={self.importance}, score={self.score})>"
+
+
+def importance_rank():
+    """重要性的 SQL 排序表达式（未设置时按 medium 处理）"""
+    return case(IMPORTANCE_ORDER, value=func.coalesce(UserMemory.importance, MemoryImportance.MEDIUM.value), else_=1)
+
+
+def memory_filters(
+    user_id: int,
+    bot_id: Optional[int] = None,
+    event_types: Optional[List[str]] = None,
+    min_importance: Optional[str] = None,
+    max_age_days: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> List[Any]:
+    """
+    生成记忆检索的 SQL 过滤条件
+
+    Args:
+        user_id: 用户ID
+        bot_id: Bot ID（指定时同时包含通用记忆）
+        event_types: 事件类型过滤列表
+        min_importance: 最低重要性级别（None 或 low 表示不过滤）
+        max_age_days: 只检索最近多少天创建的记忆（None 或 0 表示不限制；high / critical 不受限制）
+        now: 计算时间范围的参考时间
+
+    Returns:
+        可传给 and_() 的条件列表
+    """
+    conditions = [UserMemory.user_id == user_id, UserMemory.is_active == True]
+    if bot_id is not None:
+        conditions.append(or_(UserMemory.bot_id == bot_id, UserMemory.bot_id.is_(None)))
+    if event_types:
+        conditions.append(UserMemory.event_type.in_(event_types))
+    min_rank = IMPORTANCE_ORDER.get(min_importance, 0)
+    if min_rank > 0:
+        conditions.append(importance_rank() >= min_rank)
+    if max_age_days:
+        cutoff = (now or datetime.utcnow()) - timedelta(days=max_age_days)
+        conditions.append(or_(UserMemory.created_at >= cutoff, UserMemory.importance.in_(_TIMELESS_IMPORTANCE)))
+    return conditions
@@ -1,74 +1,161 @@
 """
 Reminder Scheduler - 提醒调度器
 
-负责定期检查待发送的提醒并发送给用户。
+负责在提醒到期时发送给用户。
+
+调度方式：
+1. 按窗口从数据库加载即将到期的提醒（只加载 id 与到期时间），放入内存最小堆
+2. 精确睡眠到堆顶提醒的到期时间；本进程新建的提醒通过 schedule() 立即入堆并唤醒调度循环
+3. 到期的提醒并发发送，每个 Bot 受 Telegram 发送速率限制（令牌桶）
+4. 一批提醒的发送结果通过一次批量 UPDATE 写回
+
+窗口到期或超过 check_interval 时重新加载，其他进程写入的提醒最迟在 check_interval 内被发现。
 
 使用方法：
 1. 在 Bot 启动时调用 start_reminder_scheduler()
-2. 调度器会每分钟检查一次待发送的提醒
+2. 为每个 Bot 调用 register_bot() 注册发送用的 Bot 实例
 3. 在 Bot 关闭时调用 stop_reminder_scheduler()
 """
 import asyncio
-from typing import Dict, Optional
-from datetime import datetime
+import heapq
+import time
+from typing import Any, AsyncContextManager, Callable, Dict, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
 from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
 from telegram import Bot
-from telegram.error import TelegramError
+from telegram.error import RetryAfter, TelegramError
 
+from config import settings
 from src.database import get_async_db_context
 from src.services.reminder_service import ReminderService, format_reminder_message
 from src.models.database import ReminderStatus
 
 
+class _RateLimiter:
+    """
+    令牌桶速率限制（按到达顺序排队）
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        Args:
+            rate: 每秒允许的次数
+            burst: 桶容量，默认等于 rate
+        """
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._tokens = 1.0
+                self._updated = time.monotonic()
+            self._tokens -= 1
+
+
 class ReminderScheduler:
     """
     提醒调度器 - 管理提醒的定时发送
     """
-    
-    def __init__(self, check_interval: int = 60):
+
+    def __init__(
+        self,
+        check_interval: int = 60,
+        load_window: Optional[int] = None,
+        load_limit: Optional[int] = None,
+        send_rate_per_bot: Optional[float] = None,
+        max_concurrent_sends: Optional[int] = None,
+        session_factory: Callable[[], AsyncContextManager[AsyncSession]] = get_async_db_context,
+    ):
         """
         初始化调度器
-        
+
         Args:
-            check_interval: 检查间隔（秒），默认60秒
+            check_interval: 重新加载的最长间隔（秒），用于发现其他进程写入的提醒
+            load_window: 每次加载未来多少秒内到期的提醒
+            load_limit: 每次最多加载的提醒数
+            send_rate_per_bot: 每个 Bot 每秒最多发送的提醒数
+            max_concurrent_sends: 同时进行的发送请求数
+            session_factory: 异步数据库会话上下文工厂
         """
         self.check_interval = check_interval
+        self.load_window = load_window or getattr(settings, "reminder_load_window", 600)
+        self.load_limit = load_limit or getattr(settings, "reminder_load_limit", 1000)
+        self.send_rate_per_bot = send_rate_per_bot or getattr(settings, "reminder_send_rate_per_bot", 25.0)
+        self.max_concurrent_sends = max_concurrent_sends or getattr(settings, "reminder_max_concurrent_sends", 50)
+        self._session_factory = session_factory
         self._running = False
         self._task: Optional[asyncio.Task] = None
         self._bots: Dict[int, Bot] = {}  # bot_id -> Bot 实例的映射
-    
+        self._limiters: Dict[int, _RateLimiter] = {}
+
+        # (remind_at, reminder_id) 最小堆；_queued 为堆中的 ID，用于去重
+        self._heap: List[Tuple[datetime, int]] = []
+        self._queued: Set[int] = set()
+        # 已加载窗口的结束时间：到期时间不晚于它的提醒都已在堆中
+        self._loaded_until: Optional[datetime] = None
+        self._next_load_at = 0.0
+        self._wakeup = asyncio.Event()
+        self._stats = {"sent": 0, "failed": 0, "batches": 0, "loads": 0}
+
     def register_bot(self, bot_id: int, bot: Bot) -> None:
         """
         注册 Bot 实例，用于发送提醒消息
-        
+
         Args:
             bot_id: 数据库中的 Bot ID
             bot: Telegram Bot 实例
         """
         self._bots[bot_id] = bot
         logger.info(f"📝 Registered bot {bot_id} for reminder scheduler")
-    
+
     def unregister_bot(self, bot_id: int) -> None:
         """
         取消注册 Bot 实例
-        
+
         Args:
             bot_id: Bot ID
         """
         if bot_id in self._bots:
             del self._bots[bot_id]
             logger.info(f"📝 Unregistered bot {bot_id} from reminder scheduler")
-    
+
+    def schedule(self, reminder_id: int, remind_at: datetime) -> None:
+        """
+        新建提醒后调用：到期时间落在已加载窗口内时立即入堆
+
+        窗口之外的提醒会在后续加载时进入堆，这里无需处理。
+        """
+        if not self._running or self._loaded_until is None:
+            return
+        if remind_at > self._loaded_until or reminder_id in self._queued:
+            return
+        self._push(reminder_id, remind_at)
+        if self._heap[0][1] == reminder_id:
+            self._wakeup.set()
+
+    def _push(self, reminder_id: int, remind_at: datetime) -> None:
+        heapq.heappush(self._heap, (remind_at, reminder_id))
+        self._queued.add(reminder_id)
+
     async def start(self) -> None:
         """启动调度器"""
         if self._running:
             logger.warning("Reminder scheduler is already running")
             return
-        
+
         self._running = True
         self._task = asyncio.create_task(self._run_loop())
         logger.info("🔔 Reminder scheduler started")
-    
+
     async def stop(self) -> None:
         """停止调度器"""
         self._running = False
@@ -79,76 +166,170 @@ class ReminderScheduler:
             except asyncio.CancelledError:
                 pass
             self._task = None
+        self._heap.clear()
+        self._queued.clear()
+        self._loaded_until = None
         logger.info("🔔 Reminder scheduler stopped")
-    
+
     async def _run_loop(self) -> None:
         """调度器主循环"""
         while self._running:
+            # 先清除唤醒标记：处理期间新入堆的提醒会重新置位，下面的等待立即返回
+            self._wakeup.clear()
             try:
-                await self._check_and_send_reminders()
+                if time.monotonic() >= self._next_load_at or self._window_exhausted():
+                    await self._load_window()
+                due = self._pop_due(datetime.utcnow())
+                if due:
+                    await self._dispatch(due)
+                    continue
             except Exception as e:
                 logger.error(f"Error in reminder scheduler: {e}", exc_info=True)
-            
-            await asyncio.sleep(self.check_interval)
-    
-    async def _check_and_send_reminders(self) -> None:
-        """检查并发送待处理的提醒"""
-        async with get_async_db_context() as db:
+                await asyncio.sleep(1)
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._sleep_seconds())
+            except asyncio.TimeoutError:
+                pass
+
+    def _window_exhausted(self) -> bool:
+        return self._loaded_until is None or datetime.utcnow() >= self._loaded_until
+
+    def _sleep_seconds(self) -> float:
+        """睡眠到堆顶到期、窗口结束或下次重新加载中最早的时刻"""
+        now = datetime.utcnow()
+        wake_at = self._loaded_until or now
+        if self._heap and self._heap[0][0] < wake_at:
+            wake_at = self._heap[0][0]
+        seconds = (wake_at - now).total_seconds()
+        return max(0.0, min(seconds, self._next_load_at - time.monotonic()))
+
+    async def _load_window(self) -> None:
+        """加载窗口内到期的提醒到堆中"""
+        until = datetime.utcnow() + timedelta(seconds=self.load_window)
+        async with self._session_factory() as db:
+            rows = await ReminderService(db).get_upcoming_reminders(until, limit=self.load_limit)
+
+        # 达到数量上限时，窗口只延伸到最后一条已加载提醒的时间
+        if len(rows) >= self.load_limit:
+            until = rows[-1][1]
+        for reminder_id, remind_at in rows:
+            if reminder_id not in self._queued:
+                self._push(reminder_id, remind_at)
+        self._loaded_until = until
+        self._next_load_at = time.monotonic() + self.check_interval
+        self._stats["loads"] += 1
+        if rows:
+            logger.debug(f"📅 Loaded {len(rows)} reminders due before {until}")
+
+    def _pop_due(self, now: datetime) -> List[int]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, reminder_id = heapq.heappop(self._heap)
+            self._queued.discard(reminder_id)
+            due.append(reminder_id)
+        return due
+
+    async def _dispatch(self, reminder_ids: List[int]) -> None:
+        """并发发送一批到期提醒，并批量写回状态"""
+        async with self._session_factory() as db:
             reminder_service = ReminderService(db)
-            pending_reminders = await reminder_service.get_pending_reminders()
-            
-            if not pending_reminders:
+            reminders = await reminder_service.get_pending_by_ids(reminder_ids)
+            if not reminders:
                 return
-            
-            logger.info(f"📅 Found {len(pending_reminders)} pending reminders")
-            
-            for reminder in pending_reminders:
-                await self._send_reminder(db, reminder_service, reminder)
-    
-    async def _send_reminder(self, db, reminder_service: ReminderService, reminder) -> None:
+
+            logger.info(f"📅 Sending {len(reminders)} due reminders")
+            semaphore = asyncio.Semaphore(self.max_concurrent_sends)
+
+            async def _send(reminder) -> Dict[str, Any]:
+                async with semaphore:
+                    return await self._send_reminder(reminder)
+
+            changes = await asyncio.gather(*(_send(r) for r in reminders))
+            await reminder_service.bulk_update_status(list(changes))
+
+        sent = sum(1 for change in changes if change["status"] == ReminderStatus.SENT.value)
+        self._stats["sent"] += sent
+        self._stats["failed"] += len(changes) - sent
+        self._stats["batches"] += 1
+
+    def _limiter(self, bot_id: int) -> _RateLimiter:
+        limiter = self._limiters.get(bot_id)
+        if limiter is None:
+            limiter = self._limiters[bot_id] = _RateLimiter(self.send_rate_per_bot)
+        return limiter
+
+    async def _send_reminder(self, reminder) -> Dict[str, Any]:
         """
         发送单个提醒
-        
+
         Args:
-            db: 数据库会话
-            reminder_service: 提醒服务
             reminder: 提醒对象
+
+        Returns:
+            dict: 写回数据库的状态变更
         """
         try:
             # 获取对应的 Bot 实例
-            bot = self._bots.get(reminder.bot_id)
-            
+            bot_id = reminder.bot_id
+            bot = self._bots.get(bot_id)
+
             if not bot:
                 # 如果没有注册对应的 Bot，尝试使用任意一个 Bot
                 if self._bots:
-                    bot = next(iter(self._bots.values()))
+                    bot_id, bot = next(iter(self._bots.items()))
                 else:
                     logger.warning(f"No bot available to send reminder {reminder.id}")
-                    await reminder_service.mark_as_failed(
-                        reminder.id, 
-                        "No bot available"
-                    )
-                    return
-            
+                    return self._failed(reminder, "No bot available")
+
             # 发送提醒消息
             reminder_message = format_reminder_message(reminder.reminder_text)
-            
-            await bot.send_message(
-                chat_id=reminder.chat_id,
-                text=reminder_message,
-                parse_mode="Markdown"
-            )
-            
-            # 标记为已发送
-            await reminder_service.mark_as_sent(reminder.id)
+
+            await self._limiter(bot_id).acquire()
+            try:
+                await bot.send_message(
+                    chat_id=reminder.chat_id,
+                    text=reminder_message,
+                    parse_mode="Markdown"
+                )
+            except RetryAfter as e:
+                # 触发 Telegram 限流时按要求等待后重试一次
+                retry_after = e.retry_after.total_seconds() if isinstance(e.retry_after, timedelta) else e.retry_after
+                await asyncio.sleep(retry_after)
+                await bot.send_message(
+                    chat_id=reminder.chat_id,
+                    text=reminder_message,
+                    parse_mode="Markdown"
+                )
+
             logger.info(f"✅ Reminder {reminder.id} sent successfully")
-            
+            return {"id": reminder.id, "status": ReminderStatus.SENT.value, "sent_at": datetime.utcnow()}
+
         except TelegramError as e:
             logger.error(f"Failed to send reminder {reminder.id}: {e}")
-            await reminder_service.mark_as_failed(reminder.id, str(e))
+            return self._failed(reminder, str(e))
         except Exception as e:
             logger.error(f"Error sending reminder {reminder.id}: {e}", exc_info=True)
-            await reminder_service.mark_as_failed(reminder.id, str(e))
+            return self._failed(reminder, str(e))
+
+    @staticmethod
+    def _failed(reminder, error_message: str) -> Dict[str, Any]:
+        return {
+            "id": reminder.id,
+            "status": ReminderStatus.FAILED.value,
+            "error_message": error_message,
+            "retry_count": (reminder.retry_count or 0) + 1,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """调度器统计"""
+        return {
+            "running": self._running,
+            "queued": len(self._heap),
+            "next_due": self._heap[0][0].isoformat() if self._heap else None,
+            "loaded_until": self._loaded_until.isoformat() if self._loaded_until else None,
+            **self._stats,
+        }
 
 
 # 全局调度器实例
@@ -10,10 +10,10 @@ Reminder Service - 提醒服务
 """
 import re
 import asyncio
-from typing import Optional, Tuple, List
+from typing import Any, Dict, Optional, Tuple, List
 from datetime import datetime, timedelta
 from loguru import logger
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models.database import Reminder, ReminderStatus, User, Bot
@@ -66,6 +66,16 @@ class ReminderParser:
         r"in (\d+)\s*(minute|minutes|min|hour|hours|hr|h|day|days)s?\s+remind me\s+(?:to\s+)?(.+)",
     ]
     
+    # 预编译的单个模式（按优先级排列）
+    _COMPILED_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in REMINDER_PATTERNS]
+
+    # 单次扫描的组合模式：按优先级依次尝试各模式，每个模式取最左匹配，
+    # 与逐个 re.search 的结果一致，但只需一次调用
+    _COMBINED_PATTERN = re.compile(
+        "^(?:" + "|".join(f"(?s:.*?)(?:{pattern})" for pattern in REMINDER_PATTERNS) + ")",
+        re.IGNORECASE,
+    )
+
     def parse(self, message: str) -> Optional[Tuple[int, str]]:
         """
         解析消息，提取提醒时间和内容
@@ -77,28 +87,46 @@ class ReminderParser:
             (minutes, reminder_text) 或 None（如果不是提醒请求）
         """
         message = message.strip()
-        
-        for pattern in self.REMINDER_PATTERNS:
-            match = re.search(pattern, message, re.IGNORECASE)
+
+        # 预过滤：所有模式都必须包含"提醒我"或"remind me"，绝大多数聊天消息在此直接跳过
+        if "提醒我" not in message and "remind me" not in message.lower():
+            return None
+
+        match = self._COMBINED_PATTERN.match(message)
+        if not match:
+            return None
+
+        # 每个模式恰好 3 个分组，据此定位命中的模式
+        index = next(i for i in range(len(self.REMINDER_PATTERNS)) if match.group(i * 3 + 1) is not None)
+        result = self._build_result(*match.group(index * 3 + 1, index * 3 + 2, index * 3 + 3))
+        if result:
+            return result
+
+        # 命中的模式数量或内容无效时，继续尝试后续模式
+        for pattern in self._COMPILED_PATTERNS[index + 1:]:
+            match = pattern.search(message)
             if match:
-                amount_str = match.group(1)
-                unit = match.group(2).lower()
-                content = match.group(3).strip()
-                
-                # 解析数量
-                amount = self._parse_amount(amount_str)
-                if amount is None:
-                    continue
-                
-                # 计算分钟数
-                minutes = int(amount * self.TIME_UNITS.get(unit, 1))
-                
-                # 清理内容
-                content = self._clean_content(content)
-                
-                if content and minutes > 0:
-                    return (minutes, content)
-        
+                result = self._build_result(match.group(1), match.group(2), match.group(3))
+                if result:
+                    return result
+
+        return None
+
+    def _build_result(self, amount_str: str, unit: str, content: str) -> Optional[Tuple[int, str]]:
+        """根据匹配到的数量、单位、内容生成 (minutes, reminder_text)"""
+        # 解析数量
+        amount = self._parse_amount(amount_str)
+        if amount is None:
+            return None
+
+        # 计算分钟数
+        minutes = int(amount * self.TIME_UNITS.get(unit.lower(), 1))
+
+        # 清理内容
+        content = self._clean_content(content.strip())
+
+        if content and minutes > 0:
+            return (minutes, content)
         return None
     
     def _parse_amount(self, amount_str: str) -> Optional[float]:
@@ -198,6 +226,10 @@ class ReminderService:
         await self.db.refresh(reminder)
         
         logger.info(f"📅 Created reminder: {reminder_text[:50]}... at {remind_at}")
+
+        # 通知调度器：到期时间落在已加载窗口内时立即加入堆，无需等待下次加载
+        from src.services.reminder_scheduler import get_reminder_scheduler
+        get_reminder_scheduler().schedule(reminder.id, reminder.remind_at)
         return reminder
     
     async def get_pending_reminders(self, current_time: Optional[datetime] = None) -> List[Reminder]:
@@ -221,6 +253,51 @@ class ReminderService:
         )
         return list(result.scalars().all())
     
+    async def get_upcoming_reminders(self, until: datetime, limit: int = 1000) -> List[Tuple[int, datetime]]:
+        """
+        获取到期时间不晚于 until 的待处理提醒（含已过期未发送的）
+
+        只查询 id 与到期时间，供调度器建立到期时间堆。
+
+        Args:
+            until: 窗口结束时间
+            limit: 最多返回的数量（按到期时间升序）
+
+        Returns:
+            [(reminder_id, remind_at), ...]
+        """
+        result = await self.db.execute(
+            select(Reminder.id, Reminder.remind_at)
+            .where(Reminder.status == ReminderStatus.PENDING.value)
+            .where(Reminder.remind_at <= until)
+            .order_by(Reminder.remind_at.asc())
+            .limit(limit)
+        )
+        return [(row.id, row.remind_at) for row in result]
+
+    async def get_pending_by_ids(self, reminder_ids: List[int]) -> List[Reminder]:
+        """按 ID 获取仍处于待发送状态的提醒（已取消或已处理的会被跳过）"""
+        if not reminder_ids:
+            return []
+        result = await self.db.execute(
+            select(Reminder)
+            .where(Reminder.id.in_(reminder_ids))
+            .where(Reminder.status == ReminderStatus.PENDING.value)
+        )
+        return list(result.scalars().all())
+
+    async def bulk_update_status(self, changes: List[Dict[str, Any]]) -> None:
+        """
+        批量写回发送结果（一条按主键的批量 UPDATE，一次提交）
+
+        Args:
+            changes: [{"id": ..., "status": ..., "sent_at"/"error_message"/"retry_count": ...}, ...]
+        """
+        if not changes:
+            return
+        await self.db.execute(update(Reminder), changes)
+        await self.db.commit()
+
     async def mark_as_sent(self, reminder_id: int) -> None:
         """标记提醒为已发送"""
         result = await self.db.execute(
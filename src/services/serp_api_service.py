@@ -3,15 +3,25 @@ SERP API Service - 搜索API服务
 
 提供以下功能：
 1. 多 API Key 轮用管理（使用 Redis）
-2. 搜索结果缓存（减少重复查询的 API 调用）
+2. 搜索结果缓存（进程内 LRU + Redis 两级，陈旧结果后台刷新，合并并发的相同查询）
 3. 网页抓取和文本清洗
 4. 支持多种搜索提供商（SerpAPI, Google, Bing）
+5. 异步接口（search_async / search_with_content_async）：共享连接池，
+   并发抓取结果页面（按主机限流、整体截止时间），流式读取并限制字节数
 """
+import asyncio
+import codecs
 import json
 import hashlib
-import re
-from typing import Dict, Any, List, Optional
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from html.parser import HTMLParser
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
+import aiohttp
 import redis
 import requests
 from loguru import logger
@@ -143,27 +153,77 @@ class SerpApiKeyManager:
         return status
 
 
+# 繁体 → 简体（常用字）。安装 opencc 时使用完整转换，否则使用内置对照表
+try:
+    from opencc import OpenCC
+    _opencc = OpenCC("t2s")
+except ImportError:
+    _opencc = None
+
+_TRADITIONAL_TO_SIMPLIFIED = str.maketrans(
+    "這個們來時為說國對會學後發經開過動麼與還點現實體當進機關長問題電話聞網頁尋價錢買賣東車馬門見聽讀寫書語氣風雲陽陰場處區義戰爭歷萬億無業務員單報紙雜誌導線級態運隊賽贏輸勝敗聯歐亞連鐵飛鳥魚龍鳳華廣灣臺島縣鄉鎮醫藥療腦錄視頻劇藝術樂節衛環變應該讓給從邊裡號樣種麗愛親兒媽爺幾嗎誰選擇舉議認識計劃設備頭腳臉髮記憶隻齊錯課試驗證據錶鐘銀幣貨資產權條規則響將軍團結構標準確紅綠藍黃顏熱溫濕雙盤遊戲獎數檢測質適層樓陸燈廳廠際內傳統總辦鬥獨職聖誕貓豬雞鴨週曆歲齡壽異間達遠轉換觀覽歡興較靜詞譯",
+    "这个们来时为说国对会学后发经开过动么与还点现实体当进机关长问题电话闻网页寻价钱买卖东车马门见听读写书语气风云阳阴场处区义战争历万亿无业务员单报纸杂志导线级态运队赛赢输胜败联欧亚连铁飞鸟鱼龙凤华广湾台岛县乡镇医药疗脑录视频剧艺术乐节卫环变应该让给从边里号样种丽爱亲儿妈爷几吗谁选择举议认识计划设备头脚脸发记忆只齐错课试验证据表钟银币货资产权条规则响将军团结构标准确红绿蓝黄颜热温湿双盘游戏奖数检测质适层楼陆灯厅厂际内传统总办斗独职圣诞猫猪鸡鸭周历岁龄寿异间达远转换观览欢兴较静词译",
+)
+
+# 查询末尾不影响搜索语义的标点
+_TRAILING_PUNCTUATION = "?？!！。.,，~～ "
+
+
+def normalize_query(query: str) -> str:
+    """
+    规范化搜索查询，使等价查询命中同一缓存条目
+    
+    - Unicode NFKC（全角字母数字 → 半角）
+    - 大小写折叠
+    - 合并空白字符、去掉末尾标点
+    - 繁体折叠为简体
+    """
+    query = unicodedata.normalize("NFKC", query).casefold()
+    query = " ".join(query.split()).rstrip(_TRAILING_PUNCTUATION)
+    if _opencc is not None:
+        return _opencc.convert(query)
+    return query.translate(_TRADITIONAL_TO_SIMPLIFIED)
+
+
 class SerpSearchCache:
     """
     搜索结果缓存
     
-    使用 Redis 缓存搜索结果，减少对相同查询的重复 API 调用。
+    两级缓存，减少对相同查询的重复 API 调用：
+    - L1：进程内 LRU，命中时无需任何网络往返
+    - L2：Redis（可选），多进程共享
+    
+    条目在 ttl 内为新鲜；过期后 stale_ttl 内仍可作为陈旧结果返回，
+    由调用方立即返回陈旧结果并在后台刷新（stale-while-revalidate）。
     特别适合热门话题（如"梅西最近动态"）的缓存。
     """
     
     # Redis key 前缀
     CACHE_PREFIX = "serp_cache"
     
-    def __init__(self, ttl: int = None):
+    def __init__(self, ttl: int = None, stale_ttl: int = None, max_entries: int = None):
         """
         初始化搜索缓存
         
         Args:
             ttl: 缓存过期时间（秒），默认使用配置值
+            stale_ttl: 过期后仍可返回陈旧结果的时间（秒），默认使用配置值
+            max_entries: 进程内 LRU 容量，默认使用配置值
         """
         self._redis: Optional[redis.Redis] = None
-        self._memory_cache: Dict[str, Dict[str, Any]] = {}
+        # cache_key → {"data": 结果, "cached_at": 写入时间戳}
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         self._ttl = ttl or settings.serp_cache_ttl
+        self._stale_ttl = stale_ttl if stale_ttl is not None else getattr(settings, "serp_cache_stale_ttl", 3600)
+        self._max_entries = max_entries or getattr(settings, "serp_memory_cache_size", 512)
+        self._lock = threading.Lock()
+        self._stats = {
+            "lookups": 0,
+            "memory_hits": 0,
+            "redis_lookups": 0,
+            "redis_hits": 0,
+            "stale_hits": 0,
+        }
         self._init_redis()
     
     def _init_redis(self):
@@ -184,6 +244,11 @@ class SerpSearchCache:
         else:
             logger.warning("SerpSearchCache: redis_url not configured, using memory cache")
     
+    @property
+    def redis_enabled(self) -> bool:
+        """是否启用 Redis 二级缓存"""
+        return self._redis is not None
+    
     def _generate_cache_key(self, query: str, provider: str = None) -> str:
         """
         生成缓存键
@@ -196,74 +261,134 @@ class SerpSearchCache:
             str: 缓存键
         """
         provider = provider or settings.serp_api_provider
-        # 使用 MD5 哈希来生成固定长度的键
-        query_hash = hashlib.md5(query.lower().encode()).hexdigest()
+        # 使用规范化查询的 MD5 哈希来生成固定长度的键
+        query_hash = hashlib.md5(normalize_query(query).encode()).hexdigest()
         return f"{self.CACHE_PREFIX}:{provider}:{query_hash}"
     
+    def _classify(self, entry: Dict[str, Any]) -> Optional[bool]:
+        """返回条目是否陈旧；超出陈旧窗口返回 None"""
+        age = time.time() - entry["cached_at"]
+        if age < self._ttl:
+            return False
+        if age < self._ttl + self._stale_ttl:
+            return True
+        return None
+    
+    def _remember(self, cache_key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[cache_key] = entry
+            self._memory.move_to_end(cache_key)
+            while len(self._memory) > self._max_entries:
+                self._memory.popitem(last=False)
+    
+    def lookup_memory(self, query: str, provider: str = None) -> Optional[Tuple[Dict[str, Any], bool]]:
+        """
+        查询进程内缓存（不访问网络）
+        
+        Returns:
+            (结果, 是否陈旧)，未命中返回 None
+        """
+        cache_key = self._generate_cache_key(query, provider)
+        with self._lock:
+            self._stats["lookups"] += 1
+            entry = self._memory.get(cache_key)
+            if entry is None:
+                return None
+            stale = self._classify(entry)
+            if stale is None:
+                del self._memory[cache_key]
+                return None
+            self._memory.move_to_end(cache_key)
+            self._stats["memory_hits"] += 1
+            if stale:
+                self._stats["stale_hits"] += 1
+        logger.info(f"SerpSearchCache: Memory cache hit for query: {query[:50]}...")
+        return entry["data"], stale
+    
+    def lookup_redis(self, query: str, provider: str = None) -> Optional[Tuple[Dict[str, Any], bool]]:
+        """
+        查询 Redis 缓存，命中时回填进程内缓存
+        
+        Returns:
+            (结果, 是否陈旧)，未命中或未启用 Redis 返回 None
+        """
+        if not self._redis:
+            return None
+        cache_key = self._generate_cache_key(query, provider)
+        with self._lock:
+            self._stats["redis_lookups"] += 1
+        try:
+            cached = self._redis.get(cache_key)
+        except Exception as e:
+            logger.error(f"Redis cache get error: {e}")
+            return None
+        if not cached:
+            return None
+        
+        entry = json.loads(cached)
+        if not (isinstance(entry, dict) and "cached_at" in entry and "data" in entry):
+            # 旧格式：直接存储的结果，由 Redis 过期时间保证新鲜
+            entry = {"data": entry, "cached_at": time.time()}
+        stale = self._classify(entry)
+        if stale is None:
+            return None
+        self._remember(cache_key, entry)
+        with self._lock:
+            self._stats["redis_hits"] += 1
+            if stale:
+                self._stats["stale_hits"] += 1
+        logger.info(f"SerpSearchCache: Cache hit for query: {query[:50]}...")
+        return entry["data"], stale
+    
+    def lookup(self, query: str, provider: str = None) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        依次查询进程内缓存与 Redis
+        
+        Returns:
+            (结果, 是否陈旧)，未命中返回 (None, False)
+        """
+        hit = self.lookup_memory(query, provider) or self.lookup_redis(query, provider)
+        return hit if hit else (None, False)
+    
     def get(self, query: str, provider: str = None) -> Optional[Dict[str, Any]]:
         """
-        获取缓存的搜索结果
+        获取缓存的新鲜搜索结果
         
         Args:
             query: 搜索查询
             provider: 搜索提供商
             
         Returns:
-            Dict: 缓存的搜索结果，如果没有则返回 None
+            Dict: 缓存的搜索结果，如果没有或已过期则返回 None
         """
-        cache_key = self._generate_cache_key(query, provider)
-        
-        if self._redis:
-            try:
-                cached = self._redis.get(cache_key)
-                if cached:
-                    logger.info(f"SerpSearchCache: Cache hit for query: {query[:50]}...")
-                    return json.loads(cached)
-            except Exception as e:
-                logger.error(f"Redis cache get error: {e}")
-        
-        # Fallback: 内存缓存
-        if cache_key in self._memory_cache:
-            cached_item = self._memory_cache[cache_key]
-            # 检查是否过期
-            if datetime.now().timestamp() - cached_item.get("timestamp", 0) < self._ttl:
-                logger.info(f"SerpSearchCache: Memory cache hit for query: {query[:50]}...")
-                return cached_item.get("data")
-            else:
-                del self._memory_cache[cache_key]
-        
-        return None
+        data, stale = self.lookup(query, provider)
+        return None if stale else data
     
     def set(self, query: str, result: Dict[str, Any], provider: str = None, ttl: int = None) -> bool:
         """
-        缓存搜索结果
+        缓存搜索结果（同时写入进程内缓存与 Redis）
         
         Args:
             query: 搜索查询
             result: 搜索结果
             provider: 搜索提供商
-            ttl: 自定义过期时间（秒）
+            ttl: 自定义 Redis 过期时间（秒）
             
         Returns:
             bool: 是否成功缓存
         """
         cache_key = self._generate_cache_key(query, provider)
-        cache_ttl = ttl or self._ttl
+        entry = {"data": result, "cached_at": time.time()}
+        self._remember(cache_key, entry)
         
         if self._redis:
             try:
-                self._redis.setex(cache_key, cache_ttl, json.dumps(result, ensure_ascii=False))
-                logger.info(f"SerpSearchCache: Cached result for query: {query[:50]}...")
-                return True
+                cache_ttl = ttl or (self._ttl + self._stale_ttl)
+                self._redis.setex(cache_key, cache_ttl, json.dumps(entry, ensure_ascii=False))
             except Exception as e:
                 logger.error(f"Redis cache set error: {e}")
         
-        # Fallback: 内存缓存
-        self._memory_cache[cache_key] = {
-            "data": result,
-            "timestamp": datetime.now().timestamp()
-        }
-        logger.info(f"SerpSearchCache: Memory cached result for query: {query[:50]}...")
+        logger.info(f"SerpSearchCache: Cached result for query: {query[:50]}...")
         return True
     
     def clear(self, query: str = None, provider: str = None) -> int:
@@ -279,16 +404,14 @@ class SerpSearchCache:
         """
         if query:
             cache_key = self._generate_cache_key(query, provider)
+            with self._lock:
+                removed = 1 if self._memory.pop(cache_key, None) is not None else 0
             if self._redis:
                 try:
-                    return self._redis.delete(cache_key)
+                    removed = max(removed, self._redis.delete(cache_key))
                 except Exception as e:
                     logger.error(f"Redis cache clear error: {e}")
-            
-            if cache_key in self._memory_cache:
-                del self._memory_cache[cache_key]
-                return 1
-            return 0
+            return removed
         
         # 清除所有缓存
         cleared = 0
@@ -300,10 +423,125 @@ class SerpSearchCache:
             except Exception as e:
                 logger.error(f"Redis cache clear all error: {e}")
         
-        memory_cleared = len(self._memory_cache)
-        self._memory_cache.clear()
+        with self._lock:
+            memory_cleared = len(self._memory)
+            self._memory.clear()
+        
+        return max(cleared, memory_cleared)
+    
+    def health_check(self) -> Dict[str, Any]:
+        """
+        缓存状态与各级命中率
         
-        return cleared + memory_cleared
+        Returns:
+            dict: memory / redis 两级的命中次数与命中率
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._memory)
+        lookups = stats["lookups"]
+        hits = stats["memory_hits"] + stats["redis_hits"]
+        return {
+            "ttl": self._ttl,
+            "stale_ttl": self._stale_ttl,
+            "lookups": lookups,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "stale_hits": stats["stale_hits"],
+            "memory": {
+                "entries": entries,
+                "max_entries": self._max_entries,
+                "hits": stats["memory_hits"],
+                "hit_ratio": round(stats["memory_hits"] / lookups, 4) if lookups else 0.0,
+            },
+            "redis": {
+                "enabled": self.redis_enabled,
+                "lookups": stats["redis_lookups"],
+                "hits": stats["redis_hits"],
+                "hit_ratio": round(stats["redis_hits"] / stats["redis_lookups"], 4) if stats["redis_lookups"] else 0.0,
+            },
+        }
+
+
+class HtmlTextExtractor(HTMLParser):
+    """
+    单遍增量 HTML → 纯文本提取器
+    
+    可分块 feed()，一次扫描完成：跳过 script/style 等标签内容、
+    解码 HTML 实体、合并空白字符；提取到 max_length 个字符后置 done，
+    调用方据此停止读取网络数据。
+    """
+    
+    # 内容不计入正文的标签
+    SKIP_TAGS = frozenset({"script", "style", "noscript", "template", "svg"})
+    # 行内标签两侧不插入空格
+    INLINE_TAGS = frozenset({
+        "a", "abbr", "b", "code", "em", "font", "i", "mark", "s", "small",
+        "span", "strong", "sub", "sup", "u",
+    })
+    
+    def __init__(self, max_length: int = 2000):
+        super().__init__(convert_charrefs=True)
+        self.max_length = max_length
+        self.done = False
+        self._parts: List[str] = []
+        self._length = 0
+        self._skip_depth = 0
+        self._pending_space = False
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        if tag not in self.INLINE_TAGS:
+            self._pending_space = True
+    
+    def handle_startendtag(self, tag, attrs):
+        if tag not in self.INLINE_TAGS:
+            self._pending_space = True
+    
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        if tag not in self.INLINE_TAGS:
+            self._pending_space = True
+    
+    def handle_data(self, data):
+        if self.done or self._skip_depth:
+            return
+        for word in data.split():
+            if self._length and (self._pending_space or data[:1].isspace()):
+                self._parts.append(" ")
+                self._length += 1
+            self._parts.append(word)
+            self._length += len(word)
+            self._pending_space = True
+            if self._length > self.max_length:
+                self.done = True
+                return
+        self._pending_space = bool(data) and data[-1:].isspace()
+    
+    def text(self) -> str:
+        """返回提取的文本，超过 max_length 时截断并追加省略号"""
+        content = "".join(self._parts)
+        if len(content) > self.max_length:
+            content = content[:self.max_length] + "..."
+        return content
+
+
+def clean_html(html: str, max_length: int = 2000) -> str:
+    """
+    将 HTML 转换为清洗后的纯文本
+    
+    Args:
+        html: HTML 文本
+        max_length: 最大返回文本长度
+        
+    Returns:
+        str: 清洗后的文本
+    """
+    extractor = HtmlTextExtractor(max_length)
+    extractor.feed(html)
+    extractor.close()
+    return extractor.text()
 
 
 class SerpApiService:
@@ -313,12 +551,23 @@ class SerpApiService:
     整合 API key 管理、缓存和搜索功能，提供完整的搜索服务。
     """
     
+    # 抓取网页时使用的请求头
+    FETCH_HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    }
+    
     def __init__(self):
         """初始化搜索服务"""
         self.key_manager = SerpApiKeyManager()
         self.cache = SerpSearchCache()
         self.provider = settings.serp_api_provider
         self.top_k = settings.serp_top_k
+        # 异步接口共享的 HTTP 连接池（首次使用时创建）
+        self._session: Optional[aiohttp.ClientSession] = None
+        # 正在请求上游的查询（cache_key → 结果），用于合并并发的相同查询
+        self._flights: Dict[str, Future] = {}
+        self._flight_lock = threading.Lock()
+        self._async_flights: Dict[str, "asyncio.Task"] = {}
     
     def search(self, query: str, use_cache: bool = True, top_k: int = None) -> Dict[str, Any]:
         """
@@ -334,12 +583,55 @@ class SerpApiService:
         """
         top_k = top_k or self.top_k
         
-        # 检查缓存
-        if use_cache:
-            cached = self.cache.get(query)
-            if cached:
-                return cached
+        if not use_cache:
+            return self._search_upstream(query, top_k, use_cache=False)
         
+        # 检查缓存：陈旧结果立即返回，并在后台刷新
+        cached, stale = self.cache.lookup(query)
+        if cached:
+            if stale:
+                self._refresh_in_background(query, top_k)
+            return cached
+        
+        return self._search_shared(query, top_k)
+    
+    def _search_shared(self, query: str, top_k: int) -> Dict[str, Any]:
+        """合并并发的相同查询：只有一个线程请求上游，其余线程等待同一结果"""
+        key = self.cache._generate_cache_key(query)
+        with self._flight_lock:
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._flights[key] = future
+        if not leader:
+            return future.result()
+        
+        try:
+            result = self._search_upstream(query, top_k, use_cache=True)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._flight_lock:
+                self._flights.pop(key, None)
+    
+    def _refresh_in_background(self, query: str, top_k: int) -> None:
+        """在后台线程中刷新陈旧的缓存条目"""
+        with self._flight_lock:
+            if self.cache._generate_cache_key(query) in self._flights:
+                return
+        threading.Thread(
+            target=self._search_shared,
+            args=(query, top_k),
+            name="serp-cache-refresh",
+            daemon=True
+        ).start()
+    
+    def _search_upstream(self, query: str, top_k: int, use_cache: bool) -> Dict[str, Any]:
+        """请求搜索 API，成功的结果写入缓存"""
         # 获取 API key
         api_key = self.key_manager.get_next_key()
         if not api_key:
@@ -524,37 +816,10 @@ class SerpApiService:
             str: 清洗后的文本，失败则返回 None
         """
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-            response = requests.get(url, headers=headers, timeout=10)
+            response = requests.get(url, headers=self.FETCH_HEADERS, timeout=10)
             response.raise_for_status()
             
-            # 简单的 HTML 文本提取
-            content = response.text
-            
-            # 移除 script 和 style 标签（处理各种格式的闭合标签）
-            content = re.sub(r'<script\b[^>]*>.*?</script[^>]*>', '', content, flags=re.DOTALL | re.IGNORECASE)
-            content = re.sub(r'<style\b[^>]*>.*?</style[^>]*>', '', content, flags=re.DOTALL | re.IGNORECASE)
-            
-            # 移除所有 HTML 标签
-            content = re.sub(r'<[^>]+>', ' ', content)
-            
-            # 清理空白字符
-            content = re.sub(r'\s+', ' ', content).strip()
-            
-            # 解码 HTML 实体
-            content = content.replace('&nbsp;', ' ')
-            content = content.replace('&lt;', '<')
-            content = content.replace('&gt;', '>')
-            content = content.replace('&amp;', '&')
-            content = content.replace('&quot;', '"')
-            
-            # 截断到最大长度
-            if len(content) > max_length:
-                content = content[:max_length] + "..."
-            
-            return content
+            return clean_html(response.text, max_length)
         except Exception as e:
             logger.error(f"Webpage fetch error for {url}: {e}")
             return None
@@ -587,6 +852,270 @@ class SerpApiService:
         
         return result
     
+    # ==================== 异步接口 ====================
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """获取共享的 HTTP 会话（连接池按主机限制并发连接数）"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=getattr(settings, "serp_fetch_max_connections", 20),
+                limit_per_host=getattr(settings, "serp_fetch_per_host_limit", 2),
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.FETCH_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=getattr(settings, "serp_fetch_timeout", 10)),
+            )
+        return self._session
+    
+    async def close(self):
+        """关闭共享的 HTTP 会话"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    async def search_async(self, query: str, use_cache: bool = True, top_k: int = None) -> Dict[str, Any]:
+        """
+        异步执行搜索（语义与 search 一致，不阻塞事件循环）
+        
+        Args:
+            query: 搜索查询
+            use_cache: 是否使用缓存
+            top_k: 返回结果数量
+            
+        Returns:
+            Dict: 搜索结果
+        """
+        top_k = top_k or self.top_k
+        
+        if not use_cache:
+            return await self._search_upstream_async(query, top_k, use_cache=False)
+        
+        # 先查进程内缓存，未命中时才到线程中访问 Redis
+        hit = self.cache.lookup_memory(query)
+        if hit is None and self.cache.redis_enabled:
+            hit = await asyncio.to_thread(self.cache.lookup_redis, query)
+        if hit:
+            cached, stale = hit
+            if stale:
+                self._search_shared_async(query, top_k)
+            return cached
+        
+        # shield：单个调用方被取消不影响其它等待同一查询的调用方
+        return await asyncio.shield(self._search_shared_async(query, top_k))
+    
+    def _search_shared_async(self, query: str, top_k: int) -> "asyncio.Task":
+        """获取（或创建）该查询正在进行的上游请求任务，合并并发的相同查询"""
+        key = self.cache._generate_cache_key(query)
+        task = self._async_flights.get(key)
+        if task is None:
+            task = asyncio.create_task(self._search_upstream_async(query, top_k, use_cache=True))
+            self._async_flights[key] = task
+            task.add_done_callback(lambda _: self._async_flights.pop(key, None))
+        return task
+    
+    async def _search_upstream_async(self, query: str, top_k: int, use_cache: bool) -> Dict[str, Any]:
+        """异步请求搜索 API，成功的结果写入缓存"""
+        # key 轮用与缓存写入可能访问 Redis，放到线程中执行
+        api_key = await asyncio.to_thread(self.key_manager.get_next_key)
+        if not api_key:
+            logger.error("SerpApiService: No API key available")
+            return {
+                "success": False,
+                "error": "No SERP API key configured",
+                "snippets": []
+            }
+        
+        try:
+            result = await self._execute_search_async(query, api_key, top_k)
+            
+            if result.get("success") and use_cache:
+                await asyncio.to_thread(self.cache.set, query, result)
+            
+            return result
+        except Exception as e:
+            logger.error(f"SerpApiService: Async search error: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "snippets": []
+            }
+    
+    async def _execute_search_async(self, query: str, api_key: str, top_k: int) -> Dict[str, Any]:
+        """执行实际的异步搜索请求"""
+        if self.provider == "serpapi":
+            data = await self._get_json(
+                "https://www.searchapi.io/api/v1/search",
+                params={
+                    "q": query,
+                    "api_key": api_key,
+                    "engine": "google",
+                    "num": top_k,
+                    "gl": "cn",
+                    "hl": "zh-cn"
+                }
+            )
+            if data is None:
+                return {"success": False, "error": "SerpAPI request failed", "snippets": []}
+            snippets = [
+                {
+                    "title": item.get("title", ""),
+                    "snippet": item.get("snippet", ""),
+                    "link": item.get("link", ""),
+                    "source": item.get("source", "")
+                }
+                for item in data.get("organic_results", [])[:top_k]
+            ]
+        elif self.provider == "bing":
+            data = await self._get_json(
+                "https://api.bing.microsoft.com/v7.0/search",
+                params={"q": query, "count": top_k, "mkt": "zh-CN"},
+                headers={"Ocp-Apim-Subscription-Key": api_key}
+            )
+            if data is None:
+                return {"success": False, "error": "Bing API request failed", "snippets": []}
+            snippets = [
+                {
+                    "title": item.get("name", ""),
+                    "snippet": item.get("snippet", ""),
+                    "link": item.get("url", ""),
+                    "source": item.get("displayUrl", "")
+                }
+                for item in data.get("webPages", {}).get("value", [])[:top_k]
+            ]
+        else:
+            # google 未实现，与同步接口一样回退到模拟搜索
+            return self._mock_search(query, top_k)
+        
+        return {
+            "success": True,
+            "query": query,
+            "snippets": snippets,
+            "provider": self.provider,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    async def _get_json(self, url: str, params: Dict[str, Any], headers: Dict[str, str] = None) -> Optional[Dict[str, Any]]:
+        """GET 请求并解析 JSON，失败返回 None"""
+        session = await self._get_session()
+        try:
+            async with session.get(url, params=params, headers=headers) as response:
+                response.raise_for_status()
+                return await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.error(f"SERP API async request error: {e}")
+            return None
+    
+    async def fetch_and_clean_webpage_async(
+        self,
+        url: str,
+        max_length: int = 2000,
+        max_bytes: int = None
+    ) -> Optional[str]:
+        """
+        异步抓取网页并清洗文本
+        
+        分块读取响应体并增量提取文本：提取到 max_length 个字符或读取超过
+        max_bytes 字节后立即停止，不会把整个页面载入内存。
+        
+        Args:
+            url: 网页 URL
+            max_length: 最大返回文本长度
+            max_bytes: 最多读取的响应字节数，默认使用配置值
+            
+        Returns:
+            str: 清洗后的文本，失败则返回 None
+        """
+        max_bytes = max_bytes or getattr(settings, "serp_fetch_max_bytes", 1_000_000)
+        session = await self._get_session()
+        try:
+            async with session.get(url) as response:
+                response.raise_for_status()
+                content_type = response.headers.get("Content-Type", "")
+                if content_type and "html" not in content_type and not content_type.startswith("text/"):
+                    logger.debug(f"Skip non-text content {content_type} for {url}")
+                    return None
+                
+                decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(errors="replace")
+                extractor = HtmlTextExtractor(max_length)
+                received = 0
+                async for chunk in response.content.iter_chunked(16 * 1024):
+                    received += len(chunk)
+                    extractor.feed(decoder.decode(chunk))
+                    if extractor.done or received >= max_bytes:
+                        break
+                else:
+                    extractor.feed(decoder.decode(b"", final=True))
+                extractor.close()
+                return extractor.text()
+        except LookupError:
+            logger.error(f"Unknown charset for {url}")
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Webpage async fetch error for {url}: {e}")
+            return None
+    
+    async def search_with_content_async(
+        self,
+        query: str,
+        fetch_content: bool = False,
+        use_cache: bool = True,
+        top_k: int = None,
+        deadline: float = None
+    ) -> Dict[str, Any]:
+        """
+        异步搜索并可选并发抓取网页内容
+        
+        所有结果页面并发抓取（每个主机的并发连接数由连接池限制），
+        超过 deadline 秒仍未完成的抓取被取消，对应结果不带 full_content。
+        
+        Args:
+            query: 搜索查询
+            fetch_content: 是否抓取网页内容
+            use_cache: 是否使用缓存
+            top_k: 返回结果数量
+            deadline: 抓取网页内容的整体截止时间（秒），默认使用配置值
+            
+        Returns:
+            Dict: 搜索结果（可能包含网页内容）
+        """
+        result = await self.search_async(query, use_cache, top_k)
+        
+        if not result.get("success") or not fetch_content:
+            return result
+        
+        # 复制结果，避免把网页内容写进缓存中的对象
+        snippets = [dict(snippet) for snippet in result.get("snippets", [])]
+        result = {**result, "snippets": snippets}
+        
+        tasks = {
+            asyncio.create_task(self.fetch_and_clean_webpage_async(snippet["link"])): snippet
+            for snippet in snippets if snippet.get("link")
+        }
+        if not tasks:
+            return result
+        
+        deadline = deadline or getattr(settings, "serp_fetch_deadline", 15)
+        started = time.monotonic()
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.warning(
+                f"SerpApiService: {len(pending)}/{len(tasks)} page fetch(es) exceeded {deadline}s deadline"
+            )
+        
+        for task in done:
+            if not task.cancelled() and task.exception() is None and task.result():
+                tasks[task]["full_content"] = task.result()
+        
+        logger.debug(
+            f"SerpApiService: Fetched {len(done)}/{len(tasks)} pages in {time.monotonic() - started:.2f}s"
+        )
+        return result
+    
     def health_check(self) -> Dict[str, Any]:
         """
         健康检查
@@ -598,7 +1127,8 @@ class SerpApiService:
             "key_manager": self.key_manager.health_check(),
             "provider": self.provider,
             "top_k": self.top_k,
-            "cache_ttl": self.cache._ttl
+            "cache_ttl": self.cache._ttl,
+            "cache": self.cache.health_check()
         }
 
 
@@ -0,0 +1,512 @@
+"""
+Task Queue - TaskEngine 后台任务队列
+
+将耗时的 TaskEngine 任务（浏览器/桌面操控，可能持续数分钟）从聊天处理流程中剥离：
+1. 聊天 handler 调用 submit() 入队后立即返回任务 ID
+2. 后台 worker 池从 SQLite 队列中领取任务执行，遵守每用户并发上限
+3. 执行器每轮迭代结束时推送进度到聊天（编辑同一条进度消息）
+4. 任务完成后把结果发送给用户：只通过提交任务的 Bot 推送；
+   该 Bot 未注册（已停止或被移除）时不改用其他 Bot，结果保留在队列中，可通过 /tasks 查看
+
+任务持久化在本地 SQLite 中，进程崩溃或重启后，未完成的任务会重新入队。
+
+使用方法：
+1. 在 Bot 启动时调用 start_task_queue()，并 register_bot() 注册 Bot 实例
+2. 在 Bot 关闭时调用 stop_task_queue()
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from loguru import logger
+from telegram import Bot
+from telegram.error import TelegramError
+
+from config import settings
+
+TaskRunner = Callable[[str], Awaitable[str]]
+
+
+class QueuedTaskStatus(str, Enum):
+    """队列任务状态"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+# 仍在进行中的状态（可被取消）
+_ACTIVE_STATUSES = (QueuedTaskStatus.QUEUED.value, QueuedTaskStatus.RUNNING.value)
+
+
+@dataclass
+class QueuedTask:
+    """
+    队列中的任务
+
+    Attributes:
+        task_id: 任务 ID（返回给用户，用于查询/取消）
+        user_id: 提交任务的用户 ID
+        chat_id: 结果推送的聊天 ID
+        bot_id: 负责推送的 Bot ID（数据库 ID）
+        user_input: 用户原始输入
+        status: 任务状态
+        result: 执行结果文本
+        created_at: 入队时间（Unix 时间戳）
+        updated_at: 最后更新时间（Unix 时间戳）
+    """
+    task_id: str
+    user_id: str
+    chat_id: str
+    bot_id: Optional[int]
+    user_input: str
+    status: QueuedTaskStatus = QueuedTaskStatus.QUEUED
+    result: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "QueuedTask":
+        return cls(
+            task_id=row["task_id"],
+            user_id=row["user_id"],
+            chat_id=row["chat_id"],
+            bot_id=row["bot_id"],
+            user_input=row["user_input"],
+            status=QueuedTaskStatus(row["status"]),
+            result=row["result"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+
+
+class TaskQueue:
+    """
+    基于 SQLite 的持久化后台任务队列
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        workers: Optional[int] = None,
+        per_user_limit: Optional[int] = None,
+        task_timeout: Optional[int] = None,
+        runner: Optional[TaskRunner] = None,
+        poll_interval: float = 5.0,
+        progress_interval: float = 2.0,
+    ):
+        """
+        初始化任务队列
+
+        Args:
+            db_path: SQLite 数据库文件路径
+            workers: worker 数量（同时执行的任务上限）
+            per_user_limit: 每个用户同时执行的任务上限
+            task_timeout: 单个任务超时时间（秒）
+            runner: 任务执行函数，默认使用 TaskEngine().run
+            poll_interval: 无新任务通知时的轮询间隔（秒）
+            progress_interval: 进度消息的最小编辑间隔（秒），避免触发 Telegram 限流
+        """
+        self.db_path = db_path or settings.task_queue_db_path
+        self.workers = workers or settings.task_queue_workers
+        self.per_user_limit = per_user_limit or settings.task_queue_per_user_limit
+        self.task_timeout = task_timeout or settings.task_queue_task_timeout
+        self.poll_interval = poll_interval
+        self.progress_interval = progress_interval
+        self._runner = runner
+
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._db_lock = threading.Lock()
+        self._init_db()
+
+        self._bots: Dict[int, Bot] = {}  # bot_id -> Bot 实例的映射
+        self._running = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._claim_lock: Optional[asyncio.Lock] = None
+        self._jobs: Dict[str, asyncio.Task] = {}  # task_id -> 正在执行的 asyncio.Task
+        self._running_per_user: Dict[str, Set[str]] = {}
+        # task_id -> (进度消息 ID, 上次编辑时间)
+        self._progress_messages: Dict[str, tuple] = {}
+
+    def _init_db(self) -> None:
+        """初始化数据库表结构"""
+        with self._db_lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS task_queue (
+                    task_id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    chat_id TEXT NOT NULL,
+                    bot_id INTEGER,
+                    user_input TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_task_queue_status
+                ON task_queue(status, created_at)
+            """)
+            self._conn.commit()
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        """在锁内执行一条写语句并提交"""
+        with self._db_lock:
+            cursor = self._conn.execute(sql, params)
+            self._conn.commit()
+            return cursor
+
+    def _fetchall(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._db_lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # ==================== Bot 注册 ====================
+
+    def register_bot(self, bot_id: int, bot: Bot) -> None:
+        """
+        注册 Bot 实例，用于推送进度与结果
+
+        Args:
+            bot_id: 数据库中的 Bot ID
+            bot: Telegram Bot 实例
+        """
+        self._bots[bot_id] = bot
+        logger.info(f"📝 Registered bot {bot_id} for task queue")
+
+    def unregister_bot(self, bot_id: int) -> None:
+        """取消注册 Bot 实例"""
+        if bot_id in self._bots:
+            del self._bots[bot_id]
+            logger.info(f"📝 Unregistered bot {bot_id} from task queue")
+
+    # ==================== 提交 / 查询 / 取消 ====================
+
+    @property
+    def is_running(self) -> bool:
+        """worker 池是否已启动"""
+        return self._running
+
+    def submit(self, user_id: str, chat_id: str, user_input: str, bot_id: Optional[int] = None) -> str:
+        """
+        提交任务到队列，立即返回任务 ID
+
+        可在事件循环线程或其他线程中调用。
+
+        Args:
+            user_id: 用户 ID
+            chat_id: 结果推送的聊天 ID
+            user_input: 用户原始输入
+            bot_id: 负责推送的 Bot ID
+
+        Returns:
+            str: 任务 ID
+        """
+        task_id = uuid.uuid4().hex[:8]
+        now = time.time()
+        self._execute(
+            """
+            INSERT INTO task_queue
+                (task_id, user_id, chat_id, bot_id, user_input, status, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (task_id, str(user_id), str(chat_id), bot_id, user_input,
+             QueuedTaskStatus.QUEUED.value, now, now),
+        )
+        logger.info(f"📥 [TaskQueue] 任务入队: {task_id} (user={user_id})")
+        self._notify_workers()
+        return task_id
+
+    def get(self, task_id: str) -> Optional[QueuedTask]:
+        """按 ID 查询任务"""
+        rows = self._fetchall("SELECT * FROM task_queue WHERE task_id = ?", (task_id,))
+        return QueuedTask.from_row(rows[0]) if rows else None
+
+    def list_user_tasks(self, user_id: str, active_only: bool = True, limit: int = 10) -> List[QueuedTask]:
+        """
+        查询用户的任务列表（按入队时间倒序）
+
+        Args:
+            user_id: 用户 ID
+            active_only: 是否只返回排队中/执行中的任务
+            limit: 最多返回数量
+        """
+        sql = "SELECT * FROM task_queue WHERE user_id = ?"
+        params: tuple = (str(user_id),)
+        if active_only:
+            sql += " AND status IN (?, ?)"
+            params += _ACTIVE_STATUSES
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        return [QueuedTask.from_row(r) for r in self._fetchall(sql, params + (limit,))]
+
+    def cancel(self, task_id: str, user_id: Optional[str] = None) -> bool:
+        """
+        取消排队中或执行中的任务
+
+        Args:
+            task_id: 任务 ID
+            user_id: 指定时只允许取消该用户自己的任务
+
+        Returns:
+            bool: 是否成功取消
+        """
+        sql = "UPDATE task_queue SET status = ?, updated_at = ? WHERE task_id = ? AND status IN (?, ?)"
+        params: tuple = (QueuedTaskStatus.CANCELLED.value, time.time(), task_id) + _ACTIVE_STATUSES
+        if user_id is not None:
+            sql += " AND user_id = ?"
+            params += (str(user_id),)
+        if self._execute(sql, params).rowcount == 0:
+            return False
+
+        job = self._jobs.get(task_id)
+        if job is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(job.cancel)
+        logger.info(f"🛑 [TaskQueue] 任务已取消: {task_id}")
+        return True
+
+    # ==================== 生命周期 ====================
+
+    async def start(self) -> None:
+        """启动 worker 池，并将上次未完成的任务重新入队"""
+        if self._running:
+            logger.warning("Task queue is already running")
+            return
+
+        recovered = self._execute(
+            "UPDATE task_queue SET status = ?, updated_at = ? WHERE status = ?",
+            (QueuedTaskStatus.QUEUED.value, time.time(), QueuedTaskStatus.RUNNING.value),
+        ).rowcount
+        if recovered:
+            logger.info(f"♻️ [TaskQueue] 恢复 {recovered} 个中断的任务")
+
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._claim_lock = asyncio.Lock()
+        self._running = True
+        self._worker_tasks = [
+            asyncio.create_task(self._worker_loop(i)) for i in range(self.workers)
+        ]
+        logger.info(
+            f"🧵 Task queue started (workers={self.workers}, per_user_limit={self.per_user_limit})"
+        )
+
+    async def stop(self) -> None:
+        """
+        停止 worker 池
+
+        正在执行的任务会被中断，状态保持为 running，下次启动时重新入队。
+        """
+        self._running = False
+        for job in list(self._jobs.values()):
+            job.cancel()
+        for worker in self._worker_tasks:
+            worker.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        logger.info("🧵 Task queue stopped")
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._db_lock:
+            self._conn.close()
+
+    def _notify_workers(self) -> None:
+        """唤醒空闲 worker（线程安全）"""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    # ==================== Worker ====================
+
+    async def _worker_loop(self, index: int) -> None:
+        """worker 主循环：领取任务 → 执行 → 等待新任务"""
+        while self._running:
+            try:
+                task = await self._claim_next()
+                if task is None:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wakeup.clear()
+                    continue
+                await self._run_task(task)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in task queue worker {index}: {e}", exc_info=True)
+                await asyncio.sleep(self.poll_interval)
+
+    async def _claim_next(self) -> Optional[QueuedTask]:
+        """
+        领取最早入队、且用户未达到并发上限的任务
+
+        领取通过带状态条件的 UPDATE 完成，多个 worker 之间不会重复领取。
+        """
+        async with self._claim_lock:
+            rows = await asyncio.to_thread(
+                self._fetchall,
+                "SELECT * FROM task_queue WHERE status = ? ORDER BY created_at LIMIT 50",
+                (QueuedTaskStatus.QUEUED.value,),
+            )
+            for row in rows:
+                task = QueuedTask.from_row(row)
+                if len(self._running_per_user.get(task.user_id, ())) >= self.per_user_limit:
+                    continue
+                claimed = await asyncio.to_thread(
+                    self._execute,
+                    "UPDATE task_queue SET status = ?, updated_at = ? WHERE task_id = ? AND status = ?",
+                    (QueuedTaskStatus.RUNNING.value, time.time(), task.task_id,
+                     QueuedTaskStatus.QUEUED.value),
+                )
+                if claimed.rowcount == 1:
+                    task.status = QueuedTaskStatus.RUNNING
+                    self._running_per_user.setdefault(task.user_id, set()).add(task.task_id)
+                    return task
+            return None
+
+    async def _run_task(self, task: QueuedTask) -> None:
+        """执行单个任务并推送结果"""
+        logger.info(f"▶️ [TaskQueue] 开始执行任务 {task.task_id}: {task.user_input[:50]}")
+        job = asyncio.create_task(self._execute_with_progress(task))
+        self._jobs[task.task_id] = job
+        try:
+            result_text = await job
+            status = QueuedTaskStatus.SUCCEEDED
+        except asyncio.CancelledError:
+            if not self._running:
+                # 进程关闭：保持 running 状态，重启后重新入队
+                raise
+            result_text = "任务已取消"
+            status = QueuedTaskStatus.CANCELLED
+        except asyncio.TimeoutError:
+            result_text = f"任务执行超时（{self.task_timeout} 秒）"
+            status = QueuedTaskStatus.FAILED
+        except Exception as e:
+            logger.error(f"❌ [TaskQueue] 任务 {task.task_id} 执行异常: {e}", exc_info=True)
+            result_text = f"任务执行出错：{e}"
+            status = QueuedTaskStatus.FAILED
+        finally:
+            self._jobs.pop(task.task_id, None)
+            self._progress_messages.pop(task.task_id, None)
+            user_tasks = self._running_per_user.get(task.user_id)
+            if user_tasks is not None:
+                user_tasks.discard(task.task_id)
+                if not user_tasks:
+                    del self._running_per_user[task.user_id]
+            # 释放了用户并发名额，唤醒其他 worker 领取该用户的后续任务
+            self._notify_workers()
+
+        # 已取消的任务不覆盖状态（cancel() 已写入）
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE task_queue SET status = ?, result = ?, updated_at = ? WHERE task_id = ? AND status = ?",
+            (status.value, result_text, time.time(), task.task_id, QueuedTaskStatus.RUNNING.value),
+        )
+        logger.info(f"🏁 [TaskQueue] 任务 {task.task_id} 结束: {status.value}")
+        await self._send(task, result_text)
+
+    async def _execute_with_progress(self, task: QueuedTask) -> str:
+        """在注册了进度回调的上下文中执行任务"""
+        from task_engine import progress_listener
+
+        runner = self._runner
+        if runner is None:
+            from task_engine import TaskEngine
+            runner = TaskEngine().run
+
+        async def on_progress(text: str) -> None:
+            await self._push_progress(task, text)
+
+        with progress_listener(on_progress):
+            return await asyncio.wait_for(runner(task.user_input), timeout=self.task_timeout)
+
+    # ==================== 消息推送 ====================
+
+    def _get_bot(self, bot_id: Optional[int]) -> Optional[Bot]:
+        """
+        获取推送用 Bot：只使用提交任务的 Bot
+
+        其他 Bot 可能不在该聊天中，或用户从未启动过它，因此不做回退。
+        """
+        return self._bots.get(bot_id) if bot_id is not None else None
+
+    async def _push_progress(self, task: QueuedTask, text: str) -> None:
+        """
+        推送进度：首次发送一条进度消息，之后编辑同一条消息
+
+        编辑频率受 progress_interval 限制，跳过的中间进度不会补发。
+        """
+        bot = self._get_bot(task.bot_id)
+        if bot is None:
+            return
+
+        content = f"⏳ 任务 {task.task_id} 进行中\n{text}"
+        now = time.monotonic()
+        entry = self._progress_messages.get(task.task_id)
+        try:
+            if entry is None:
+                sent = await bot.send_message(chat_id=task.chat_id, text=content)
+                self._progress_messages[task.task_id] = (sent.message_id, now)
+            else:
+                message_id, last_edit = entry
+                if now - last_edit < self.progress_interval:
+                    return
+                await bot.edit_message_text(chat_id=task.chat_id, message_id=message_id, text=content)
+                self._progress_messages[task.task_id] = (message_id, now)
+        except TelegramError as e:
+            logger.warning(f"⚠️ [TaskQueue] 进度推送失败 {task.task_id}: {e}")
+
+    async def _send(self, task: QueuedTask, text: str) -> None:
+        """推送最终结果"""
+        bot = self._get_bot(task.bot_id)
+        if bot is None:
+            logger.warning(
+                f"⚠️ [TaskQueue] 任务 {task.task_id} 的 Bot（bot_id={task.bot_id}）未注册，"
+                f"结果无法推送，已保留在队列中供 /tasks 查看"
+            )
+            return
+        try:
+            await bot.send_message(chat_id=task.chat_id, text=text)
+        except TelegramError as e:
+            logger.error(f"Failed to deliver task {task.task_id}: {e}")
+
+
+# 全局任务队列实例
+_task_queue: Optional[TaskQueue] = None
+
+
+def get_task_queue() -> TaskQueue:
+    """获取全局任务队列实例"""
+    global _task_queue
+    if _task_queue is None:
+        _task_queue = TaskQueue()
+    return _task_queue
+
+
+def get_running_task_queue() -> Optional[TaskQueue]:
+    """获取已启动的全局任务队列，未启动时返回 None（不会创建实例）"""
+    if _task_queue is not None and _task_queue.is_running:
+        return _task_queue
+    return None
+
+
+async def start_task_queue() -> None:
+    """启动全局任务队列"""
+    await get_task_queue().start()
+
+
+async def stop_task_queue() -> None:
+    """停止全局任务队列"""
+    await get_task_queue().stop()
@@ -0,0 +1,290 @@
+"""
+Update Dispatcher - 更新分发与 LLM 管线并发控制
+
+1. ChatOrderedUpdateProcessor：作为 Application 的 update processor，
+   同一聊天内的更新按到达顺序依次处理，不同聊天之间并发处理
+2. PipelineLimiter：限制同时运行的 handle_message_with_agents 管线数量
+   （每条管线占用数据库会话并调用 LLM / TTS / 嵌入服务），分为全局上限和每个 Bot 的上限；
+   排队过长或等待超时时直接回复"忙碌"提示，而不是无限堆积
+3. get_dispatch_stats()：导出排队深度与等待时间等指标
+
+使用方法：
+1. 构建 Application 时 concurrent_updates(ChatOrderedUpdateProcessor(...))
+2. 注册消息处理器时用 limit_pipeline() 包装 LLM 管线 handler
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from functools import wraps
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+
+from loguru import logger
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor, ContextTypes
+
+from config import settings
+
+# 管线饱和时回复给用户的提示
+BUSY_REPLY = "🙇 现在找我聊天的人有点多，请稍等片刻再发一次～"
+
+
+class PipelineBusy(Exception):
+    """LLM 管线已饱和（排队已满或等待超时）"""
+
+
+class _WaitStats:
+    """最近 N 次等待时间的统计"""
+
+    def __init__(self, window: int = 1000):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self.count += 1
+        self.max = max(self.max, seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        samples = sorted(self._samples)
+        if not samples:
+            return {"count": self.count, "avg_ms": 0.0, "p95_ms": 0.0, "max_ms": round(self.max * 1000, 1)}
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        return {
+            "count": self.count,
+            "avg_ms": round(sum(samples) / len(samples) * 1000, 1),
+            "p95_ms": round(p95 * 1000, 1),
+            "max_ms": round(self.max * 1000, 1),
+        }
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    按聊天保序的并发 update processor
+
+    每个聊天一把 FIFO 锁：同一聊天的更新串行处理，保证回复顺序与消息顺序一致；
+    不同聊天的更新并发处理，总并发由 max_concurrent_updates 限制。
+    没有所属聊天的更新（如 poll）直接并发处理。
+
+    先排到本聊天的轮次，再占用全局名额：等待同聊天前序更新的更新不占用
+    max_concurrent_updates，一个积压的聊天不会挤占其他聊天的并发名额。
+    """
+
+    def __init__(self, max_concurrent_updates: int = 256, name: str = ""):
+        super().__init__(max_concurrent_updates)
+        self.name = name
+        # chat_id → [锁, 持有或等待该锁的更新数]
+        self._chats: Dict[Hashable, List[Any]] = {}
+        self._queued = 0
+        self._processed = 0
+        self._wait = _WaitStats()
+
+    @staticmethod
+    def _chat_key(update: object) -> Optional[Hashable]:
+        if isinstance(update, Update) and update.effective_chat is not None:
+            return update.effective_chat.id
+        return None
+
+    async def process_update(self, update: object, coroutine: Awaitable[Any]) -> None:  # type: ignore[misc]
+        """
+        先等待本聊天的轮次，再通过基类的信号量占用全局名额并调用 do_process_update
+
+        基类在持有全局名额时才调用 do_process_update，若在其中等待聊天锁，
+        同一聊天排队的 N 条更新会占住 N 个全局名额，因此这里重写 process_update。
+        """
+        key = self._chat_key(update)
+        if key is None:
+            await super().process_update(update, coroutine)
+            return
+
+        entry = self._chats.get(key)
+        if entry is None:
+            entry = self._chats[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        self._queued += 1
+        queued_at = time.monotonic()
+        try:
+            async with entry[0]:
+                self._queued -= 1
+                self._wait.record(time.monotonic() - queued_at)
+                await super().process_update(update, coroutine)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._chats.pop(key, None)
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        await coroutine
+        self._processed += 1
+
+    async def initialize(self) -> None:
+        _processors[id(self)] = self
+
+    async def shutdown(self) -> None:
+        _processors.pop(id(self), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """排队深度（等待同聊天前序更新的数量）与等待时间"""
+        return {
+            "in_flight": self.current_concurrent_updates,
+            "queued": self._queued,
+            "active_chats": len(self._chats),
+            "processed": self._processed,
+            "wait": self._wait.snapshot(),
+        }
+
+
+class PipelineLimiter:
+    """
+    LLM 管线并发限制
+
+    同时受全局上限与每个 Bot 上限约束。等待的请求超过 max_waiting 时直接拒绝，
+    等待超过 queue_timeout 秒时放弃，两种情况都抛出 PipelineBusy。
+    """
+
+    def __init__(
+        self,
+        max_pipelines: int = 32,
+        max_per_bot: int = 8,
+        max_waiting: int = 64,
+        queue_timeout: float = 30.0,
+    ):
+        self.max_pipelines = max_pipelines
+        self.max_per_bot = max_per_bot
+        self.max_waiting = max_waiting
+        self.queue_timeout = queue_timeout
+        self._global = asyncio.Semaphore(max_pipelines)
+        self._per_bot: Dict[Any, asyncio.Semaphore] = {}
+        self._in_flight: Dict[Any, int] = {}
+        self._waiting = 0
+        self._completed = 0
+        self._shed = 0
+        self._timed_out = 0
+        self._wait = _WaitStats()
+
+    def _bot_semaphore(self, bot_id: Any) -> asyncio.Semaphore:
+        semaphore = self._per_bot.get(bot_id)
+        if semaphore is None:
+            semaphore = self._per_bot[bot_id] = asyncio.Semaphore(self.max_per_bot)
+        return semaphore
+
+    async def _acquire(self, bot_semaphore: asyncio.Semaphore) -> None:
+        await bot_semaphore.acquire()
+        try:
+            await self._global.acquire()
+        except BaseException:
+            bot_semaphore.release()
+            raise
+
+    @asynccontextmanager
+    async def slot(self, bot_id: Any = None):
+        """
+        占用一个管线名额
+
+        Raises:
+            PipelineBusy: 排队已满或等待超时
+        """
+        bot_semaphore = self._bot_semaphore(bot_id)
+        if not bot_semaphore.locked() and not self._global.locked():
+            # 有空闲名额：直接占用，不计入排队
+            await self._acquire(bot_semaphore)
+            self._wait.record(0.0)
+        else:
+            if self._waiting >= self.max_waiting:
+                self._shed += 1
+                raise PipelineBusy("queue full")
+            self._waiting += 1
+            queued_at = time.monotonic()
+            try:
+                await asyncio.wait_for(self._acquire(bot_semaphore), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._timed_out += 1
+                raise PipelineBusy("queue timeout")
+            finally:
+                self._waiting -= 1
+            self._wait.record(time.monotonic() - queued_at)
+
+        self._in_flight[bot_id] = self._in_flight.get(bot_id, 0) + 1
+        try:
+            yield
+        finally:
+            self._in_flight[bot_id] -= 1
+            self._completed += 1
+            self._global.release()
+            bot_semaphore.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """管线并发、排队深度与等待时间"""
+        return {
+            "max_pipelines": self.max_pipelines,
+            "max_per_bot": self.max_per_bot,
+            "in_flight": sum(self._in_flight.values()),
+            "in_flight_per_bot": {str(k): v for k, v in self._in_flight.items() if v},
+            "waiting": self._waiting,
+            "completed": self._completed,
+            "shed": self._shed,
+            "timed_out": self._timed_out,
+            "wait": self._wait.snapshot(),
+        }
+
+
+# 已初始化的 update processor（用于导出指标）
+_processors: Dict[int, ChatOrderedUpdateProcessor] = {}
+# 全局管线限制器
+_limiter: Optional[PipelineLimiter] = None
+
+
+def get_pipeline_limiter() -> PipelineLimiter:
+    """获取全局 LLM 管线限制器"""
+    global _limiter
+    if _limiter is None:
+        _limiter = PipelineLimiter(
+            max_pipelines=getattr(settings, "dispatch_max_pipelines", 32),
+            max_per_bot=getattr(settings, "dispatch_max_pipelines_per_bot", 8),
+            max_waiting=getattr(settings, "dispatch_max_waiting", 64),
+            queue_timeout=getattr(settings, "dispatch_queue_timeout", 30.0),
+        )
+    return _limiter
+
+
+def create_update_processor(name: str = "") -> ChatOrderedUpdateProcessor:
+    """按配置创建按聊天保序的 update processor"""
+    return ChatOrderedUpdateProcessor(
+        max_concurrent_updates=getattr(settings, "dispatch_max_concurrent_updates", 256),
+        name=name,
+    )
+
+
+def limit_pipeline(
+    handler: Callable[[Update, ContextTypes.DEFAULT_TYPE], Awaitable[Any]],
+) -> Callable[[Update, ContextTypes.DEFAULT_TYPE], Awaitable[Any]]:
+    """
+    用全局管线限制器包装 handler，饱和时回复忙碌提示
+    """
+    @wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        bot_id = context.bot_data.get("bot_id") if context.bot_data is not None else None
+        try:
+            async with get_pipeline_limiter().slot(bot_id):
+                return await handler(update, context)
+        except PipelineBusy as e:
+            logger.warning(f"⚠️ [Dispatcher] bot={bot_id} 管线饱和（{e}），回复忙碌提示")
+            message = update.effective_message
+            if message is not None:
+                try:
+                    await message.reply_text(BUSY_REPLY)
+                except Exception as reply_error:
+                    logger.debug(f"[Dispatcher] 忙碌提示发送失败: {reply_error}")
+    return wrapper
+
+
+def get_dispatch_stats() -> Dict[str, Any]:
+    """导出分发指标：LLM 管线与各 Bot 的聊天排队情况"""
+    return {
+        "pipelines": get_pipeline_limiter().get_stats(),
+        "updates": {
+            processor.name or str(key): processor.get_stats()
+            for key, processor in _processors.items()
+        },
+    }
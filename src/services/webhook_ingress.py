@@ -0,0 +1,213 @@
+"""
+Webhook Ingress - 多 Bot 共用的 Webhook 接入服务
+
+轮询模式下每个 Bot 各自维持一条 getUpdates 长轮询连接；Bot 数量较多时，
+连接数和启动时间随 Bot 数量线性增长。Webhook 模式下：
+1. 单个 aiohttp 服务器为所有 Bot 接收更新，每个 Bot 使用独立路径
+   （由 Token 派生的哈希，不在 URL 中暴露 Token）
+2. 通过 X-Telegram-Bot-Api-Secret-Token 校验请求来源
+3. 收到的更新直接放入对应 Application.update_queue，立即返回 200
+4. /healthz 只返回不含任何信息的 200，供负载均衡存活探测；
+   Bot 与队列统计不在公网监听端口上暴露，通过 get_stats() 在进程内读取
+5. 所有 Bot 的出站 Bot API 调用共用一个 HTTP 连接池（SharedHTTPXRequest）
+
+使用方法：
+1. 创建 WebhookServer 并 start()
+2. 每个 Bot 的 Application 初始化后调用 register()，再用 webhook_url() 调用 set_webhook
+3. 关闭时 unregister() 各 Bot 后调用 stop()
+"""
+import hashlib
+import hmac
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+from loguru import logger
+from telegram import Update
+from telegram.ext import Application
+from telegram.request import HTTPXRequest
+
+from config import settings
+
+# Telegram 校验 secret_token 时使用的请求头
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def token_path_key(token: str) -> str:
+    """由 Bot Token 派生 Webhook 路径标识（不可逆）"""
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+def token_secret(token: str) -> str:
+    """
+    由 Bot Token 派生 secret_token
+
+    配置了 webhook_secret_token 时所有 Bot 共用该值，否则用 secret_key 对 Token 做 HMAC。
+    """
+    configured = getattr(settings, "webhook_secret_token", None)
+    if configured:
+        return configured
+    key = getattr(settings, "secret_key", "").encode()
+    return hmac.new(key, token.encode(), hashlib.sha256).hexdigest()
+
+
+class SharedHTTPXRequest(HTTPXRequest):
+    """
+    多个 Bot 共用的 Bot API 请求对象
+
+    HTTPXRequest 在 shutdown() 时关闭底层连接池；这里按 initialize / shutdown
+    调用次数计数，最后一个使用者关闭时才真正关闭连接池。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._users = 0
+
+    async def initialize(self) -> None:
+        self._users += 1
+        await super().initialize()
+
+    async def shutdown(self) -> None:
+        self._users = max(0, self._users - 1)
+        if self._users == 0:
+            await super().shutdown()
+
+
+@dataclass
+class _WebhookRoute:
+    """已注册的 Bot 路由"""
+    application: Application
+    bot_username: str
+    secret: str
+    received: int = 0
+    rejected: int = 0
+
+
+class WebhookServer:
+    """
+    Webhook 服务器
+
+    单个 aiohttp 应用，按路径把更新分发到各 Bot 的 update_queue。
+    """
+
+    def __init__(
+        self,
+        host: str = "0.0.0.0",
+        port: int = 8443,
+        path_prefix: str = "/telegram",
+    ):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口
+            path_prefix: Webhook 路径前缀
+        """
+        self.host = host
+        self.port = port
+        self.path_prefix = "/" + path_prefix.strip("/")
+        self._routes: Dict[str, _WebhookRoute] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self._started_at: Optional[float] = None
+        self._stats = {"received": 0, "rejected": 0, "unknown": 0, "invalid": 0}
+
+        self.app = web.Application()
+        self.app.router.add_post(f"{self.path_prefix}/{{path_key}}", self._handle_update)
+        self.app.router.add_get("/healthz", self._handle_health)
+
+    @property
+    def is_running(self) -> bool:
+        return self._runner is not None
+
+    def path_for(self, token: str) -> str:
+        """Bot 的 Webhook 路径"""
+        return f"{self.path_prefix}/{token_path_key(token)}"
+
+    def webhook_url(self, base_url: str, token: str) -> str:
+        """Bot 的完整 Webhook URL（传给 set_webhook）"""
+        return base_url.rstrip("/") + self.path_for(token)
+
+    def register(self, application: Application, token: str, bot_username: str = "") -> str:
+        """
+        注册 Bot，返回其 Webhook 路径
+
+        Args:
+            application: 已初始化的 Application
+            token: Bot Token
+            bot_username: 用于日志与统计
+        """
+        self._routes[token_path_key(token)] = _WebhookRoute(
+            application=application,
+            bot_username=bot_username,
+            secret=token_secret(token),
+        )
+        return self.path_for(token)
+
+    def unregister(self, token: str) -> None:
+        """注销 Bot，之后到达的更新返回 404"""
+        self._routes.pop(token_path_key(token), None)
+
+    async def start(self) -> None:
+        """启动 HTTP 服务器"""
+        if self._runner is not None:
+            return
+        runner = web.AppRunner(self.app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, self.host, self.port)
+        await site.start()
+        self._runner = runner
+        self._started_at = time.time()
+        logger.info(f"🌐 [Webhook] 服务器已启动: http://{self.host}:{self.port}{self.path_prefix}/<bot>")
+
+    async def stop(self) -> None:
+        """停止 HTTP 服务器"""
+        if self._runner is None:
+            return
+        await self._runner.cleanup()
+        self._runner = None
+        logger.info("🌐 [Webhook] 服务器已停止")
+
+    async def _handle_update(self, request: web.Request) -> web.Response:
+        route = self._routes.get(request.match_info["path_key"])
+        if route is None:
+            self._stats["unknown"] += 1
+            return web.Response(status=404)
+
+        provided = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(provided, route.secret):
+            self._stats["rejected"] += 1
+            route.rejected += 1
+            logger.warning(f"⚠️ [Webhook] @{route.bot_username} secret token 校验失败")
+            return web.Response(status=403)
+
+        try:
+            data = await request.json()
+            update = Update.de_json(data, route.application.bot)
+        except Exception as e:
+            self._stats["invalid"] += 1
+            logger.warning(f"⚠️ [Webhook] @{route.bot_username} 无法解析更新: {e}")
+            return web.Response(status=400)
+
+        await route.application.update_queue.put(update)
+        self._stats["received"] += 1
+        route.received += 1
+        return web.Response(status=200)
+
+    async def _handle_health(self, request: web.Request) -> web.Response:
+        return web.Response(status=200, text="ok")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """服务器与各 Bot 的更新统计"""
+        return {
+            "running": self.is_running,
+            "uptime": round(time.time() - self._started_at, 1) if self._started_at else 0,
+            **self._stats,
+            "bots": {
+                route.bot_username or key: {
+                    "received": route.received,
+                    "rejected": route.rejected,
+                    "queue_size": route.application.update_queue.qsize(),
+                }
+                for key, route in self._routes.items()
+            },
+        }
@@ -4,11 +4,14 @@
 支持用户自然语言指令，由 LLM 自主决策完成任务：
 LLM 意图理解 → 自主选择目标网站 → 浏览器工具操控 → 验证完成
 
-核心流程：LLM + browser tool-call 循环
-启动浏览器 → 导航 → 快照 → 操作 → 再快照 → 直到完成
+核心流程：Planner 拆解 Step DAG → 按执行器分发
+- 简单步骤：ShellExecutor / LLMExecutor 直接完成，无需浏览器
+- 网页操控步骤：LLM + browser tool-call 循环
+  启动浏览器 → 导航 → 快照 → 操作 → 再快照 → 直到完成
 """
 from .engine import TaskEngine
 from .models import Task, Step, StepResult, ExecutorType, TaskStatus
+from .progress import progress_listener, report_progress
 
 __all__ = [
     "TaskEngine",
@@ -17,4 +20,6 @@ __all__ = [
     "StepResult",
     "ExecutorType",
     "TaskStatus",
+    "progress_listener",
+    "report_progress",
 ]
@@ -3,14 +3,39 @@
 
 核心编排器，串联 planner → executor_router → verifier → reporter。
 """
+from typing import Dict
+
 from loguru import logger
 
-from .executor_router import route_and_execute
-from .models import ExecutorType, Step, Task, TaskStatus
+from .executor_router import execute_dag
+from .models import StepResult, Task, TaskStatus
+from .planner import plan
 from .polisher import polish
 from .verifier import verify
 
 
+def _merge_results(task: Task, results: Dict[str, StepResult]) -> StepResult:
+    """
+    将逐步骤结果合并为任务的汇总结果
+
+    单步骤任务直接沿用该步骤结果；多步骤任务按步骤顺序拼接各步骤输出，
+    供 polish 生成最终回复。
+    """
+    if len(task.steps) == 1:
+        return results[task.steps[0].step_id]
+
+    lines = []
+    for step in task.steps:
+        result = results[step.step_id]
+        status = "成功" if result.success else "失败"
+        lines.append(f"[{step.description}]（{status}）{result.message}")
+    return StepResult(
+        success=all(r.success for r in results.values()),
+        message="\n".join(lines),
+        data={"steps": {sid: r.data for sid, r in results.items()}},
+    )
+
+
 class TaskEngine:
     """
     任务引擎
@@ -34,18 +59,16 @@ class TaskEngine:
         """
         logger.debug(f"🚀 [TaskEngine] ===== 开始任务 =====")
         logger.debug(f"🚀 [TaskEngine] 输入: {user_input}")
-        task = Task(user_input=user_input)
-        step = Step(
-            executor_type=ExecutorType.AGENT,
-            description="AI 自主操控任务",
-            params={"task": user_input},
-        )
+
+        # 1. 规划：拆解为 Step DAG
+        task = await plan(user_input)
+
+        # 2. 执行：互不依赖的分支并发执行，前置步骤失败时跳过下游步骤
         task.status = TaskStatus.RUNNING
-        result = await route_and_execute(step)
-        task.result = result
-        # 如果某步骤失败，停止执行后续步骤
-        if not result.success:
-            logger.debug(f"⚙️ [TaskEngine] Step 执行失败，停止后续步骤")
+        task.step_results = await execute_dag(task.steps)
+        task.result = _merge_results(task, task.step_results)
+        if not task.result.success:
+            logger.debug(f"⚙️ [TaskEngine] 存在失败步骤，已跳过其下游步骤")
 
         # 3. 验证
         task = await verify(task)
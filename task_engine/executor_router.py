@@ -2,8 +2,16 @@
 执行器路由 - shell / llm / desktop / playwright / agent 分发
 
 根据 Step.executor_type 将步骤路由到对应的执行器。
+execute_dag 按 depends_on 拓扑执行多个步骤，互不依赖的分支并发运行。
 """
+import asyncio
+from dataclasses import replace
+from typing import Dict, List
+
+from loguru import logger
+
 from task_engine.models import ExecutorType, Step, StepResult
+from task_engine.progress import report_progress
 from task_engine.executors.shell_executor import ShellExecutor
 from task_engine.executors.llm_executor import LLMExecutor
 from task_engine.executors.desktop_executor import DesktopExecutor
@@ -13,6 +21,10 @@ from task_engine.executors.agent_executor import AgentExecutor
 # 延迟实例化的执行器缓存
 _executors = {}
 
+# 持有会话状态（浏览器 / 桌面 + TaskGuard）的执行器同一时刻只能运行一个步骤
+_EXCLUSIVE_TYPES = (ExecutorType.AGENT, ExecutorType.DESKTOP)
+_exclusive_locks: Dict[ExecutorType, asyncio.Lock] = {}
+
 
 def _get_executor(executor_type: ExecutorType):
     """获取或创建执行器实例（懒加载单例）"""
@@ -40,3 +52,79 @@ async def route_and_execute(step: Step) -> StepResult:
     """
     executor = _get_executor(step.executor_type)
     return await executor.run(step)
+
+
+async def _run_exclusive(step: Step) -> StepResult:
+    """执行步骤；有状态执行器按类型串行化，其余直接并发"""
+    if step.executor_type not in _EXCLUSIVE_TYPES:
+        return await route_and_execute(step)
+    lock = _exclusive_locks.setdefault(step.executor_type, asyncio.Lock())
+    async with lock:
+        return await route_and_execute(step)
+
+
+def _with_upstream(step: Step, results: Dict[str, StepResult]) -> Step:
+    """将前置步骤的输出注入 params["upstream"]，供下游步骤参考"""
+    if not step.depends_on:
+        return step
+    upstream = {dep: results[dep].message for dep in step.depends_on}
+    return replace(step, params={**step.params, "upstream": upstream})
+
+
+async def execute_dag(steps: List[Step]) -> Dict[str, StepResult]:
+    """
+    按依赖关系执行步骤 DAG
+
+    每一轮找出依赖已全部完成的步骤并发执行；
+    依赖失败的步骤不再执行，直接记为失败。
+
+    Args:
+        steps: 规划好的步骤列表（planner 已保证无环）
+
+    Returns:
+        Dict[str, StepResult]: step_id → 执行结果，顺序与 steps 一致
+    """
+    results: Dict[str, StepResult] = {}
+    pending = list(steps)
+
+    while pending:
+        ready = [s for s in pending if all(d in results for d in s.depends_on)]
+        if not ready:
+            # 理论上不会发生（planner 已校验），防御性兜底避免死循环
+            for s in pending:
+                results[s.step_id] = StepResult(success=False, message="步骤依赖无法满足")
+            break
+
+        runnable = []
+        for s in ready:
+            failed = [d for d in s.depends_on if not results[d].success]
+            if failed:
+                results[s.step_id] = StepResult(
+                    success=False,
+                    message=f"前置步骤失败（{', '.join(failed)}），已跳过",
+                    data={"skipped": True},
+                )
+            else:
+                runnable.append(s)
+
+        if runnable:
+            logger.debug(
+                f"⚙️ [ExecutorRouter] 并发执行 {len(runnable)} 个步骤: "
+                + ", ".join(s.step_id for s in runnable)
+            )
+            outcomes = await asyncio.gather(
+                *(_run_exclusive(_with_upstream(s, results)) for s in runnable),
+                return_exceptions=True,
+            )
+            for s, outcome in zip(runnable, outcomes):
+                if isinstance(outcome, BaseException):
+                    logger.error(f"❌ [ExecutorRouter] 步骤 {s.step_id} 执行异常: {outcome}")
+                    outcome = StepResult(success=False, message=f"步骤执行异常: {outcome}")
+                results[s.step_id] = outcome
+                if len(steps) > 1:
+                    status = "完成" if outcome.success else "失败"
+                    await report_progress(f"步骤「{s.description}」{status}")
+
+        pending = [s for s in pending if s.step_id not in results]
+
+    return {s.step_id: results[s.step_id] for s in steps}
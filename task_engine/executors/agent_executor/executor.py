@@ -30,6 +30,7 @@ from config import settings
 from task_engine.executors.base import BaseExecutor
 from task_engine.executors.desktop_executor.guard import GuardAction, TaskGuard
 from task_engine.models import Step, StepResult
+from task_engine.progress import report_progress
 from task_engine.executors.agent_executor.tools import (
     TOOL_DEFINITIONS,
     TOOL_REGISTRY,
@@ -206,6 +207,7 @@ class AgentExecutor(BaseExecutor):
             )
 
             # 依次执行每个 tool_call
+            iteration_actions: List[str] = []
             for tc_idx, tc in enumerate(tool_calls, 1):
                 func_name: str = tc.get("function", {}).get("name", "")
                 func_args_raw: str = tc.get("function", {}).get("arguments", "{}")
@@ -220,6 +222,7 @@ class AgentExecutor(BaseExecutor):
                     f"🌐 [AgentExecutor] 执行工具 [{tc_idx}/{len(tool_calls)}]: "
                     f"{func_name}({_summarize_args(func_args)})"
                 )
+                iteration_actions.append(_summarize_args(func_args))
 
                 # TaskGuard 执行前安全检查
                 pre_action = self._guard.pre_check(func_name, func_args)
@@ -305,6 +308,10 @@ class AgentExecutor(BaseExecutor):
                     "content": str(tool_result),
                 })
 
+            await report_progress(
+                f"第 {iteration}/{_MAX_ITERATIONS} 轮：" + "；".join(iteration_actions)
+            )
+
         logger.warning(
             f"⏰ [AgentExecutor] 达到最大迭代次数 ({_MAX_ITERATIONS})，任务未完成"
         )
@@ -25,8 +25,10 @@ from typing import Any, Dict, List, Optional
 from loguru import logger
 
 from task_engine.models import Step, StepResult
+from task_engine.progress import report_progress
 from task_engine.executors.base import BaseExecutor
 from task_engine.executors.desktop_executor.guard import GuardAction, TaskGuard
+from task_engine.executors.desktop_executor.image_pipeline import clear_results
 from task_engine.executors.desktop_executor.tools import TOOL_DEFINITIONS, TOOL_REGISTRY
 from config import settings
 
@@ -37,6 +39,8 @@ EXECUTOR_LLM_MODEL = getattr(settings, 'executor_llm_model', "default")
 EXECUTOR_LLM_TOKEN = getattr(settings, 'executor_llm_token', "")
 _MAX_ITERATIONS = getattr(settings, 'max_iterations', "")
 
+# 会改变屏幕内容的工具：执行后清空 VLM 结果缓存
+_SCREEN_CHANGING_TOOLS = {"app_open", "click", "type_text", "key_press", "shell_run"}
 
 
 # 桌面操控 system prompt
@@ -204,6 +208,8 @@ class DesktopExecutor(BaseExecutor):
                     except Exception as e:
                         tool_result = f"工具执行异常: {e}"
                         logger.error(f"❌ [DesktopExecutor] 工具 {func_name} 执行异常: {e}")
+                    if func_name in _SCREEN_CHANGING_TOOLS:
+                        clear_results()
 
                 # TaskGuard 执行后结果检查
                 post_action = self._guard.post_check(func_name, func_args, str(tool_result))
@@ -235,6 +241,11 @@ class DesktopExecutor(BaseExecutor):
                     "content": str(tool_result),
                 })
 
+            await report_progress(
+                f"第 {iteration}/{_MAX_ITERATIONS} 轮："
+                + "；".join(tc.get("function", {}).get("name", "?") for tc in tool_calls)
+            )
+
         logger.warning(
             f"⏰ [DesktopExecutor] 达到最大迭代次数 ({_MAX_ITERATIONS})，任务未完成"
         )
@@ -0,0 +1,194 @@
+"""
+截图内存管线 - 一次解码、按需降采样、同帧结果复用
+
+截图命令把 PNG 写入临时目录后，由 capture_frame() 解码一次并缓存在内存中，
+后续 vision_analyze / 标注绘制 / 尺寸查询都复用同一份解码后的图像，不再重复读盘。
+
+发送给 VLM 前，将图像按最长边降采样到 vlm_max_image_edge 并编码为 JPEG，
+Retina 屏截图的请求体从数 MB 降到数百 KB。VLM 返回的坐标基于降采样后的图像，
+由 vision_analyze 通过 _scale_elements 映射回原图像素坐标与屏幕逻辑坐标。
+
+每帧计算像素内容摘要：截图与上一帧逐像素相同（且尺寸一致）时，
+对同一元素的重复分析直接复用上一次的 VLM 结果，跳过 VLM 调用。
+执行器每完成一次点击/输入等改变屏幕的操作后调用 clear_results() 清空结果缓存，
+避免把操作前的坐标当作新画面的答案。
+
+Pillow 不可用或图片无法解码时，各函数返回 None，调用方回退到读取原始文件。
+"""
+import base64
+import hashlib
+import io
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from config import settings
+
+# 降采样后最长边（像素）
+_MAX_EDGE = getattr(settings, "vlm_max_image_edge", 1280) or 1280
+# JPEG 编码质量
+_JPEG_QUALITY = getattr(settings, "vlm_jpeg_quality", 85) or 85
+
+# 缓存容量
+_MAX_FRAMES = 8
+_MAX_RESULTS = 32
+
+
+@dataclass
+class Frame:
+    """
+    一帧解码后的截图
+
+    Attributes:
+        path: 截图文件路径（作为 LLM 工具调用之间传递的句柄）
+        image: 解码后的 PIL 图像（RGB）
+        width: 原图像素宽度
+        height: 原图像素高度
+        digest: 像素内容摘要（BLAKE2b），仅逐像素相同的画面摘要相同
+        encoded: max_edge → (base64, mime, 降采样后宽度) 的编码缓存
+    """
+    path: str
+    image: Any
+    width: int
+    height: int
+    digest: str
+    encoded: Dict[int, Tuple[str, str, int]] = field(default_factory=dict)
+
+
+# path → (文件签名, Frame)
+_frames: "OrderedDict[str, Tuple[Tuple[int, int], Frame]]" = OrderedDict()
+# (digest, width, height, query) → VLM 解析结果（原图像素坐标）
+_results: "OrderedDict[Tuple[str, int, int, str], dict]" = OrderedDict()
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """文件签名（mtime_ns, size），用于识别同一路径被覆盖写入的情况"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _digest(image: Any) -> str:
+    """计算像素内容摘要：相同尺寸、逐像素相同的图像摘要才相同"""
+    return hashlib.blake2b(image.tobytes(), digest_size=16).hexdigest()
+
+
+def capture_frame(path: str) -> Optional[Frame]:
+    """
+    从磁盘解码截图并放入内存缓存
+
+    截图命令落盘后调用一次；同一路径、同一文件签名的后续调用直接命中缓存。
+
+    Args:
+        path: 截图文件路径
+
+    Returns:
+        Frame，Pillow 不可用或解码失败时返回 None
+    """
+    signature = _file_signature(path)
+    if signature is None:
+        return None
+
+    cached = _frames.get(path)
+    if cached is not None and cached[0] == signature:
+        _frames.move_to_end(path)
+        return cached[1]
+
+    try:
+        from PIL import Image
+        with Image.open(path) as img:
+            image = img.convert("RGB")
+    except Exception:
+        return None
+
+    frame = Frame(
+        path=path,
+        image=image,
+        width=image.width,
+        height=image.height,
+        digest=_digest(image),
+    )
+    _frames[path] = (signature, frame)
+    _frames.move_to_end(path)
+    while len(_frames) > _MAX_FRAMES:
+        _frames.popitem(last=False)
+    return frame
+
+
+def encode_for_vlm(frame: Frame, max_edge: int = _MAX_EDGE) -> Tuple[str, str, int]:
+    """
+    降采样并编码为 VLM 请求用的 base64 JPEG
+
+    Args:
+        frame: 截图帧
+        max_edge: 最长边上限（像素），原图不超过该值时不缩放
+
+    Returns:
+        (base64 字符串, MIME 类型, 降采样后宽度)
+    """
+    if max_edge in frame.encoded:
+        return frame.encoded[max_edge]
+
+    from PIL import Image
+
+    image = frame.image
+    longest = max(frame.width, frame.height)
+    if longest > max_edge:
+        ratio = max_edge / longest
+        size = (max(1, round(frame.width * ratio)), max(1, round(frame.height * ratio)))
+        image = image.resize(size, Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=_JPEG_QUALITY)
+    encoded = (base64.b64encode(buffer.getvalue()).decode("utf-8"), "image/jpeg", image.width)
+    frame.encoded[max_edge] = encoded
+    logger.debug(
+        f"🗜️ [image_pipeline] {frame.width}x{frame.height} → {image.width}x{image.height}, "
+        f"{len(buffer.getvalue()) // 1024} KB"
+    )
+    return encoded
+
+
+def _result_key(frame: Frame, query: str) -> Tuple[str, int, int, str]:
+    """结果缓存键：像素摘要 + 原图尺寸 + 查询"""
+    return frame.digest, frame.width, frame.height, query
+
+
+def lookup_result(frame: Frame, query: str) -> Optional[dict]:
+    """
+    查找同一画面（像素内容与尺寸完全相同）上同一查询的 VLM 结果
+
+    Returns:
+        结果副本（原图像素坐标），未命中返回 None
+    """
+    key = _result_key(frame, query)
+    result = _results.get(key)
+    if result is None:
+        return None
+    _results.move_to_end(key)
+    return {**result, "elements": [dict(e) for e in result.get("elements", [])]}
+
+
+def store_result(frame: Frame, query: str, result: dict) -> None:
+    """缓存 VLM 结果（原图像素坐标）"""
+    key = _result_key(frame, query)
+    _results[key] = {**result, "elements": [dict(e) for e in result.get("elements", [])]}
+    _results.move_to_end(key)
+    while len(_results) > _MAX_RESULTS:
+        _results.popitem(last=False)
+
+
+def clear_results() -> None:
+    """清空 VLM 结果缓存（屏幕可能已被操作改变时调用）"""
+    _results.clear()
+
+
+def clear_cache() -> None:
+    """清空帧缓存与结果缓存"""
+    _frames.clear()
+    _results.clear()
@@ -1,5 +1,8 @@
 """
 屏幕截图工具
+
+截图落盘后立即解码一次放入内存帧缓存（image_pipeline），
+后续 vision_analyze 与标注绘制直接复用，不再重复读盘解码。
 """
 import asyncio
 import json
@@ -10,6 +13,7 @@ from typing import Optional, Tuple
 
 from loguru import logger
 
+from task_engine.executors.desktop_executor.image_pipeline import capture_frame
 from task_engine.executors.desktop_executor.platform import get_screenshot_command, get_screen_resolution
 
 
@@ -20,12 +24,9 @@ def _get_image_size(filepath: str) -> Tuple[Optional[int], Optional[int]]:
     Returns:
         (width, height) 或 (None, None)
     """
-    try:
-        from PIL import Image
-        with Image.open(filepath) as img:
-            return img.size
-    except Exception:
-        pass
+    frame = capture_frame(filepath)
+    if frame is not None:
+        return frame.width, frame.height
     return None, None
 
 
@@ -54,7 +55,7 @@ async def screenshot() -> str:
         )
         _, stderr = await asyncio.wait_for(proc.communicate(), timeout=10)
         if proc.returncode == 0 and os.path.exists(filepath):
-            # 获取截图的实际像素尺寸
+            # 解码一次放入帧缓存，并获取截图的实际像素尺寸
             image_width, image_height = _get_image_size(filepath)
             # 获取屏幕逻辑分辨率
             screen_res = await get_screen_resolution()
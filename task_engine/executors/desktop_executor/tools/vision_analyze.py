@@ -6,10 +6,16 @@
 
 当 VLM 识别到需要点击的具体元素时，会在截图上绘制红色边框标注。
 
+图像管线：
+  截图从内存帧缓存（image_pipeline）读取，不重复读盘解码；
+  发送前降采样到 vlm_max_image_edge 并编码为 JPEG。
+  画面未变化（像素内容与尺寸完全相同）时复用上次同一查询的结果，跳过 VLM 调用。
+
 坐标映射：
-  VLM 返回的坐标基于截图的像素尺寸。在 macOS Retina/HiDPI 屏幕上，
-  截图像素分辨率（如 2880x1800）通常是屏幕逻辑分辨率（如 1440x900）的 2 倍。
-  而 click 工具使用的是屏幕逻辑坐标，因此需要将 VLM 坐标除以缩放因子。
+  VLM 返回的坐标基于发送的（降采样后）图像，先映射回截图像素坐标。
+  在 macOS Retina/HiDPI 屏幕上，截图像素分辨率（如 2880x1800）通常是
+  屏幕逻辑分辨率（如 1440x900）的 2 倍。而 click 工具使用的是屏幕逻辑坐标，
+  因此还需要将像素坐标除以缩放因子。两步映射都通过 _scale_elements 完成。
 """
 import base64
 import json
@@ -20,6 +26,13 @@ import aiohttp
 from loguru import logger
 
 from config import settings
+from task_engine.executors.desktop_executor.image_pipeline import (
+    Frame,
+    capture_frame,
+    encode_for_vlm,
+    lookup_result,
+    store_result,
+)
 from task_engine.executors.desktop_executor.platform import get_screen_resolution
 
 # VLM 配置（优先使用 VLM 专用配置，回退到 executor LLM 配置）
@@ -102,12 +115,9 @@ def _get_image_size(image_path: str) -> Tuple[Optional[int], Optional[int]]:
     Returns:
         (width, height) 或 (None, None)
     """
-    try:
-        from PIL import Image
-        with Image.open(image_path) as img:
-            return img.size
-    except Exception:
-        pass
+    frame = capture_frame(image_path)
+    if frame is not None:
+        return frame.width, frame.height
     return None, None
 
 
@@ -140,28 +150,33 @@ def _scale_elements(elements: List[dict], scale_factor: float) -> List[dict]:
     return scaled
 
 
-def draw_bounding_boxes(image_path: str, elements: List[dict]) -> Optional[str]:
+def draw_bounding_boxes(image_path: str, elements: List[dict], frame: Optional[Frame] = None) -> Optional[str]:
     """
     在截图上绘制红色边框标注 VLM 识别到的 UI 元素
 
     Args:
-        image_path: 原始截图文件路径
+        image_path: 原始截图文件路径（标注图保存在同目录）
         elements: VLM 识别到的元素列表，每个元素包含 x, y, width, height, description
+        frame: 已解码的截图帧，未提供时从帧缓存获取
 
     Returns:
         str: 标注后的截图文件路径，失败返回 None
     """
     try:
-        from PIL import Image, ImageDraw, ImageFont
+        from PIL import ImageDraw, ImageFont
     except ImportError:
         logger.warning("Pillow 未安装，无法绘制边框标注")
         return None
 
-    if not elements or not os.path.exists(image_path):
+    if not elements:
         return None
+    if frame is None:
+        frame = capture_frame(image_path)
+        if frame is None:
+            return None
 
     try:
-        img = Image.open(image_path)
+        img = frame.image.copy()
         draw = ImageDraw.Draw(img)
 
         for elem in elements:
@@ -288,13 +303,25 @@ async def vision_analyze(image_path: str, query: str) -> str:
     if not os.path.exists(image_path):
         return json.dumps({"error": f"截图文件不存在: {image_path}"}, ensure_ascii=False)
 
-    # 编码图片为 base64
-    try:
-        image_base64 = _encode_image(image_path)
-    except Exception as e:
-        return json.dumps({"error": f"图片读取失败: {e}"}, ensure_ascii=False)
-
-    mime_type = _get_mime_type(image_path)
+    frame = capture_frame(image_path)
+    sent_width: Optional[int] = None
+    if frame is not None:
+        # 画面未变化时复用上次结果，跳过 VLM 调用
+        cached = lookup_result(frame, query)
+        if cached is not None:
+            logger.info(f"♻️ [vision_analyze] 画面未变化，复用 VLM 结果: query={query}")
+            cached["dedup"] = True
+            result = await _map_to_screen(cached, image_path, frame)
+            return json.dumps(result, ensure_ascii=False)
+        # 降采样后编码，减小 VLM 请求体
+        image_base64, mime_type, sent_width = encode_for_vlm(frame)
+    else:
+        # 无法解码（如 Pillow 不可用）时回退到发送原始文件
+        try:
+            image_base64 = _encode_image(image_path)
+        except Exception as e:
+            return json.dumps({"error": f"图片读取失败: {e}"}, ensure_ascii=False)
+        mime_type = _get_mime_type(image_path)
 
     # 构建 VLM 请求消息（OpenAI 兼容的视觉格式）
     messages = [
@@ -379,32 +406,14 @@ async def vision_analyze(image_path: str, query: str) -> str:
         logger.info(f"👁️ VLM 分析完成: query={query}")
         result = _parse_vlm_response(content, query)
 
-        # 坐标缩放：将 VLM 的图片像素坐标映射到屏幕逻辑坐标
-        if result.get("found") and result.get("elements"):
-            scale_factor = await _get_scale_factor(image_path)
-            if scale_factor and abs(scale_factor - 1.0) > 0.01:
-                logger.info(
-                    f"📐 [vision_analyze] 坐标缩放: "
-                    f"scale_factor={scale_factor:.2f}, "
-                    f"将图片像素坐标转换为屏幕逻辑坐标"
-                )
-                # 先在原始坐标上绘制标注
-                annotated = draw_bounding_boxes(image_path, result["elements"])
-                if annotated:
-                    result["annotated_image"] = annotated
-                    logger.info(f"🖼️ 元素标注截图已保存: {annotated}")
-                # 再缩放坐标
-                result["elements"] = _scale_elements(
-                    result["elements"], scale_factor
-                )
-                result["scale_factor"] = round(scale_factor, 2)
-            else:
-                # 无缩放，直接绘制标注
-                annotated = draw_bounding_boxes(image_path, result["elements"])
-                if annotated:
-                    result["annotated_image"] = annotated
-                    logger.info(f"🖼️ 元素标注截图已保存: {annotated}")
+        if frame is not None:
+            # 降采样图像坐标 → 截图像素坐标
+            if sent_width and sent_width != frame.width and result.get("elements"):
+                result["elements"] = _scale_elements(result["elements"], sent_width / frame.width)
+            if "message" not in result:
+                store_result(frame, query, result)
 
+        result = await _map_to_screen(result, image_path, frame)
         return json.dumps(result, ensure_ascii=False)
     except (KeyError, IndexError) as e:
         logger.warning(f"VLM 响应格式异常: {e}, data={data}")
@@ -419,6 +428,40 @@ async def vision_analyze(image_path: str, query: str) -> str:
         )
 
 
+async def _map_to_screen(result: dict, image_path: str, frame: Optional[Frame]) -> dict:
+    """
+    在截图上标注识别到的元素，并将截图像素坐标映射为屏幕逻辑坐标
+
+    Args:
+        result: 解析后的 VLM 结果，坐标为截图像素坐标
+        image_path: 截图文件路径
+        frame: 已解码的截图帧（可为 None）
+
+    Returns:
+        dict: 坐标已映射为屏幕逻辑坐标的结果
+    """
+    if not (result.get("found") and result.get("elements")):
+        return result
+
+    # 先在原始坐标上绘制标注
+    annotated = draw_bounding_boxes(image_path, result["elements"], frame=frame)
+    if annotated:
+        result["annotated_image"] = annotated
+        logger.info(f"🖼️ 元素标注截图已保存: {annotated}")
+
+    # 坐标缩放：将 VLM 的图片像素坐标映射到屏幕逻辑坐标
+    scale_factor = await _get_scale_factor(image_path)
+    if scale_factor and abs(scale_factor - 1.0) > 0.01:
+        logger.info(
+            f"📐 [vision_analyze] 坐标缩放: "
+            f"scale_factor={scale_factor:.2f}, "
+            f"将图片像素坐标转换为屏幕逻辑坐标"
+        )
+        result["elements"] = _scale_elements(result["elements"], scale_factor)
+        result["scale_factor"] = round(scale_factor, 2)
+    return result
+
+
 async def _get_scale_factor(image_path: str) -> Optional[float]:
     """
     计算截图像素坐标到屏幕逻辑坐标的缩放因子
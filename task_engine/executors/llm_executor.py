@@ -1,11 +1,51 @@
 """
 LLM 执行器 - 纯文本回答
 
-当任务不需要桌面操控时，使用 LLM 直接生成文本回答。
+当任务不需要桌面操控时，使用 LLM 直接生成文本回答：
+调用 OpenAI 兼容的 /v1/chat/completions（默认复用 executor / vLLM 的配置），
+不启动浏览器会话，多个 llm 步骤可以并发执行。
+前置步骤的输出（params["upstream"]）会作为参考资料附在用户消息中。
 """
+from typing import Any, Dict, Optional
+
+import aiohttp
+from loguru import logger
+
+from config import settings
 from task_engine.models import Step, StepResult
 from task_engine.executors.base import BaseExecutor
 
+# LLM 配置（未单独配置时复用 executor / vLLM 的配置）
+_LLM_EXECUTOR_URL = (
+    getattr(settings, "executor_llm_url", None)
+    or getattr(settings, "vllm_api_url", None)
+)
+_LLM_EXECUTOR_MODEL = (
+    getattr(settings, "executor_llm_model", None)
+    or getattr(settings, "vllm_model", "default")
+)
+_LLM_EXECUTOR_TOKEN = (
+    getattr(settings, "executor_llm_token", None)
+    or getattr(settings, "vllm_api_token", None)
+)
+# 单次回答的请求超时（秒）
+_LLM_EXECUTOR_TIMEOUT = 60
+
+_ANSWER_SYSTEM_PROMPT = """你是一个任务助手，负责直接用文字完成用户交给你的步骤（回答、总结、改写、翻译、计算等）。
+规则：
+1. 只输出该步骤的结果，不要解释你的思考过程
+2. 如果提供了前置步骤的结果，以它们为准，不要编造其中没有的信息
+3. 回答简洁、自然，不要使用 Markdown 表格
+"""
+
+
+def _build_user_message(task_text: str, upstream: Optional[Dict[str, Any]]) -> str:
+    """拼接步骤任务与前置步骤结果"""
+    if not upstream:
+        return task_text
+    context = "\n".join(f"[{step_id}] {output}" for step_id, output in upstream.items())
+    return f"{task_text}\n\n前置步骤结果：\n{context}"
+
 
 class LLMExecutor(BaseExecutor):
     """LLM 纯文本执行器（兜底）"""
@@ -14,10 +54,8 @@ class LLMExecutor(BaseExecutor):
         """
         使用 LLM 生成文本回答
 
-        当前实现为占位返回，实际可对接 VLLMProvider / OpenAI 等
-
         Args:
-            step: 包含 params["task"] 的步骤
+            step: 包含 params["task"] 的步骤，可选 params["upstream"]
 
         Returns:
             StepResult: LLM 回答结果
@@ -26,8 +64,44 @@ class LLMExecutor(BaseExecutor):
         if not task_text:
             return StepResult(success=False, message="缺少 task 参数")
 
-        # 占位实现：后续可对接真实 LLM
-        return StepResult(
-            success=True,
-            message=f"[LLM] 已收到任务：{task_text}（LLM 直答模式暂未对接）",
-        )
+        if not _LLM_EXECUTOR_URL:
+            logger.warning("⚠️ [LLMExecutor] LLM URL 未配置，无法直接回答")
+            return StepResult(success=False, message="LLM 未配置，无法直接回答")
+
+        headers = {"Content-Type": "application/json"}
+        if _LLM_EXECUTOR_TOKEN:
+            headers["Authorization"] = f"Bearer {_LLM_EXECUTOR_TOKEN}"
+
+        payload = {
+            "model": _LLM_EXECUTOR_MODEL,
+            "messages": [
+                {"role": "system", "content": _ANSWER_SYSTEM_PROMPT},
+                {"role": "user", "content": _build_user_message(task_text, step.params.get("upstream"))},
+            ],
+            "temperature": 0.3,
+            "max_tokens": 800,
+        }
+
+        try:
+            timeout = aiohttp.ClientTimeout(total=_LLM_EXECUTOR_TIMEOUT)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                api_url = _LLM_EXECUTOR_URL.rstrip("/")
+                async with session.post(
+                        f"{api_url}/v1/chat/completions",
+                        json=payload,
+                        headers=headers,
+                ) as response:
+                    if response.status != 200:
+                        error_text = await response.text()
+                        logger.error(f"❌ [LLMExecutor] LLM API 错误: {response.status} - {error_text}")
+                        return StepResult(success=False, message=f"LLM API 错误: {response.status}")
+                    result = await response.json()
+                    answer = (result["choices"][0]["message"]["content"] or "").strip()
+        except Exception as e:
+            logger.error(f"❌ [LLMExecutor] LLM 调用失败: {e}")
+            return StepResult(success=False, message=f"LLM 调用失败: {e}")
+
+        if not answer:
+            return StepResult(success=False, message="LLM 返回空回答")
+        logger.info(f"💬 [LLMExecutor] 回答完成: {answer[:100]}")
+        return StepResult(success=True, message=answer)
@@ -10,7 +10,7 @@ Task / Step / Result 数据模型
 """
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 
 class ExecutorType(str, Enum):
@@ -40,10 +40,14 @@ class Step:
         executor_type: 执行器类型（shell / llm / desktop）
         description: 步骤描述
         params: 执行参数（如 task=自然语言任务描述）
+        step_id: 步骤 ID（DAG 中唯一）
+        depends_on: 依赖的前置步骤 ID 列表，为空表示可立即执行
     """
     executor_type: ExecutorType
     description: str
     params: Dict[str, Any] = field(default_factory=dict)
+    step_id: str = "s1"
+    depends_on: List[str] = field(default_factory=list)
 
 
 @dataclass
@@ -68,11 +72,13 @@ class Task:
 
     Attributes:
         user_input: 用户原始输入
-        steps: 规划的执行步骤列表
+        steps: 规划的执行步骤列表（按 depends_on 构成 DAG）
         status: 当前任务状态
-        result: 最终执行结果
+        result: 最终执行结果（多步骤时为汇总结果）
+        step_results: 各步骤的执行结果，key 为 step_id
     """
     user_input: str
     steps: list = field(default_factory=list)
     status: TaskStatus = TaskStatus.PENDING
     result: Optional[StepResult] = None
+    step_results: Dict[str, StepResult] = field(default_factory=dict)
@@ -0,0 +1,289 @@
+"""
+任务规划器 - 将用户请求拆解为 Step DAG
+
+使用 LLM 对用户请求进行分类/拆解：
+- 简单请求：返回单个 task_type（llm / shell / agent），生成单步骤任务
+- 复合请求：返回 steps 列表，每个步骤带 id 与 depends_on，构成 DAG
+
+廉价步骤（纯文本回答、白名单 shell 命令）路由到 LLMExecutor / ShellExecutor，
+只有确实需要操控浏览器的步骤才交给 AgentExecutor，避免为简单任务启动浏览器。
+shell 步骤的命令由 LLM 根据不可信的用户消息生成，因此默认关闭
+（planner_shell_enabled），开启后也只执行白名单中的固定命令，其余降级为 llm 回答。
+LLM 不可用或返回无法解析的结果时，回退到单个 LLM 步骤。
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+from loguru import logger
+
+from config import settings
+from .models import ExecutorType, Step, Task
+
+# LLM 配置（未单独配置时复用 executor / vLLM 的配置）
+_PLANNER_LLM_URL = (
+    getattr(settings, "planner_llm_url", None)
+    or getattr(settings, "executor_llm_url", None)
+    or getattr(settings, "vllm_api_url", None)
+)
+_PLANNER_LLM_MODEL = (
+    getattr(settings, "planner_llm_model", None)
+    or getattr(settings, "executor_llm_model", None)
+    or getattr(settings, "vllm_model", "default")
+)
+_PLANNER_LLM_TOKEN = (
+    getattr(settings, "planner_llm_token", None)
+    or getattr(settings, "executor_llm_token", None)
+    or getattr(settings, "vllm_api_token", None)
+)
+
+# 是否允许 shell 步骤（默认关闭）
+_SHELL_STEPS_ENABLED = getattr(settings, "planner_shell_enabled", False)
+
+# shell 步骤允许的命令：完整匹配（空白归一化后），不接受任何其他参数
+_SHELL_ALLOWLIST = frozenset({
+    "date",
+    "uptime",
+    "df -h",
+    "free -h",
+    "uname -a",
+    "hostname",
+})
+
+# 单个任务最多拆解的步骤数
+_MAX_STEPS = 8
+
+# 兼容旧分类：playwright / desktop 统一映射到 agent
+_TYPE_ALIASES = {
+    "llm": ExecutorType.LLM,
+    "shell": ExecutorType.SHELL,
+    "agent": ExecutorType.AGENT,
+    "playwright": ExecutorType.AGENT,
+    "desktop": ExecutorType.AGENT,
+}
+
+_PLAN_PROMPT_HEAD = """你是一个任务规划助手。请将用户请求拆解为可执行的步骤，并为每个步骤选择执行器。
+
+可用执行器（按成本从低到高，能用便宜的就不要用贵的）：
+- llm：纯文本回答、总结、改写、翻译、计算等无需外部操作的任务
+"""
+
+_PLAN_PROMPT_AGENT = "- agent：必须打开浏览器操作网页才能完成的任务（如在网站上播放音乐、搜索并点击）\n"
+
+_PLAN_PROMPT_SHELL = "- shell：只能使用以下命令之一（原样填写 command，不得添加参数）：{commands}\n"
+
+_PLAN_PROMPT_RULES = """
+输出规则：
+1. 只输出 JSON，不要添加任何解释
+2. 单步骤任务输出：{"task_type": "<执行器>", "description": "步骤描述", "command": "仅 shell 需要"}
+3. 多步骤任务输出：{"steps": [{"id": "s1", "task_type": "...", "description": "...", "task": "该步骤的自然语言任务", "command": "仅 shell 需要", "depends_on": []}]}
+4. depends_on 填写必须先完成的步骤 id；互不依赖的步骤留空，它们会被并发执行
+5. 步骤数不超过 8 个，不要为了拆分而拆分
+"""
+
+
+def _plan_system_prompt() -> str:
+    """根据是否允许 shell 步骤构建规划 System Prompt"""
+    if not _SHELL_STEPS_ENABLED:
+        rules = _PLAN_PROMPT_RULES.replace(', "command": "仅 shell 需要"', "")
+        return _PLAN_PROMPT_HEAD + _PLAN_PROMPT_AGENT + rules
+    shell = _PLAN_PROMPT_SHELL.format(commands=" / ".join(sorted(_SHELL_ALLOWLIST)))
+    return _PLAN_PROMPT_HEAD + shell + _PLAN_PROMPT_AGENT + _PLAN_PROMPT_RULES
+
+
+def _allowed_shell_command(command: Any) -> Optional[str]:
+    """shell 步骤开启且命令在白名单内时返回归一化后的命令，否则返回 None"""
+    if not _SHELL_STEPS_ENABLED or not isinstance(command, str):
+        return None
+    normalized = " ".join(command.split())
+    return normalized if normalized in _SHELL_ALLOWLIST else None
+
+
+def _strip_code_block(text: str) -> str:
+    """去掉 LLM 可能返回的 Markdown 代码块标记"""
+    clean = text.strip()
+    if clean.startswith("```json"):
+        clean = clean.split("```json", 1)[-1]
+    elif clean.startswith("```"):
+        clean = clean.split("```", 1)[-1]
+    if clean.endswith("```"):
+        clean = clean.rsplit("```", 1)[0]
+    return clean.strip()
+
+
+def _parse_llm_classification(raw_content: str) -> str:
+    """
+    解析 LLM 的单步骤分类结果
+
+    Args:
+        raw_content: LLM 原始输出
+
+    Returns:
+        str: 执行器类型值（llm / shell / agent），无法解析时回退到 llm
+    """
+    try:
+        parsed = json.loads(_strip_code_block(raw_content))
+    except (json.JSONDecodeError, TypeError):
+        return ExecutorType.LLM.value
+    if not isinstance(parsed, dict):
+        return ExecutorType.LLM.value
+    task_type = str(parsed.get("task_type", "")).strip().lower()
+    return _TYPE_ALIASES.get(task_type, ExecutorType.LLM).value
+
+
+def _build_step(
+        item: Dict[str, Any],
+        user_input: str,
+        step_id: str,
+        depends_on: Optional[List[str]] = None,
+) -> Step:
+    """
+    根据 LLM 输出的单个步骤描述构建 Step
+
+    shell 步骤关闭或命令不在白名单时无法确定性执行，降级为 llm 回答。
+    """
+    executor_type = _TYPE_ALIASES.get(
+        str(item.get("task_type", "")).strip().lower(), ExecutorType.LLM
+    )
+    params: Dict[str, Any] = {"task": item.get("task") or user_input}
+    if executor_type == ExecutorType.SHELL:
+        command = _allowed_shell_command(item.get("command"))
+        if command is None:
+            logger.warning(f"⚠️ [Planner] shell 步骤未启用或命令不在白名单内，降级为 llm: {item.get('command')!r}")
+            executor_type = ExecutorType.LLM
+        else:
+            params["command"] = command
+    return Step(
+        executor_type=executor_type,
+        description=item.get("description") or "任务步骤",
+        params=params,
+        step_id=step_id,
+        depends_on=list(depends_on or []),
+    )
+
+
+def _has_cycle(steps: List[Step]) -> bool:
+    """检测步骤依赖是否存在环（Kahn 拓扑排序）"""
+    indegree = {s.step_id: len(s.depends_on) for s in steps}
+    children: Dict[str, List[str]] = {s.step_id: [] for s in steps}
+    for s in steps:
+        for dep in s.depends_on:
+            children[dep].append(s.step_id)
+    ready = [sid for sid, deg in indegree.items() if deg == 0]
+    visited = 0
+    while ready:
+        sid = ready.pop()
+        visited += 1
+        for child in children[sid]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                ready.append(child)
+    return visited != len(steps)
+
+
+def _parse_llm_plan(raw_content: str, user_input: str) -> List[Step]:
+    """
+    解析 LLM 输出为步骤列表
+
+    支持单步骤分类格式与多步骤 steps 格式，DAG 非法（未知依赖、重复 id、
+    存在环）时回退到单步骤。
+
+    Args:
+        raw_content: LLM 原始输出
+        user_input: 用户原始输入
+
+    Returns:
+        List[Step]: 规划的步骤列表（至少一个）
+    """
+    try:
+        parsed = json.loads(_strip_code_block(raw_content))
+    except (json.JSONDecodeError, TypeError):
+        parsed = None
+
+    if isinstance(parsed, dict) and isinstance(parsed.get("steps"), list) and parsed["steps"]:
+        items = [item for item in parsed["steps"][:_MAX_STEPS] if isinstance(item, dict)]
+        ids = [str(item.get("id") or f"s{idx}") for idx, item in enumerate(items, 1)]
+        if items and len(set(ids)) == len(ids):
+            known = set(ids)
+            steps = []
+            for item, step_id in zip(items, ids):
+                deps = [str(d) for d in item.get("depends_on") or []]
+                if any(d not in known or d == step_id for d in deps):
+                    steps = []
+                    break
+                steps.append(_build_step(item, user_input, step_id, deps))
+            if steps and not _has_cycle(steps):
+                return steps
+        logger.warning("⚠️ [Planner] 多步骤计划无效，回退到单步骤")
+
+    if isinstance(parsed, dict) and "task_type" in parsed:
+        return [_build_step(parsed, user_input, "s1")]
+
+    task_type = _parse_llm_classification(raw_content)
+    return [_build_step({"task_type": task_type}, user_input, "s1")]
+
+
+def _fallback_task(user_input: str) -> Task:
+    """LLM 不可用时的兜底计划：单个 LLM 步骤"""
+    task = Task(user_input=user_input)
+    task.steps = [Step(
+        executor_type=ExecutorType.LLM,
+        description="LLM 直接回答",
+        params={"task": user_input},
+    )]
+    return task
+
+
+async def plan(user_input: str) -> Task:
+    """
+    规划任务：将用户请求拆解为 Step DAG
+
+    Args:
+        user_input: 用户原始自然语言输入
+
+    Returns:
+        Task: 包含规划步骤的任务
+    """
+    if not _PLANNER_LLM_URL:
+        logger.debug("⚠️ [Planner] LLM URL 未配置，回退到 LLM 步骤")
+        return _fallback_task(user_input)
+
+    headers = {"Content-Type": "application/json"}
+    if _PLANNER_LLM_TOKEN:
+        headers["Authorization"] = f"Bearer {_PLANNER_LLM_TOKEN}"
+
+    payload = {
+        "model": _PLANNER_LLM_MODEL,
+        "messages": [
+            {"role": "system", "content": _plan_system_prompt()},
+            {"role": "user", "content": user_input},
+        ],
+        "temperature": 0.1,
+        "max_tokens": 500,
+    }
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            api_url = _PLANNER_LLM_URL.rstrip("/")
+            async with session.post(
+                    f"{api_url}/v1/chat/completions",
+                    json=payload,
+                    headers=headers,
+            ) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.error(f"❌ [Planner] LLM API 错误: {response.status} - {error_text}")
+                    return _fallback_task(user_input)
+                result = await response.json()
+                raw_content = result["choices"][0]["message"]["content"].strip()
+    except Exception as e:
+        logger.error(f"❌ [Planner] LLM 规划失败: {e}，回退到 LLM 步骤")
+        return _fallback_task(user_input)
+
+    task = Task(user_input=user_input)
+    task.steps = _parse_llm_plan(raw_content, user_input)
+    logger.info(
+        "🧭 [Planner] 规划完成: "
+        + ", ".join(f"{s.step_id}={s.executor_type.value}" for s in task.steps)
+    )
+    return task
@@ -3,8 +3,17 @@
 
 将任务执行报告通过 LLM 进行润色，使结果更简洁、自然，
 重要信息放在开头。当 LLM 不可用时回退到原始文本。
+
+为减少一次完整的 LLM 往返：
+- 快速路径：已经很短且不含 emoji 状态标记 / Markdown 符号的纯文本报告直接返回
+- 结果缓存：按 (报告哈希, 用户输入哈希) 做 LRU 缓存，相同报告不重复润色
 """
+import hashlib
 import json
+import re
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
 import aiohttp
 from loguru import logger
 from config import settings
@@ -14,6 +23,21 @@ _POLISHER_LLM_URL = getattr(settings, "polisher_llm_url", None)
 _POLISHER_LLM_MODEL = getattr(settings, "polisher_llm_model", None)
 _POLISHER_LLM_TOKEN = getattr(settings, "polisher_llm_token", None)
 
+# 润色结果缓存容量（0 表示禁用缓存）
+_CACHE_SIZE = getattr(settings, "polisher_cache_size", 256)
+# 快速路径：不超过该长度的纯文本报告无需润色
+_FAST_PATH_MAX_CHARS = getattr(settings, "polisher_fast_path_max_chars", 40)
+
+# 需要 LLM 清理的格式：emoji 状态标记、Markdown 符号、表格
+_NEEDS_POLISH_RE = re.compile(
+    r"[\u2600-\u27bf\U0001f300-\U0001faff]|\*\*|^\s*[-*#>|]|`",
+    re.MULTILINE,
+)
+
+# (报告哈希, 用户输入哈希) → 润色结果
+_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+_stats: Dict[str, int] = {"hits": 0, "misses": 0, "fast_path": 0}
+
 # 润色 system prompt
 _POLISH_SYSTEM_PROMPT = """你是一个文本润色助手。你的任务是将任务执行结果润色为简洁、自然的回复
 规则：
@@ -32,6 +56,92 @@ content字段为润色完成后的文字
 """
 
 
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _is_plain_short(report_text: str) -> bool:
+    """报告是否已是简短纯文本（单行、无 emoji 状态标记与 Markdown 符号）"""
+    text = report_text.strip()
+    return (
+        len(text) <= _FAST_PATH_MAX_CHARS
+        and "\n" not in text
+        and not _NEEDS_POLISH_RE.search(text)
+    )
+
+
+def parse_polished_content(raw_content: str) -> str:
+    """
+    解析 LLM 返回的润色结果
+
+    期望格式为 {"content": "..."}，可能被 Markdown 代码块包裹；
+    无法解析为 JSON 时回退到原始输出。
+
+    Args:
+        raw_content: LLM 原始输出
+
+    Returns:
+        str: 润色后的文本（可能为空字符串）
+    """
+    raw_content = raw_content.strip()
+    # 预处理：去掉 LLM 可能返回的 Markdown 代码块标记
+    clean_json = raw_content
+    if clean_json.startswith("```json"):
+        clean_json = clean_json.split("```json", 1)[-1]
+    if clean_json.endswith("```"):
+        clean_json = clean_json.rsplit("```", 1)[0]
+    clean_json = clean_json.strip()
+    try:
+        parsed = json.loads(clean_json)
+        # 确保提取的是 content 字段中的纯字符串
+        polished = parsed.get("content", raw_content) if isinstance(parsed, dict) else raw_content
+    except (json.JSONDecodeError, TypeError):
+        # 解析失败时直接使用 raw_content
+        polished = raw_content
+    return str(polished) if polished else ""
+
+
+def _cache_get(key: Tuple[str, str]) -> Optional[str]:
+    polished = _cache.get(key)
+    if polished is None:
+        _stats["misses"] += 1
+        return None
+    _stats["hits"] += 1
+    _cache.move_to_end(key)
+    return polished
+
+
+def _cache_put(key: Tuple[str, str], polished: str) -> None:
+    if _CACHE_SIZE <= 0:
+        return
+    _cache[key] = polished
+    _cache.move_to_end(key)
+    while len(_cache) > _CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def get_cache_stats() -> Dict[str, float]:
+    """
+    获取润色缓存统计
+
+    Returns:
+        dict: hits / misses / fast_path 计数、命中率与当前缓存条数
+    """
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "hit_rate": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+        "size": len(_cache),
+    }
+
+
+def clear_cache() -> None:
+    """清空润色缓存与统计"""
+    _cache.clear()
+    for name in _stats:
+        _stats[name] = 0
+
+
 async def polish(report_text: str, user_input: str) -> str:
     """
     使用 LLM 润色任务执行报告
@@ -50,6 +160,17 @@ async def polish(report_text: str, user_input: str) -> str:
     if not report_text or not report_text.strip():
         return report_text
 
+    if _is_plain_short(report_text):
+        _stats["fast_path"] += 1
+        logger.debug("⚡ [Polisher] 报告已是简短纯文本，跳过润色")
+        return report_text
+
+    cache_key = (_digest(report_text), _digest(user_input or ""))
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        logger.debug("♻️ [Polisher] 命中润色缓存")
+        return cached
+
     messages = [
         {"role": "system", "content": _POLISH_SYSTEM_PROMPT},
         {"role": "user", "content": f"用户请求：{user_input}\n\n任务执行结果：\n{report_text}"},
@@ -79,27 +200,14 @@ async def polish(report_text: str, user_input: str) -> str:
                     logger.error(f"❌ [Polisher] LLM API 错误: {response.status} - {error_text}")
                     return report_text
                 result = await response.json()
-                raw_content = result["choices"][0]["message"]["content"].strip()
-                # 预处理：去掉 LLM 可能返回的 Markdown 代码块标记
-                clean_json = raw_content
-                if clean_json.startswith("```json"):
-                    clean_json = clean_json.split("```json", 1)[-1]
-                if clean_json.endswith("```"):
-                    clean_json = clean_json.rsplit("```", 1)[0]
-                clean_json = clean_json.strip()
-                try:
-                    parsed = json.loads(clean_json)
-                    # 确保提取的是 content 字段中的纯字符串
-                    polished = parsed.get("content", raw_content)
-                except (json.JSONDecodeError, TypeError):
-                    # 如果还是解析失败，则进行简单的正则或字符串清洗，或者直接使用 raw_content
-                    polished = raw_content
+                polished = parse_polished_content(result["choices"][0]["message"]["content"])
                 if not polished:
                     logger.warning("⚠️ [Polisher] LLM 返回空内容，使用原始文本")
                     return report_text
+                _cache_put(cache_key, polished)
                 logger.info(f"✅ [Polisher] 润色完成 ")
                 logger.debug(f"✨ [Polisher] 润色完成，润色后的回复是: '{polished}'")
-                return str(polished)
+                return polished
 
     except Exception as e:
         logger.error(f"❌ [Polisher] LLM 润色失败: {e}，使用原始文本")
@@ -0,0 +1,51 @@
+"""
+任务进度上报
+
+执行器在每一轮迭代结束时调用 report_progress()，
+由调用方（如后台任务队列）通过 progress_listener() 注册回调接收进度。
+
+回调存放在 ContextVar 中：asyncio.gather 派生的子任务会继承调用方的上下文，
+因此 DAG 中并发执行的步骤也能上报到同一个监听者，不同任务之间互不干扰。
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Iterator, Optional
+
+from loguru import logger
+
+ProgressCallback = Callable[[str], Awaitable[None]]
+
+_progress_callback: ContextVar[Optional[ProgressCallback]] = ContextVar(
+    "task_engine_progress_callback", default=None
+)
+
+
+@contextmanager
+def progress_listener(callback: Optional[ProgressCallback]) -> Iterator[None]:
+    """
+    在当前上下文中注册进度回调
+
+    使用方式：
+        with progress_listener(on_progress):
+            await engine.run(user_input)
+    """
+    token = _progress_callback.set(callback)
+    try:
+        yield
+    finally:
+        _progress_callback.reset(token)
+
+
+async def report_progress(message: str) -> None:
+    """
+    上报一条进度信息，未注册监听者时为空操作
+
+    回调异常只记录日志，不影响任务执行。
+    """
+    callback = _progress_callback.get()
+    if callback is None:
+        return
+    try:
+        await callback(message)
+    except Exception as e:
+        logger.warning(f"⚠️ [TaskEngine] 进度回调异常: {e}")
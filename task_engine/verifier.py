@@ -2,16 +2,22 @@
 结果验证器 - 成功/失败判断
 
 根据 StepResult 判断任务整体是否成功。
+多步骤任务会综合每个步骤的结果：全部成功才算成功，任一步骤被安全守卫终止则整体终止。
 """
 from .models import StepResult, Task, TaskStatus
 from loguru import logger
 
 
+def _is_aborted(result: StepResult) -> bool:
+    """检查结果是否由安全守卫终止"""
+    return "安全守卫终止" in result.message
+
+
 async def verify(task: Task) -> Task:
     """
     验证任务执行结果
 
-    根据最后一个步骤的结果判断任务整体状态。
+    有逐步骤结果时综合全部步骤判断，否则根据最后一个步骤的结果判断任务整体状态。
 
     Args:
         task: 已执行完步骤的任务
@@ -19,17 +25,20 @@ async def verify(task: Task) -> Task:
     Returns:
         Task: 更新了 status 的任务
     """
-    if task.result is None:
+    results = list(task.step_results.values())
+    if not results and task.result is not None:
+        results = [task.result]
+
+    if not results:
         task.status = TaskStatus.FAILED
         return task
 
-    if task.result.success:
+    if all(r.success for r in results):
         task.status = TaskStatus.SUCCESS
-    else:
+    elif any(_is_aborted(r) for r in results if not r.success):
         # 检查是否被安全守卫终止
-        if "安全守卫终止" in task.result.message:
-            task.status = TaskStatus.ABORTED
-        else:
-            task.status = TaskStatus.FAILED
+        task.status = TaskStatus.ABORTED
+    else:
+        task.status = TaskStatus.FAILED
     logger.info(f"✅ [TaskEngine] 验证完成: status={task.status.value}")
     return task
@@ -7,7 +7,8 @@ import shutil
 import sys
 from pathlib import Path
 
-from src.agents import AgentLoader, BaseAgent
+from src.agents import AgentLoader, AgentOrchestrator, BaseAgent
+from src.agents.loader import AgentManifestEntry, LazyAgent, load_manifest
 from src.agents.models import Message, ChatContext, AgentResponse
 from typing import Dict, Any
 
@@ -207,3 +208,100 @@ class Agent2(BaseAgent):
         # Should only load one agent (the first one found)
         assert len(agent_classes) == 1
         assert agent_classes[0].__name__ in ["Agent1", "Agent2"]
+
+
+class RecordingAgent(BaseAgent):
+    """LazyAgent 背后的真实Agent"""
+    
+    can_handle_is_pure = False
+    
+    @property
+    def name(self) -> str:
+        return "Recorder"
+    
+    @property
+    def description(self) -> str:
+        return "Records messages"
+    
+    def can_handle(self, message: Message, context: ChatContext) -> float:
+        return 0.7
+    
+    def respond(self, message: Message, context: ChatContext) -> AgentResponse:
+        return AgentResponse(content=f"got {message.content}", agent_name=self.name)
+    
+    def memory_read(self, user_id: str) -> Dict[str, Any]:
+        return {}
+    
+    def memory_write(self, user_id: str, data: Dict[str, Any]) -> None:
+        pass
+
+
+class TestLazyAgentLoading:
+    """Tests for manifest-based lazy plugin loading."""
+    
+    PLUGINS_DIR = "src/agents/plugins"
+    
+    @pytest.mark.asyncio
+    async def test_lazy_agent_imports_on_first_dispatch(self):
+        created = []
+        
+        def factory(entry):
+            created.append(entry.module)
+            return RecordingAgent()
+        
+        entry = AgentManifestEntry(
+            module="recorder", class_name="RecordingAgent", name="Recorder",
+            description="Records messages", skills=["record"],
+        )
+        agent = LazyAgent(entry, factory)
+        context = ChatContext(chat_id="c1")
+        
+        assert (agent.name, agent.description, agent.skills) == ("Recorder", "Records messages", ["record"])
+        assert agent.can_handle(Message(content="hi", user_id="u1", chat_id="c1"), context) == 0.0
+        mention = Message(content="@Recorder hi", user_id="u1", chat_id="c1", metadata={"mentions": ["@Recorder"]})
+        assert agent.can_handle(mention, context) == 1.0
+        assert agent.can_handle_is_pure
+        assert created == []
+        
+        response = await agent.respond_async(mention, context)
+        await agent.respond_async(mention, context)
+        assert response.content == "got @Recorder hi"
+        assert created == ["recorder"]
+        # 加载后由真实Agent决定
+        assert agent.can_handle(Message(content="hi", user_id="u1", chat_id="c1"), context) == 0.7
+        assert not agent.can_handle_is_pure
+    
+    def test_load_agents_lazy_uses_manifest(self):
+        loader = AgentLoader(agents_dir=self.PLUGINS_DIR, lazy=True)
+        agents = loader.load_agents()
+        
+        lazy_agents = [a for a in agents if isinstance(a, LazyAgent)]
+        assert [a.name for a in lazy_agents] == ["TaskEngineAgent"]
+        assert not lazy_agents[0].is_loaded
+        assert "src.agents.plugins.task_engine_agent" not in loader.import_times
+        
+        orchestrator = AgentOrchestrator(agents)
+        assert [c.name for c in orchestrator._capabilities] == ["TaskEngineAgent"]
+        assert not lazy_agents[0].is_loaded
+        
+        lazy_agents[0].load()
+        assert loader.get_import_report()[0][0] == "src.agents.plugins.task_engine_agent"
+    
+    def test_manifest_matches_plugins(self):
+        eager = {a.name: a for a in AgentLoader(agents_dir=self.PLUGINS_DIR).load_agents()}
+        for entry in load_manifest(Path(self.PLUGINS_DIR) / "manifest.yaml"):
+            agent = eager[entry.name]
+            assert type(agent).__name__ == entry.class_name
+            assert agent.description == entry.description
+            assert agent.skills == entry.skills
+    
+    def test_invalid_manifest_entries_are_skipped(self, tmp_path):
+        manifest = tmp_path / "manifest.yaml"
+        manifest.write_text(
+            "agents:\n"
+            "  - module: ok\n    class: OkAgent\n    name: Ok\n    description: fine\n"
+            "  - module: broken\n",
+            encoding="utf-8",
+        )
+        assert [e.name for e in load_manifest(manifest)] == ["Ok"]
+        assert load_manifest(tmp_path / "missing.yaml") == []
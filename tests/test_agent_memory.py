@@ -1,6 +1,9 @@
 """
 Tests for the memory storage system.
 """
+import asyncio
+import sqlite3
+
 import pytest
 import tempfile
 import shutil
@@ -9,6 +12,7 @@ from pathlib import Path
 from src.agents.memory import (
     FileMemoryStore,
     SQLiteMemoryStore,
+    AsyncSQLiteMemoryStore,
     InMemoryStore
 )
 
@@ -166,6 +170,96 @@ class TestSQLiteMemoryStore:
         assert result == data
 
 
+class TestAsyncSQLiteMemoryStore:
+    """Tests for the persistent-connection SQLite store with async API."""
+    
+    def setup_method(self):
+        """Create a temporary database for testing."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = str(Path(self.temp_dir) / "agent_memory.db")
+        self.store = AsyncSQLiteMemoryStore(db_path=self.db_path)
+    
+    def teardown_method(self):
+        """Close the store and clean up."""
+        self.store.close()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_sync_write_read_delete(self):
+        """Test the synchronous MemoryStore interface."""
+        self.store.write("TestAgent", "user123", {"message": "你好世界"})
+        assert self.store.read("TestAgent", "user123") == {"message": "你好世界"}
+        
+        self.store.delete("TestAgent", "user123")
+        assert self.store.read("TestAgent", "user123") == {}
+    
+    def test_wal_mode_and_persistence(self):
+        """Test that data is committed in WAL mode and survives reopening."""
+        self.store.write("TestAgent", "user123", {"count": 1})
+        self.store.close()
+        
+        with sqlite3.connect(self.db_path) as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        
+        self.store = AsyncSQLiteMemoryStore(db_path=self.db_path)
+        assert self.store.read("TestAgent", "user123") == {"count": 1}
+    
+    def test_read_through_cache(self):
+        """Test that repeated reads are served from the LRU."""
+        self.store.write("TestAgent", "user123", {"count": 1})
+        self.store.read("TestAgent", "user123")
+        self.store.read("TestAgent", "user123")
+        
+        stats = self.store.get_stats()
+        assert stats["cache_hits"] == 2
+        assert stats["cache_misses"] == 0
+        
+        # 返回的是副本，修改不会影响缓存
+        self.store.read("TestAgent", "user123")["count"] = 99
+        assert self.store.read("TestAgent", "user123") == {"count": 1}
+    
+    def test_lru_eviction(self):
+        """Test that the LRU is bounded and misses fall back to the database."""
+        store = AsyncSQLiteMemoryStore(db_path=self.db_path, cache_size=1)
+        try:
+            store.write("TestAgent", "user1", {"user": "one"})
+            store.write("TestAgent", "user2", {"user": "two"})
+            assert store.get_stats()["cached"] == 1
+            assert store.read("TestAgent", "user1") == {"user": "one"}
+            assert store.get_stats()["cache_misses"] == 1
+        finally:
+            store.close()
+    
+    @pytest.mark.asyncio
+    async def test_async_writes_are_batched(self):
+        """Test that concurrent async writes share short transactions."""
+        await asyncio.gather(*(
+            self.store.write_async("TestAgent", f"user{i}", {"n": i}) for i in range(50)
+        ))
+        await self.store.write_async("TestAgent", "user0", {"n": "latest"})
+        
+        stats = self.store.get_stats()
+        assert stats["writes"] == 51
+        assert stats["batches"] < 51
+        
+        with sqlite3.connect(self.db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM agent_memory").fetchone()[0] == 50
+        assert await self.store.read_async("TestAgent", "user0") == {"n": "latest"}
+    
+    @pytest.mark.asyncio
+    async def test_async_read_miss_and_delete(self):
+        """Test async reads from the database and async delete."""
+        self.store.write("TestAgent", "user123", {"key": "value"})
+        
+        store = AsyncSQLiteMemoryStore(db_path=self.db_path)
+        try:
+            assert await store.read_async("TestAgent", "user123") == {"key": "value"}
+            await store.delete_async("TestAgent", "user123")
+            assert await store.read_async("TestAgent", "user123") == {}
+        finally:
+            store.close()
+        assert self.store.read("TestAgent", "nonexistent") == {}
+
+
 class TestInMemoryStore:
     """Tests for in-memory storage."""
     
@@ -1,9 +1,13 @@
 """
 Tests for the Router component.
 """
+import asyncio
+import time
+
 import pytest
 from src.agents import Router, RouterConfig, Message, ChatContext, AgentResponse
 from src.agents.base_agent import BaseAgent
+from src.agents.router import CooldownStore
 from typing import Dict, Any
 
 
@@ -275,3 +279,188 @@ class TestRouter:
         assert responses[0].agent_name == "Agent2"  # 0.9
         assert responses[1].agent_name == "Agent1"  # 0.7
         assert responses[2].agent_name == "Agent3"  # 0.6
+
+
+class SlowAsyncAgent(MockAgent):
+    """原生异步Agent，respond_async 需要等待 delay 秒"""
+    
+    def __init__(self, name: str, delay: float, confidence: float = 0.8):
+        super().__init__(name, "Test", lambda m, c: confidence)
+        self.delay = delay
+    
+    async def respond_async(self, message: Message, context: ChatContext) -> AgentResponse:
+        await asyncio.sleep(self.delay)
+        return self.respond(message, context)
+
+
+class BlockingSyncAgent(MockAgent):
+    """只实现同步 respond() 且会阻塞的Agent"""
+    
+    def respond(self, message: Message, context: ChatContext) -> AgentResponse:
+        time.sleep(0.2)
+        return super().respond(message, context)
+
+
+class TestRouteAsync:
+    """Tests for Router.route_async with native async agents."""
+    
+    @pytest.mark.asyncio
+    async def test_parallel_agents_with_timeout(self):
+        """Agents run concurrently; an agent exceeding agent_timeout is skipped."""
+        agents = [
+            SlowAsyncAgent("Fast1", 0.1, 0.9),
+            SlowAsyncAgent("Fast2", 0.1, 0.8),
+            SlowAsyncAgent("Stuck", 10, 0.7),
+        ]
+        config = RouterConfig(min_confidence=0.5, max_agents=3, enable_parallel=True, agent_timeout=0.3)
+        router = Router(agents, config)
+        
+        msg = Message(content="test", user_id="user1", chat_id="chat1")
+        started = time.monotonic()
+        responses = await router.route_async(msg, ChatContext(chat_id="chat1"))
+        
+        assert time.monotonic() - started < 1.0
+        assert [r.agent_name for r in responses] == ["Fast1", "Fast2"]
+    
+    @pytest.mark.asyncio
+    async def test_sync_agent_does_not_block_event_loop(self):
+        """Sync respond() is offloaded to the thread pool."""
+        router = Router([BlockingSyncAgent("Blocking", "Test", lambda m, c: 0.9)])
+        ticks = 0
+        
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        
+        ticker_task = asyncio.create_task(ticker())
+        msg = Message(content="test", user_id="user1", chat_id="chat1")
+        responses = await router.route_async(msg, ChatContext(chat_id="chat1"))
+        ticker_task.cancel()
+        
+        assert responses[0].agent_name == "Blocking"
+        assert ticks >= 5
+
+
+class CountingAgent(MockAgent):
+    """记录 can_handle() 调用次数的Agent"""
+    
+    def __init__(self, name: str, confidence: float = 0.8, pure: bool = True):
+        super().__init__(name, "Test", lambda m, c: confidence)
+        self.can_handle_is_pure = pure
+        self.calls = 0
+    
+    def can_handle(self, message: Message, context: ChatContext) -> float:
+        self.calls += 1
+        return super().can_handle(message, context)
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+    
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestConfidenceCache:
+    """Tests for memoized can_handle() of pure agents."""
+    
+    def test_pure_agent_is_memoized_by_text_and_mentions(self):
+        pure = CountingAgent("Pure")
+        impure = CountingAgent("Impure", pure=False)
+        router = Router([pure, impure], RouterConfig(max_agents=2))
+        context = ChatContext(chat_id="chat1")
+        
+        for user_id in ("u1", "u2", "u3"):
+            router.select_agents(Message(content="你好", user_id=user_id, chat_id="chat1"), context)
+        assert pure.calls == 1
+        assert impure.calls == 3
+        
+        router.select_agents(
+            Message(content="你好", user_id="u1", chat_id="chat1", metadata={"mentions": ["@Other"]}), context
+        )
+        assert pure.calls == 2
+        assert router.get_stats()["confidence_cache_hits"] == 2
+    
+    def test_cached_confidence_is_clamped_and_invalidated_on_replace(self):
+        router = Router([CountingAgent("Pure", confidence=1.5)], RouterConfig(confidence_cache_size=1))
+        msg = Message(content="test", user_id="u1", chat_id="chat1")
+        context = ChatContext(chat_id="chat1")
+        
+        assert router.select_agents(msg, context)[0][1] == 1.0
+        assert router.select_agents(msg, context)[0][1] == 1.0
+        
+        replacement = CountingAgent("Pure", confidence=0.6)
+        router.add_agent(replacement)
+        assert router.select_agents(msg, context)[0][1] == 0.6
+        assert replacement.calls == 1
+    
+    def test_cache_is_bounded(self):
+        agent = CountingAgent("Pure")
+        router = Router([agent], RouterConfig(confidence_cache_size=2))
+        context = ChatContext(chat_id="chat1")
+        for i in range(10):
+            router.select_agents(Message(content=f"msg {i}", user_id="u1", chat_id="chat1"), context)
+        assert router.get_stats()["confidence_cache_size"] == 2
+    
+    def test_cache_can_be_disabled(self):
+        agent = CountingAgent("Pure")
+        router = Router([agent], RouterConfig(confidence_cache_size=0))
+        msg = Message(content="test", user_id="u1", chat_id="chat1")
+        router.select_agents(msg, ChatContext(chat_id="chat1"))
+        router.select_agents(msg, ChatContext(chat_id="chat1"))
+        assert agent.calls == 2
+
+
+class TestCooldownStore:
+    """Tests for the time-wheel cooldown store."""
+    
+    def test_cooldown_expires(self):
+        clock = FakeClock()
+        store = CooldownStore(10.0, clock=clock)
+        store.touch("Agent", "u1")
+        
+        clock.now += 9.9
+        assert store.is_cooling("Agent", "u1")
+        assert not store.is_cooling("Agent", "u2")
+        clock.now += 0.2
+        assert not store.is_cooling("Agent", "u1")
+    
+    def test_expired_entries_are_compacted(self):
+        clock = FakeClock()
+        store = CooldownStore(10.0, slots=8, clock=clock)
+        for i in range(1000):
+            store.touch("Agent", f"user{i}")
+            clock.now += 0.05
+        # 只保留冷却窗口（10 秒 ≈ 200 个用户）内的记录，外加当前槽（约 1.7 秒）内尚未清理的记录
+        assert len(store) <= 240
+        
+        clock.now += 1000
+        assert not store.is_cooling("Agent", "user999")
+        assert len(store) == 0
+    
+    def test_touch_extends_cooldown(self):
+        clock = FakeClock()
+        store = CooldownStore(10.0, slots=4, clock=clock)
+        store.touch("Agent", "u1")
+        clock.now += 8
+        store.touch("Agent", "u1")
+        clock.now += 8
+        assert store.is_cooling("Agent", "u1")
+        assert len(store) == 1
+        clock.now += 3
+        assert not store.is_cooling("Agent", "u1")
+    
+    def test_router_applies_cooldown_after_response(self):
+        router = Router([MockAgent("Agent", "Test", lambda m, c: 0.9)], RouterConfig(cooldown_seconds=60))
+        msg = Message(content="test", user_id="u1", chat_id="chat1")
+        context = ChatContext(chat_id="chat1")
+        
+        assert len(router.route(msg, context)) == 1
+        assert router.route(msg, context) == []
+        assert len(router.route(Message(content="test", user_id="u2", chat_id="chat1"), context)) == 1
+        assert router.get_stats()["cooldown_entries"] == 2
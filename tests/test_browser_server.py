@@ -0,0 +1,113 @@
+"""
+Tests for browser_server 导航快照缓存
+
+测试 URL 规范化、缓存容量限制，以及命中缓存时立即返回快照、后台刷新
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from browser_server import BrowserControlServer, NavSnapshotCache, normalize_url
+
+
+def _elements(n, prefix="按钮"):
+    elements = [{"ref": f"e{i}", "role": "button", "name": f"{prefix}{i}"} for i in range(1, n + 1)]
+    ref_map = {e["ref"]: {"role": "button", "name": e["name"], "tagName": "button"} for e in elements}
+    return elements, ref_map
+
+
+class TestNormalizeUrl:
+    """测试 URL 规范化"""
+
+    def test_equivalent_urls(self):
+        assert normalize_url("HTTPS://Music.Example.com:443/search/?b=2&a=1#top") == \
+            normalize_url("https://music.example.com/search?a=1&b=2")
+
+    def test_keeps_custom_port_and_path(self):
+        assert normalize_url("http://localhost:8080/a") == "http://localhost:8080/a"
+        assert normalize_url("https://example.com") == "https://example.com/"
+
+
+class TestNavSnapshotCache:
+    """测试 NavSnapshotCache"""
+
+    def test_hit_and_miss_stats(self):
+        cache = NavSnapshotCache()
+        elements, ref_map = _elements(2)
+        assert cache.get("https://a.com") is None
+        cache.put("https://a.com/", "A", elements, ref_map)
+        assert cache.get("https://A.com")["title"] == "A"
+        assert cache.get("https://a.com", interactive=True) is None
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+        assert stats["entries"] == 1
+        assert stats["bytes"] > 0
+
+    def test_ttl_expiry(self):
+        cache = NavSnapshotCache(ttl=0)
+        cache.put("https://a.com", "A", *_elements(1))
+        assert cache.get("https://a.com") is None
+        assert cache.stats()["entries"] == 0
+
+    def test_entry_limit_evicts_lru(self):
+        cache = NavSnapshotCache(max_entries=2)
+        cache.put("https://a.com", "A", *_elements(1))
+        cache.put("https://b.com", "B", *_elements(1))
+        cache.get("https://a.com")
+        cache.put("https://c.com", "C", *_elements(1))
+        assert cache.get("https://b.com") is None
+        assert cache.get("https://a.com") is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_byte_limit(self):
+        elements, ref_map = _elements(50)
+        cache = NavSnapshotCache(max_bytes=8000)
+        cache.put("https://a.com", "A", elements, ref_map)
+        cache.put("https://b.com", "B", elements, ref_map)
+        stats = cache.stats()
+        assert stats["bytes"] <= 8000
+        assert stats["entries"] == 1
+
+
+class TestCachedNavigation:
+    """测试命中缓存时立即返回快照，真实页面后台加载后刷新缓存"""
+
+    @pytest.mark.asyncio
+    async def test_second_navigation_served_from_cache(self):
+        server = BrowserControlServer()
+        server._page = MagicMock()
+        server._page.title = AsyncMock(return_value="音乐")
+        loaded = asyncio.Event()
+
+        async def goto(url):
+            await loaded.wait()
+            return {"success": True, "url": url, "title": "音乐"}
+
+        server._goto = AsyncMock(side_effect=goto)
+        server._ensure_page = AsyncMock(return_value=True)
+        first, second = _elements(3), _elements(4, prefix="新按钮")
+        server._collect_elements = AsyncMock(side_effect=[first, second])
+
+        loaded.set()
+        await server.navigate("https://music.example.com/")
+        snap = await server.snapshot()
+        assert snap["count"] == 3
+        assert "cached" not in snap
+
+        loaded.clear()
+        nav = await server.navigate("https://music.example.com")
+        assert nav["cached"] is True
+        snap = await server.snapshot()
+        assert snap["cached"] is True
+        assert snap["count"] == 3
+        assert set(server._ref_map) == {"e1", "e2", "e3"}
+
+        # 页面加载完成后刷新缓存条目
+        loaded.set()
+        assert await server._await_pending_navigation() is None
+        assert len(server.nav_cache.get("https://music.example.com")["elements"]) == 4
+        assert server.nav_cache.stats()["refreshes"] == 1
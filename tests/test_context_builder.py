@@ -5,7 +5,8 @@ import pytest
 from src.conversation.context_builder import (
     UnifiedContextBuilder,
     ContextConfig,
-    BuilderResult
+    BuilderResult,
+    PromptSections
 )
 from src.conversation.summary_service import ConversationSummaryService
 from src.conversation.proactive_strategy import ProactiveDialogueStrategyAnalyzer
@@ -309,3 +310,36 @@ class TestBuilderResult:
         assert result.messages == messages
         assert result.token_estimate == 100
         assert result.metadata["test"] == "value"
+
+
+class TestPromptSections:
+    """Test static / semi-static / dynamic prompt sections"""
+
+    @pytest.mark.asyncio
+    async def test_sections_split_by_change_frequency(self):
+        builder = UnifiedContextBuilder(config=ContextConfig(enable_history_filter=False))
+        result = await builder.build_context(
+            bot_system_prompt="你是小暖。",
+            conversation_history=[
+                {"role": "user", "content": "今天好累"},
+                {"role": "assistant", "content": "辛苦啦"},
+            ],
+            current_message="想休息",
+            user_memories=[{"event_summary": "喜欢猫", "event_date": None}],
+            dialogue_strategy="先共情",
+        )
+
+        sections = result.metadata["prompt_sections"]
+        assert sections["static"].startswith("你是小暖。")
+        assert "强制输出格式" in sections["static"]
+        assert "喜欢猫" in sections["semi_static"]
+        assert "今天好累" in sections["dynamic"] and "先共情" in sections["dynamic"]
+        # 静态部分不含任何本轮内容
+        for dynamic_text in ("喜欢猫", "今天好累", "先共情"):
+            assert dynamic_text not in sections["static"]
+
+    def test_static_part_independent_of_user(self):
+        first = PromptSections(persona="人设", json_format="格式", memories="- A", history="历史1").layered()
+        second = PromptSections(persona="人设", json_format="格式", memories="- B", strategy="策略").layered()
+        assert first["static"] == second["static"]
+        assert first["semi_static"] != second["semi_static"]
@@ -0,0 +1,164 @@
+"""
+Tests for EmbeddingBackfillJob 可断点续跑的向量补全任务
+
+测试分片与并发、过期模型重新生成、检查点续跑，以及失败分片的统计
+"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.models.database import Base, UserMemory
+from src.services.embedding_backfill import EmbeddingBackfillJob
+from src.services.embedding_codec import embedding_columns, memory_embedding
+from src.services.embedding_service import EmbeddingResult
+
+
+class FakeEmbeddingService:
+    """记录每次 embed_batch 调用与最大并发数"""
+
+    def __init__(self, model="model-v2", max_batch_size=3, fail_on=None):
+        self.provider = SimpleNamespace(model=model, max_batch_size=max_batch_size)
+        self.fail_on = fail_on
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def embed_batch(self, texts, use_cache=True):
+        self.calls.append(list(texts))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            if self.fail_on and self.fail_on in texts:
+                raise RuntimeError("provider error")
+            return [
+                EmbeddingResult(embedding=[float(len(text)), 1.0], text=text, model=self.provider.model)
+                for text in texts
+            ]
+        finally:
+            self.active -= 1
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def factory():
+        async with maker() as session:
+            yield session
+
+    yield factory
+    await engine.dispose()
+
+
+async def _add_memories(session_factory, count, **columns):
+    async with session_factory() as db:
+        for i in range(count):
+            db.add(UserMemory(user_id=1, event_summary=f"memory {i}", **columns))
+        await db.commit()
+
+
+async def _load_memories(session_factory):
+    async with session_factory() as db:
+        result = await db.execute(select(UserMemory).order_by(UserMemory.id))
+        return list(result.scalars().all())
+
+
+class TestEmbeddingBackfillJob:
+    """测试向量补全任务"""
+
+    @pytest.mark.asyncio
+    async def test_chunks_by_provider_batch_size_with_bounded_concurrency(self, session_factory):
+        await _add_memories(session_factory, 10)
+        service = FakeEmbeddingService(max_batch_size=3)
+        job = EmbeddingBackfillJob(service, session_factory=session_factory, page_size=10, concurrency=2)
+
+        report = await job.run()
+
+        assert [len(call) for call in service.calls] == [3, 3, 3, 1]
+        assert service.max_active == 2
+        assert report["processed"] == 10
+        assert report["pending"] == 0
+        for memory in await _load_memories(session_factory):
+            assert memory.embedding_model == "model-v2"
+            vector, _ = memory_embedding(memory)
+            assert vector.tolist() == [float(len(memory.event_summary)), 1.0]
+
+    @pytest.mark.asyncio
+    async def test_reembeds_rows_from_other_models(self, session_factory):
+        await _add_memories(session_factory, 2, **embedding_columns([0.0, 1.0], model="model-v2"))
+        await _add_memories(session_factory, 3, **embedding_columns([0.0, 1.0], model="model-v1"))
+        service = FakeEmbeddingService()
+        job = EmbeddingBackfillJob(service, session_factory=session_factory)
+
+        report = await job.run()
+
+        assert report["processed"] == 3
+        assert [m.embedding_model for m in await _load_memories(session_factory)] == ["model-v2"] * 5
+
+        # 只补全缺失向量时不处理旧模型的记录
+        legacy = FakeEmbeddingService(model="model-v3")
+        job = EmbeddingBackfillJob(legacy, session_factory=session_factory, reembed_stale=False)
+        assert (await job.run())["processed"] == 0
+
+    @pytest.mark.asyncio
+    async def test_resumes_from_checkpoint(self, session_factory, tmp_path):
+        await _add_memories(session_factory, 7)
+        checkpoint_path = str(tmp_path / "backfill.json")
+
+        first = FakeEmbeddingService()
+        job = EmbeddingBackfillJob(first, session_factory=session_factory, checkpoint_path=checkpoint_path, page_size=3)
+        report = await job.run(max_pages=1)  # 模拟处理一页后中断
+        assert report["processed"] == 3
+        with open(checkpoint_path, encoding="utf-8") as f:
+            assert json.load(f)["cursor"] == 3
+
+        second = FakeEmbeddingService()
+        job = EmbeddingBackfillJob(second, session_factory=session_factory, checkpoint_path=checkpoint_path, page_size=3)
+        report = await job.run()
+
+        assert [text for call in second.calls for text in call] == [f"memory {i}" for i in range(3, 7)]
+        assert report["processed"] == 7
+        assert report["pending"] == 0
+
+        # 模型变化时检查点失效，从头开始
+        third = FakeEmbeddingService(model="model-v3")
+        job = EmbeddingBackfillJob(third, session_factory=session_factory, checkpoint_path=checkpoint_path)
+        assert (await job.run())["processed"] == 7
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_retries_rows_and_skips_only_the_bad_one(self, session_factory):
+        await _add_memories(session_factory, 6)
+        service = FakeEmbeddingService(max_batch_size=3, fail_on="memory 4")
+        job = EmbeddingBackfillJob(service, session_factory=session_factory)
+
+        report = await job.run()
+
+        assert report["processed"] == 5
+        assert report["failed"] == 1
+        assert service.calls[2:] == [["memory 3"], ["memory 4"], ["memory 5"]]
+        memories = await _load_memories(session_factory)
+        assert [m.embedding_vector is not None for m in memories] == [True] * 4 + [False] + [True]
+
+    @pytest.mark.asyncio
+    async def test_bad_row_does_not_block_later_runs(self, session_factory):
+        """没有检查点时，坏摘要每次都排在最前面，不能让同分片的其它记忆永远得不到向量"""
+        await _add_memories(session_factory, 3)
+        service = FakeEmbeddingService(max_batch_size=3, fail_on="memory 0")
+        job = EmbeddingBackfillJob(service, session_factory=session_factory, page_size=3)
+
+        await job.run(max_pages=1)
+
+        memories = await _load_memories(session_factory)
+        assert [m.embedding_vector is not None for m in memories] == [False, True, True]
@@ -0,0 +1,95 @@
+"""
+Tests for embedding_codec 记忆向量二进制存储
+
+测试各格式的编码解码、零拷贝读取、JSON 回退，以及 JSON → 二进制的批量迁移
+"""
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import Session
+
+from src.models.database import Base, UserMemory
+from src.services.embedding_codec import (
+    decode_embedding,
+    embedding_columns,
+    encode_embedding,
+    memory_embedding,
+    migrate_json_embeddings,
+    missing_embedding_clause,
+)
+
+
+@pytest.fixture
+def vector():
+    return np.random.default_rng(0).normal(size=256).astype(np.float32).tolist()
+
+
+class TestCodec:
+    """测试编码与解码"""
+
+    @pytest.mark.parametrize("fmt,size,tolerance", [
+        ("float32", 4, 0), ("float16", 2, 1e-2), ("int8", 1, 5e-2),
+    ])
+    def test_round_trip(self, vector, fmt, size, tolerance):
+        blob = encode_embedding(vector, fmt)
+        decoded = decode_embedding(blob, fmt)
+
+        assert len(blob) == len(vector) * size + (4 if fmt == "int8" else 0)
+        assert decoded.dtype == np.float32
+        np.testing.assert_allclose(decoded, vector, atol=tolerance * np.max(np.abs(vector)))
+
+    def test_float32_decode_is_zero_copy(self, vector):
+        blob = encode_embedding(vector)
+        decoded = decode_embedding(blob)
+        assert not decoded.flags.owndata
+        assert not decoded.flags.writeable
+
+    def test_columns_store_dim_and_norm(self, vector):
+        columns = embedding_columns(vector, model="m", fmt="float16")
+        assert columns["embedding_dim"] == 256
+        assert columns["embedding_model"] == "m"
+        decoded = decode_embedding(columns["embedding_vector"], "float16")
+        assert columns["embedding_norm"] == pytest.approx(float(np.linalg.norm(decoded)))
+        assert embedding_columns(None) == {}
+
+    def test_memory_embedding_falls_back_to_json(self, vector):
+        binary = UserMemory(**embedding_columns(vector, fmt="float32"))
+        legacy = UserMemory(embedding=vector)
+
+        for memory in (binary, legacy):
+            decoded, norm = memory_embedding(memory)
+            np.testing.assert_allclose(decoded, vector, rtol=1e-6)
+            assert norm == pytest.approx(float(np.linalg.norm(vector)), rel=1e-5)
+        assert memory_embedding(UserMemory()) is None
+
+
+class TestMigration:
+    """测试 JSON 向量批量迁移"""
+
+    def test_migrates_in_batches_and_reports_savings(self, vector):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        with Session(engine) as db:
+            for i in range(5):
+                db.add(UserMemory(user_id=1, event_summary=f"m{i}", embedding=vector))
+            db.add(UserMemory(user_id=1, event_summary="empty", embedding=None))  # 存为 JSON null
+            db.commit()
+
+            stats = migrate_json_embeddings(db, batch_size=2, fmt="float32")
+
+            assert stats["converted"] == 5
+            assert stats["cleared"] == 1
+            assert stats["binary_bytes"] == 5 * 256 * 4
+            assert stats["binary_bytes"] < stats["json_bytes"] / 2
+
+            memories = db.execute(select(UserMemory).order_by(UserMemory.id)).scalars().all()
+            for memory in memories[:5]:
+                assert memory.embedding is None
+                np.testing.assert_allclose(memory_embedding(memory)[0], vector, rtol=1e-6)
+            # JSON null 规范化为 SQL NULL，补全任务可以识别
+            assert db.execute(text("SELECT embedding IS NULL FROM user_memories WHERE id = 6")).scalar() == 1
+            missing = db.execute(select(UserMemory.id).where(missing_embedding_clause())).scalars().all()
+            assert missing == [6]
+
+            # 重复执行不会重复转换
+            assert migrate_json_embeddings(db, batch_size=2)["converted"] == 0
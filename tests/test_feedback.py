@@ -553,6 +553,134 @@ class TestFeedbackService:
         assert trending[0]['emoji'] == "👍"
 
 
+class TestFeedbackRollup:
+    """Tests for incremental hourly feedback rollups"""
+
+    @staticmethod
+    def _buckets(db_session):
+        return db_session.query(FeedbackSummary).filter(FeedbackSummary.period_type == "hourly").all()
+
+    def test_service_writes_maintain_buckets(self, db_session, test_user, test_bot):
+        from src.services.feedback_service import FeedbackService
+
+        service = FeedbackService(db_session)
+        service.add_reaction(test_user.id, 1, -100, "👍", bot_id=test_bot.id)
+        service.add_reaction(test_user.id, 2, -100, "👎", bot_id=test_bot.id)
+        service.add_reaction(test_user.id, 2, -100, "❤️", bot_id=test_bot.id)  # 替换 👎
+        service.add_reaction(test_user.id, 3, -100, "🔥", bot_id=test_bot.id)
+        service.remove_reaction(test_user.id, 3, -100)
+        service.record_interaction(test_user.id, 1, -100, InteractionType.COPY.value, bot_id=test_bot.id)
+
+        buckets = self._buckets(db_session)
+        assert len(buckets) == 1
+        bucket = buckets[0]
+        assert bucket.total_reactions == 2
+        assert bucket.positive_reactions == 2
+        assert bucket.negative_reactions == 0
+        assert bucket.reaction_breakdown == {"👍": 1, "❤️": 1}
+        assert bucket.copy_count == 1
+        assert bucket.satisfaction_score == 100
+
+        stats = service.get_bot_feedback_stats(test_bot.id)
+        assert stats["reactions"]["breakdown"] == {"positive": 2}
+        assert stats["interactions"]["breakdown"] == {InteractionType.COPY.value: 1}
+        assert stats["scores"]["satisfaction"] == 100
+
+    def test_daily_summary_and_backfill_match_raw_data(self, db_session, test_user, test_bot):
+        from src.services.feedback_service import FeedbackService
+
+        service = FeedbackService(db_session)
+        for i in range(3):
+            service.add_reaction(test_user.id, 10 + i, -100, "👍", bot_id=test_bot.id)
+        service.add_reaction(test_user.id, 20, -100, "😢", bot_id=test_bot.id)
+        service.record_interaction(test_user.id, 10, -100, InteractionType.REPLY.value, bot_id=test_bot.id)
+
+        # 历史数据：直接写入、未经过增量统计的记录
+        yesterday = datetime.utcnow() - timedelta(days=1)
+        db_session.add(MessageReaction(
+            user_id=test_user.id, message_id=30, chat_id=-100, reaction_emoji="👎",
+            reaction_type="negative", bot_id=test_bot.id, created_at=yesterday
+        ))
+        db_session.commit()
+
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        summary = service.generate_feedback_summary("daily", today, bot_id=test_bot.id)
+        assert summary.total_reactions == 4
+        assert summary.positive_reactions == 3
+        assert summary.neutral_reactions == 1
+        assert summary.reply_count == 1
+        assert summary.satisfaction_score == 100
+
+        before = {(b.period_start, b.total_reactions, b.total_interactions) for b in self._buckets(db_session)}
+        assert service.rebuild_rollups() == 2
+        after = {(b.period_start, b.total_reactions, b.total_interactions) for b in self._buckets(db_session)}
+        assert before < after
+        assert (yesterday.replace(minute=0, second=0, microsecond=0), 1, 0) in after
+
+        hourly = service.generate_feedback_summary("hourly", datetime.utcnow(), bot_id=test_bot.id)
+        assert hourly.total_reactions == 4
+
+    def test_concurrent_deltas_are_not_lost(self, tmp_path):
+        from src.services.feedback_rollup import RollupDelta, apply_rollup_deltas
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'rollup.db'}")
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        created_at = datetime.utcnow()
+
+        def delta(emoji):
+            d = RollupDelta()
+            d.add_reaction(None, None, created_at, emoji)
+            return d
+
+        first, second = Session(), Session()
+        apply_rollup_deltas(first, delta("👍"))
+        first.commit()
+        # second 持有该桶的旧快照，期间另一个会话完成了写入
+        stale = second.query(FeedbackSummary).one()
+        apply_rollup_deltas(first, delta("👎"))
+        first.commit()
+        apply_rollup_deltas(second, delta("👍"))
+        second.commit()
+
+        assert stale.total_reactions == 3
+        bucket = Session().query(FeedbackSummary).one()
+        assert bucket.total_reactions == 3
+        assert bucket.positive_reactions == 2
+        assert bucket.negative_reactions == 1
+        assert bucket.reaction_breakdown == {"👍": 2, "👎": 1}
+        assert bucket.satisfaction_score == 66
+        first.close()
+        second.close()
+        engine.dispose()
+
+    def test_bucket_unique_with_null_dimensions(self, db_session):
+        from sqlalchemy.exc import IntegrityError
+        from src.services.feedback_rollup import bucket_start, new_bucket
+
+        key = (None, None, bucket_start(datetime.utcnow()))
+        db_session.add(new_bucket(key))
+        db_session.commit()
+        db_session.add(new_bucket(key))
+        with pytest.raises(IntegrityError):
+            db_session.commit()
+        db_session.rollback()
+
+    def test_backfill_with_mid_hour_end_rebuilds_whole_bucket(self, db_session, test_user, test_bot):
+        from src.services.feedback_rollup import backfill_rollups, bucket_start
+
+        hour = bucket_start(datetime.utcnow() - timedelta(hours=2))
+        for message_id, minute in ((1, 10), (2, 40)):
+            db_session.add(MessageReaction(
+                user_id=test_user.id, message_id=message_id, chat_id=-100, reaction_emoji="👍",
+                reaction_type="positive", bot_id=test_bot.id, created_at=hour + timedelta(minutes=minute)
+            ))
+        db_session.commit()
+
+        assert backfill_rollups(db_session, end=hour + timedelta(minutes=20)) == 1
+        assert [b.total_reactions for b in self._buckets(db_session)] == [2]
+
+
 class TestFeedbackHandlers:
     """Tests for feedback handlers"""
     
@@ -573,3 +701,189 @@ class TestFeedbackHandlers:
         assert handle_pinned_message is not None
         assert feedback_stats_command is not None
         assert my_feedback_command is not None
+
+    @pytest.mark.asyncio
+    async def test_feedback_stats_command_replies_with_stats(self, db_session, test_user):
+        """/feedback_stats 汇总近 30 天数据并回复统计信息"""
+        pytest.importorskip("dateutil")
+        from unittest.mock import AsyncMock
+        from src.handlers import feedback as feedback_handlers
+        from src.services.feedback_service import FeedbackService
+
+        FeedbackService(db_session).add_reaction(
+            user_id=test_user.id, message_id=1, chat_id=-100, reaction_emoji="👍"
+        )
+
+        message = MagicMock()
+        message.chat.id = -100
+        message.chat.type = "group"
+        message.chat.title = "Test Group"
+        message.chat.username = None
+        message.reply_text = AsyncMock()
+        update = MagicMock(message=message)
+        update.effective_user.id = test_user.telegram_id
+
+        with patch.object(feedback_handlers, "get_db_session", return_value=db_session):
+            await feedback_handlers.feedback_stats_command(update, MagicMock())
+
+        reply = message.reply_text.await_args.args[0]
+        assert reply.startswith("📊 **反馈统计**")
+        assert "👍: 1次" in reply
+
+
+class TestFeedbackIngestion:
+    """Tests for the async feedback ingestion queue"""
+
+    @pytest.fixture
+    def session_factory(self):
+        """Async in-memory database shared across sessions (call ``await factory.create()`` first)"""
+        from contextlib import asynccontextmanager
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+        from sqlalchemy.pool import StaticPool
+
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+
+        async def _create():
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+
+        maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+        @asynccontextmanager
+        async def factory():
+            async with maker() as session:
+                yield session
+
+        factory.engine = engine
+        factory.create = _create
+        return factory
+
+    @staticmethod
+    def _event(kind, emoji=None, message_id=1, user=111, chat=-100, **kwargs):
+        from src.services.feedback_ingestion import FeedbackEvent
+        return FeedbackEvent(
+            kind=kind, telegram_user_id=user, chat_id=chat, message_id=message_id,
+            chat_type="group", emoji=emoji, **kwargs
+        )
+
+    @staticmethod
+    async def _reactions(factory):
+        from sqlalchemy import select
+        async with factory() as db:
+            result = await db.execute(select(MessageReaction).order_by(MessageReaction.id))
+            return list(result.scalars())
+
+    @pytest.mark.asyncio
+    async def test_batch_write_matches_service_semantics(self, session_factory):
+        from src.services.feedback_ingestion import (
+            FeedbackIngestionQueue, INTERACTION, REACTION_ADD, REACTION_REMOVE,
+        )
+        await session_factory.create()
+        queue = FeedbackIngestionQueue(session_factory=session_factory)
+
+        await queue.write([
+            self._event(REACTION_ADD, "👍"),
+            self._event(REACTION_ADD, "👍"),           # 重复添加不产生新记录
+            self._event(REACTION_ADD, "🔥", message_id=2),
+            self._event(REACTION_REMOVE, "🔥", message_id=2),
+            self._event(INTERACTION, interaction_type=InteractionType.REPLY.value,
+                        metadata={"reply_message_id": 9}),
+        ])
+        # 下一批替换数据库中已有的活跃反应
+        await queue.write([self._event(REACTION_ADD, "❤️")])
+
+        reactions = await self._reactions(session_factory)
+        assert [(r.reaction_emoji, r.is_active) for r in reactions] == [
+            ("👍", False), ("🔥", False), ("❤️", True),
+        ]
+        assert reactions[2].reaction_type == "positive"
+        assert all(r.channel_id is not None for r in reactions)
+        assert reactions[0].removed_at is not None and reactions[1].removed_at is not None
+
+        from sqlalchemy import func, select
+        async with session_factory() as db:
+            interactions = (await db.execute(select(MessageInteraction))).scalars().all()
+            users = await db.scalar(select(func.count(User.id)))
+        assert len(interactions) == 1
+        assert interactions[0].extra_data == {"reply_message_id": 9}
+        assert users == 1
+
+        async with session_factory() as db:
+            buckets = (await db.execute(
+                select(FeedbackSummary).where(FeedbackSummary.period_type == "hourly")
+            )).scalars().all()
+        assert len(buckets) == 1
+        assert buckets[0].total_reactions == 1
+        assert buckets[0].reaction_breakdown == {"❤️": 1}
+        assert buckets[0].reply_count == 1
+
+    @pytest.mark.asyncio
+    async def test_queue_backpressure_and_flush_on_stop(self, session_factory):
+        from src.services.feedback_ingestion import FeedbackIngestionQueue, REACTION_ADD
+        await session_factory.create()
+        queue = FeedbackIngestionQueue(max_size=3, batch_size=10, flush_interval=0.05,
+                                       session_factory=session_factory)
+        assert queue.enqueue(self._event(REACTION_ADD, "👍")) is False  # 未启动
+
+        await queue.start()
+        accepted = [queue.enqueue(self._event(REACTION_ADD, "👍", message_id=i)) for i in range(5)]
+        await queue.stop()
+
+        stats = queue.get_stats()
+        assert accepted == [True, True, True, False, False]
+        assert stats["dropped"] == 2
+        assert stats["high_watermark"] == 3
+        assert stats["written"] == 3
+        assert stats["queue_size"] == 0
+        assert len(await self._reactions(session_factory)) == 3
+
+    @pytest.mark.asyncio
+    async def test_concurrently_created_user_does_not_fail_batch(self, session_factory):
+        from sqlalchemy import func, insert, select
+        from src.services.feedback_ingestion import FeedbackIngestionQueue, REACTION_ADD
+        await session_factory.create()
+        queue = FeedbackIngestionQueue(session_factory=session_factory)
+
+        # 同步路径在批量查询之后、插入之前创建了同一用户
+        original = queue._resolve_users
+
+        async def resolve_with_concurrent_insert(db, telegram_ids):
+            execute = db.execute
+
+            async def execute_then_race(statement, *args, **kwargs):
+                result = await execute(statement, *args, **kwargs)
+                db.execute = execute
+                await execute(insert(User).values(telegram_id=111, subscription_tier="free", is_active=True))
+                return result
+
+            db.execute = execute_then_race
+            return await original(db, telegram_ids)
+
+        queue._resolve_users = resolve_with_concurrent_insert
+        await queue.write([self._event(REACTION_ADD, "👍")])
+
+        async with session_factory() as db:
+            users = await db.scalar(select(func.count(User.id)))
+        assert users == 1
+        assert len(await self._reactions(session_factory)) == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_retries_events_individually(self, session_factory):
+        from src.services.feedback_ingestion import FeedbackIngestionQueue, REACTION_ADD
+        await session_factory.create()
+        queue = FeedbackIngestionQueue(session_factory=session_factory)
+
+        original = queue._apply
+
+        async def apply_rejecting_poison(db, events):
+            if any(e.message_id == 2 for e in events):
+                raise RuntimeError("poison event")
+            await original(db, events)
+
+        queue._apply = apply_rejecting_poison
+        await queue._flush([self._event(REACTION_ADD, "👍", message_id=i) for i in range(1, 4)])
+
+        stats = queue.get_stats()
+        assert stats["written"] == 2
+        assert stats["failed"] == 1
+        assert sorted(r.message_id for r in await self._reactions(session_factory)) == [1, 3]
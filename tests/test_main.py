@@ -0,0 +1,123 @@
+"""
+Tests for MultiBotLauncher 关闭流程
+
+信号只设置 _shutdown_event；start_all() 返回前必须停止共享服务，
+写入反馈队列与记忆访问计数缓冲中剩余的数据，并关闭搜索服务的连接池
+"""
+import asyncio
+import sys
+from contextlib import ExitStack, asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+pytest.importorskip("dateutil")
+
+
+def _patch_launcher(stack, main, launcher, run, **services):
+    """
+    替换 main 中的共享服务与 Bot 运行函数
+
+    Args:
+        run: 代替 run_single_bot / run_webhook_mode 的协程函数
+        services: 覆盖默认 AsyncMock 的 main 属性（如 stop_feedback_ingestion）
+    """
+    names = (
+        "init_async_db", "start_reminder_scheduler", "stop_reminder_scheduler",
+        "start_task_queue", "stop_task_queue",
+        "start_memory_access_tracker", "stop_memory_access_tracker",
+        "start_feedback_ingestion", "stop_feedback_ingestion",
+    )
+    for name in names:
+        stack.enter_context(patch.object(main, name, services.get(name, AsyncMock())))
+    stack.enter_context(patch.object(main, "get_session_manager", MagicMock()))
+    stack.enter_context(patch.object(main, "SharedHTTPXRequest", MagicMock()))
+    stack.enter_context(patch.object(
+        launcher, "load_bots_from_db", AsyncMock(return_value=[SimpleNamespace(id=1, bot_username="a")])
+    ))
+    stack.enter_context(patch.object(launcher, "run_single_bot", run))
+    stack.enter_context(patch.object(launcher, "run_webhook_mode", run))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["polling", "webhook"])
+async def test_shutdown_signal_flushes_feedback_events(mode):
+    import main
+    from src.services.feedback_ingestion import FeedbackEvent, FeedbackIngestionQueue, REACTION_ADD
+
+    ingestion = FeedbackIngestionQueue(flush_interval=0.05, session_factory=MagicMock())
+    ingestion.write = AsyncMock()
+    launcher = main.MultiBotLauncher(mode=mode)
+    launcher.config_loader = MagicMock()
+
+    async def run_until_signal(*args):
+        # 运行中收到一条反馈，随后收到停止信号
+        ingestion.enqueue(FeedbackEvent(kind=REACTION_ADD, telegram_user_id=1, chat_id=-100,
+                                        message_id=1, emoji="👍"))
+        launcher._shutdown_event.set()
+        await launcher._shutdown_event.wait()
+
+    stop_memory_access_tracker = AsyncMock()
+    serp_close = AsyncMock()
+    serp_module = SimpleNamespace(serp_api_service=SimpleNamespace(close=serp_close))
+    with ExitStack() as stack:
+        _patch_launcher(
+            stack, main, launcher, run_until_signal,
+            start_feedback_ingestion=ingestion.start,
+            stop_feedback_ingestion=ingestion.stop,
+            stop_memory_access_tracker=stop_memory_access_tracker,
+        )
+        stack.enter_context(patch.dict(sys.modules, {"src.services.serp_api_service": serp_module}))
+        try:
+            await asyncio.wait_for(launcher.start_all(), timeout=5)
+            stats = ingestion.get_stats()
+        finally:
+            await ingestion.stop()
+
+    assert stats["running"] is False
+    assert stats["written"] == 1
+    ingestion.write.assert_awaited_once()
+    stop_memory_access_tracker.assert_awaited_once()
+    serp_close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_shutdown_signal_flushes_memory_access_counts():
+    import main
+    from src.services.memory_access_tracker import MemoryAccessTracker
+
+    db = AsyncMock()
+
+    @asynccontextmanager
+    async def session_factory():
+        yield db
+
+    # 定时写入间隔远大于测试时长：计数只能由停止流程写入
+    tracker = MemoryAccessTracker(flush_interval=60, session_factory=session_factory)
+    launcher = main.MultiBotLauncher(mode="polling")
+    launcher.config_loader = MagicMock()
+
+    async def run_until_signal(*args):
+        tracker.record([7, 7, 8])
+        launcher._shutdown_event.set()
+        await launcher._shutdown_event.wait()
+
+    with ExitStack() as stack:
+        _patch_launcher(
+            stack, main, launcher, run_until_signal,
+            start_memory_access_tracker=tracker.start,
+            stop_memory_access_tracker=tracker.stop,
+        )
+        try:
+            await asyncio.wait_for(launcher.start_all(), timeout=5)
+            stats = tracker.get_stats()
+        finally:
+            await tracker.stop()
+
+    assert stats["running"] is False
+    assert stats["pending"] == 0
+    assert stats["written_rows"] == 2
+    params = db.execute.await_args.args[1]
+    assert {p["memory_id"]: p["increment"] for p in params} == {7: 2, 8: 1}
+    db.commit.assert_awaited_once()
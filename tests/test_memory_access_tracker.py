@@ -0,0 +1,123 @@
+"""
+Tests for MemoryAccessTracker 记忆访问计数缓冲
+
+测试访问计数的合并、按阈值与定时写入、停止时写入剩余计数，以及失败后重试
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.models.database import Base, UserMemory
+from src.services.memory_access_tracker import MemoryAccessTracker, write_memory_access
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def factory():
+        async with maker() as session:
+            yield session
+
+    async with factory() as db:
+        for i in range(3):
+            db.add(UserMemory(user_id=1, event_summary=f"memory {i}", access_count=0))
+        await db.commit()
+
+    yield factory
+    await engine.dispose()
+
+
+async def _access(session_factory):
+    async with session_factory() as db:
+        result = await db.execute(
+            select(UserMemory.id, UserMemory.access_count, UserMemory.last_accessed_at).order_by(UserMemory.id)
+        )
+        return {row.id: (row.access_count, row.last_accessed_at) for row in result}
+
+
+class TestMemoryAccessTracker:
+    """测试访问计数缓冲"""
+
+    @pytest.mark.asyncio
+    async def test_coalesces_and_flushes_on_stop(self, session_factory):
+        tracker = MemoryAccessTracker(flush_interval=60, session_factory=session_factory)
+        await tracker.start()
+        first, last = datetime(2026, 1, 1, 8), datetime(2026, 1, 1, 9)
+        tracker.record([1, 2], accessed_at=first)
+        tracker.record([1], accessed_at=last)
+
+        assert tracker.get_stats()["pending"] == 2
+        assert (await _access(session_factory))[1][0] == 0  # 读路径上没有写入
+
+        await tracker.stop()
+
+        access = await _access(session_factory)
+        assert access[1] == (2, last)
+        assert access[2] == (1, first)
+        assert access[3] == (0, None)
+        assert tracker.get_stats()["flushes"] == 1
+
+    @pytest.mark.asyncio
+    async def test_flushes_when_max_pending_reached(self, session_factory):
+        tracker = MemoryAccessTracker(flush_interval=60, max_pending=2, session_factory=session_factory)
+        await tracker.start()
+        try:
+            tracker.record([1])
+            await asyncio.sleep(0.05)
+            assert tracker.get_stats()["flushes"] == 0
+
+            tracker.record([2])
+            for _ in range(50):
+                if tracker.get_stats()["flushes"]:
+                    break
+                await asyncio.sleep(0.01)
+            assert tracker.get_stats()["flushes"] == 1
+            assert (await _access(session_factory))[2][0] == 1
+        finally:
+            await tracker.stop()
+
+    @pytest.mark.asyncio
+    async def test_periodic_flush(self, session_factory):
+        tracker = MemoryAccessTracker(flush_interval=0.05, session_factory=session_factory)
+        await tracker.start()
+        try:
+            tracker.record([3])
+            await asyncio.sleep(0.2)
+            assert (await _access(session_factory))[3][0] == 1
+        finally:
+            await tracker.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_counts(self, session_factory):
+        @asynccontextmanager
+        async def broken_factory():
+            raise RuntimeError("database unavailable")
+            yield
+
+        tracker = MemoryAccessTracker(session_factory=broken_factory)
+        tracker.record([1, 1])
+        assert await tracker.flush() == 0
+        tracker.record([1])
+
+        tracker._session_factory = session_factory
+        assert await tracker.flush() == 1
+        assert (await _access(session_factory))[1][0] == 3
+
+    @pytest.mark.asyncio
+    async def test_write_memory_access_without_tracker(self, session_factory):
+        async with session_factory() as db:
+            await write_memory_access(db, [1, 2])
+        access = await _access(session_factory)
+        assert access[1][0] == 1 and access[2][0] == 1
+        assert access[1][1] is not None
@@ -0,0 +1,186 @@
+"""
+Tests for MemoryLexicalIndex 记忆倒排索引与混合排序
+
+测试二元组切分、BM25 打分、增量更新、按用户 LRU 淘汰，以及检索中的融合排序与快速路径
+"""
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.models.database import Base, UserMemory
+from src.services.embedding_codec import embedding_columns
+from src.services.memory_lexical_index import (
+    MemoryLexicalIndex,
+    UserLexicalIndex,
+    hybrid_score,
+    tokenize,
+)
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def factory():
+        async with maker() as session:
+            yield session
+
+    now = datetime.utcnow()
+    async with factory() as db:
+        db.add_all([
+            UserMemory(user_id=1, event_summary="喜欢吃火锅", keywords=["火锅"], importance="medium",
+                       created_at=now, **embedding_columns([1.0, 0.0], model="m")),
+            UserMemory(user_id=1, event_summary="好朋友小林下周结婚", keywords=["小林", "婚礼"], importance="high",
+                       created_at=now - timedelta(days=10), **embedding_columns([0.0, 1.0], model="m")),
+            UserMemory(user_id=1, event_summary="在准备考研", keywords=["考研"], importance="high",
+                       created_at=now - timedelta(days=20)),
+            UserMemory(user_id=2, event_summary="小林是同事", keywords=["小林"], importance="medium", created_at=now),
+        ])
+        await db.commit()
+
+    yield factory
+    await engine.dispose()
+
+
+class TestTokenize:
+    """测试切分"""
+
+    def test_chinese_bigrams_and_ascii_words(self):
+        assert tokenize("小林结婚 Happy Day") == ["小林", "林结", "结婚", "happy", "day"]
+        assert tokenize("猫") == ["猫"]
+        assert tokenize("！？") == []
+
+
+class TestUserLexicalIndex:
+    """测试单用户 BM25 索引"""
+
+    def test_ranks_exact_entity_first(self):
+        index = UserLexicalIndex()
+        index.add(1, "小林下周结婚")
+        index.add(2, "下周要出差")
+        index.add(3, "喜欢吃火锅")
+
+        scores = index.search("小林什么时候结婚")
+        assert list(scores) == [1]
+        assert 0.0 < scores[1] < 1.0
+        assert set(index.search("下周")) == {1, 2}
+        assert index.search("火锅")[3] == 1.0
+        assert index.search("天气") == {}
+
+    def test_scores_are_normalized_by_query_idf(self):
+        index = UserLexicalIndex()
+        for memory_id, text in enumerate(["用户今天去公园散步", "今天加班到很晚", "小林下周结婚 小林 婚礼"]):
+            index.add(memory_id, text)
+
+        # 只共享一个常见二元组的闲聊不是强命中（分数不再恒为 1.0）
+        assert max(index.search("今天好累啊").values()) < 0.2
+        # 覆盖查询大部分信息量的实体命中分数更高
+        assert index.search("小林的婚礼")[2] > 0.3
+        assert index.search("小林的婚礼")[2] > index.search("小林的婚礼我该送什么")[2]
+
+    def test_add_replaces_and_remove_cleans_postings(self):
+        index = UserLexicalIndex()
+        index.add(1, "小林结婚")
+        index.add(1, "火锅")
+        assert index.search("结婚") == {}
+        assert list(index.search("火锅")) == [1]
+
+        index.remove(1)
+        assert len(index) == 0
+        assert index.postings == {}
+        assert index.total_length == 0
+
+
+class TestMemoryLexicalIndex:
+    """测试按用户的索引集合"""
+
+    @pytest.mark.asyncio
+    async def test_builds_per_user_index_and_updates_on_insert(self, session_factory):
+        index = MemoryLexicalIndex()
+        async with session_factory() as db:
+            await index.ensure_user(db, 1)
+
+        assert list(index.search(1, "小林")) == [2]  # 不包含其他用户的记忆
+        assert index.search(2, "小林") == {}  # 用户 2 尚未加载
+
+        index.add_memory(1, 99, "下个月去日本旅行", ["日本"])
+        assert list(index.search(1, "去日本")) == [99]
+        index.remove_memory(99)
+        assert index.search(1, "去日本") == {}
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, session_factory):
+        index = MemoryLexicalIndex(max_users=1)
+        async with session_factory() as db:
+            await index.ensure_user(db, 1)
+            await index.ensure_user(db, 2)
+        assert 1 not in index
+        assert 2 in index
+
+
+def test_hybrid_score_combines_signals():
+    now = datetime(2026, 1, 31)
+    weights = {"vector": 0.6, "lexical": 0.25, "importance": 0.1, "recency": 0.05}
+    score = hybrid_score(0.5, 1.0, "critical", now - timedelta(days=30), now, weights, half_life_days=30)
+    assert score == pytest.approx(0.6 * 0.5 + 0.25 + 0.1 + 0.05 * 0.5)
+    assert hybrid_score(None, 0.0, "low", None, now, weights, half_life_days=30) == 0.0
+
+
+class TestHybridRetrieval:
+    """测试 ConversationMemoryService 的混合检索"""
+
+    @pytest.fixture
+    def service_cls(self):
+        pytest.importorskip("dateutil")
+        from src.services.conversation_memory_service import ConversationMemoryService
+        return ConversationMemoryService
+
+    @pytest.mark.asyncio
+    async def test_lexical_hit_is_fused_with_vector_results(self, session_factory, service_cls):
+        async def embed_text(text):
+            return SimpleNamespace(embedding=[1.0, 0.0], model="m")
+
+        embedding_service = SimpleNamespace(provider=object(), embed_text=embed_text)
+        async with session_factory() as db:
+            service = service_cls(db, embedding_service=embedding_service, lexical_index=MemoryLexicalIndex())
+            memories = await service.retrieve_memories(user_id=1, current_message="小林的婚礼")
+
+        # 向量只命中「火锅」；「小林」的记忆与没有向量的记忆由倒排索引召回
+        assert [m.event_summary for m in memories] == ["喜欢吃火锅", "好朋友小林下周结婚"]
+
+    @pytest.mark.asyncio
+    async def test_lexical_fast_path_when_embedding_fails(self, session_factory, service_cls):
+        async def embed_text(text):
+            raise RuntimeError("provider down")
+
+        embedding_service = SimpleNamespace(provider=object(), embed_text=embed_text)
+        async with session_factory() as db:
+            service = service_cls(db, embedding_service=embedding_service, lexical_index=MemoryLexicalIndex())
+            memories = await service.retrieve_memories(user_id=1, current_message="考研准备得怎么样")
+
+        assert [m.event_summary for m in memories] == ["在准备考研"]
+
+    @pytest.mark.asyncio
+    async def test_weak_lexical_match_falls_back_to_metadata(self, session_factory, service_cls):
+        async def embed_text(text):
+            raise RuntimeError("provider down")
+
+        embedding_service = SimpleNamespace(provider=object(), embed_text=embed_text)
+        async with session_factory() as db:
+            service = service_cls(db, embedding_service=embedding_service, lexical_index=MemoryLexicalIndex())
+            assert max(service.lexical_index.search(1, "准备好了吗").values(), default=0.0) == 0.0
+            await service.lexical_index.ensure_user(db, 1)
+            assert 0.0 < service.lexical_index.search(1, "准备好了吗")[3] < service.lexical_min_score
+            memories = await service.retrieve_memories(user_id=1, current_message="准备好了吗")
+
+        # 弱命中不走倒排索引快速路径，由元数据回退按重要性返回
+        assert [m.event_summary for m in memories][:2] == ["好朋友小林下周结婚", "在准备考研"]
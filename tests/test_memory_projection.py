@@ -0,0 +1,136 @@
+"""
+Tests for 记忆检索的列投影与 SQL 预过滤
+
+测试 MemoryRecord、重要性排序、预过滤条件，以及 ConversationMemoryService 的投影检索
+"""
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.models.database import Base, UserMemory
+from src.services.embedding_codec import embedding_columns
+from src.services.memory_lexical_index import MemoryLexicalIndex
+from src.services.memory_projection import (
+    MEMORY_RECORD_COLUMNS,
+    MemoryRecord,
+    importance_rank,
+    memory_filters,
+)
+
+NOW = datetime(2026, 6, 1)
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def factory():
+        async with maker() as session:
+            yield session
+
+    async with factory() as db:
+        db.add_all([
+            UserMemory(user_id=1, event_summary="喜欢猫", importance="medium", event_type="preference",
+                       created_at=NOW - timedelta(days=2), user_message="x" * 1000,
+                       **embedding_columns([1.0, 0.0], model="m")),
+            UserMemory(user_id=1, event_summary="生日是3月5日", importance="critical", event_type="birthday",
+                       event_date=datetime(2000, 3, 5), created_at=NOW - timedelta(days=400),
+                       **embedding_columns([0.9, 0.1], model="m")),
+            UserMemory(user_id=1, event_summary="今天吃了面", importance="low", event_type="other",
+                       created_at=NOW - timedelta(days=1), **embedding_columns([0.8, 0.2], model="m")),
+            UserMemory(user_id=1, event_summary="旧模型的记忆", importance="high", event_type="other",
+                       created_at=NOW - timedelta(days=500), **embedding_columns([1.0, 0.0, 0.0], model="old")),
+            UserMemory(user_id=1, event_summary="去年换了工作", importance="medium", event_type="life_event",
+                       created_at=NOW - timedelta(days=300), **embedding_columns([0.0, 1.0], model="m")),
+            UserMemory(user_id=2, event_summary="其他用户", importance="critical", created_at=NOW,
+                       **embedding_columns([1.0, 0.0], model="m")),
+        ])
+        await db.commit()
+
+    yield factory
+    await engine.dispose()
+
+
+async def _summaries(session_factory, **filters):
+    async with session_factory() as db:
+        result = await db.execute(
+            select(*MEMORY_RECORD_COLUMNS)
+            .where(and_(*memory_filters(1, now=NOW, **filters)))
+            .order_by(importance_rank().desc(), UserMemory.created_at.desc())
+        )
+        return [MemoryRecord.from_row(row).event_summary for row in result.all()]
+
+
+class TestMemoryProjection:
+    """测试投影查询与预过滤"""
+
+    @pytest.mark.asyncio
+    async def test_orders_by_importance_rank(self, session_factory):
+        assert await _summaries(session_factory) == [
+            "生日是3月5日", "旧模型的记忆", "喜欢猫", "去年换了工作", "今天吃了面",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_min_importance_and_max_age(self, session_factory):
+        assert await _summaries(session_factory, min_importance="medium") == [
+            "生日是3月5日", "旧模型的记忆", "喜欢猫", "去年换了工作",
+        ]
+        # high / critical 记忆不受时间范围限制
+        assert await _summaries(session_factory, max_age_days=30) == [
+            "生日是3月5日", "旧模型的记忆", "喜欢猫", "今天吃了面",
+        ]
+
+    def test_record_is_slotted_and_converts_to_context_dict(self):
+        record = MemoryRecord(1, "生日是3月5日", "birthday", datetime(2000, 3, 5), ["生日"], "critical")
+        assert not hasattr(record, "__dict__")
+        assert record.to_context_dict() == {
+            "event_summary": "生日是3月5日",
+            "event_date": "2000-03-05",
+            "event_type": "birthday",
+            "keywords": ["生日"],
+        }
+
+
+class TestServiceRetrieval:
+    """测试 ConversationMemoryService 的投影检索"""
+
+    @pytest.fixture
+    def service_cls(self):
+        pytest.importorskip("dateutil")
+        from src.services.conversation_memory_service import ConversationMemoryService
+        return ConversationMemoryService
+
+    @pytest.mark.asyncio
+    async def test_vector_search_caps_candidates_and_returns_records(self, session_factory, service_cls):
+        async def embed_text(text):
+            return SimpleNamespace(embedding=[1.0, 0.0], model="m")
+
+        embedding_service = SimpleNamespace(provider=object(), embed_text=embed_text)
+        async with session_factory() as db:
+            service = service_cls(
+                db, embedding_service=embedding_service, candidate_limit=3, lexical_index=MemoryLexicalIndex()
+            )
+            memories = await service.retrieve_memories(user_id=1, current_message="我喜欢什么")
+
+        # 维度不同的旧向量在 SQL 中被过滤；候选集按重要性截取前 3 条，
+        # 低重要性的「今天吃了面」虽然相似但不在候选集中
+        assert {m.event_summary for m in memories} == {"喜欢猫", "生日是3月5日"}
+        assert all(isinstance(m, MemoryRecord) for m in memories)
+        assert memories[0].score > memories[1].score
+
+    @pytest.mark.asyncio
+    async def test_metadata_search_returns_records(self, session_factory, service_cls):
+        async with session_factory() as db:
+            service = service_cls(db, retrieval_min_importance="high", lexical_index=MemoryLexicalIndex())
+            memories = await service.retrieve_memories(user_id=1, limit=5)
+        assert [m.event_summary for m in memories] == ["生日是3月5日", "旧模型的记忆"]
@@ -7,7 +7,8 @@ from unittest.mock import Mock, AsyncMock
 import json
 
 from src.agents.orchestrator import (
-    AgentOrchestrator, OrchestratorResult, IntentType, IntentSource
+    AgentOrchestrator, OrchestratorResult, IntentType, IntentSource,
+    PROMPT_LAYOUT_STATIC_FIRST
 )
 from src.agents import Message, ChatContext, BaseAgent
 
@@ -225,3 +226,42 @@ class TestOrchestratorMessageStructure:
         assert messages[2]["role"] == "assistant"
         assert messages[3]["role"] == "assistant"  # "bot"应该被识别为assistant
         assert messages[4]["role"] == "assistant"  # "agent"应该被识别为assistant
+
+
+class TestStaticFirstPromptLayout:
+    """测试静态优先的 System Prompt 布局"""
+
+    @staticmethod
+    def _context(user, turn):
+        return ChatContext(
+            chat_id=user,
+            system_prompt=f"人设 记忆{user} 历史{turn}",
+            prompt_sections={
+                "static": "你是团团",
+                "semi_static": f"【历史重要记忆】用户{user}喜欢猫",
+                "dynamic": f"【近期对话记录】第{turn}轮",
+            },
+        )
+
+    def test_static_sections_come_first(self):
+        orchestrator = AgentOrchestrator([], prompt_layout=PROMPT_LAYOUT_STATIC_FIRST)
+        prompt = orchestrator.assemble_system_prompt(self._context("u1", 1))
+
+        positions = [prompt.index(text) for text in (
+            "你是团团", "📋 任务指令", "【任务 4：记忆分析】", "用户u1喜欢猫", "第1轮", "【当前时间】", "【再次强调】"
+        )]
+        assert positions == sorted(positions)
+
+    def test_requests_share_static_prefix(self):
+        orchestrator = AgentOrchestrator([], prompt_layout=PROMPT_LAYOUT_STATIC_FIRST)
+        a = orchestrator.assemble_system_prompt(self._context("u1", 1))
+        b = orchestrator.assemble_system_prompt(self._context("u2", 2))
+        shared = 0
+        while a[shared] == b[shared]:
+            shared += 1
+        # 人设与全部任务指令都在公共前缀内
+        assert "【任务 4：记忆分析】" in a[:shared]
+
+        # 未提供分段时回退到 legacy 布局
+        legacy = orchestrator.assemble_system_prompt(ChatContext(chat_id="u1", system_prompt="人设"))
+        assert legacy.index("人设") < legacy.index("📋 任务指令")
@@ -172,6 +172,64 @@ class TestSkillRegistry:
         assert matches[0].category == SkillCategory.TECH
 
 
+class TestSkillKeywordIndex:
+    """Test the compiled keyword index behind match_skills"""
+    
+    @staticmethod
+    def _legacy_match(registry, text, top_n=3):
+        """逐个 keyword in text 的参考实现"""
+        text_lower = text.lower()
+        matches = []
+        for skill in registry._skills.values():
+            if not skill.is_active:
+                continue
+            score = sum(1 for keyword in skill.keywords if keyword.lower() in text_lower)
+            if score > 0:
+                matches.append((skill, score))
+        matches.sort(key=lambda x: (-x[1], -x[0].priority))
+        return matches[:top_n]
+    
+    def _registry(self):
+        registry = SkillRegistry()
+        registry.register(Skill(id="emotion", name="情感", description="", keywords=["难过", "心情", "sad"]))
+        registry.register(Skill(id="code", name="代码", description="", keywords=["Python", "代码", "bug"], priority=1))
+        registry.register(Skill(id="py", name="Py", description="", keywords=["python", "py", "thon"]))
+        registry.register(Skill(id="off", name="Off", description="", keywords=["代码"], is_active=False))
+        return registry
+    
+    @pytest.mark.parametrize("text", [
+        "我今天很难过，心情不好",
+        "帮我看看这个PYTHON代码的bug",
+        "pythonic python",
+        "sad sad sad",
+        "天气不错",
+        "",
+    ])
+    def test_matches_legacy_loop(self, text):
+        registry = self._registry()
+        assert registry.match_skills_scored(text, top_n=10) == self._legacy_match(registry, text, top_n=10)
+    
+    def test_scores_and_overlapping_keywords(self):
+        registry = self._registry()
+        scored = registry.match_skills_scored("帮我看看这个Python代码")
+        assert [(skill.id, score) for skill, score in scored] == [("py", 3), ("code", 2)]
+    
+    def test_index_rebuilt_on_register_and_unregister(self):
+        registry = self._registry()
+        assert registry.match_skills("画一幅画") == []
+        
+        registry.register(Skill(id="draw", name="画画", description="", keywords=["画"]))
+        assert [s.id for s in registry.match_skills("画一幅画")] == ["draw"]
+        
+        registry.unregister("draw")
+        assert registry.match_skills("画一幅画") == []
+    
+    def test_inactive_skills_checked_at_match_time(self):
+        registry = self._registry()
+        registry.get("off").is_active = True
+        assert "off" in [s.id for s in registry.match_skills("代码", top_n=10)]
+
+
 class TestSkillButtonGenerator:
     """Test SkillButtonGenerator class"""
     
@@ -332,6 +390,38 @@ class TestOrchestratorAsync:
         
         assert len(responses) == 1
         assert responses[0].agent_name == "Agent1"
+
+    async def test_execute_agents_concurrently_with_timeout(self):
+        """Selected agents run concurrently; slow or failing agents are skipped"""
+        import asyncio
+        import time
+
+        class AsyncAgent(MockAgent):
+            def __init__(self, name, delay, error=None):
+                super().__init__(name, 0.8)
+                self.delay = delay
+                self.error = error
+
+            async def respond_async(self, message, context):
+                await asyncio.sleep(self.delay)
+                if self.error:
+                    raise self.error
+                return self.respond(message, context)
+
+        agents = [
+            AsyncAgent("A", 0.1), AsyncAgent("B", 0.1),
+            AsyncAgent("Slow", 10), AsyncAgent("Broken", 0, RuntimeError("boom")),
+        ]
+        orchestrator = AgentOrchestrator(agents, llm_provider=None, agent_timeout=0.3)
+
+        message = Message(content="test", user_id="123", chat_id="456")
+        started = time.monotonic()
+        responses = await orchestrator.execute_agents(
+            message, ChatContext(chat_id="456"), ["Slow", "B", "Broken", "A"]
+        )
+
+        assert time.monotonic() - started < 1.0
+        assert [r.agent_name for r in responses] == ["B", "A"]
     
     async def test_synthesize_response_single(self):
         """Test synthesizing single response"""
@@ -0,0 +1,102 @@
+"""
+Tests for prompt_cache 预编译提示词缓存
+
+测试系统提示词按配置版本缓存、配置变化后重新渲染，以及编排器任务指令的预编译
+"""
+import importlib.util
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+from src.agents.orchestrator import AgentOrchestrator
+from src.conversation.prompt_cache import PromptCache
+from src.conversation.prompt_template import PromptTemplate, get_template_manager
+
+# 直接加载 config_loader，避免 src.bot.__init__ 引入 telegram handlers
+_config_loader_path = Path(__file__).parent.parent / "src" / "bot" / "config_loader.py"
+_spec = importlib.util.spec_from_file_location("config_loader", _config_loader_path)
+config_loader_module = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(config_loader_module)
+
+BotConfig = config_loader_module.BotConfig
+PersonalityConfig = config_loader_module.PersonalityConfig
+PromptConfig = config_loader_module.PromptConfig
+
+
+def _config(name="小美", traits=None):
+    return BotConfig(personality=PersonalityConfig(name=name, traits=traits or ["温柔"]))
+
+
+class TestPromptCache:
+    """测试 PromptCache"""
+
+    def test_lru_and_stats(self):
+        cache = PromptCache(max_entries=2)
+        calls = []
+
+        def build(value):
+            def _build():
+                calls.append(value)
+                return value
+            return _build
+
+        assert cache.get("a", build("A")) == "A"
+        assert cache.get("a", build("X")) == "A"
+        cache.get("b", build("B"))
+        cache.get("c", build("C"))  # 淘汰 a
+        assert cache.get("a", build("A2")) == "A2"
+
+        assert calls == ["A", "B", "C", "A2"]
+        stats = cache.get_stats()
+        assert (stats["entries"], stats["hits"], stats["misses"]) == (2, 1, 4)
+
+
+class TestCompiledSystemPrompt:
+    """测试 BotConfig.get_system_prompt 的预编译缓存"""
+
+    def test_renders_once_per_config_version(self):
+        cache = PromptCache()
+        config = _config()
+        with patch("src.conversation.prompt_cache._prompt_cache", cache), \
+                patch.object(BotConfig, "_build_personality_prompt", autospec=True,
+                             side_effect=BotConfig._build_personality_prompt) as build:
+            first = config.get_system_prompt()
+            assert config.get_system_prompt() == first
+            # 内容相同的新配置对象（如重新加载未修改的 YAML）共享缓存
+            assert _config().get_system_prompt() == first
+            assert build.call_count == 1
+
+            # 重新加载后内容变化 → 新版本
+            changed = _config(traits=["毒舌"])
+            assert "毒舌" in changed.get_system_prompt()
+            assert build.call_count == 2
+
+            # 原地修改需显式失效
+            config.personality.traits = ["冷静"]
+            config.invalidate_prompt()
+            assert "冷静" in config.get_system_prompt()
+
+    def test_template_prompt_refreshes_when_template_replaced(self):
+        cache = PromptCache()
+        manager = get_template_manager()
+        config = BotConfig(prompt=PromptConfig(template="cache_test"), personality=PersonalityConfig(name="阿星"))
+        with patch("src.conversation.prompt_cache._prompt_cache", cache):
+            manager.register_template(PromptTemplate(name="cache_test", content="我是{{bot_name}}"))
+            assert config.get_system_prompt() == "我是阿星"
+            manager.register_template(PromptTemplate(name="cache_test", content="你好，{{bot_name}}"))
+            assert config.get_system_prompt() == "你好，阿星"
+            manager.delete_template("cache_test")
+
+
+class TestOrchestratorCompiledPrompt:
+    """测试编排器任务指令预编译后与逐次 format 结果一致"""
+
+    def test_fragments_match_full_render(self):
+        orchestrator = AgentOrchestrator([])
+        now = datetime.now().strftime("%Y年%m月%d日 %H:%M")
+        expected = AgentOrchestrator.UNIFIED_PROMPT_TEMPLATE.format(
+            agent_capabilities=orchestrator._get_capabilities_prompt(),
+            current_time=now,
+        )
+        assert orchestrator._task_prompt_head.endswith(expected.split(now)[0])
+        assert orchestrator._task_prompt_tail == expected.split(now, 1)[1]
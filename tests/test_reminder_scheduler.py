@@ -0,0 +1,135 @@
+"""
+Tests for reminder_scheduler 提醒调度器
+
+测试到期时间堆、新建提醒的即时唤醒、并发发送与批量状态写回
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from telegram.error import TelegramError
+
+from src.models.database import Base, Reminder, ReminderStatus
+from src.services.reminder_scheduler import ReminderScheduler, _RateLimiter
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def factory():
+        async with maker() as session:
+            yield session
+
+    yield factory
+    await engine.dispose()
+
+
+async def _add_reminder(factory, remind_at, bot_id=1, chat_id=100, text="喝水"):
+    async with factory() as db:
+        reminder = Reminder(
+            user_id=1, bot_id=bot_id, telegram_user_id=chat_id, chat_id=chat_id,
+            reminder_text=text, remind_at=remind_at, status=ReminderStatus.PENDING.value,
+        )
+        db.add(reminder)
+        await db.commit()
+        return reminder.id, reminder.remind_at
+
+
+async def _reminders(factory):
+    async with factory() as db:
+        result = await db.execute(select(Reminder).order_by(Reminder.id))
+        return {r.id: r for r in result.scalars()}
+
+
+def _bot():
+    bot = MagicMock()
+    bot.send_message = AsyncMock()
+    return bot
+
+
+async def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+class TestReminderScheduler:
+    """测试 ReminderScheduler"""
+
+    @pytest.mark.asyncio
+    async def test_due_reminders_sent_and_written_back_in_bulk(self, session_factory):
+        now = datetime.utcnow()
+        ok_id, _ = await _add_reminder(session_factory, now - timedelta(minutes=5), bot_id=1)
+        failing_id, _ = await _add_reminder(session_factory, now - timedelta(minutes=1), bot_id=2, chat_id=200)
+        future_id, _ = await _add_reminder(session_factory, now + timedelta(hours=2), bot_id=1)
+
+        ok_bot, failing_bot = _bot(), _bot()
+        failing_bot.send_message.side_effect = TelegramError("chat not found")
+        scheduler = ReminderScheduler(check_interval=3600, session_factory=session_factory)
+        scheduler.register_bot(1, ok_bot)
+        scheduler.register_bot(2, failing_bot)
+
+        await scheduler.start()
+        try:
+            await _wait_for(lambda: scheduler.get_stats()["batches"] == 1)
+        finally:
+            await scheduler.stop()
+
+        ok_bot.send_message.assert_awaited_once()
+        reminders = await _reminders(session_factory)
+        assert reminders[ok_id].status == ReminderStatus.SENT.value
+        assert reminders[ok_id].sent_at is not None
+        assert reminders[failing_id].status == ReminderStatus.FAILED.value
+        assert reminders[failing_id].error_message == "chat not found"
+        assert reminders[failing_id].retry_count == 1
+        assert reminders[future_id].status == ReminderStatus.PENDING.value
+
+    @pytest.mark.asyncio
+    async def test_new_reminder_wakes_scheduler_at_due_time(self, session_factory):
+        bot = _bot()
+        scheduler = ReminderScheduler(check_interval=3600, session_factory=session_factory)
+        scheduler.register_bot(1, bot)
+
+        await scheduler.start()
+        try:
+            await _wait_for(lambda: scheduler.get_stats()["loads"] == 1)
+            reminder_id, remind_at = await _add_reminder(
+                session_factory, datetime.utcnow() + timedelta(milliseconds=200)
+            )
+            scheduler.schedule(reminder_id, remind_at)
+            assert scheduler.get_stats()["queued"] == 1
+
+            await _wait_for(lambda: bot.send_message.await_count == 1)
+            sent_at = datetime.utcnow()
+        finally:
+            await scheduler.stop()
+
+        # 精确睡眠到到期时间，而不是等待下一次轮询
+        assert remind_at <= sent_at < remind_at + timedelta(seconds=1)
+        assert scheduler.get_stats()["loads"] == 1
+
+
+class TestRateLimiter:
+    """测试每个 Bot 的发送速率限制"""
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_spaces_sends(self):
+        limiter = _RateLimiter(rate=50, burst=2)
+        started = time.monotonic()
+        for _ in range(6):
+            await limiter.acquire()
+        # 前 2 次使用桶内令牌，其余 4 次每次约 20ms
+        assert time.monotonic() - started >= 0.07
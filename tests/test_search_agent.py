@@ -253,6 +253,8 @@ class TestSerpSearchCache:
         with patch('src.services.serp_api_service.settings') as mock:
             mock.redis_url = None
             mock.serp_cache_ttl = 3600
+            mock.serp_cache_stale_ttl = 3600
+            mock.serp_memory_cache_size = 512
             mock.serp_api_provider = "mock"
             yield mock
     
@@ -300,6 +302,62 @@ class TestSerpSearchCache:
         cleared = cache.clear()
         assert cache.get("query1") is None
         assert cache.get("query2") is None
+    
+    def test_normalized_keys(self, mock_settings):
+        """Test equivalent queries share one cache entry."""
+        from src.services.serp_api_service import SerpSearchCache, normalize_query
+        
+        assert normalize_query("  梅西   最近動態？ ") == "梅西 最近动态"
+        assert normalize_query("Messi  NEWS") == normalize_query("messi news")
+        
+        cache = SerpSearchCache()
+        cache.set("梅西 最近动态", {"data": 1})
+        assert cache.get("梅西  最近動態?") == {"data": 1}
+    
+    def test_memory_tier_lru_and_stale(self, mock_settings):
+        """Test the in-process tier evicts LRU entries and reports stale hits."""
+        from src.services.serp_api_service import SerpSearchCache
+        
+        cache = SerpSearchCache(ttl=10, stale_ttl=10, max_entries=2)
+        cache.set("a", {"data": "a"})
+        cache.set("b", {"data": "b"})
+        cache.get("a")
+        cache.set("c", {"data": "c"})
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        
+        key = cache._generate_cache_key("a")
+        cache._memory[key]["cached_at"] -= 15
+        assert cache.lookup("a") == ({"data": "a"}, True)
+        assert cache.get("a") is None  # 陈旧结果不通过 get 返回
+        cache._memory[key]["cached_at"] -= 10
+        assert cache.lookup("a") == (None, False)
+    
+    def test_redis_tier_backfills_memory(self, mock_settings):
+        """Test a Redis hit populates the memory tier and per-tier hit ratios."""
+        from src.services.serp_api_service import SerpSearchCache
+        
+        store = {}
+        fake_redis = MagicMock()
+        fake_redis.get.side_effect = store.get
+        fake_redis.setex.side_effect = lambda key, ttl, value: store.__setitem__(key, value)
+        
+        writer = SerpSearchCache()
+        writer._redis = fake_redis
+        writer.set("shared query", {"data": 1})
+        
+        reader = SerpSearchCache()
+        reader._redis = fake_redis
+        assert reader.get("shared query") == {"data": 1}
+        assert reader.get("shared query") == {"data": 1}
+        assert reader.get("other query") is None
+        assert fake_redis.get.call_count == 2
+        
+        health = reader.health_check()
+        assert health["lookups"] == 3
+        assert health["memory"]["hits"] == 1
+        assert health["redis"]["hits"] == 1
+        assert health["redis"]["hit_ratio"] == 0.5
 
 
 class TestSerpApiService:
@@ -312,6 +370,8 @@ class TestSerpApiService:
             mock.serp_api_keys = "test_key"
             mock.redis_url = None
             mock.serp_cache_ttl = 3600
+            mock.serp_cache_stale_ttl = 3600
+            mock.serp_memory_cache_size = 512
             mock.serp_top_k = 5
             mock.serp_api_provider = "mock"
             yield mock
@@ -364,6 +424,53 @@ class TestSerpApiService:
         assert "provider" in status
         assert "top_k" in status
     
+    def test_stale_result_served_and_refreshed(self, mock_settings):
+        """Test stale-while-revalidate: stale result returns immediately, refresh runs in background."""
+        import time
+        from src.services.serp_api_service import SerpApiService
+        
+        service = SerpApiService()
+        service.search("stale query")
+        key = service.cache._generate_cache_key("stale query")
+        service.cache._memory[key]["cached_at"] -= 3600 + 1
+        
+        refreshed = {"success": True, "snippets": [], "provider": "fresh"}
+        with patch.object(service, "_execute_search", return_value=refreshed) as upstream:
+            result = service.search("stale query")
+            assert result["provider"] == "mock"
+            for _ in range(100):
+                if service.cache.get("stale query"):
+                    break
+                time.sleep(0.01)
+        
+        assert upstream.call_count == 1
+        assert service.cache.get("stale query")["provider"] == "fresh"
+        assert service.health_check()["cache"]["stale_hits"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_queries_single_flight(self, mock_settings):
+        """Test concurrent identical async searches make one upstream call."""
+        import asyncio
+        from src.services.serp_api_service import SerpApiService
+        
+        service = SerpApiService()
+        calls = []
+        
+        async def slow_search(query, api_key, top_k):
+            calls.append(query)
+            await asyncio.sleep(0.05)
+            return {"success": True, "query": query, "snippets": []}
+        
+        with patch.object(service, "_execute_search_async", side_effect=slow_search):
+            results = await asyncio.gather(*[
+                service.search_async("Hot  Topic") for _ in range(3)
+            ], service.search_async("hot topic"))
+            again = await service.search_async("HOT TOPIC")
+        
+        assert len(calls) == 1
+        assert all(r["success"] for r in results)
+        assert again is results[0]
+    
     @patch('src.services.serp_api_service.requests.get')
     def test_fetch_and_clean_webpage(self, mock_get, mock_settings):
         """Test webpage fetching and cleaning."""
@@ -393,6 +500,84 @@ class TestSerpApiService:
         assert "<style>" not in content
 
 
+    def test_clean_html_incremental(self, mock_settings):
+        """Test the single-pass extractor handles chunked input, entities and truncation."""
+        from src.services.serp_api_service import HtmlTextExtractor, clean_html
+        
+        html = "<p>Hello&nbsp;<b>wor</b>ld &amp; you</p><script>x()</script><div>More   text</div>"
+        assert clean_html(html) == "Hello world & you More text"
+        
+        extractor = HtmlTextExtractor(max_length=10)
+        for chunk in ["<p>abc de", "f ghi</p>", "<p>jkl mno</p>"]:
+            extractor.feed(chunk)
+        assert extractor.done is True
+        assert extractor.text() == "abc def gh..."
+    
+    @pytest.mark.asyncio
+    async def test_fetch_webpage_async_streams_with_byte_cap(self, mock_settings):
+        """Test async fetching stops reading at the byte cap."""
+        from aiohttp import web
+        from aiohttp.test_utils import TestServer
+        from src.services.serp_api_service import SerpApiService
+        
+        async def page(request):
+            response = web.StreamResponse(headers={"Content-Type": "text/html; charset=utf-8"})
+            await response.prepare(request)
+            await response.write(b"<html><body><p>first paragraph</p>")
+            for _ in range(50):
+                await response.write(b"<p>" + b"x" * 16384 + b"</p>")
+            await response.write(b"</body></html>")
+            return response
+        
+        mock_settings.serp_fetch_max_connections = 10
+        mock_settings.serp_fetch_per_host_limit = 2
+        mock_settings.serp_fetch_timeout = 10
+        
+        app = web.Application()
+        app.router.add_get("/page", page)
+        server = TestServer(app)
+        await server.start_server()
+        service = SerpApiService()
+        try:
+            content = await service.fetch_and_clean_webpage_async(
+                str(server.make_url("/page")), max_length=100000, max_bytes=40000
+            )
+        finally:
+            await service.close()
+            await server.close()
+        
+        assert content.startswith("first paragraph")
+        assert len(content) < 50 * 16384
+    
+    @pytest.mark.asyncio
+    async def test_search_with_content_async_concurrent_with_deadline(self, mock_settings):
+        """Test result pages are fetched concurrently and slow pages are dropped at the deadline."""
+        import asyncio
+        from src.services.serp_api_service import SerpApiService
+        
+        service = SerpApiService()
+        
+        async def fake_fetch(url, max_length=2000, max_bytes=None):
+            if url.endswith("/2"):
+                await asyncio.sleep(5)
+            await asyncio.sleep(0.05)
+            return f"content of {url}"
+        
+        loop = asyncio.get_running_loop()
+        with patch.object(service, "fetch_and_clean_webpage_async", side_effect=fake_fetch):
+            started = loop.time()
+            result = await service.search_with_content_async("query", fetch_content=True, deadline=0.5)
+            elapsed = loop.time() - started
+        
+        snippets = result["snippets"]
+        assert elapsed < 1
+        assert snippets[0]["full_content"] == "content of https://example.com/result/1"
+        assert "full_content" not in snippets[1]
+        assert snippets[2]["full_content"] == "content of https://example.com/result/3"
+        # 缓存中的结果不被修改
+        assert "full_content" not in service.cache.get("query")["snippets"][0]
+
+
 class TestSkillRegistryWithSearchAgent:
     """Tests for SkillRegistry with SearchAgent skill."""
     
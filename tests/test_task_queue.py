@@ -0,0 +1,213 @@
+"""
+Tests for TaskQueue
+
+测试后台任务队列：入队、执行、每用户并发上限、取消、进度推送与重启恢复
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.services.task_queue import QueuedTaskStatus, TaskQueue
+
+
+def _make_bot():
+    bot = MagicMock()
+    bot.send_message = AsyncMock(return_value=MagicMock(message_id=42))
+    bot.edit_message_text = AsyncMock()
+    return bot
+
+
+async def _wait_for_status(queue: TaskQueue, task_id: str, status: QueuedTaskStatus, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        task = queue.get(task_id)
+        if task and task.status == status:
+            return task
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"task {task_id} did not reach {status}: {queue.get(task_id)}")
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "task_queue.db")
+
+
+class TestTaskQueue:
+    """测试 TaskQueue"""
+
+    @pytest.mark.asyncio
+    async def test_submit_runs_and_delivers_result(self, db_path):
+        runner = AsyncMock(return_value="播放成功")
+        queue = TaskQueue(db_path=db_path, workers=1, runner=runner, poll_interval=0.05)
+        bot = _make_bot()
+        queue.register_bot(1, bot)
+        await queue.start()
+        try:
+            task_id = queue.submit(user_id="u1", chat_id="100", user_input="播放音乐", bot_id=1)
+            task = await _wait_for_status(queue, task_id, QueuedTaskStatus.SUCCEEDED)
+        finally:
+            await queue.stop()
+            queue.close()
+
+        assert task.result == "播放成功"
+        runner.assert_awaited_once_with("播放音乐")
+        bot.send_message.assert_awaited_with(chat_id="100", text="播放成功")
+
+    @pytest.mark.asyncio
+    async def test_result_not_delivered_through_another_bot(self, db_path):
+        async def runner(text):
+            from task_engine.progress import report_progress
+            await report_progress("第 1/1 轮")
+            return "播放成功"
+
+        queue = TaskQueue(db_path=db_path, workers=1, runner=runner, poll_interval=0.05, progress_interval=0)
+        other_bot = _make_bot()
+        queue.register_bot(2, other_bot)
+        await queue.start()
+        try:
+            task_id = queue.submit(user_id="u1", chat_id="100", user_input="播放音乐", bot_id=1)
+            task = await _wait_for_status(queue, task_id, QueuedTaskStatus.SUCCEEDED)
+        finally:
+            await queue.stop()
+            queue.close()
+
+        # 提交任务的 Bot 未注册：不改用其他 Bot，结果保留供 /tasks 查看
+        other_bot.send_message.assert_not_awaited()
+        assert task.result == "播放成功"
+
+    @pytest.mark.asyncio
+    async def test_per_user_limit(self, db_path):
+        release = asyncio.Event()
+        started = []
+
+        async def runner(text):
+            started.append(text)
+            await release.wait()
+            return text
+
+        queue = TaskQueue(db_path=db_path, workers=3, per_user_limit=1, runner=runner, poll_interval=0.05)
+        await queue.start()
+        try:
+            first = queue.submit("u1", "100", "a")
+            second = queue.submit("u1", "100", "b")
+            other = queue.submit("u2", "200", "c")
+            await _wait_for_status(queue, first, QueuedTaskStatus.RUNNING)
+            await _wait_for_status(queue, other, QueuedTaskStatus.RUNNING)
+            await asyncio.sleep(0.1)
+            assert queue.get(second).status == QueuedTaskStatus.QUEUED
+            assert sorted(started) == ["a", "c"]
+
+            release.set()
+            await _wait_for_status(queue, second, QueuedTaskStatus.SUCCEEDED)
+        finally:
+            await queue.stop()
+            queue.close()
+
+    @pytest.mark.asyncio
+    async def test_cancel_running_task(self, db_path):
+        async def runner(text):
+            await asyncio.sleep(10)
+            return text
+
+        queue = TaskQueue(db_path=db_path, workers=1, runner=runner, poll_interval=0.05)
+        await queue.start()
+        try:
+            task_id = queue.submit("u1", "100", "long task")
+            await _wait_for_status(queue, task_id, QueuedTaskStatus.RUNNING)
+            assert queue.cancel(task_id, user_id="other") is False
+            assert queue.cancel(task_id, user_id="u1") is True
+            await asyncio.sleep(0.05)
+            assert queue.get(task_id).status == QueuedTaskStatus.CANCELLED
+            assert task_id not in queue._jobs
+        finally:
+            await queue.stop()
+            queue.close()
+
+    def test_cancel_queued_task_without_workers(self, db_path):
+        queue = TaskQueue(db_path=db_path)
+        task_id = queue.submit("u1", "100", "x")
+        assert queue.cancel(task_id) is True
+        assert queue.cancel(task_id) is False
+        assert queue.list_user_tasks("u1") == []
+        queue.close()
+
+    @pytest.mark.asyncio
+    async def test_progress_edits_single_message(self, db_path):
+        from task_engine.progress import report_progress
+
+        async def runner(text):
+            await report_progress("第 1/3 轮")
+            await report_progress("第 2/3 轮")
+            return "done"
+
+        queue = TaskQueue(db_path=db_path, workers=1, runner=runner, poll_interval=0.05, progress_interval=0)
+        bot = _make_bot()
+        queue.register_bot(1, bot)
+        await queue.start()
+        try:
+            task_id = queue.submit("u1", "100", "x", bot_id=1)
+            await _wait_for_status(queue, task_id, QueuedTaskStatus.SUCCEEDED)
+        finally:
+            await queue.stop()
+            queue.close()
+
+        assert "第 1/3 轮" in bot.send_message.await_args_list[0].kwargs["text"]
+        bot.edit_message_text.assert_awaited_once()
+        assert bot.edit_message_text.await_args.kwargs["message_id"] == 42
+
+    @pytest.mark.asyncio
+    async def test_running_tasks_requeued_on_restart(self, db_path):
+        queue = TaskQueue(db_path=db_path)
+        task_id = queue.submit("u1", "100", "x")
+        queue._execute("UPDATE task_queue SET status = 'running' WHERE task_id = ?", (task_id,))
+        queue.close()
+
+        runner = AsyncMock(return_value="ok")
+        restarted = TaskQueue(db_path=db_path, workers=1, runner=runner, poll_interval=0.05)
+        await restarted.start()
+        try:
+            await _wait_for_status(restarted, task_id, QueuedTaskStatus.SUCCEEDED)
+        finally:
+            await restarted.stop()
+            restarted.close()
+        runner.assert_awaited_once_with("x")
+
+
+class TestTaskEngineAgentQueueing:
+    """测试 TaskEngineAgent 在队列启用时立即返回任务 ID"""
+
+    def test_respond_submits_to_queue(self):
+        from unittest.mock import patch
+        from src.agents.models import ChatContext, Message
+        from src.agents.plugins.task_engine_agent import TaskEngineAgent
+
+        queue = MagicMock()
+        queue.submit.return_value = "abc123"
+        agent = TaskEngineAgent()
+        msg = Message(content="打开网页播放音乐", user_id="u1", chat_id="100", metadata={"bot_id": 7})
+        with patch("src.agents.plugins.task_engine_agent.get_running_task_queue", return_value=queue):
+            response = agent.respond(msg, ChatContext(chat_id="100"))
+
+        queue.submit.assert_called_once_with(
+            user_id="u1", chat_id="100", user_input="打开网页播放音乐", bot_id=7
+        )
+        assert "abc123" in response.content
+        assert response.metadata["task_id"] == "abc123"
+
+    @pytest.mark.asyncio
+    async def test_respond_async_awaits_engine_without_queue(self):
+        from unittest.mock import patch
+        from src.agents.models import ChatContext, Message
+        from src.agents.plugins.task_engine_agent import TaskEngineAgent
+
+        agent = TaskEngineAgent()
+        agent._engine = MagicMock()
+        agent._engine.run = AsyncMock(return_value="已打开网页")
+        msg = Message(content="打开网页", user_id="u1", chat_id="100")
+        with patch("src.agents.plugins.task_engine_agent.get_running_task_queue", return_value=None):
+            response = await agent.respond_async(msg, ChatContext(chat_id="100"))
+
+        agent._engine.run.assert_awaited_once_with("打开网页")
+        assert response.content == "已打开网页"
+        assert response.should_continue is False
@@ -0,0 +1,74 @@
+"""
+Tests for 单次扫描的时间表达解析
+
+测试 ReminderParser 的组合模式与预过滤、DateParser 的单次扫描词法器
+"""
+import re
+from datetime import datetime
+
+import pytest
+
+from src.services.reminder_service import ReminderParser
+
+
+def _sequential_parse(parser: ReminderParser, message: str):
+    """逐个模式 re.search 的参考实现"""
+    message = message.strip()
+    for pattern in parser.REMINDER_PATTERNS:
+        match = re.search(pattern, message, re.IGNORECASE)
+        if match:
+            result = parser._build_result(match.group(1), match.group(2), match.group(3))
+            if result:
+                return result
+    return None
+
+
+class TestReminderParserSinglePass:
+    """测试 ReminderParser 单次扫描"""
+
+    @pytest.mark.parametrize("message", [
+        "1小时后提醒我开会",
+        "提醒我30分钟后给妈妈打电话",
+        "过了十五分钟提醒我关火",
+        "REMIND ME in 2 HOURS to stretch",
+        "in 1 hour remind me to call John",
+        # 多个表达时仍按模式优先级而非出现位置
+        "提醒我5分钟后喝水，10分钟后提醒我吃药",
+        # 优先级最高的模式数量无效时回退到后续模式
+        "半半小时后提醒我休息，提醒我3分钟后吃饭",
+        "5分钟后提醒我。",
+        "今天天气怎么样",
+    ])
+    def test_matches_sequential_patterns(self, message):
+        parser = ReminderParser()
+        assert parser.parse(message) == _sequential_parse(parser, message)
+
+    def test_prefilter_skips_messages_without_trigger(self):
+        parser = ReminderParser()
+        parser._COMBINED_PATTERN = None  # 若未被预过滤会抛出 AttributeError
+        assert parser.parse("30分钟后我去吃饭") is None
+        assert parser.parse("in 5 minutes I'll be there") is None
+
+
+class TestDateParserSinglePass:
+    """测试 DateParser 单次扫描词法器"""
+
+    @pytest.fixture
+    def parser(self):
+        pytest.importorskip("dateutil")
+        from src.services.conversation_memory_service import DateParser
+        return DateParser(datetime(2026, 1, 14, 15, 30))
+
+    def test_extract_expressions_ordered_by_priority(self, parser):
+        expressions = parser.extract_expressions("下周五和朋友去爬山，昨天晚上已经订好票了")
+        assert expressions == ["昨天晚上", "下周"]
+
+    def test_parse_from_message(self, parser):
+        assert parser.parse_from_message("昨天没睡好") == datetime(2026, 1, 13)
+        assert parser.parse_from_message("我生日是2024年3月5日") == datetime(2024, 3, 5)
+        assert parser.parse_from_message("月底要交报告") == datetime(2026, 1, 31)
+
+    def test_prefilter_skips_messages_without_time_words(self, parser):
+        assert parser.extract_expressions("哈哈哈你说得对") == []
+        assert parser.parse_from_message("哈哈哈你说得对") is None
+        assert parser.parse("好的") is None
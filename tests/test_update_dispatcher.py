@@ -0,0 +1,154 @@
+"""
+Tests for update_dispatcher 更新分发与管线并发控制
+
+测试同一聊天内保序、不同聊天并发，管线的全局 / 每 Bot 上限与忙碌提示
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from telegram import Update
+
+from src.services.update_dispatcher import (
+    BUSY_REPLY,
+    ChatOrderedUpdateProcessor,
+    PipelineBusy,
+    PipelineLimiter,
+    limit_pipeline,
+)
+
+
+def _update(update_id, chat_id):
+    return Update.de_json({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 1700000000,
+            "chat": {"id": chat_id, "type": "private"},
+            "text": f"msg {update_id}",
+        },
+    }, None)
+
+
+class TestChatOrderedUpdateProcessor:
+    """测试按聊天保序的 update processor"""
+
+    @pytest.mark.asyncio
+    async def test_same_chat_serial_other_chats_concurrent(self):
+        processor = ChatOrderedUpdateProcessor(max_concurrent_updates=16, name="bot")
+        await processor.initialize()
+        events = []
+
+        async def handle(label, delay):
+            events.append(("start", label))
+            await asyncio.sleep(delay)
+            events.append(("end", label))
+
+        await asyncio.gather(
+            processor.process_update(_update(1, 100), handle("a1", 0.05)),
+            processor.process_update(_update(2, 100), handle("a2", 0.01)),
+            processor.process_update(_update(3, 200), handle("b1", 0.01)),
+        )
+
+        # 同一聊天：a2 在 a1 完成后才开始
+        assert events.index(("end", "a1")) < events.index(("start", "a2"))
+        # 不同聊天：b1 不等待 a1
+        assert events.index(("end", "b1")) < events.index(("end", "a1"))
+
+        stats = processor.get_stats()
+        assert stats["processed"] == 3
+        assert stats["queued"] == 0
+        assert stats["active_chats"] == 0
+        assert stats["wait"]["count"] == 3
+        await processor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_queued_updates_do_not_hold_global_slots(self):
+        processor = ChatOrderedUpdateProcessor(max_concurrent_updates=2, name="bot")
+        await processor.initialize()
+        release = asyncio.Event()
+        other_chat_done = asyncio.Event()
+
+        async def busy():
+            await release.wait()
+
+        async def other():
+            other_chat_done.set()
+
+        # 聊天 100 积压 3 条更新，只有正在处理的 1 条占用全局名额
+        busy_tasks = [
+            asyncio.create_task(processor.process_update(_update(i, 100), busy())) for i in range(3)
+        ]
+        await asyncio.sleep(0)
+        assert processor.current_concurrent_updates == 1
+        assert processor.get_stats()["queued"] == 2
+
+        other_task = asyncio.create_task(processor.process_update(_update(9, 200), other()))
+        await asyncio.wait_for(other_chat_done.wait(), timeout=1)
+
+        release.set()
+        await asyncio.gather(other_task, *busy_tasks)
+        assert processor.get_stats()["processed"] == 4
+        await processor.shutdown()
+
+
+class TestPipelineLimiter:
+    """测试 LLM 管线并发限制"""
+
+    @pytest.mark.asyncio
+    async def test_per_bot_cap_queue_and_shed(self):
+        limiter = PipelineLimiter(max_pipelines=4, max_per_bot=1, max_waiting=1, queue_timeout=0.1)
+        release = asyncio.Event()
+
+        async def hold(bot_id):
+            async with limiter.slot(bot_id):
+                await release.wait()
+
+        holder = asyncio.create_task(hold(1))
+        other_bot = asyncio.create_task(hold(2))
+        await asyncio.sleep(0)
+
+        waiter = asyncio.create_task(hold(1))   # 排队等待 bot 1 的名额
+        await asyncio.sleep(0)
+        with pytest.raises(PipelineBusy):          # 排队已满，直接拒绝
+            async with limiter.slot(1):
+                pass
+        with pytest.raises(PipelineBusy):          # 等待超时
+            await waiter
+
+        stats = limiter.get_stats()
+        assert stats["in_flight"] == 2
+        assert stats["in_flight_per_bot"] == {"1": 1, "2": 1}
+        assert stats["shed"] == 1
+        assert stats["timed_out"] == 1
+
+        release.set()
+        await asyncio.gather(holder, other_bot)
+        stats = limiter.get_stats()
+        assert stats["in_flight"] == 0
+        assert stats["completed"] == 2
+
+    @pytest.mark.asyncio
+    async def test_global_cap(self):
+        limiter = PipelineLimiter(max_pipelines=1, max_per_bot=5, max_waiting=5, queue_timeout=0.05)
+        async with limiter.slot(1):
+            with pytest.raises(PipelineBusy):
+                async with limiter.slot(2):
+                    pass
+
+    @pytest.mark.asyncio
+    async def test_limit_pipeline_replies_busy(self, monkeypatch):
+        import src.services.update_dispatcher as dispatcher
+
+        limiter = PipelineLimiter(max_pipelines=1, max_per_bot=1, max_waiting=0)
+        monkeypatch.setattr(dispatcher, "_limiter", limiter)
+        handler = AsyncMock()
+        update = MagicMock()
+        update.effective_message.reply_text = AsyncMock()
+        context = MagicMock(bot_data={"bot_id": 7})
+
+        async with limiter.slot(7):             # 名额已被占用且不允许排队
+            await limit_pipeline(handler)(update, context)
+
+        handler.assert_not_called()
+        update.effective_message.reply_text.assert_awaited_once_with(BUSY_REPLY)
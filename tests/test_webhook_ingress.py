@@ -0,0 +1,126 @@
+"""
+Tests for webhook_ingress 多 Bot Webhook 服务
+
+测试按 Token 路径分发更新、secret token 校验，以及共享连接池的引用计数
+"""
+import pytest
+import pytest_asyncio
+from aiohttp.test_utils import TestClient, TestServer
+from telegram.ext import Application
+
+from src.services.webhook_ingress import (
+    SECRET_HEADER,
+    SharedHTTPXRequest,
+    WebhookServer,
+    token_path_key,
+    token_secret,
+)
+
+TOKEN_A = "111:aaa"
+TOKEN_B = "222:bbb"
+
+
+def _update(update_id, text="你好"):
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": 1,
+            "date": 1700000000,
+            "chat": {"id": 42, "type": "private"},
+            "from": {"id": 42, "is_bot": False, "first_name": "U"},
+            "text": text,
+        },
+    }
+
+
+@pytest_asyncio.fixture
+async def webhook():
+    server = WebhookServer(path_prefix="/telegram")
+    apps = {
+        TOKEN_A: Application.builder().token(TOKEN_A).updater(None).build(),
+        TOKEN_B: Application.builder().token(TOKEN_B).updater(None).build(),
+    }
+    for token, app in apps.items():
+        server.register(app, token, bot_username=token.split(":")[1])
+    client = TestClient(TestServer(server.app))
+    await client.start_server()
+    yield server, apps, client
+    await client.close()
+
+
+class TestWebhookServer:
+    """测试 WebhookServer"""
+
+    def test_paths_do_not_expose_token(self):
+        server = WebhookServer(path_prefix="telegram/")
+        path = server.path_for(TOKEN_A)
+        assert path == f"/telegram/{token_path_key(TOKEN_A)}"
+        assert TOKEN_A not in path
+        assert server.webhook_url("https://bot.example.com/", TOKEN_A) == "https://bot.example.com" + path
+        assert token_secret(TOKEN_A) != token_secret(TOKEN_B)
+
+    @pytest.mark.asyncio
+    async def test_dispatches_to_matching_bot_queue(self, webhook):
+        server, apps, client = webhook
+
+        resp = await client.post(
+            server.path_for(TOKEN_B),
+            json=_update(7),
+            headers={SECRET_HEADER: token_secret(TOKEN_B)},
+        )
+        assert resp.status == 200
+        assert apps[TOKEN_A].update_queue.qsize() == 0
+        update = apps[TOKEN_B].update_queue.get_nowait()
+        assert update.update_id == 7
+        assert update.message.text == "你好"
+
+        stats = server.get_stats()
+        assert stats["received"] == 1
+        assert stats["bots"]["bbb"]["received"] == 1
+
+    @pytest.mark.asyncio
+    async def test_rejects_bad_requests(self, webhook):
+        server, apps, client = webhook
+
+        wrong_secret = await client.post(
+            server.path_for(TOKEN_A), json=_update(1), headers={SECRET_HEADER: token_secret(TOKEN_B)}
+        )
+        unknown = await client.post("/telegram/unknown", json=_update(2))
+        invalid = await client.post(
+            server.path_for(TOKEN_A), data=b"not json", headers={SECRET_HEADER: token_secret(TOKEN_A)}
+        )
+        server.unregister(TOKEN_A)
+        removed = await client.post(
+            server.path_for(TOKEN_A), json=_update(3), headers={SECRET_HEADER: token_secret(TOKEN_A)}
+        )
+
+        assert (wrong_secret.status, unknown.status, invalid.status, removed.status) == (403, 404, 400, 404)
+        assert apps[TOKEN_A].update_queue.qsize() == 0
+        stats = server.get_stats()
+        assert (stats["rejected"], stats["unknown"], stats["invalid"]) == (1, 2, 1)
+
+    @pytest.mark.asyncio
+    async def test_healthz_exposes_no_stats(self, webhook):
+        server, apps, client = webhook
+
+        resp = await client.get("/healthz")
+        assert resp.status == 200
+        body = await resp.text()
+        assert body == "ok"
+        assert "bbb" not in body
+
+
+class TestSharedHTTPXRequest:
+    """测试共享连接池只在最后一个使用者关闭时关闭"""
+
+    @pytest.mark.asyncio
+    async def test_reference_counted_shutdown(self):
+        request = SharedHTTPXRequest(connection_pool_size=4)
+        await request.initialize()
+        await request.initialize()
+
+        await request.shutdown()
+        assert not request._client.is_closed
+
+        await request.shutdown()
+        assert request._client.is_closed